@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Aho-Corasick多模式匹配
+
+在一段文本中同时查找很多个词（例如所有常见典籍名和作者名）。逐个词用in查找的时间与词数成正比；
+把词编译为自动机后，只需从头到尾扫描文本一遍，时间只与文本长度（和匹配数）有关，与词数无关。
+
+加入新词后自动机在下一次查找时重新编译，所以可以随时从用户文件补充词表。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """多模式匹配自动机"""
+
+    def __init__(self, words: Iterable[str] = ()):
+        """
+        Args:
+            words: 要查找的词
+        """
+        self._words: List[str] = []
+        self._seen = set()
+        # 编译结果：状态的转移、失败链接和在该状态结束的词（含经失败链接可达的词）
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._output: List[Tuple[str, ...]] = []
+        self._compiled = False
+        self.add_words(words)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._seen
+
+    def add_words(self, words: Iterable[str]):
+        """加入新词（空词和已有的词忽略），下一次查找时重新编译"""
+        for word in words:
+            if word and word not in self._seen:
+                self._seen.add(word)
+                self._words.append(word)
+                self._compiled = False
+
+    def _compile(self):
+        """建立字典树和失败链接"""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[str]] = [[]]
+        for word in self._words:
+            state = 0
+            for char in word:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(word)
+
+        # 按层次遍历设置失败链接：指向当前前缀的最长真后缀所在的状态
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                output[next_state].extend(output[fail[next_state]])
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [tuple(words) for words in output]
+        self._compiled = True
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        依次给出文本中出现的词
+
+        Yields:
+            Tuple[int, str]: (开始位置, 词)，按结束位置排列
+        """
+        if not self._compiled:
+            self._compile()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in output[state]:
+                yield index + 1 - len(word), word
+
+    def search(self, text: str) -> bool:
+        """文本中是否出现任一个词"""
+        for _ in self.finditer(text):
+            return True
+        return False
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡片内存占用基准
+
+按真实数据的形态生成卡片（来源、标签在卡片之间重复，时间为ISO文本），
+经过JSON解析后分别以dict和Card记录保存，比较每张卡片占用的字节数，
+以及两种形式保存（序列化为JSON）、加载（解析并转换）和pickle往返的用时。
+
+用法：python benchmark_card_memory.py [卡片数量]
+"""
+
+import gc
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_record import Card, card_to_json, cards_to_json
+
+BOOKS = ["论语", "孟子", "大学", "中庸", "庄子", "荀子", "韩非子", "史记", "左传", "战国策"]
+CHAPTERS = ["学而", "为政", "八佾", "里仁", "公冶长", "雍也", "述而", "泰伯", "子罕", "乡党"]
+TAGS = ["实词", "虚词", "通假字", "古今异义", "词类活用", "成语"]
+
+
+def make_json(count: int) -> str:
+    """生成count张卡片的JSON文本"""
+    start = datetime(2025, 9, 1, 8, 0, 0, 123456)
+    cards = []
+    for i in range(count):
+        moment = (start + timedelta(minutes=i, microseconds=i)).isoformat()
+        cards.append({
+            'id': f"{i:08x}-5f3c-4a8e-9d2b-{i:012x}",
+            'keyword': f"学而时习之{i}",
+            'definition': "学习了知识然后按时复习它。",
+            'source': f"《{BOOKS[i % len(BOOKS)]}·{CHAPTERS[i // len(BOOKS) % len(CHAPTERS)]}》",
+            'quote': "子曰：学而时习之，不亦说乎？",
+            'notes': "",
+            'tags': [TAGS[i % len(TAGS)], TAGS[(i * 7) % len(TAGS)]],
+            'created_at': moment,
+            'updated_at': moment,
+        })
+    return json.dumps(cards, ensure_ascii=False)
+
+
+def measure(text: str, convert: bool) -> int:
+    """解析JSON（可选转换为Card）后保留的内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    cards = json.loads(text)
+    if convert:
+        cards = [Card(card) for card in cards]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    return size
+
+
+def best_time(func, repeat: int = 3) -> float:
+    """多次运行取最短用时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def save_json(cards) -> str:
+    """与CardManager.save_cards相同的方式序列化卡片列表"""
+    return json.dumps(cards_to_json(cards), ensure_ascii=False, indent=2, default=card_to_json)
+
+
+def main():
+    """运行基准并输出结果"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    text = make_json(count)
+    before = measure(text, convert=False)
+    after = measure(text, convert=True)
+    print(f"卡片数量: {count}")
+    print(f"dict:  {before / count:8.1f} 字节/张")
+    print(f"Card:  {after / count:8.1f} 字节/张")
+    print(f"节省:  {(1 - after / before) * 100:7.1f}%")
+
+    dicts = json.loads(text)
+    cards = [Card(card) for card in dicts]
+    print()
+    print(f"{'':10s}{'dict':>12s}{'Card':>12s}")
+    rows = [
+        ("保存JSON", lambda: save_json(dicts), lambda: save_json(cards)),
+        ("加载JSON", lambda: json.loads(text), lambda: [Card(card) for card in json.loads(text)]),
+        ("pickle往返", lambda: pickle.loads(pickle.dumps(dicts, pickle.HIGHEST_PROTOCOL)),
+         lambda: pickle.loads(pickle.dumps(cards, pickle.HIGHEST_PROTOCOL))),
+    ]
+    for label, with_dicts, with_cards in rows:
+        print(f"{label:10s}{best_time(with_dicts):9.1f} ms{best_time(with_cards):9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预热快照启动基准
+
+按真实数据的形态生成卡片数据文件，比较只解析JSON（json.load）、完整加载（解析并建立索引）
+和从预热快照启动（读入、校验并恢复卡片和索引）的用时，以及退出时写快照的用时。
+
+用法：python benchmark_card_snapshot.py [卡片数量]
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_card_memory import make_json
+from card_manager import CardManager
+from card_snapshot import snapshot_path
+
+
+def best_time(func, repeat: int = 5) -> float:
+    """多次运行取最短用时（秒），运行期间不输出加载信息"""
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """运行基准并输出结果"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data_file = os.path.join(tempfile.mkdtemp(), "cards.json")
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(json.loads(make_json(count)), f, ensure_ascii=False, indent=2)
+
+    def parse():
+        with open(data_file, 'r', encoding='utf-8') as f:
+            json.load(f)
+
+    def cold_start():
+        if os.path.exists(snapshot_path(data_file)):
+            os.remove(snapshot_path(data_file))
+        return CardManager(data_file)
+
+    def warm_start():
+        assert CardManager(data_file)._loaded_from_snapshot
+
+    parse_time = best_time(parse)
+    cold_time = best_time(cold_start, repeat=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        card_manager = cold_start()
+    start = time.perf_counter()
+    card_manager.save_snapshot()
+    write_time = time.perf_counter() - start
+    warm_time = best_time(warm_start)
+
+    print(f"卡片数量: {count}")
+    print(f"json.load:      {parse_time * 1000:8.1f} ms")
+    print(f"完整加载:       {cold_time * 1000:8.1f} ms")
+    print(f"写入快照:       {write_time * 1000:8.1f} ms")
+    print(f"从快照启动:     {warm_time * 1000:8.1f} ms（json.load的{warm_time / parse_time:.2f}倍）")
+
+
+if __name__ == "__main__":
+    main()
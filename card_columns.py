@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按列存储的卡片镜像，用于在大量卡片上按来源、时间范围、收藏和标签筛选
+
+每个字段保存为一列紧凑的数组：时间和收藏标记是整数列，来源做字典编码（来源列保存编号）。
+安装了NumPy时，筛选在这些列上以向量化的布尔掩码完成（零拷贝读取数组）；没有NumPy时
+按列逐行比较，结果相同。标签不另存一份，由标签索引（card_tags.TagIndex，标签 → 卡片ID集合）
+求出卡片ID后经"卡片ID → 行号"换成行号；收藏的行另外保存为行号集合，
+多个标签的且/或与收藏条件直接以集合运算组合。
+
+镜像随卡片变更事件维护：收藏和修改直接改对应的行，追加在末尾的新卡片先记下，
+下次筛选前再一次性追加；删除和整体替换则在下次筛选时重建。
+
+时间列另有按时间排序的行号（第一次按时间范围查询时建立，列变化后作废），
+时间范围查询用二分查找直接得到范围内的行，不逐行比较。
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from card_events import CardEvent, CARD_ADDED, CARD_UPDATED, CARD_FAVORITED
+from card_record import card_time, time_micros
+
+# 没有时间（或时间无法识别）的行
+MISSING_TIME = -(1 << 62)
+
+_numpy = None
+_numpy_loaded = False
+
+
+def get_numpy():
+    """按需导入NumPy（导入较慢，第一次筛选时才导入），没有安装时返回None"""
+    global _numpy, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+class CardColumns:
+    """卡片的列式镜像"""
+
+    def __init__(self, card_manager, use_numpy: Optional[bool] = None):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表）
+            use_numpy: 是否使用NumPy，None表示安装了就使用
+        """
+        self.card_manager = card_manager
+        self.use_numpy = use_numpy
+        self._dirty = True
+        self._pending: List[Any] = []  # 等待追加到末尾的卡片
+        self.cards: List[Any] = []  # 每一行对应的卡片
+        self._rows: Dict[str, int] = {}  # 卡片ID → 行号
+        self.created = array('q')
+        self.updated = array('q')
+        self.favorite = array('b')
+        self.source = array('l')
+        self.source_values: List[str] = []  # 来源编号 → 来源
+        self.source_codes: Dict[str, int] = {}  # 来源 → 来源编号
+        self.favorite_rows: Set[int] = set()  # 收藏的行号
+        self._time_order: Dict[str, tuple] = {}  # 时间字段 → (按时间排序的行号, 对应的时间)
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时维护镜像（需要以immediate方式订阅）"""
+        if self._dirty:
+            return
+        if event.type in (CARD_FAVORITED, CARD_UPDATED):
+            for card_id in event.card_ids:
+                row = self._rows.get(card_id)
+                card = self.card_manager.get_card(card_id)
+                if row is None or card is None:
+                    self._dirty = True
+                    return
+                self._set_row(row, card)
+        elif event.type == CARD_ADDED and self._added_at_end(event.card_ids):
+            count = len(event.card_ids)
+            self._pending.extend(self.card_manager.cards[-count:])
+        else:
+            self._dirty = True
+
+    def filter(self, **criteria) -> List[Any]:
+        """
+        按条件筛选卡片，结果保持卡片列表中的顺序
+
+        Args:
+            **criteria: 筛选条件，见filter_rows
+
+        Returns:
+            List: 符合条件的卡片
+        """
+        rows = self.filter_rows(**criteria)
+        cards = self.cards
+        return [cards[row] for row in rows]
+
+    def filter_rows(self, sources: Union[str, Iterable[str], None] = None,
+                    created_from=None, created_to=None,
+                    favorite: Optional[bool] = None,
+                    tags: Union[str, Iterable[str], None] = None,
+                    any_tag: bool = False) -> List[int]:
+        """
+        按条件筛选（各条件同时满足），返回升序的行号（即卡片在卡片列表中的位置）
+
+        Args:
+            sources: 来源（一个或多个，满足其一即可）
+            created_from: 创建时间下限（含），datetime、date或ISO文本
+            created_to: 创建时间上限（含），只给日期时包含当天全天
+            favorite: 是否收藏
+            tags: 标签（一个或多个）
+            any_tag: True时有其中任一标签即可，否则需要全部标签
+
+        Returns:
+            List[int]: 符合条件的行号
+        """
+        self._ensure()
+        sources = [sources] if isinstance(sources, str) else sources
+        tags = [tags] if isinstance(tags, str) else tags
+        lower = upper = None
+        if created_from is not None:
+            lower = time_micros(created_from)
+            if lower is None:
+                raise ValueError(f"无法识别的时间: {created_from}")
+        if created_to is not None:
+            upper = _upper_bound(created_to)
+            if upper is None:
+                raise ValueError(f"无法识别的时间: {created_to}")
+
+        tag_rows = None
+        if tags is not None:
+            tag_rows = self.tag_rows(list(tags), any_tag)
+            if favorite is not None:
+                # 标签和收藏都是行号集合，直接求交集或差集
+                tag_rows = tag_rows & self.favorite_rows if favorite else tag_rows - self.favorite_rows
+                favorite = None
+        source_codes = None
+        if sources is not None:
+            source_codes = {self.source_codes[value] for value in sources if value in self.source_codes}
+
+        numpy = get_numpy() if self.use_numpy is not False else None
+        if numpy is not None:
+            rows = self._filter_numpy(numpy, source_codes, lower, upper, favorite, tag_rows)
+        else:
+            rows = self._filter_python(source_codes, lower, upper, favorite, tag_rows)
+        return rows
+
+    def _filter_numpy(self, numpy, source_codes, lower, upper, favorite, tag_rows):
+        """NumPy向量化筛选，返回行号"""
+        count = len(self.cards)
+        mask = numpy.ones(count, dtype=bool)
+        if tag_rows is not None:
+            mask[:] = False
+            mask[numpy.fromiter(tag_rows, dtype=numpy.intp, count=len(tag_rows))] = True
+        if source_codes is not None:
+            column = numpy.frombuffer(self.source, dtype=numpy.dtype(f"i{self.source.itemsize}"))
+            mask &= numpy.isin(column, numpy.fromiter(source_codes, dtype=column.dtype))
+        if lower is not None or upper is not None:
+            column = numpy.frombuffer(self.created, dtype=numpy.int64)
+            if lower is not None:
+                mask &= column >= lower
+            if upper is not None:
+                mask &= (column <= upper) & (column != MISSING_TIME)
+        if favorite is not None:
+            column = numpy.frombuffer(self.favorite, dtype=numpy.int8)
+            mask &= (column != 0) == bool(favorite)
+        return numpy.flatnonzero(mask).tolist()
+
+    def _filter_python(self, source_codes, lower, upper, favorite, tag_rows):
+        """没有NumPy时逐列筛选，返回行号"""
+        rows: Iterable[int] = sorted(tag_rows) if tag_rows is not None else range(len(self.cards))
+        if source_codes is not None:
+            column = self.source
+            rows = [row for row in rows if column[row] in source_codes]
+        if lower is not None or upper is not None:
+            column = self.created
+            low = lower if lower is not None else MISSING_TIME + 1
+            high = upper if upper is not None else (1 << 62)
+            rows = [row for row in rows if low <= column[row] <= high]
+        if favorite is not None:
+            column = self.favorite
+            wanted = 1 if favorite else 0
+            rows = [row for row in rows if column[row] == wanted]
+        return list(rows)
+
+    def row_of(self, card_id: str) -> Optional[int]:
+        """卡片所在的行号（即在卡片列表中的位置），不在镜像中时返回None"""
+        self._ensure()
+        return self._rows.get(card_id)
+
+    def favorite_ids(self) -> Set[str]:
+        """收藏的卡片ID（由收藏的行号集合求出）"""
+        self._ensure()
+        cards = self.cards
+        return {cards[row].get('id') for row in self.favorite_rows}
+
+    def rows_in_range(self, field: str, lower: Optional[int], upper: Optional[int]) -> List[int]:
+        """
+        时间在[lower, upper]范围内的行号（按时间排序，二分查找）
+
+        Args:
+            field: created_at或updated_at
+            lower: 下限（time_micros的值，含），None表示不限
+            upper: 上限（含），None表示不限；没有时间的行不在任何范围内
+        """
+        order, times = self._sorted_times(field)
+        start, stop = self._range_bounds(times, lower, upper)
+        return order[start:stop]
+
+    def count_in_range(self, field: str, lower: Optional[int], upper: Optional[int]) -> int:
+        """时间在范围内的行数（不取出行号）"""
+        _, times = self._sorted_times(field)
+        start, stop = self._range_bounds(times, lower, upper)
+        return stop - start
+
+    def _range_bounds(self, times, lower, upper):
+        """范围在排序后的时间中的起止下标"""
+        start = bisect_left(times, lower if lower is not None else MISSING_TIME + 1)
+        stop = bisect_right(times, upper) if upper is not None else len(times)
+        return start, max(start, stop)
+
+    def _sorted_times(self, field: str):
+        """按时间排序的行号和对应的时间（缓存到列变化为止）"""
+        self._ensure()
+        cached = self._time_order.get(field)
+        if cached is None:
+            column = self.created if field == 'created_at' else self.updated
+            order = sorted(range(len(column)), key=column.__getitem__)
+            cached = (order, [column[row] for row in order])
+            self._time_order[field] = cached
+        return cached
+
+    def tag_rows(self, tags: List[str], any_tag: bool = False) -> Set[int]:
+        """有指定标签的行号（由标签索引求出卡片ID，再换成行号）"""
+        self._ensure()
+        if not tags:
+            return set(range(len(self.cards))) if not any_tag else set()
+        rows = self._rows
+        card_ids = self.card_manager._tag_index().card_ids(tags, any_tag)
+        return {row for row in map(rows.get, card_ids) if row is not None}
+
+    def _ensure(self):
+        """筛选前确保镜像与卡片一致"""
+        if self._dirty:
+            self._rebuild()
+        elif self._pending:
+            pending, self._pending = self._pending, []
+            for card in pending:
+                self._append(card)
+
+    def _rebuild(self):
+        """按当前卡片列表重建所有列"""
+        self._dirty = False
+        self._pending = []
+        self._time_order = {}
+        self.cards = []
+        self._rows = {}
+        self.created = array('q')
+        self.updated = array('q')
+        self.favorite = array('b')
+        self.source = array('l')
+        self.source_values = []
+        self.source_codes = {}
+        self.favorite_rows = set()
+        for card in self.card_manager.cards:
+            self._append(card)
+
+    def _append(self, card):
+        """在末尾追加一行"""
+        row = len(self.cards)
+        self._time_order.clear()
+        self.cards.append(card)
+        self._rows[card.get('id')] = row
+        self.created.append(0)
+        self.updated.append(0)
+        self.favorite.append(0)
+        self.source.append(0)
+        self._fill_row(row, card)
+
+    def _set_row(self, row: int, card):
+        """卡片被修改（可能换成了新对象）后更新一行"""
+        self._time_order.clear()
+        self.cards[row] = card
+        self._fill_row(row, card)
+
+    def _fill_row(self, row: int, card):
+        """把卡片的各字段写入一行"""
+        created = card_time(card, 'created_at')
+        updated = card_time(card, 'updated_at')
+        self.created[row] = created if created is not None else MISSING_TIME
+        self.updated[row] = updated if updated is not None else MISSING_TIME
+        self.favorite[row] = 1 if card.get('is_favorite', False) else 0
+        if self.favorite[row]:
+            self.favorite_rows.add(row)
+        else:
+            self.favorite_rows.discard(row)
+        self.source[row] = self._source_code(card.get('source') or '')
+
+    def _source_code(self, source: str) -> int:
+        """来源的字典编码（新来源追加到字典末尾）"""
+        code = self.source_codes.get(source)
+        if code is None:
+            code = len(self.source_values)
+            self.source_values.append(source)
+            self.source_codes[source] = code
+        return code
+
+    def _added_at_end(self, card_ids) -> bool:
+        """新增的卡片是否正好位于卡片列表末尾（可以直接追加行）"""
+        count = len(card_ids)
+        cards = self.card_manager.cards
+        if count > len(cards):
+            return False
+        tail = cards[len(cards) - count:]
+        return all(card.get('id') == card_id for card, card_id in zip(tail, card_ids))
+
+
+class CardRows:
+    """
+    卡片ID → 卡片在列表中的位置（按字、按出处、按ID取卡片时把索引中的ID换成位置）
+
+    比列式镜像轻：只有一个字典。修改和收藏不改变位置，无需处理；追加在末尾的新卡片直接补上；
+    删除或在中间插入会让后面的位置整体移动，这时只作废，下次使用时用一次字典推导重建。
+    """
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表）
+        """
+        self.card_manager = card_manager
+        self._rows: Optional[Dict[str, int]] = None
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时维护映射（需要以immediate方式订阅）"""
+        if self._rows is None or event.type in (CARD_UPDATED, CARD_FAVORITED):
+            return
+        cards = self.card_manager.cards
+        count = len(event.card_ids)
+        if event.type == CARD_ADDED and count <= len(cards) and all(
+                card.get('id') == card_id for card, card_id in zip(cards[len(cards) - count:], event.card_ids)):
+            rows = self._rows
+            for row, card_id in enumerate(event.card_ids, len(cards) - count):
+                rows.setdefault(card_id, row)
+        else:
+            self._rows = None
+
+    def rows_of(self, card_ids: Iterable[str]) -> List[int]:
+        """
+        一组卡片的位置（升序，不在列表中的忽略），代价与卡片数成正比，不逐张扫描
+
+        Args:
+            card_ids: 卡片ID
+        """
+        rows = self._rows
+        if rows is None:
+            cards = self.card_manager.cards
+            # 重复ID取第一次出现的位置（与CardIndex一致）
+            rows = {cards[row].get('id'): row for row in range(len(cards) - 1, -1, -1)}
+            self._rows = rows
+        return sorted(row for row in map(rows.get, card_ids) if row is not None)
+
+
+def _upper_bound(value) -> Optional[int]:
+    """时间上限：只给日期（date或YYYY-MM-DD）时取当天最后一刻"""
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            value = date.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return time_micros(datetime.combine(value, datetime.min.time()) + timedelta(days=1)) - 1
+    return time_micros(value)
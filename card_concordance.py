@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+逐字索引和语境索引（KWIC，keyword in context）
+
+学习"之""其"这类虚词时，要看所有关键词或原文中含有这个字的卡片，以及它在每句原文中的用法。
+CharIndex把每个汉字映射到关键词或原文含有它的卡片ID集合，第一次使用时建立，
+之后以immediate方式订阅变更事件增量更新，查一个字不必扫描全部卡片。
+
+Concordance把这些卡片按出处排列，每处出现列为一行（前文、该字、后文）。
+各卡片的出现次数第一次需要时才统计（str.count，很快），行本身在取某一页时才生成，
+所以常用字即使出现几万次，翻页也只处理当前一页。
+
+字符按规范化文本（繁简、异体字统一，见card_normalize.py）比较，规范化逐字对应，
+所以在规范化文本中找到的位置就是原文中的位置，显示的仍是原文。
+"""
+
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import accumulate
+from typing import Dict, List, Set
+
+from card_events import CardEvent, CARD_DELETED, CARDS_REPLACED
+from card_normalize import normalize_text
+from card_record import normalized_text
+
+# 建立逐字索引的字段
+CONCORDANCE_FIELDS = ('keyword', 'quote')
+
+# CJK统一汉字（基本区、扩展A-H）和兼容汉字的码位范围
+_HAN_RANGES = ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0x20000, 0x323AF))
+
+
+def is_han(char: str) -> bool:
+    """是否是一个汉字"""
+    if len(char) != 1:
+        return False
+    code = ord(char)
+    return any(low <= code <= high for low, high in _HAN_RANGES)
+
+
+class CharIndex:
+    """
+    逐字索引
+
+    - postings: 汉字（规范化文本）→ 关键词或原文含有它的卡片ID集合
+    """
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表和ID索引）
+        """
+        self.card_manager = card_manager
+        self.postings: Dict[str, Set[str]] = {}
+        self._card_chars: Dict[str, frozenset] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前卡片列表重建"""
+        self.postings = {}
+        self._card_chars = {}
+        for card in self.card_manager.cards:
+            self._add(card)
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时增量更新（在卡片索引之后订阅，按ID取到的是当前的卡片）"""
+        if event.type == CARDS_REPLACED:
+            self.rebuild()
+            return
+        get_card = self.card_manager.index.get
+        for card_id in event.card_ids:
+            self._remove(card_id)
+            card = None if event.type == CARD_DELETED else get_card(card_id)
+            if card is not None:
+                self._add(card)
+
+    def cards_with(self, char: str) -> Set[str]:
+        """关键词或原文含有该字的卡片ID（不要修改返回的集合）"""
+        return self.postings.get(normalize_text(char), set())
+
+    def count(self, char: str) -> int:
+        """关键词或原文含有该字的卡片数"""
+        return len(self.cards_with(char))
+
+    def _add(self, card):
+        """把一张卡片加入索引"""
+        card_id = card.get('id')
+        if card_id is None or card_id in self._card_chars:
+            return
+        chars = frozenset(char for field in CONCORDANCE_FIELDS
+                          for char in normalized_text(card, field) if is_han(char))
+        self._card_chars[card_id] = chars
+        for char in chars:
+            posting = self.postings.get(char)
+            if posting is None:
+                self.postings[char] = {card_id}
+            else:
+                posting.add(card_id)
+
+    def _remove(self, card_id: str):
+        """把一张卡片移出索引"""
+        for char in self._card_chars.pop(card_id, ()):
+            posting = self.postings.get(char)
+            if posting is not None:
+                posting.discard(card_id)
+                if not posting:
+                    del self.postings[char]
+
+
+def source_order(card) -> tuple:
+    """语境索引的卡片顺序：按出处，出处相同按关键词，没有出处的在最后"""
+    source = normalized_text(card, 'source')
+    return (not source, source, normalized_text(card, 'keyword'))
+
+
+class ConcordanceLine:
+    """语境索引的一行：某张卡片的某个字段中该字的一处出现"""
+
+    __slots__ = ('card', 'field', 'start', 'left', 'match', 'right')
+
+    def __init__(self, card, field: str, start: int, context: int):
+        """
+        Args:
+            card: 卡片
+            field: 字段（原文，原文中没有该字时为关键词）
+            start: 该字在字段中的位置
+            context: 前后各显示的字数
+        """
+        text = card.get(field) or ""
+        self.card = card
+        self.field = field
+        self.start = start
+        self.left = text[max(0, start - context):start]
+        self.match = text[start:start + 1]
+        self.right = text[start + 1:start + 1 + context]
+
+    def __repr__(self):
+        return f"ConcordanceLine({self.left}【{self.match}】{self.right})"
+
+
+class Concordance(Sequence):
+    """
+    一个字的语境索引：按出处排列的卡片中，该字的每处出现为一行
+
+    原文中的每处出现各为一行；原文中没有、只有关键词含有该字的卡片列一行关键词。
+    行在访问时才生成，page()只生成一页。
+    """
+
+    def __init__(self, cards, char: str, context: int = 12, page_size: int = 50):
+        """
+        Args:
+            cards: 关键词或原文含有该字的卡片，已按出处排列（只读视图，卡片不会再变）
+            char: 要查看的字
+            context: 每行前后各显示的字数
+            page_size: 每页行数
+        """
+        self.cards = cards
+        self.char = char
+        self.context = context
+        self.page_size = page_size
+        self._char = normalize_text(char)
+        self._ends = None  # 各卡片最后一行之后的行号（累计行数），第一次需要时统计
+
+    def _line_ends(self) -> List[int]:
+        """各卡片最后一行之后的行号"""
+        if self._ends is None:
+            char = self._char
+            self._ends = list(accumulate(normalized_text(card, 'quote').count(char) or 1
+                                         for card in self.cards))
+        return self._ends
+
+    def __len__(self):
+        ends = self._line_ends()
+        return ends[-1] if ends else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._line(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("语境索引行号超出范围")
+        return self._line(index)
+
+    def _line(self, index: int) -> ConcordanceLine:
+        """生成第index行"""
+        ends = self._line_ends()
+        position = bisect_right(ends, index)
+        card = self.cards[position]
+        occurrence = index - (ends[position - 1] if position else 0)
+        field = 'quote'
+        text = normalized_text(card, field)
+        if self._char not in text:
+            field = 'keyword'
+            text = normalized_text(card, field)
+        start = text.find(self._char)
+        for _ in range(occurrence):
+            start = text.find(self._char, start + 1)
+        return ConcordanceLine(card, field, start, self.context)
+
+    @property
+    def page_count(self) -> int:
+        """总页数（没有结果时为0）"""
+        return -(-len(self) // self.page_size)
+
+    def page(self, number: int) -> List[ConcordanceLine]:
+        """第number页（从0开始）的各行"""
+        start = number * self.page_size
+        return self[start:start + self.page_size]
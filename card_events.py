@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+卡片变更通知，CardManager通过它告诉各个视图"哪些卡片发生了什么变化"，
+视图、搜索索引和缓存据此增量更新，而不必每次都全量刷新
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+# 事件类型
+CARD_ADDED = "added"
+CARD_UPDATED = "updated"
+CARD_DELETED = "deleted"
+CARD_FAVORITED = "favorited"
+CARDS_REPLACED = "bulk_replaced"
+
+# 批量合并后事件的派发顺序
+EVENT_ORDER = (CARD_DELETED, CARD_ADDED, CARD_UPDATED, CARD_FAVORITED)
+
+
+class CardEvent:
+    """卡片变更事件"""
+
+    __slots__ = ("type", "card_ids")
+
+    def __init__(self, event_type: str, card_ids: Iterable[str] = ()):
+        """
+        Args:
+            event_type: 事件类型（CARD_ADDED等常量）
+            card_ids: 受影响的卡片ID（CARDS_REPLACED时为空，表示全部卡片都可能变化）
+        """
+        self.type = event_type
+        self.card_ids = tuple(card_ids)
+
+    def __repr__(self):
+        return f"CardEvent({self.type!r}, {len(self.card_ids)} ids)"
+
+
+class CardEventBus:
+    """
+    卡片变更事件总线
+
+    在batch()内产生的事件会按卡片ID合并，批次结束时每种类型最多派发一个事件：
+    - 新增后又修改 → 新增
+    - 新增后又删除 → 不派发
+    - 删除后又恢复 → 修改
+    - 收藏状态变化且内容被修改 → 修改
+    - 批次中出现整体替换 → 只派发一个整体替换事件
+
+    必须时刻与数据一致的派生结构（例如索引）可以用immediate=True订阅，
+    这类监听者在批次内也会立即收到每一个未合并的原始事件。
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable[[CardEvent], None]] = []
+        self._immediate_listeners: List[Callable[[CardEvent], None]] = []
+        self._batch_depth = 0
+        self._pending: Dict[str, str] = {}
+        self._pending_order: List[str] = []
+        self._pending_replaced = False
+
+    def subscribe(self, listener: Callable[[CardEvent], None], immediate: bool = False):
+        """
+        订阅卡片变更事件
+
+        Args:
+            listener: 回调函数，参数为CardEvent
+            immediate: 是否不经批次合并、立即接收每个事件
+        """
+        listeners = self._immediate_listeners if immediate else self._listeners
+        if listener not in listeners:
+            listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[CardEvent], None]):
+        """取消订阅"""
+        for listeners in (self._listeners, self._immediate_listeners):
+            if listener in listeners:
+                listeners.remove(listener)
+
+    @contextmanager
+    def batch(self):
+        """批量操作上下文，退出最外层批次时合并派发事件（支持嵌套）"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush()
+
+    def emit(self, event_type: str, card_ids: Iterable[str] = ()):
+        """
+        发出事件：批次内先记录等待合并，否则立即派发
+
+        Args:
+            event_type: 事件类型
+            card_ids: 受影响的卡片ID
+        """
+        if self._immediate_listeners:
+            card_ids = tuple(card_ids)
+            if card_ids or event_type == CARDS_REPLACED:
+                self._dispatch(CardEvent(event_type, card_ids), self._immediate_listeners)
+        if self._batch_depth == 0:
+            card_ids = tuple(card_ids)
+            if card_ids or event_type == CARDS_REPLACED:
+                self._dispatch(CardEvent(event_type, card_ids))
+            return
+
+        if event_type == CARDS_REPLACED:
+            self._pending_replaced = True
+            return
+        if self._pending_replaced:
+            # 整体替换会让监听者全量重建，后续的单卡事件无需再记录
+            return
+        for card_id in card_ids:
+            self._merge(card_id, event_type)
+
+    def _merge(self, card_id: str, event_type: str):
+        """把单张卡片的新事件与批次中已有的事件合并"""
+        previous = self._pending.get(card_id)
+        if previous is None:
+            self._pending[card_id] = event_type
+            self._pending_order.append(card_id)
+            return
+
+        merged = _merge_event_types(previous, event_type)
+        if merged is None:
+            # 批次内新增又删除，相当于什么都没发生
+            del self._pending[card_id]
+        else:
+            self._pending[card_id] = merged
+
+    def _flush(self):
+        """派发批次中合并后的事件"""
+        pending = self._pending
+        order = self._pending_order
+        replaced = self._pending_replaced
+        self._pending = {}
+        self._pending_order = []
+        self._pending_replaced = False
+
+        if replaced:
+            self._dispatch(CardEvent(CARDS_REPLACED))
+            return
+
+        grouped: Dict[str, List[str]] = {event_type: [] for event_type in EVENT_ORDER}
+        for card_id in order:
+            event_type = pending.pop(card_id, None)
+            if event_type is not None:
+                grouped[event_type].append(card_id)
+        for event_type in EVENT_ORDER:
+            if grouped[event_type]:
+                self._dispatch(CardEvent(event_type, grouped[event_type]))
+
+    def _dispatch(self, event: CardEvent, listeners: Optional[List[Callable[[CardEvent], None]]] = None):
+        """依次通知监听者，单个监听者出错不影响其他监听者和数据操作"""
+        for listener in list(self._listeners if listeners is None else listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"处理卡片变更事件失败: {str(e)}")
+
+
+def _merge_event_types(previous: str, current: str) -> Optional[str]:
+    """
+    合并同一张卡片先后两个事件的类型
+
+    Returns:
+        Optional[str]: 合并后的类型，None表示两个事件互相抵消
+    """
+    if previous == CARD_ADDED:
+        return None if current == CARD_DELETED else CARD_ADDED
+    if previous == CARD_DELETED:
+        # 删除后又恢复，对监听者来说是内容可能变化
+        return CARD_UPDATED if current == CARD_ADDED else CARD_DELETED
+    if current == CARD_DELETED:
+        return CARD_DELETED
+    if previous == CARD_FAVORITED and current == CARD_FAVORITED:
+        return CARD_FAVORITED
+    return CARD_UPDATED
+
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模糊搜索：容忍错字、异体字和漏字
+
+古籍中异体字、繁简混用很常见，输入时也难免打错字，精确匹配只要错一个字就找不到。
+模糊搜索按编辑距离（插入、删除、替换一个字各算一次）匹配关键词和原文：
+关键词与查询整体比较，原文中找与查询最接近的一段。
+
+对每张卡片都计算编辑距离太慢，所以先用n-gram倒排表找候选：与查询编辑距离不超过k的文本，
+至少含有查询中 (不同二元组数 - 2k) 个二元组（每次编辑最多破坏两个二元组）；
+查询太短、这个下限不大于0时改用单字（下限为 不同字数 - k）。只对候选计算编辑距离。
+
+比较的是规范化文本（繁简、异体字统一，见card_normalize.py），学/學不算错字。
+倒排表第一次模糊搜索时才建立，之后以immediate方式订阅变更事件增量更新。
+"""
+
+from collections import Counter
+from typing import Dict, Optional, Set, Tuple
+
+from card_events import CardEvent, CARD_DELETED, CARDS_REPLACED
+from card_highlight import Spans
+from card_normalize import normalize_text
+from card_record import normalized_text
+
+# 模糊搜索的字段
+FUZZY_FIELDS = ('keyword', 'quote')
+
+
+def default_max_distance(length: int) -> int:
+    """查询长度对应的默认最大编辑距离：每4个字容忍一处，至少一处，但不超过长度减一"""
+    return min(max(1, length // 4), max(0, length - 1))
+
+
+def edit_distance(first: str, second: str, max_distance: int) -> Optional[int]:
+    """
+    两个字符串的编辑距离
+
+    Returns:
+        Optional[int]: 编辑距离，超过max_distance时为None
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return None
+    previous = list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        current = [i]
+        for j, other in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    distance = previous[-1]
+    return distance if distance <= max_distance else None
+
+
+def substring_distance(pattern: str, text: str, max_distance: int) -> Optional[Tuple[int, int, int]]:
+    """
+    text中与pattern编辑距离最小的一段（近似子串匹配）
+
+    Returns:
+        Optional[Tuple[int, int, int]]: (编辑距离, 开始, 结束)，距离相同时取最靠前的一段，
+            超过max_distance时为None
+    """
+    size = len(pattern)
+    # costs[i]：pattern前i个字与以当前位置结尾的某一段的最小距离，starts[i]是那一段的开始
+    costs = list(range(size + 1))
+    starts = [0] * (size + 1)
+    best = None
+    for end, char in enumerate(text, 1):
+        new_costs = [0]
+        new_starts = [end]
+        for i in range(1, size + 1):
+            cost = costs[i - 1] + (pattern[i - 1] != char)
+            start = starts[i - 1]
+            if new_costs[i - 1] + 1 < cost:
+                cost = new_costs[i - 1] + 1
+                start = new_starts[i - 1]
+            if costs[i] + 1 < cost:
+                cost = costs[i] + 1
+                start = starts[i]
+            new_costs.append(cost)
+            new_starts.append(start)
+        costs, starts = new_costs, new_starts
+        if costs[size] <= max_distance and (best is None or costs[size] < best[0]):
+            best = (costs[size], starts[size], end)
+            if best[0] == 0:
+                break
+    return best
+
+
+def _grams(text: str) -> Set[str]:
+    """文本中的单字和二元组"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class FuzzyIndex:
+    """
+    模糊搜索的候选索引
+
+    - grams: 单字或二元组（规范化文本）→ 关键词或原文中含有它的卡片ID集合
+    """
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表和ID索引）
+        """
+        self.card_manager = card_manager
+        self.grams: Dict[str, Set[str]] = {}
+        self._card_grams: Dict[str, frozenset] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前卡片列表重建"""
+        self.grams = {}
+        self._card_grams = {}
+        for card in self.card_manager.cards:
+            self._add(card)
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时增量更新（在卡片索引之后订阅，按ID取到的是当前的卡片）"""
+        if event.type == CARDS_REPLACED:
+            self.rebuild()
+            return
+        get_card = self.card_manager.index.get
+        for card_id in event.card_ids:
+            self._remove(card_id)
+            card = None if event.type == CARD_DELETED else get_card(card_id)
+            if card is not None:
+                self._add(card)
+
+    def candidates(self, query: str, max_distance: int) -> Optional[Set[str]]:
+        """
+        可能与query编辑距离不超过max_distance的卡片ID
+
+        Args:
+            query: 查询（规范化文本）
+            max_distance: 最大编辑距离
+
+        Returns:
+            Optional[Set[str]]: 候选卡片ID（需要再计算编辑距离），查询太短无法筛选时返回None
+        """
+        bigrams = {query[i:i + 2] for i in range(len(query) - 1)}
+        needed = len(bigrams) - 2 * max_distance
+        grams = bigrams
+        if needed < 1:
+            grams = set(query)
+            needed = len(grams) - max_distance
+            if needed < 1:
+                return None
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.grams.get(gram, ()))
+        return {card_id for card_id, count in counts.items() if count >= needed}
+
+    def _add(self, card):
+        """把一张卡片加入索引"""
+        card_id = card.get('id')
+        if card_id is None or card_id in self._card_grams:
+            return
+        grams = frozenset().union(*(_grams(normalized_text(card, field)) for field in FUZZY_FIELDS))
+        self._card_grams[card_id] = grams
+        for gram in grams:
+            posting = self.grams.get(gram)
+            if posting is None:
+                self.grams[gram] = {card_id}
+            else:
+                posting.add(card_id)
+
+    def _remove(self, card_id: str):
+        """把一张卡片移出索引"""
+        for gram in self._card_grams.pop(card_id, ()):
+            posting = self.grams.get(gram)
+            if posting is not None:
+                posting.discard(card_id)
+                if not posting:
+                    del self.grams[gram]
+
+
+class FuzzyMatch:
+    """CardQuery.fuzzy()的条件：关键词与查询的编辑距离、或原文中有一段与查询的编辑距离不超过上限"""
+
+    __slots__ = ('text', 'fields', 'max_distance', '_query')
+
+    def __init__(self, text: str, max_distance: Optional[int] = None):
+        self.text = text
+        self.fields = FUZZY_FIELDS
+        self._query = normalize_text(text)
+        if max_distance is None:
+            max_distance = default_max_distance(len(self._query))
+        self.max_distance = max_distance
+
+    def candidates(self, card_manager) -> Optional[Set[str]]:
+        """用n-gram倒排表得到候选卡片ID（调用方持有读锁）"""
+        return card_manager._fuzzy_index().candidates(self._query, self.max_distance)
+
+    def describe(self, card_manager) -> str:
+        """explain的输出行"""
+        ids = self.candidates(card_manager)
+        estimate = len(card_manager.cards) if ids is None else len(ids)
+        return (f"模糊匹配 \"{self.text}\"（编辑距离≤{self.max_distance}）：n-gram倒排表取候选后计算编辑距离"
+                f"  估计 {estimate} 张")
+
+    def _best(self, card) -> Tuple[Optional[tuple], Spans]:
+        """(排序键, 匹配位置)：排序键为(编辑距离, 字段顺序)，不匹配时为(None, {})"""
+        query = self._query
+        rank = None
+        spans = {}
+        # 关键词整体比较
+        keyword = normalized_text(card, 'keyword')
+        distance = edit_distance(query, keyword, self.max_distance)
+        if distance is not None:
+            rank = (distance, 0)
+            spans['keyword'] = [(0, len(keyword))]
+        # 原文找最接近的一段；只容忍少于一半的字不同，否则短查询几乎处处都能匹配（匹配的一段也不会为空）
+        quote = normalized_text(card, 'quote')
+        found = substring_distance(query, quote, min(self.max_distance, (len(query) - 1) // 2))
+        if found is not None:
+            if rank is None or found[0] < rank[0]:
+                rank = (found[0], 1)
+            spans['quote'] = [(found[1], found[2])]
+        return rank, spans
+
+    def spans(self, card) -> Spans:
+        """匹配的位置（关键词匹配时是整个关键词），不匹配时为空"""
+        return self._best(card)[1]
+
+    def matches(self, card) -> bool:
+        """卡片是否匹配"""
+        return self._best(card)[0] is not None
+
+    def rank(self, card) -> tuple:
+        """排序键：编辑距离小的在前，距离相同时关键词匹配在前"""
+        rank = self._best(card)[0]
+        return rank if rank is not None else (self.max_distance + 1, 2)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+搜索匹配位置
+
+查询在确认卡片是否匹配的同时记下每个字段中匹配的位置：字段 → [(开始, 结束), ...]，
+按开始位置排序、互不重叠（结束位置不含）。结果视图随每张卡片保存这些位置（CardsView.match_spans），
+结果列表和详情窗口直接按位置高亮，不再重新匹配（正则和拼音匹配也一样）。
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+Span = Tuple[int, int]
+Spans = Dict[str, List[Span]]
+
+
+def find_spans(value: str, text: str, case_sensitive: bool = False) -> List[Span]:
+    """
+    value中所有不重叠的text出现位置
+
+    Args:
+        value: 字段文本
+        text: 要查找的文本（不区分大小写时应已转为小写）
+        case_sensitive: 是否区分大小写
+    """
+    if not case_sensitive:
+        value = value.lower()
+    spans = []
+    size = len(text)
+    start = value.find(text)
+    while start != -1 and size:
+        spans.append((start, start + size))
+        start = value.find(text, start + size)
+    return spans
+
+
+def merge_span_list(spans: Iterable[Span]) -> List[Span]:
+    """一个字段的匹配位置排序，重叠或相接的合为一段（重复的位置只留一个）"""
+    result = []
+    for start, end in sorted(spans):
+        if result and start <= result[-1][1]:
+            if end > result[-1][1]:
+                result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def merge_spans(*groups: Spans) -> Spans:
+    """合并几组匹配位置：同一字段的位置排序，重叠或相接的合为一段"""
+    merged: Spans = {}
+    for group in groups:
+        for field, spans in group.items():
+            merged.setdefault(field, []).extend(spans)
+    return {field: merge_span_list(spans) for field, spans in merged.items()}
+
+
+def mark_spans(value: str, spans: List[Span], before: str = "【", after: str = "】") -> str:
+    """在匹配位置两侧加上标记（用于不能设置部分文字样式的列表框）"""
+    parts = []
+    last = 0
+    for start, end in spans:
+        if start >= end:
+            # 正则只匹配到空串，没有可标记的文字
+            continue
+        parts.append(value[last:start])
+        parts.append(before + value[start:end] + after)
+        last = end
+    parts.append(value[last:])
+    return "".join(parts)
+
+
+def snippet(value: str, spans: List[Span], context: int = 8) -> str:
+    """第一个匹配位置附近的片段（前后各保留context个字），匹配处加标记"""
+    spans = [span for span in spans if span[0] < span[1]]
+    if not spans:
+        return value[:context * 2]
+    start = max(0, spans[0][0] - context)
+    end = min(len(value), spans[0][1] + context)
+    shown = [(max(s, start) - start, min(e, end) - start) for s, e in spans if s < end and e > start]
+    text = mark_spans(value[start:end], shown)
+    return ("…" if start > 0 else "") + text + ("…" if end < len(value) else "")
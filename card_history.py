@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+撤销/重做历史
+
+CardManager的每种修改（新增、导入、编辑、合并、收藏、删除、移入/移出回收站、清空、从备份恢复）
+都记录为一条命令。
+命令只保存必要的差异：编辑和收藏只记录变化字段的旧值和新值，新增只记录位置和卡片引用，
+删除和整体替换才保留被移除的卡片。历史按估算的内存占用而不是条数限制，超出预算时丢弃最早的记录。
+
+批量操作（CardManager.batch()）中的多条命令合并为一条复合命令，一次撤销；
+连续追加的新增命令会合并成一条，撤销一万张卡片的导入只需一次遍历。
+"""
+
+import sys
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _Missing:
+    """表示字段原本不存在（撤销时删除该字段）"""
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+# 每条记录的固定开销估算（字节）
+_ENTRY_OVERHEAD = 64
+
+
+def _value_size(value) -> int:
+    """估算一个字段值占用的内存"""
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def card_size(card) -> int:
+    """估算一张卡片占用的内存"""
+    return sys.getsizeof(card) + sum(_value_size(value) for value in card.values())
+
+
+class Command:
+    """可撤销的命令"""
+
+    # 估算的内存占用（只计算仅被历史引用的数据）
+    size = 0
+
+    def undo(self, card_manager):
+        raise NotImplementedError
+
+    def redo(self, card_manager):
+        raise NotImplementedError
+
+    def merge(self, other: 'Command') -> bool:
+        """尝试把紧随其后的命令合并进来，返回是否合并成功"""
+        return False
+
+
+class InsertCards(Command):
+    """新增卡片：记录每张卡片插入后的位置（按位置升序）"""
+
+    def __init__(self, positions: List[Tuple[int, Any]]):
+        self.positions = positions
+        # 卡片仍在列表中，历史只多保存位置和引用
+        self.size = _ENTRY_OVERHEAD * (1 + len(positions))
+
+    def undo(self, card_manager):
+        card_manager._remove_cards_by_id({card['id'] for _, card in self.positions})
+
+    def redo(self, card_manager):
+        card_manager._insert_cards_at(self.positions)
+
+    def merge(self, other: Command) -> bool:
+        if not isinstance(other, InsertCards) or not other.positions:
+            return False
+        if self.positions and other.positions[0][0] <= self.positions[-1][0]:
+            # 插在已有卡片之前会改变它们的位置，不能简单合并
+            return False
+        self.positions.extend(other.positions)
+        self.size += other.size - _ENTRY_OVERHEAD
+        return True
+
+
+class RemoveCards(Command):
+    """删除卡片：记录每张卡片删除前的位置（按位置升序）"""
+
+    def __init__(self, positions: List[Tuple[int, Any]]):
+        self.positions = positions
+        self.size = _ENTRY_OVERHEAD + sum(_ENTRY_OVERHEAD + card_size(card) for _, card in positions)
+
+    def undo(self, card_manager):
+        card_manager._insert_cards_at(self.positions)
+
+    def redo(self, card_manager):
+        card_manager._remove_cards_by_id({card['id'] for _, card in self.positions})
+
+
+class TrashCards(RemoveCards):
+    """移入回收站：与删除相同，但卡片仍由回收站保存，历史只需记录位置"""
+
+    def __init__(self, positions: List[Tuple[int, Any]]):
+        self.positions = positions
+        self.size = _ENTRY_OVERHEAD * (1 + len(positions))
+
+    def undo(self, card_manager):
+        # 已被彻底删除（清空回收站或过期整理）的卡片不再放回，只恢复仍在回收站中的卡片
+        taken = {card['id']: card for card in
+                 card_manager._take_from_trash(card['id'] for _, card in self.positions)}
+        positions = []
+        purged = 0
+        for index, card in self.positions:
+            if card['id'] in taken:
+                # 位置按删除前的列表计算，前面被清除的卡片不再占位
+                positions.append((index - purged, taken[card['id']]))
+            else:
+                purged += 1
+        card_manager._insert_cards_at(positions)
+
+    def redo(self, card_manager):
+        removed = card_manager._remove_cards_by_id({card['id'] for _, card in self.positions})
+        card_manager._put_in_trash([(card, None) for card in removed])
+
+
+class RestoreCards(Command):
+    """从回收站恢复：记录每张卡片及其删除时间，撤销时原样放回回收站"""
+
+    def __init__(self, entries: List[Tuple[Any, Any]]):
+        self.entries = entries
+        self.size = _ENTRY_OVERHEAD * (1 + len(entries))
+
+    def undo(self, card_manager):
+        card_manager._remove_cards_by_id({card['id'] for card, _ in self.entries})
+        card_manager._put_in_trash(self.entries)
+
+    def redo(self, card_manager):
+        card_manager._restore_from_trash([card['id'] for card, _ in self.entries])
+
+
+class UpdateFields(Command):
+    """修改字段：{卡片ID: {字段: (旧值, 新值)}}，不存在的字段用MISSING表示"""
+
+    def __init__(self, changes: Dict[str, Dict[str, Tuple[Any, Any]]]):
+        self.changes = changes
+        self.size = _ENTRY_OVERHEAD + sum(
+            _ENTRY_OVERHEAD + sum(_value_size(old) + _value_size(new) for old, new in fields.values())
+            for fields in changes.values())
+
+    def undo(self, card_manager):
+        card_manager._set_card_fields({card_id: {field: old for field, (old, _) in fields.items()}
+                                       for card_id, fields in self.changes.items()})
+
+    def redo(self, card_manager):
+        card_manager._set_card_fields({card_id: {field: new for field, (_, new) in fields.items()}
+                                       for card_id, fields in self.changes.items()})
+
+    def merge(self, other: Command) -> bool:
+        if not isinstance(other, UpdateFields):
+            return False
+        for card_id, fields in other.changes.items():
+            merged = self.changes.setdefault(card_id, {})
+            for field, (old, new) in fields.items():
+                # 保留最早的旧值和最新的新值
+                merged[field] = (merged[field][0] if field in merged else old, new)
+        self.size += other.size - _ENTRY_OVERHEAD
+        return True
+
+
+class ReplaceCards(Command):
+    """整体替换卡片列表（清空、从备份恢复）"""
+
+    def __init__(self, old_cards: List[Any], new_cards: List[Any]):
+        self.old_cards = old_cards
+        self.new_cards = new_cards
+        self.size = _ENTRY_OVERHEAD + sum(card_size(card) for card in old_cards)
+
+    def undo(self, card_manager):
+        card_manager._replace_all_cards(list(self.old_cards))
+
+    def redo(self, card_manager):
+        card_manager._replace_all_cards(list(self.new_cards))
+
+
+class CompoundCommand(Command):
+    """一组命令，整体撤销（逆序）和重做（顺序）"""
+
+    def __init__(self):
+        self.commands: List[Command] = []
+        self.size = _ENTRY_OVERHEAD
+
+    def add(self, command: Command):
+        """加入一条命令（能与上一条合并时直接合并）"""
+        if self.commands and self.commands[-1].merge(command):
+            self.size += command.size - _ENTRY_OVERHEAD
+        else:
+            self.commands.append(command)
+            self.size += command.size
+
+    def undo(self, card_manager):
+        for command in reversed(self.commands):
+            command.undo(card_manager)
+
+    def redo(self, card_manager):
+        for command in self.commands:
+            command.redo(card_manager)
+
+
+class UndoHistory:
+    """
+    撤销/重做历史
+
+    撤销和重做记录的总占用超过memory_budget时丢弃最早的撤销记录；
+    最近的一条记录即使单独超出预算也会保留，保证刚做的操作总能撤销。
+    """
+
+    def __init__(self, memory_budget: int):
+        """
+        Args:
+            memory_budget: 历史最多占用的内存（字节，估算值）
+        """
+        self.memory_budget = memory_budget
+        self._undo: deque = deque()
+        self._redo: deque = deque()
+        self._group: Optional[CompoundCommand] = None
+        self._group_depth = 0
+        self.memory_usage = 0
+
+    def record(self, command: Command):
+        """记录一条新命令（清空重做记录）"""
+        if self._group is not None:
+            self._group.add(command)
+            return
+        self._push(command)
+
+    @contextmanager
+    def group(self):
+        """组合上下文：块内记录的命令合并为一条复合命令（支持嵌套）"""
+        if self._group_depth == 0:
+            self._group = CompoundCommand()
+        self._group_depth += 1
+        try:
+            yield
+        finally:
+            self._group_depth -= 1
+            if self._group_depth == 0:
+                group, self._group = self._group, None
+                if len(group.commands) == 1:
+                    self._push(group.commands[0])
+                elif group.commands:
+                    self._push(group)
+
+    def pop_undo(self) -> Optional[Command]:
+        """取出最近一条可撤销的命令（移入重做记录）"""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        self._redo.append(command)
+        return command
+
+    def pop_redo(self) -> Optional[Command]:
+        """取出最近一条可重做的命令（移回撤销记录）"""
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        self._undo.append(command)
+        return command
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self):
+        """清空历史（例如重新加载数据后）"""
+        self._undo.clear()
+        self._redo.clear()
+        self.memory_usage = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+    def _push(self, command: Command):
+        """加入撤销记录并按预算裁剪"""
+        for dropped in self._redo:
+            self.memory_usage -= dropped.size
+        self._redo.clear()
+        self._undo.append(command)
+        self.memory_usage += command.size
+        while self.memory_usage > self.memory_budget and len(self._undo) > 1:
+            self.memory_usage -= self._undo.popleft().size
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+卡片派生索引：ID映射、关键词排序键和逐字倒排表
+
+索引以immediate方式订阅CardManager的变更事件，每次增删改后立即增量更新，
+因此在批量操作中途也与卡片数据保持一致。倒排表和排序键都按规范化文本（繁简、异体字统一，
+见card_normalize.py）建立，"學"和"学"互相能找到、排在一起。索引状态可以整体导出，
+和卡片一起写入预热快照（见card_snapshot.py），下次启动时直接恢复而不必重建；
+倒排表在快照中单独打包，第一次搜索或修改卡片时才解开，不占用启动时间。
+"""
+
+import pickle
+from typing import Any, Dict, Iterable, Optional, Set
+
+from card_events import CardEvent, CARD_ADDED, CARD_UPDATED, CARD_DELETED, CARDS_REPLACED
+from card_normalize import normalize_text
+from card_record import normalized_text
+from pinyin_support import get_lazy_pinyin, pinyin_available
+
+
+def compute_sort_key(keyword: str):
+    """关键词排序键（按规范化文本：有pypinyin时按拼音，否则按字符）"""
+    keyword = normalize_text(keyword)
+    lazy_pinyin = get_lazy_pinyin()
+    if lazy_pinyin is not None:
+        # 使用pypinyin进行中文拼音排序
+        return lazy_pinyin(keyword)
+    # 使用Python内置排序（可能不够准确）
+    return keyword
+
+
+class CardIndex:
+    """
+    卡片索引
+
+    - id_map: 卡片ID → 卡片
+    - sort_keys: 卡片ID → (计算时的关键词, 排序键)，关键词变化后自动失效
+    - postings: 字符 → 含有该字符的卡片ID集合（规范化文本，覆盖SEARCH_FIELDS）
+    """
+
+    # 参与全文搜索的字段
+    SEARCH_FIELDS = ('keyword', 'definition', 'source', 'quote', 'notes')
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表）
+        """
+        self.card_manager = card_manager
+        self.id_map: Dict[str, Dict[str, Any]] = {}
+        self.sort_keys: Dict[str, tuple] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        # 卡片ID → 卡片文本中的字符（从快照恢复的是字符串，同样只用于逐字遍历）
+        self._card_chars: Dict[str, Iterable[str]] = {}
+        # 从快照恢复、还没有解开的倒排表和字符集合（pickle数据）
+        self._packed: Optional[bytes] = None
+        # 缓存的排序键是否按拼音计算（None表示还没有计算过）
+        self._sort_keys_pinyin: Optional[bool] = None
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时增量更新索引"""
+        if event.type == CARDS_REPLACED:
+            self.rebuild()
+        elif event.type == CARD_DELETED:
+            for card_id in event.card_ids:
+                self._remove(card_id)
+        elif event.type == CARD_ADDED:
+            # 从快照恢复的卡片已经在索引中，不需要重新索引
+            pending = [card_id for card_id in event.card_ids if card_id not in self.id_map]
+            self._reindex(pending)
+        elif event.type == CARD_UPDATED:
+            self._refresh(event.card_ids)
+
+    def rebuild(self):
+        """按当前卡片列表重建全部索引"""
+        self.id_map = {}
+        self.sort_keys = {}
+        self._postings = {}
+        self._card_chars = {}
+        self._packed = None
+        for card in self.card_manager.cards:
+            self._add(card)
+
+    @property
+    def postings(self) -> Dict[str, Set[str]]:
+        """字符 → 含有该字符的卡片ID集合（从快照恢复的在第一次使用时解开）"""
+        if self._packed is not None:
+            self._postings, self._card_chars = pickle.loads(self._packed)
+            self._packed = None
+        return self._postings
+
+    def get(self, card_id: str) -> Optional[Dict[str, Any]]:
+        """按ID获取卡片（O(1)）"""
+        return self.id_map.get(card_id)
+
+    def sort_key(self, card: Dict[str, Any]):
+        """获取卡片的关键词排序键（优先使用缓存）"""
+        pinyin = pinyin_available()
+        if pinyin != self._sort_keys_pinyin:
+            # 缓存的排序键是在有无pypinyin不同的环境下计算的，全部作废
+            self.sort_keys = {}
+            self._sort_keys_pinyin = pinyin
+        keyword = card['keyword']
+        cached = self.sort_keys.get(card.get('id'))
+        if cached is not None and cached[0] == keyword:
+            return cached[1]
+        key = compute_sort_key(keyword)
+        if self.id_map.get(card.get('id')) is card:
+            self.sort_keys[card['id']] = (keyword, key)
+        return key
+
+    def candidates(self, query: str) -> Optional[Set[str]]:
+        """
+        用倒排表找出可能包含query的卡片ID
+
+        Args:
+            query: 搜索文本
+
+        Returns:
+            Optional[Set[str]]: 候选卡片ID（需要再逐张确认），query为空时返回None
+        """
+        chars = set(normalize_text(query))
+        if not chars:
+            return None
+        # 从最短的倒排表开始求交集
+        postings = sorted((self.postings.get(char, set()) for char in chars), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        导出索引状态（写入快照用）
+
+        ID映射不导出（恢复时按卡片列表重建）。倒排表和每张卡片的字符（存为字符串）单独打包，
+        恢复时先不解开；还没有解开过的直接沿用原来的打包数据。
+        """
+        packed = self._packed
+        if packed is None:
+            card_chars = {card_id: ''.join(chars) for card_id, chars in self._card_chars.items()}
+            packed = pickle.dumps((self._postings, card_chars), protocol=pickle.HIGHEST_PROTOCOL)
+        return {
+            'sort_keys': self.sort_keys,
+            'sort_keys_pinyin': self._sort_keys_pinyin,
+            'count': len(self.id_map),
+            'search': packed,
+        }
+
+    def restore_state(self, state: Dict[str, Any], cards: Iterable[Dict[str, Any]]):
+        """
+        恢复导出的索引状态（来自与卡片一起保存的快照）
+
+        快照只在卡片与索引一致时写入；万一恢复后的卡片数与索引对不上，按卡片列表重建。
+
+        Args:
+            state: export_state导出的状态
+            cards: 与状态一起保存的卡片列表
+        """
+        self.id_map = {}
+        for card in cards:
+            # 重复ID：保留先出现的卡片（与_add一致）
+            self.id_map.setdefault(card.get('id'), card)
+        self.id_map.pop(None, None)
+        self.sort_keys = state['sort_keys']
+        self._sort_keys_pinyin = state['sort_keys_pinyin']
+        self._postings, self._card_chars = {}, {}
+        self._packed = state['search']
+
+        if state['count'] != len(self.id_map):
+            id_map = self.id_map
+            self.id_map, self.sort_keys, self._packed = {}, {}, None
+            for card in id_map.values():
+                self._add(card)
+
+    def _refresh(self, card_ids: Iterable[str]):
+        """
+        重新索引修改过的卡片（按ID直接取卡片，不遍历卡片列表）
+
+        修改时换成新卡片对象的操作会同时更新id_map（见CardManager._own_card_at），
+        所以id_map中的就是当前的卡片对象。
+        """
+        for card_id in card_ids:
+            card = self.id_map.get(card_id)
+            if card is not None:
+                self._remove(card_id)
+                self._add(card)
+
+    def _reindex(self, card_ids: Iterable[str]):
+        """重新索引指定的卡片（按ID从卡片列表中找到当前的卡片对象）"""
+        wanted = set(card_ids)
+        if not wanted:
+            return
+        # 新增的卡片通常在列表末尾，从后往前找
+        for card in reversed(self.card_manager.cards):
+            card_id = card.get('id')
+            if card_id in wanted:
+                self._remove(card_id)
+                self._add(card)
+                wanted.discard(card_id)
+                if not wanted:
+                    break
+        # 找不到的卡片已经不在列表中
+        for card_id in wanted:
+            self._remove(card_id)
+
+    def _add(self, card: Dict[str, Any]):
+        """把一张卡片加入索引"""
+        card_id = card.get('id')
+        if card_id is None:
+            return
+        if card_id in self.id_map:
+            # 重复ID：保留先出现的卡片（与按列表顺序查找的结果一致）
+            return
+        self.id_map[card_id] = card
+        postings = self.postings
+        chars = frozenset(self._search_text(card))
+        self._card_chars[card_id] = chars
+        for char in chars:
+            posting = postings.get(char)
+            if posting is None:
+                postings[char] = {card_id}
+            else:
+                posting.add(card_id)
+
+    def _remove(self, card_id: str):
+        """把一张卡片移出索引"""
+        if self.id_map.pop(card_id, None) is None:
+            return
+        self.sort_keys.pop(card_id, None)
+        postings = self.postings
+        for char in self._card_chars.pop(card_id, ()):
+            posting = postings.get(char)
+            if posting is not None:
+                posting.discard(card_id)
+                if not posting:
+                    del postings[char]
+
+    def _search_text(self, card: Dict[str, Any]) -> str:
+        """卡片参与搜索的文本（规范化文本，同时缓存在卡片记录中供逐张确认时使用）"""
+        return "\n".join(normalized_text(card, field) for field in self.SEARCH_FIELDS)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+读写锁
+
+CardManager的修改方法持有写锁，读取方法持有读锁：多个读线程（后台搜索、序列化）可以同时读取，
+写入时独占。等待中的写线程优先，避免持续的读取让界面上的修改一直等待。
+
+锁可重入：持有写锁的线程可以再次获取写锁或读锁（修改方法内部会调用其他方法）；
+持有读锁的线程可以再次获取读锁，但不能升级为写锁（会抛出RuntimeError，而不是死锁）。
+"""
+
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+
+class ReadWriteLock:
+    """可重入、写优先的读写锁"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0  # 持有读锁的线程数
+        self._writer = None  # 持有写锁的线程
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()  # 本线程的读锁重入深度
+
+    def acquire_read(self):
+        """获取读锁"""
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth or self._writer == threading.get_ident():
+            # 重入，或在持有写锁的线程中读取
+            local.depth = depth + 1
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        local.depth = 1
+        local.counted = True
+
+    def release_read(self):
+        """释放读锁"""
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0 and getattr(local, 'counted', False):
+            local.counted = False
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        """获取写锁"""
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'depth', 0):
+            raise RuntimeError("持有读锁时不能获取写锁")
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        """释放写锁"""
+        self._write_depth -= 1
+        if self._write_depth == 0:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """读锁上下文"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """写锁上下文"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def reads(method):
+    """方法装饰器：在self.lock的读锁中执行"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def writes(method):
+    """方法装饰器：在self.lock的写锁中执行"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -10,27 +10,69 @@ import json
 import os
 import re
 import sys
+import threading
 import uuid
-from datetime import datetime
-from typing import List, Dict, Optional, Any
+import weakref
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Any, Set, Tuple
 
-# 尝试导入pypinyin库用于中文排序，如果没有安装则使用备选方案
-try:
-    from pypinyin import lazy_pinyin
-    PINYIN_AVAILABLE = True
-except ImportError:
-    PINYIN_AVAILABLE = False
+from card_events import (CardEventBus, CARD_ADDED, CARD_UPDATED, CARD_DELETED,
+                         CARD_FAVORITED, CARDS_REPLACED)
+from card_columns import CardColumns, CardRows
+from card_concordance import CharIndex, Concordance, is_han, source_order
+from card_fuzzy import FuzzyIndex
+from card_history import (MISSING, InsertCards, RemoveCards, ReplaceCards, RestoreCards, TrashCards,
+                          UndoHistory, UpdateFields)
+from card_index import CardIndex
+from card_lock import ReadWriteLock, reads, writes
+from card_query import CardQuery
+from card_search_cache import SearchCache
+from card_sources import SourceIndex
+from card_tags import TagIndex, clean_tags
+from card_normalize import normalize_text
+from card_record import (Card, card_to_json, cards_from_columns, cards_to_columns, cards_to_json,
+                         normalized_text, time_micros)
+from card_snapshot import gc_paused, read_snapshot, write_snapshot
+from card_views import CardsSnapshot, CardsView, ReadOnlyCards
+
+
+def user_data_dir() -> str:
+    """获取跨平台的用户数据目录（可读写）"""
+    # 根据系统获取用户目录
+    home_dir = os.path.expanduser("~")  # 通用用户目录
+    
+    # 按系统拼接App专用目录
+    if os.name == "nt":  # Windows
+        # Windows：C:\\Users\\用户名\\AppData\\Local\\ancient_chinese_cards
+        app_data_dir = os.getenv("LOCALAPPDATA", os.path.join(home_dir, "AppData", "Local"))
+        user_dir = os.path.join(app_data_dir, "ancient_chinese_cards")
+    elif os.name == "posix":  # Mac/Linux
+        # Mac：~/Library/Application Support/ancient_chinese_cards
+        # Linux：~/.config/ancient_chinese_cards
+        if sys.platform == "darwin":
+            user_dir = os.path.join(home_dir, "Library", "Application Support", "ancient_chinese_cards")
+        else:
+            user_dir = os.path.join(home_dir, ".config", "ancient_chinese_cards")
+    else:
+        # 其他系统：用户目录下的.ancient_chinese_cards
+        user_dir = os.path.join(home_dir, ".ancient_chinese_cards")
+    
+    return user_dir
 
 
 class CardManager:
     """卡片管理器类"""
     
-    def __init__(self, data_file: str = "cards.json"):
+    def __init__(self, data_file: str = "cards.json", auto_load: bool = True, soft_delete: bool = False):
         """
         初始化卡片管理器
         
         Args:
             data_file: 卡片数据存储文件路径（相对于用户数据目录）
+            auto_load: 是否立即同步加载卡片（图形界面传False，改为后台加载）
+            soft_delete: 删除时是否移入回收站（可恢复，过期后由整理清除）
         """
         # 获取用户数据目录（跨平台兼容）
         self.user_data_dir = self._get_user_data_dir()
@@ -38,35 +80,146 @@ class CardManager:
         self.data_file = os.path.join(self.user_data_dir, data_file)
         self.cards: List[Dict[str, Any]] = []
         self.modified_cards = set()  # 用于跟踪被修改的卡片ID
-        # 撤销栈 - 用于保存删除操作的卡片数据
-        self.undo_stack = []
+        # 回收站：卡片ID → 已删除的卡片（带deleted_at墓碑标记，不在cards中，视图和索引都看不到）
+        self.soft_delete = soft_delete
+        self.trash: Dict[str, Dict[str, Any]] = {}
+        # 撤销/重做历史：记录所有修改，超出内存预算时自动丢弃最早的操作
+        self.history = UndoHistory(self.UNDO_MEMORY_BUDGET)
+        # 变更通知：视图通过subscribe订阅卡片的增删改事件
+        self.events = CardEventBus()
+        # 派生索引（ID映射、排序键、倒排表），立即随每次变更更新
+        self.index = CardIndex(self)
+        self.events.subscribe(self.index.on_cards_changed, immediate=True)
+        # 卡片ID → 位置（第一次按ID取卡片时才建立，删除和中间插入后下次使用时重建）
+        self._rows = None
+        self._rows_lock = threading.Lock()
+        # 列式镜像（第一次按条件筛选时才建立；筛选时可能补建，多个读线程之间用互斥锁串行）
+        self._columns = None
+        self._columns_lock = threading.Lock()
+        # 模糊搜索的n-gram倒排表（第一次模糊搜索时才建立）
+        self._fuzzy = None
+        self._fuzzy_lock = threading.Lock()
+        # 逐字索引（第一次按字查看时才建立）
+        self._chars = None
+        self._chars_lock = threading.Lock()
+        # 出处层级索引（第一次按出处浏览时才建立）
+        self._sources = None
+        self._sources_lock = threading.Lock()
+        # 标签索引（第一次使用标签管理时才建立）
+        self._tags = None
+        self._tags_lock = threading.Lock()
+        # 读写锁：修改方法持有写锁，读取方法持有读锁（见card_lock.py）
+        self.lock = ReadWriteLock()
+        # 版本号：每次变更加一，快照和缓存据此判断数据是否变化
+        self.version = 0
+        self.events.subscribe(self._bump_version, immediate=True)
+        # 搜索结果缓存：按查询和版本号缓存，变更时只作废可能受影响的结果（须在版本号递增之后订阅）
+        self.search_cache = SearchCache(self, self.SEARCH_CACHE_SIZE)
+        self.events.subscribe(self.search_cache.on_cards_changed, immediate=True)
+        # 仍然存在的只读快照；有快照时列表和卡片写时复制（见snapshot）
+        self._snapshots = weakref.WeakValueDictionary()  # id → 快照
+        self._cards_shared = False  # 当前列表是否可能被快照引用
+        self._owned = set()  # 最近一次快照之后复制出来、可以直接修改的卡片（对象id）
+        # 数据文件同一时间只由一个线程写入
+        self._save_lock = threading.Lock()
+        # 加载代号：每次开始加载或整体替换数据时递增，过期的加载结果会被丢弃
+        self.load_generation = 0
+        self.loading = False  # 是否正在加载（加载期间推迟保存，避免用不完整的数据覆盖文件）
+        self._save_pending = False
+        self._loaded_from_snapshot = False  # 本次加载是否来自预热快照
+        self._save_failed = False  # 最近一次保存是否失败（内存中有没写入数据文件的修改）
+        self._snapshot_current = False  # 预热快照是否与数据文件一致（从快照加载后没有再保存过）
         # 确保数据目录存在
         self.ensure_data_directory()
         # 加载卡片数据
-        self.load_cards()
+        if auto_load:
+            self.load_cards()
+    
+    def subscribe(self, listener):
+        """
+        订阅卡片变更事件
+        
+        Args:
+            listener: 回调函数，参数为card_events.CardEvent
+        """
+        self.events.subscribe(listener)
+    
+    def unsubscribe(self, listener):
+        """取消订阅卡片变更事件"""
+        self.events.unsubscribe(listener)
+    
+    @contextmanager
+    def batch(self):
+        """
+        批量操作上下文，块内的变更事件合并后一次性通知，块内的修改记录为一个撤销操作
+        
+        用法:
+            with card_manager.batch():
+                for card_id in card_ids:
+                    card_manager.toggle_favorite(card_id)
+        """
+        with self.lock.write(), self.events.batch(), self.history.group():
+            yield
+    
+    def snapshot(self) -> CardsSnapshot:
+        """
+        获取当前卡片的只读快照（不复制列表，可在任意线程中调用）
+        
+        快照存在期间，卡片管理器修改列表前先换成新列表、修改卡片前先换成卡片副本，
+        因此后台线程可以不持锁地遍历、搜索或序列化快照，同时界面照常修改卡片。
+        
+        Returns:
+            CardsSnapshot: 卡片列表、回收站和版本号
+        """
+        with self.lock.read():
+            snapshot = CardsSnapshot(self.cards, tuple(self.trash.values()), self.version)
+            self._snapshots[id(snapshot)] = snapshot
+            self._cards_shared = True
+            self._owned = set()
+            return snapshot
+    
+    def _bump_version(self, event):
+        """卡片变更时递增版本号"""
+        self.version += 1
+    
+    def _writable_cards(self) -> List[Dict[str, Any]]:
+        """修改卡片列表前调用：列表可能被快照引用时先换成副本（写时复制）"""
+        if self._cards_shared:
+            self._cards_shared = False
+            if self._snapshots:
+                self.cards = list(self.cards)
+        return self.cards
+    
+    def _own(self, card):
+        """修改卡片前调用：卡片可能被快照引用时返回副本（由调用方放回原处）"""
+        if not self._snapshots or id(card) in self._owned:
+            return card
+        card = card.copy()
+        self._owned.add(id(card))
+        return card
+    
+    def _own_card_at(self, i: int):
+        """取得卡片列表第i张卡片的可修改版本（换成副本时同时更新列表和ID索引）"""
+        card = self.cards[i]
+        owned = self._own(card)
+        if owned is not card:
+            self._writable_cards()[i] = owned
+            self.index.id_map[owned['id']] = owned
+        return owned
+    
+    def _own_card(self, card_id: str):
+        """按ID取得可修改的卡片（没有快照时不需要查找位置）"""
+        card = self.get_card(card_id)
+        if card is None or not self._snapshots or id(card) in self._owned:
+            return card
+        for i, item in enumerate(self.cards):
+            if item is card:
+                return self._own_card_at(i)
+        return card
     
     def _get_user_data_dir(self) -> str:
         """获取跨平台的用户数据目录（可读写）"""
-        # 根据系统获取用户目录
-        home_dir = os.path.expanduser("~")  # 通用用户目录
-        
-        # 按系统拼接App专用目录
-        if os.name == "nt":  # Windows
-            # Windows：C:\\Users\\用户名\\AppData\\Local\\ancient_chinese_cards
-            app_data_dir = os.getenv("LOCALAPPDATA", os.path.join(home_dir, "AppData", "Local"))
-            user_dir = os.path.join(app_data_dir, "ancient_chinese_cards")
-        elif os.name == "posix":  # Mac/Linux
-            # Mac：~/Library/Application Support/ancient_chinese_cards
-            # Linux：~/.config/ancient_chinese_cards
-            if sys.platform == "darwin":
-                user_dir = os.path.join(home_dir, "Library", "Application Support", "ancient_chinese_cards")
-            else:
-                user_dir = os.path.join(home_dir, ".config", "ancient_chinese_cards")
-        else:
-            # 其他系统：用户目录下的.ancient_chinese_cards
-            user_dir = os.path.join(home_dir, ".ancient_chinese_cards")
-        
-        return user_dir
+        return user_data_dir()
     
     def ensure_data_directory(self):
         """确保数据目录存在（改进：添加异常处理和提示）"""
@@ -79,9 +232,10 @@ class CardManager:
             # 明确提示目录创建失败
             raise RuntimeError(f"无法创建数据目录：{data_dir}，错误：{str(e)}") from e
     
+    @reads
     def find_duplicate_card(self, keyword: str, definition: str) -> Optional[str]:
         """
-        查找重复卡片
+        查找重复卡片（按规范化文本比较，繁简、异体字写法不同也算重复）
         
         Args:
             keyword: 关键词
@@ -90,13 +244,16 @@ class CardManager:
         Returns:
             Optional[str]: 如果找到重复卡片，返回卡片ID，否则返回None
         """
+        keyword = normalize_text(keyword.strip())
+        definition = normalize_text(definition.strip())
         for card in self.cards:
-            if (card['keyword'].strip() == keyword.strip() and 
-                card['definition'].strip() == definition.strip()):
+            if (normalized_text(card, 'keyword').strip() == keyword and 
+                normalized_text(card, 'definition').strip() == definition):
                 return card['id']
         
         return None
     
+    @writes
     def merge_cards(self, card_id1: str, card_data2: Dict[str, Any]) -> bool:
         """
         合并两张卡片
@@ -133,15 +290,29 @@ class CardManager:
         
         return self.update_card(card_id1, updated_data)
     
-    def get_all_cards(self) -> List[Dict[str, Any]]:
+    def get_all_cards(self) -> CardsSnapshot:
+        """
+        获取所有卡片（只读快照，不复制列表；需要可修改的列表时用list()）
+        
+        Returns:
+            CardsSnapshot: 所有卡片
+        """
+        return self.snapshot()
+    
+    def _view(self, positions, spans=None) -> CardsView:
+        """当前卡片列表中若干位置的只读视图，spans是各自的匹配位置（调用方持有读锁）"""
+        return CardsView(self.snapshot(), positions, spans)
+    
+    def query(self) -> CardQuery:
         """
-        获取所有卡片数据
+        创建惰性查询，例如 query().where(fav=True).match("之").order_by("keyword_pinyin").limit(100)
         
         Returns:
-            List[Dict[str, Any]]: 卡片数据列表
+            CardQuery: 匹配所有卡片的查询，组合条件后用run()或遍历执行
         """
-        return self.cards.copy()
+        return CardQuery(self)
     
+    @writes
     def add_cards(self, cards_data: List[Dict[str, Any]]) -> int:
         """
         批量添加卡片
@@ -153,6 +324,8 @@ class CardManager:
             int: 成功添加的卡片数量
         """
         added_count = 0
+        cards = self._writable_cards()
+        start = len(cards)
         
         for card_data in cards_data:
             # 确保卡片数据包含必要字段
@@ -163,17 +336,21 @@ class CardManager:
                 card_data['created_at'] = datetime.now().isoformat()
                 card_data['updated_at'] = datetime.now().isoformat()
                 
-                # 添加到卡片列表
-                self.cards.append(card_data)
+                # 添加到卡片列表（以紧凑的卡片记录保存）
+                cards.append(Card.from_dict(card_data))
                 self.modified_cards.add(card_data['id'])
                 added_count += 1
         
         # 保存卡片
         if added_count > 0:
+            # 整批新增记录为一个撤销操作
+            self.history.record(InsertCards(list(enumerate(self.cards[start:], start))))
             self.save_cards()
+            self.events.emit(CARD_ADDED, [card['id'] for card in self.cards[-added_count:]])
         
         return added_count
     
+    @writes
     def clear_cards(self) -> bool:
         """
         清空所有卡片
@@ -182,9 +359,12 @@ class CardManager:
             bool: 操作是否成功
         """
         try:
-            # 清空卡片列表
-            self.cards.clear()
+            # 清空卡片列表（未完成的加载作废）
+            self.cancel_load()
+            self.history.record(ReplaceCards(self.cards[:], []))
+            self._writable_cards().clear()
             self.modified_cards.clear()
+            self.events.emit(CARDS_REPLACED)
             
             # 保存空数据
             return self.save_cards()
@@ -192,6 +372,7 @@ class CardManager:
             print(f"清空卡片失败: {str(e)}")
             return False
     
+    @writes
     def add_card(self, card_data: Dict[str, Any], allow_duplicates: bool = False) -> str:
         """
         添加新卡片
@@ -218,7 +399,7 @@ class CardManager:
         card_id = self._generate_unique_id()
         
         # 创建完整的卡片数据
-        card = {
+        card = Card({
             'id': card_id,
             'keyword': keyword,
             'definition': definition,
@@ -228,16 +409,18 @@ class CardManager:
             'tags': card_data.get('tags', []),
             'created_at': datetime.now().isoformat(),
             'updated_at': datetime.now().isoformat()
-        }
+        })
         
         # 添加到卡片列表
-        self.cards.append(card)
+        self._writable_cards().append(card)
         
         # 标记为已修改
         self.modified_cards.add(card_id)
         
         # 保存卡片
         if self.save_cards():
+            self.history.record(InsertCards([(len(self.cards) - 1, card)]))
+            self.events.emit(CARD_ADDED, [card_id])
             return card_id
         else:
             # 保存失败，从列表中移除新卡片
@@ -245,6 +428,7 @@ class CardManager:
             self.modified_cards.remove(card_id)
             return None
     
+    @writes
     def update_card(self, card_id_or_data, card_data=None) -> bool:
         """
         更新卡片
@@ -261,7 +445,7 @@ class CardManager:
             bool: 更新是否成功
         """
         # 判断调用方式
-        if isinstance(card_id_or_data, dict) and card_data is None:
+        if isinstance(card_id_or_data, Mapping) and card_data is None:
             # 第二种调用方式：传入完整的卡片数据
             card_data = card_id_or_data
             card_id = card_data.get('id')
@@ -276,23 +460,29 @@ class CardManager:
         for i, card in enumerate(self.cards):
             if card['id'] == card_id:
                 # 更新卡片数据
-                if isinstance(card_id_or_data, dict):
+                if isinstance(card_id_or_data, Mapping):
                     # 完整卡片数据更新
-                    self.cards[i] = card_data
+                    self._writable_cards()[i] = Card.from_dict(card_data)
+                    self.index.id_map[card_id] = self.cards[i]
+                    self._record_field_changes(card_id, card, self.cards[i], set(card) | set(self.cards[i]))
                 else:
+                    before = {field: card.get(field, MISSING) for field in self.EDITABLE_FIELDS}
                     # 部分字段更新
-                    self.cards[i].update({
-                        'keyword': card_data.get('keyword', self.cards[i]['keyword']),
-                        'definition': card_data.get('definition', self.cards[i]['definition']),
-                        'source': card_data.get('source', self.cards[i]['source']),
-                        'quote': card_data.get('quote', self.cards[i]['quote']),
-                        'notes': card_data.get('notes', self.cards[i]['notes']),
-                        'tags': card_data.get('tags', self.cards[i]['tags']),
+                    card = self._own_card_at(i)
+                    card.update({
+                        'keyword': card_data.get('keyword', card['keyword']),
+                        'definition': card_data.get('definition', card['definition']),
+                        'source': card_data.get('source', card['source']),
+                        'quote': card_data.get('quote', card['quote']),
+                        'notes': card_data.get('notes', card['notes']),
+                        'tags': card_data.get('tags', card['tags']),
                         'updated_at': datetime.now().isoformat()
                     })
+                    self._record_field_changes(card_id, before, card, self.EDITABLE_FIELDS)
                 
                 # 标记为已修改
                 self.modified_cards.add(card_id)
+                self.events.emit(CARD_UPDATED, [card_id])
                 
                 # 保存卡片
                 if self.save_cards():
@@ -303,6 +493,23 @@ class CardManager:
         
         return False
     
+    # 部分更新时可能被修改的字段
+    EDITABLE_FIELDS = ('keyword', 'definition', 'source', 'quote', 'notes', 'tags', 'updated_at')
+    
+    def _record_field_changes(self, card_id: str, before, after, fields):
+        """把卡片修改前后不同的字段记录为一个撤销操作"""
+        changes = {}
+        for field in fields:
+            old = before.get(field, MISSING)
+            new = after.get(field, MISSING)
+            if old != new:
+                changes[field] = (old, new)
+        if changes:
+            self.history.record(UpdateFields({card_id: changes}))
+    
+    # 撤销/重做历史最多占用的内存（字节，估算值）
+    UNDO_MEMORY_BUDGET = 32 * 1024 * 1024
+    
     def delete_card(self, card_id: str) -> bool:
         """
         删除卡片（支持撤销）
@@ -313,30 +520,177 @@ class CardManager:
         Returns:
             bool: 删除是否成功
         """
+        return self.delete_cards([card_id]) > 0
+    
+    @writes
+    def delete_cards(self, card_ids) -> int:
+        """
+        批量删除卡片：一次遍历移除、只保存一次，并记录为一个撤销操作
+        
+        Args:
+            card_ids: 要删除的卡片ID
+        
+        Returns:
+            int: 实际删除的卡片数量
+        """
+        wanted = set(card_ids)
+        if not wanted:
+            return 0
+        
+        kept = []
+        removed = []  # [(原位置, 卡片)]
         for i, card in enumerate(self.cards):
-            if card['id'] == card_id:
-                # 保存卡片数据到撤销栈
-                self.undo_stack.append({
-                    'action': 'delete',
-                    'card_data': card.copy(),
-                    'index': i,
-                    'timestamp': datetime.now().isoformat()
-                })
-                
-                # 限制撤销栈大小，防止内存占用过大
-                if len(self.undo_stack) > 50:  # 最多保存50个操作
-                    self.undo_stack.pop(0)
-                
-                # 删除卡片
-                del self.cards[i]
-                self.save_cards()
-                return True
+            if card['id'] in wanted:
+                removed.append((i, card))
+            else:
+                kept.append(card)
+        if not removed:
+            return 0
+        
+        if self.soft_delete:
+            # 移入回收站：卡片由回收站保存，撤销记录只需位置
+            self.history.record(TrashCards(removed))
+            self._put_in_trash([(card, None) for _, card in removed])
+        else:
+            # 已删除的卡片不会再被修改，撤销记录直接保存卡片对象
+            self.history.record(RemoveCards(removed))
         
-        return False
+        self._writable_cards()[:] = kept
+        self.save_cards()
+        self.events.emit(CARD_DELETED, [card['id'] for _, card in removed])
+        return len(removed)
+    
+    # 回收站中的卡片保留的天数，过期后由compact_trash清除
+    TRASH_RETENTION_DAYS = 30
+    
+    @reads
+    def get_trash_cards(self) -> List[Dict[str, Any]]:
+        """
+        获取回收站中的卡片
+        
+        Returns:
+            List[Dict[str, Any]]: 已删除的卡片，最近删除的在前
+        """
+        return list(reversed(self.trash.values()))
+    
+    @writes
+    def restore_from_trash(self, card_ids) -> int:
+        """
+        从回收站恢复卡片（每张O(1)：从回收站字典取出并追加到卡片列表末尾）
+        
+        Args:
+            card_ids: 要恢复的卡片ID
+        
+        Returns:
+            int: 实际恢复的卡片数量
+        """
+        entries = [(self.trash[card_id], self.trash[card_id].get('deleted_at'))
+                   for card_id in dict.fromkeys(card_ids) if card_id in self.trash]
+        if not entries:
+            return 0
+        self.history.record(RestoreCards(entries))
+        self._restore_from_trash([card['id'] for card, _ in entries])
+        self.save_cards()
+        return len(entries)
+    
+    @writes
+    def purge_trash(self, card_ids=None) -> int:
+        """
+        彻底删除回收站中的卡片（不可撤销）
+        
+        Args:
+            card_ids: 要彻底删除的卡片ID，None表示清空回收站
+        
+        Returns:
+            int: 彻底删除的卡片数量
+        """
+        if card_ids is None:
+            card_ids = list(self.trash)
+        purged = 0
+        for card_id in card_ids:
+            if self.trash.pop(card_id, None) is not None:
+                purged += 1
+        if purged:
+            self.version += 1
+            self.save_cards()
+        return purged
+    
+    @reads
+    def expired_trash_ids(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        找出在回收站中超过保留天数的卡片（只读，可在后台线程中调用）
+        
+        Args:
+            now: 当前时间，默认为现在
+        
+        Returns:
+            List[str]: 已过期的卡片ID
+        """
+        cutoff = time_micros((now or datetime.now()) - timedelta(days=self.TRASH_RETENTION_DAYS))
+        expired = []
+        for card_id, card in list(self.trash.items()):
+            deleted_at = time_micros(card.get('deleted_at'))
+            if deleted_at is not None and deleted_at < cutoff:
+                expired.append(card_id)
+        return expired
+    
+    @writes
+    def compact_trash(self, card_ids=None) -> int:
+        """
+        整理回收站：清除过期的墓碑并重写数据文件
+        
+        Args:
+            card_ids: 要清除的卡片ID（通常由后台线程调用expired_trash_ids得到），None表示现在查找
+        
+        Returns:
+            int: 清除的卡片数量
+        """
+        if card_ids is None:
+            card_ids = self.expired_trash_ids()
+        purged = self.purge_trash(card_ids)
+        if purged:
+            print(f"已从回收站清除 {purged} 张过期卡片")
+        return purged
+    
+    def _put_in_trash(self, entries):
+        """给卡片加上墓碑标记并放入回收站：entries为[(卡片, 删除时间)]，时间为None时取现在"""
+        now = datetime.now().isoformat()
+        for card, deleted_at in entries:
+            card = self._own(card)
+            card['deleted_at'] = deleted_at or now
+            self.trash[card['id']] = card
+    
+    def _take_from_trash(self, card_ids) -> List[Dict[str, Any]]:
+        """从回收站取出卡片并去掉墓碑标记（不放回卡片列表）"""
+        cards = []
+        for card_id in card_ids:
+            card = self.trash.pop(card_id, None)
+            if card is not None:
+                card = self._own(card)
+                card.pop('deleted_at', None)
+                cards.append(card)
+        return cards
+    
+    def _restore_from_trash(self, card_ids):
+        """把回收站中的卡片追加回卡片列表末尾"""
+        cards = self._take_from_trash(card_ids)
+        self._writable_cards().extend(cards)
+        self.modified_cards.update(card['id'] for card in cards)
+        self.events.emit(CARD_ADDED, [card['id'] for card in cards])
+    
+    def _split_tombstones(self, cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """把带墓碑标记的卡片放入回收站，返回其余卡片"""
+        live = []
+        for card in cards:
+            if 'deleted_at' in card:
+                self.trash[card['id']] = card
+            else:
+                live.append(card)
+        return live
     
     def get_card(self, card_id: str) -> Optional[Dict[str, Any]]:
         """
-        获取卡片
+        获取卡片（字典查找本身是原子的，不需要加锁）
         
         Args:
             card_id: 卡片ID
@@ -344,12 +698,9 @@ class CardManager:
         Returns:
             Optional[Dict[str, Any]]: 卡片数据，如果不存在则返回None
         """
-        for card in self.cards:
-            if card['id'] == card_id:
-                return card
-        
-        return None
+        return self.index.get(card_id)
     
+    @writes
     def toggle_favorite(self, card_id: str) -> bool:
         """
         切换卡片的收藏状态
@@ -360,17 +711,21 @@ class CardManager:
         Returns:
             bool: 操作后的收藏状态（True为已收藏，False为未收藏）
         """
-        for card in self.cards:
+        for i, card in enumerate(self.cards):
             if card['id'] == card_id:
                 # 切换收藏状态
+                card = self._own_card_at(i)
+                old = card.get('is_favorite', MISSING)
                 is_favorite = not card.get('is_favorite', False)
                 card['is_favorite'] = is_favorite
+                self.history.record(UpdateFields({card_id: {'is_favorite': (old, is_favorite)}}))
                 
                 # 标记为已修改
                 self.modified_cards.add(card_id)
                 
                 # 保存卡片
                 self.save_cards()
+                self.events.emit(CARD_FAVORITED, [card_id])
                 
                 return is_favorite
         
@@ -388,63 +743,348 @@ class CardManager:
         """
         results = {}
         
-        for card_id in card_ids:
-            is_favorite = self.toggle_favorite(card_id)
-            results[card_id] = is_favorite
+        # 合并为一次收藏变更通知和一个撤销操作
+        with self.batch():
+            for card_id in card_ids:
+                is_favorite = self.toggle_favorite(card_id)
+                results[card_id] = is_favorite
         
         return results
     
-    def get_favorite_cards(self) -> List[Dict[str, Any]]:
+    @reads
+    def get_favorite_cards(self) -> CardsView:
         """
         获取所有收藏的卡片
         
         Returns:
-            List[Dict[str, Any]]: 收藏的卡片列表
+            CardsView: 收藏的卡片（只读视图）
         """
-        return [card for card in self.cards if card.get('is_favorite', False)]
+        return self.query().where(favorite=True).run()
     
-    def get_all_cards(self) -> List[Dict[str, Any]]:
+    # 卡片数量达到该值时，只按收藏筛选也改用列式镜像
+    COLUMNAR_THRESHOLD = 20000
+    
+    @reads
+    def filter_cards(self, **criteria) -> CardsView:
         """
-        获取所有卡片
+        按来源、创建时间范围、收藏和标签筛选卡片（在列式镜像上完成，有NumPy时向量化）
+        
+        Args:
+            **criteria: 筛选条件，见CardColumns.filter（sources、created_from、created_to、
+                favorite、tags、any_tag）
         
         Returns:
-            List[Dict[str, Any]]: 所有卡片列表
+            CardsView: 符合条件的卡片（只读视图），保持原有顺序
         """
-        return self.cards
+        return self._view(self._filter_rows(criteria))
+    
+    def _filter_rows(self, criteria) -> List[int]:
+        """在列式镜像上筛选，返回卡片的位置（调用方持有读锁）"""
+        with self._columns_lock:
+            return self._column_mirror().filter_rows(**criteria)
+    
+    def _column_mirror(self) -> CardColumns:
+        """列式镜像（第一次使用时建立，调用方持有_columns_lock）"""
+        if self._columns is None:
+            self._columns = CardColumns(self)
+            self.events.subscribe(self._columns.on_cards_changed, immediate=True)
+        return self._columns
+    
+    def _rows_of(self, card_ids) -> List[int]:
+        """卡片的位置（升序，由"卡片ID → 位置"映射求出，调用方持有读锁）"""
+        with self._rows_lock:
+            if self._rows is None:
+                self._rows = CardRows(self)
+                self.events.subscribe(self._rows.on_cards_changed, immediate=True)
+            return self._rows.rows_of(card_ids)
+    
+    def _fuzzy_index(self) -> FuzzyIndex:
+        """模糊搜索的候选索引（第一次使用时建立，调用方持有读锁）"""
+        with self._fuzzy_lock:
+            if self._fuzzy is None:
+                self._fuzzy = FuzzyIndex(self)
+                self.events.subscribe(self._fuzzy.on_cards_changed, immediate=True)
+            return self._fuzzy
+    
+    def _char_index(self) -> CharIndex:
+        """逐字索引（第一次使用时建立，调用方持有读锁）"""
+        with self._chars_lock:
+            if self._chars is None:
+                self._chars = CharIndex(self)
+                self.events.subscribe(self._chars.on_cards_changed, immediate=True)
+            return self._chars
+    
+    @reads
+    def cards_with_char(self, char: str) -> CardsView:
+        """
+        关键词或原文含有某个汉字的卡片（查逐字索引，不必逐张查找文本；不区分繁简、异体字）
+        
+        Args:
+            char: 一个汉字
+        
+        Returns:
+            CardsView: 含有该字的卡片（只读视图），按出处排列
+        
+        Raises:
+            ValueError: char不是一个汉字
+        """
+        if not is_han(char):
+            raise ValueError(f"不是一个汉字：{char!r}")
+        ids = self._char_index().cards_with(char)
+        # 经"卡片ID → 位置"找到位置，代价与含该字的卡片数成正比
+        positions = self._rows_of(ids)
+        cards = self.cards
+        positions.sort(key=lambda row: source_order(cards[row]))
+        return self._view(positions)
+    
+    def concordance(self, char: str, context: int = 12, page_size: int = 50) -> Concordance:
+        """
+        某个汉字的语境索引（KWIC）：按出处排列，每处出现一行，翻页时才生成各行
+        
+        Args:
+            char: 一个汉字
+            context: 每行前后各显示的字数
+            page_size: 每页行数
+        
+        Returns:
+            Concordance: 语境索引（基于当前卡片的快照，之后的修改不影响它）
+        
+        Raises:
+            ValueError: char不是一个汉字
+        """
+        return Concordance(self.cards_with_char(char), char, context, page_size)
+    
+    def _source_index(self) -> SourceIndex:
+        """出处层级索引（第一次使用时建立，调用方持有读锁）"""
+        with self._sources_lock:
+            if self._sources is None:
+                self._sources = SourceIndex(self)
+                self.events.subscribe(self._sources.on_cards_changed, immediate=True)
+            return self._sources
+    
+    @reads
+    def source_books(self) -> List[Tuple[str, str, int]]:
+        """
+        按出处中的典籍分组（计数由出处索引随变更维护，不扫描卡片）
+        
+        Returns:
+            List[Tuple[str, str, int]]: [(典籍键, 显示名称, 卡片数), ...]，没有出处的在最后
+        """
+        return self._source_index().book_list()
+    
+    @reads
+    def source_chapters(self, book: str) -> List[Tuple[str, str, int]]:
+        """
+        某个典籍下按篇章分组
+        
+        Args:
+            book: 典籍键（source_books返回的第一项）
+        
+        Returns:
+            List[Tuple[str, str, int]]: [(篇章键, 显示名称, 卡片数), ...]，篇章键""表示未分篇
+        """
+        return self._source_index().chapter_list(book)
+    
+    @reads
+    def cards_in_source(self, book: str, chapter: Optional[str] = None) -> CardsView:
+        """
+        出处属于某个典籍（或其中某一篇章）的卡片（出处索引的卡片ID经"卡片ID → 行号"换成位置，不逐张扫描）
+        
+        Args:
+            book: 典籍键
+            chapter: 篇章键，None表示整个典籍
+        
+        Returns:
+            CardsView: 这些卡片（只读视图），保持原有顺序
+        """
+        return self.cards_with_ids(self._source_index().card_ids(book, chapter))
+    
+    def _tag_index(self) -> TagIndex:
+        """标签索引（第一次使用时建立，调用方持有读锁）"""
+        with self._tags_lock:
+            if self._tags is None:
+                self._tags = TagIndex(self)
+                self.events.subscribe(self._tags.on_cards_changed, immediate=True)
+            return self._tags
+    
+    @reads
+    def tag_counts(self) -> List[Tuple[str, int]]:
+        """
+        所有标签及其卡片数（由标签索引随变更维护，不扫描卡片）
+        
+        Returns:
+            List[Tuple[str, int]]: [(标签, 卡片数), ...]，卡片多的在前
+        """
+        return self._tag_index().counts()
+    
+    @reads
+    def tag_count(self, tag: str) -> int:
+        """有该标签的卡片数（O(1)）"""
+        return self._tag_index().count(tag)
+    
+    @reads
+    def filter_ids(self, tags=None, any_tag: bool = False, source: Optional[Tuple[str, Optional[str]]] = None,
+                   favorite: bool = False) -> Optional[Set[str]]:
+        """
+        同时满足标签、出处和收藏条件的卡片ID（由标签索引、出处索引和收藏的行号集合求交集，不逐张检查）
+        
+        Args:
+            tags: 标签，为空时不按标签筛选
+            any_tag: True时有其中任一标签即可，否则需要全部标签
+            source: (典籍键, 篇章键或None)，None表示不按出处筛选
+            favorite: 是否只要收藏的卡片
+        
+        Returns:
+            Optional[Set[str]]: 卡片ID，没有任何条件时返回None（表示全部卡片）
+        """
+        groups = []
+        if tags:
+            groups.append(self._tag_index().card_ids(tags, any_tag))
+        if source is not None:
+            groups.append(self._source_index().card_ids(*source))
+        if favorite:
+            with self._columns_lock:
+                groups.append(self._column_mirror().favorite_ids())
+        if not groups:
+            return None
+        groups.sort(key=len)
+        return groups[0].intersection(*groups[1:])
+    
+    @reads
+    def cards_with_ids(self, card_ids) -> CardsView:
+        """
+        一组卡片（经"卡片ID → 位置"映射找到位置，代价与卡片数成正比）
+        
+        Args:
+            card_ids: 卡片ID
+        
+        Returns:
+            CardsView: 这些卡片（只读视图），保持原有顺序
+        """
+        return self._view(self._rows_of(card_ids))
+    
+    def add_tags(self, card_ids, tags) -> int:
+        """
+        给多张卡片加上标签（批量：只保存一次，记录为一个撤销操作）
+        
+        Args:
+            card_ids: 卡片ID
+            tags: 一个或多个标签
+        
+        Returns:
+            int: 标签有变化的卡片数
+        """
+        tags = clean_tags(tags)
+        return self._edit_tags(card_ids, lambda old: old + [tag for tag in tags if tag not in old])
+    
+    def remove_tags(self, card_ids, tags) -> int:
+        """
+        去掉多张卡片的标签（批量：只保存一次，记录为一个撤销操作）
+        
+        Args:
+            card_ids: 卡片ID
+            tags: 一个或多个标签
+        
+        Returns:
+            int: 标签有变化的卡片数
+        """
+        tags = set(clean_tags(tags))
+        return self._edit_tags(card_ids, lambda old: [tag for tag in old if tag not in tags])
+    
+    @writes
+    def rename_tag(self, old_tag: str, new_tag: str) -> int:
+        """
+        重命名标签（新标签已存在时合并）
+        
+        Returns:
+            int: 标签有变化的卡片数
+        """
+        new_tag = new_tag.strip()
+        if not new_tag or new_tag == old_tag:
+            return 0
+        
+        def rename(old):
+            tags = [new_tag if tag == old_tag else tag for tag in old]
+            return [tag for i, tag in enumerate(tags) if tag not in tags[:i]]
+        return self._edit_tags(self._tag_index().card_ids(old_tag), rename)
+    
+    @writes
+    def delete_tag(self, tag: str) -> int:
+        """
+        从所有卡片上去掉一个标签
+        
+        Returns:
+            int: 标签有变化的卡片数
+        """
+        return self._edit_tags(self._tag_index().card_ids(tag), lambda old: [item for item in old if item != tag])
     
+    @writes
+    def _edit_tags(self, card_ids, edit) -> int:
+        """
+        批量修改标签：一次遍历找到卡片，只保存一次，记录为一个撤销操作
+        
+        标签是分类信息，与收藏一样不改变卡片的修改时间。
+        
+        Args:
+            card_ids: 卡片ID
+            edit: 由旧标签列表得到新标签列表的函数
+        
+        Returns:
+            int: 标签有变化的卡片数
+        """
+        wanted = set(card_ids)
+        if not wanted:
+            return 0
+        changes = {}
+        for i, card in enumerate(self.cards):
+            if card['id'] not in wanted:
+                continue
+            old = list(card.get('tags') or [])
+            new = edit(old)
+            if new != old:
+                card = self._own_card_at(i)
+                card['tags'] = new
+                changes[card['id']] = {'tags': (old, list(new))}
+                self.modified_cards.add(card['id'])
+        if not changes:
+            return 0
+        self.history.record(UpdateFields(changes))
+        self.save_cards()
+        self.events.emit(CARD_UPDATED, list(changes))
+        return len(changes)
+    
+    @writes
     def undo_last_action(self) -> bool:
         """
-        撤销上一个操作（目前支持撤销删除操作）
+        撤销上一个操作（新增、导入、编辑、合并、收藏、删除、清空和从备份恢复）
         
         Returns:
             bool: 撤销是否成功
         """
-        if not self.undo_stack:
+        command = self.history.pop_undo()
+        if command is None:
             return False
+        # 撤销过程中的变更合并为一次通知，最后只保存一次
+        with self.events.batch():
+            command.undo(self)
+        self.save_cards()
+        return True
+    
+    @writes
+    def redo_last_action(self) -> bool:
+        """
+        重做上一个被撤销的操作
         
-        # 获取最后一个操作
-        last_action = self.undo_stack.pop()
-        
-        if last_action['action'] == 'delete':
-            # 撤销删除操作 - 恢复被删除的卡片
-            card_data = last_action['card_data']
-            index = last_action.get('index', len(self.cards))
-            
-            # 确保索引有效
-            if index < 0:
-                index = 0
-            elif index > len(self.cards):
-                index = len(self.cards)
-            
-            # 恢复卡片到原位置
-            self.cards.insert(index, card_data)
-            
-            # 保存恢复后的数据
-            self.save_cards()
-            
-            return True
-        
-        return False
+        Returns:
+            bool: 重做是否成功
+        """
+        command = self.history.pop_redo()
+        if command is None:
+            return False
+        with self.events.batch():
+            command.redo(self)
+        self.save_cards()
+        return True
     
     def can_undo(self) -> bool:
         """
@@ -453,23 +1093,79 @@ class CardManager:
         Returns:
             bool: 是否有可撤销的操作
         """
-        return len(self.undo_stack) > 0
+        return self.history.can_undo()
+    
+    def can_redo(self) -> bool:
+        """检查是否有可重做的操作"""
+        return self.history.can_redo()
+    
+    def _remove_cards_by_id(self, card_ids) -> List[Dict[str, Any]]:
+        """撤销/重做时一次遍历移除指定卡片，返回实际移除的卡片"""
+        removed = [card for card in self.cards if card['id'] in card_ids]
+        self._writable_cards()[:] = [card for card in self.cards if card['id'] not in card_ids]
+        self.events.emit(CARD_DELETED, [card['id'] for card in removed])
+        return removed
+    
+    def _insert_cards_at(self, positions):
+        """撤销/重做时按原位置把卡片合并回列表（一次遍历，positions按位置升序）"""
+        restored = []
+        remaining = iter(self.cards)
+        for index, card in positions:
+            while len(restored) < index:
+                next_card = next(remaining, None)
+                if next_card is None:
+                    break
+                restored.append(next_card)
+            restored.append(card)
+        restored.extend(remaining)
+        self._writable_cards()[:] = restored
+        self.modified_cards.update(card['id'] for _, card in positions)
+        self.events.emit(CARD_ADDED, [card['id'] for _, card in positions])
+    
+    def _set_card_fields(self, changes):
+        """撤销/重做时写回字段值：{卡片ID: {字段: 值}}，值为MISSING时删除该字段"""
+        updated = []
+        favorited = []
+        for card_id, fields in changes.items():
+            card = self._own_card(card_id)
+            if card is None:
+                continue
+            for field, value in fields.items():
+                if value is MISSING:
+                    card.pop(field, None)
+                else:
+                    # 列表复制一份，之后修改卡片不会影响历史记录
+                    card[field] = list(value) if isinstance(value, list) else value
+            self.modified_cards.add(card_id)
+            (favorited if set(fields) == {'is_favorite'} else updated).append(card_id)
+        if favorited:
+            self.events.emit(CARD_FAVORITED, favorited)
+        if updated:
+            self.events.emit(CARD_UPDATED, updated)
+    
+    def _replace_all_cards(self, cards):
+        """撤销/重做清空或从备份恢复：整体替换卡片列表"""
+        self.cancel_load()
+        self.cards = cards
+        self.modified_cards.clear()
+        self.events.emit(CARDS_REPLACED)
     
-    def sort_cards(self) -> List[Dict[str, Any]]:
+    @reads
+    def sort_cards(self) -> CardsView:
         """
-        按关键词字母顺序排序卡片
+        按关键词字母顺序排序卡片（不改变卡片的存储顺序）
         
         Returns:
-            List[Dict[str, Any]]: 排序后的卡片列表
+            CardsView: 排序后的卡片（只读视图）
         """
-        if PINYIN_AVAILABLE:
-            # 使用pypinyin进行中文拼音排序
-            return sorted(self.cards, key=lambda x: lazy_pinyin(x['keyword'].lower()))
-        else:
-            # 使用Python内置排序（可能不够准确）
-            return sorted(self.cards, key=lambda x: x['keyword'].lower())
+        return self.query().order_by('keyword_pinyin').run()
+    
+    def keyword_sort_key(self, card: Dict[str, Any]):
+        """关键词排序键（有pypinyin时按拼音，否则按字符；由索引缓存）"""
+        return self.index.sort_key(card)
     
-    def search_cards(self, query: str) -> List[Dict[str, Any]]:
+    @reads
+    def search_cards(self, query: str) -> ReadOnlyCards:
         """
         搜索卡片
         
@@ -477,40 +1173,49 @@ class CardManager:
             query: 搜索关键词
         
         Returns:
-            List[Dict[str, Any]]: 搜索结果列表
+            ReadOnlyCards: 搜索结果（只读视图），查询为空时是所有卡片
         """
         if not query:
-            return self.cards
-        
-        query = query.lower()
-        results = []
-        
-        for card in self.cards:
-            # 在多个字段中搜索
-            if (query in card['keyword'].lower() or
-                query in card['definition'].lower() or
-                query in card['source'].lower() or
-                query in card['quote'].lower() or
-                query in card['notes'].lower()):
-                results.append(card)
-        
-        return results
+            return self.snapshot()
+        # 先用倒排表排除不可能匹配的卡片，再在多个字段中确认；重复的搜索直接取缓存
+        return self.query().match(query).cached().run()
+    
+    # 搜索结果缓存保存的结果数
+    SEARCH_CACHE_SIZE = 32
     
     def save_cards(self):
-        """保存卡片数据到文件（包含自动备份）"""
+        """
+        保存卡片数据到文件（包含自动备份）
+        
+        可以在后台线程中调用：只在取快照时短暂持有读锁，序列化和写文件期间界面可以继续修改卡片。
+        修改标记在取快照的同一段读锁内换成新的集合（修改方法持有写锁，这时不会同时写入标记），
+        保存期间又修改的卡片记在新集合中；保存失败时把换出的标记并回去。
+        """
+        with self.lock.read():
+            if self.loading:
+                # 加载尚未完成，推迟到加载结束后再保存
+                self._save_pending = True
+                return True
+            snapshot = self.snapshot()
+            saved_ids, self.modified_cards = self.modified_cards, set()
         try:
-            # 创建备份
-            backup_path = self._create_backup()
-            
-            # 保存数据
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cards, f, ensure_ascii=False, indent=2)
-            
-            # 保存成功后清空修改标记
-            self.modified_cards.clear()
-            print(f"成功保存 {len(self.cards)} 张卡片到: {self.data_file}")
-            if backup_path:
-                print(f"备份文件已创建: {backup_path}")
+            with self._save_lock:
+                # 创建备份
+                backup_path = self._create_backup()
+                
+                # 保存数据：先把整个列表一次转换为dict再序列化为文本，最后一次写入
+                # （序列化出错时不会留下写了一半的数据文件）
+                text = json.dumps(cards_to_json(snapshot.stored_cards()), ensure_ascii=False, indent=2,
+                                  default=card_to_json)
+                with open(self.data_file, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                
+                self._save_failed = False
+                # 数据文件已经改变，旧快照不再适用
+                self._snapshot_current = False
+                print(f"成功保存 {len(snapshot)} 张卡片到: {self.data_file}")
+                if backup_path:
+                    print(f"备份文件已创建: {backup_path}")
             return True
         except Exception as e:
             # 友好提示用户，而非仅打印到控制台
@@ -523,9 +1228,51 @@ class CardManager:
                 if latest_backup:
                     print(f"数据保存失败，但您可以从备份恢复: {latest_backup}")
             
-            # 保存失败，保持修改标记
+            # 保存失败，保持修改标记（在写锁内并回，不与修改方法同时写入）
+            with self.lock.write():
+                self.modified_cards |= saved_ids
+                self._save_failed = True
             return False
     
+    def save_snapshot(self) -> bool:
+        """
+        把卡片和索引写入预热快照（退出程序时调用一次，失败不影响数据）
+        
+        保存卡片时不写快照，免得每次保存都多序列化一遍。只在内存中的卡片与数据文件一致
+        （没有未保存的修改）时写入；快照已经是最新的（例如本次就是从快照启动且没有修改）时跳过。
+        
+        Returns:
+            bool: 快照是否是最新的
+        """
+        with self.lock.read():
+            if self.loading or self._save_failed or self.modified_cards or self.load_generation == 0:
+                return False
+            if self._snapshot_current:
+                return True
+            cards = self.snapshot().stored_cards()
+            if not all(type(card) is Card for card in cards):
+                return False
+            with self._save_lock:
+                written = write_snapshot(self.data_file, {
+                    'cards': cards_to_columns(cards),
+                    'index': self.index.export_state(),
+                })
+            self._snapshot_current = written
+            return written
+    
+    def load_snapshot(self) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        读取与数据文件一致的预热快照（可在后台线程中调用）
+        
+        Returns:
+            Optional[Tuple]: (卡片列表, 索引状态)，没有可用快照时返回None，应改为完整加载
+        """
+        payload = read_snapshot(self.data_file)
+        if payload is None or not isinstance(payload.get('cards'), dict) or 'index' not in payload:
+            return None
+        with gc_paused():
+            return cards_from_columns(payload['cards']), payload['index']
+    
     def _create_backup(self):
         """创建数据备份"""
         if not os.path.exists(self.data_file):
@@ -581,6 +1328,7 @@ class CardManager:
             print(f"获取最新备份失败: {str(e)}")
             return None
     
+    @writes
     def restore_from_backup(self, backup_file=None):
         """从备份恢复数据"""
         try:
@@ -598,9 +1346,14 @@ class CardManager:
             if not isinstance(backup_cards, list):
                 return False
             
-            # 替换当前数据
-            self.cards = backup_cards
+            # 替换当前数据（未完成的加载作废）
+            self.cancel_load()
+            old_cards = self.cards
+            self.cards = self._split_tombstones([Card.from_dict(card) if isinstance(card, Mapping) else card
+                                                 for card in backup_cards])
+            self.history.record(ReplaceCards(old_cards, self.cards[:]))
             self.modified_cards.clear()
+            self.events.emit(CARDS_REPLACED)
             
             # 保存恢复的数据
             return self.save_cards()
@@ -614,7 +1367,7 @@ class CardManager:
         for attempt in range(max_attempts):
             card_id = str(uuid.uuid4())
             # 检查ID是否已存在
-            if not any(card['id'] == card_id for card in self.cards):
+            if card_id not in self.index.id_map and card_id not in self.trash:
                 return card_id
         
         # 如果多次尝试后仍未生成唯一ID，使用时间戳和随机数组合
@@ -627,21 +1380,156 @@ class CardManager:
         """检查是否有卡片被修改"""
         return len(self.modified_cards) > 0
     
+    @writes
     def load_cards(self):
-        """从文件加载卡片数据（改进：首次运行时创建示例数据）"""
-        if os.path.exists(self.data_file):
+        """从文件同步加载卡片数据（改进：首次运行时创建示例数据）"""
+        generation = self.begin_load()
+        # 同步加载只需通知一次整体替换
+        with self.events.batch():
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.cards = json.load(f)
-                print(f"成功加载 {len(self.cards)} 张卡片")
+                snapshot = self.load_snapshot()
+                if snapshot is not None:
+                    self.add_loaded_cards(generation, *snapshot)
+                else:
+                    for chunk in self.iter_card_chunks():
+                        self.add_loaded_cards(generation, chunk)
+                self.finish_load(generation)
             except json.JSONDecodeError as e:
-                print(f"警告：数据文件格式错误，将创建新文件。错误：{str(e)}")
-                self.cards = []
-                self._create_sample_cards()
-        else:
+                self.finish_load(generation, e)
+            except Exception:
+                # 读取失败时退出加载状态，避免之后的保存一直被推迟
+                self.cancel_load()
+                raise
+    
+    @writes
+    def begin_load(self) -> int:
+        """
+        开始（重新）加载卡片：清空当前卡片并进入加载状态
+        
+        Returns:
+            int: 本次加载的代号，之后提交加载结果时需要带上
+        """
+        self.load_generation += 1
+        self.loading = True
+        self._save_pending = False
+        self._loaded_from_snapshot = False
+        self._save_failed = False
+        self._snapshot_current = False
+        self.cards = []
+        self.trash = {}
+        self.modified_cards.clear()
+        self.history.clear()
+        self.events.emit(CARDS_REPLACED)
+        return self.load_generation
+    
+    def is_current_load(self, generation: int) -> bool:
+        """检查加载代号是否仍然有效（没有被更新的加载或整体替换取代）"""
+        return self.loading and generation == self.load_generation
+    
+    @writes
+    def cancel_load(self):
+        """作废正在进行的加载（数据被整体替换时调用）"""
+        if self.loading:
+            self.load_generation += 1
+            self.loading = False
+            self._save_pending = False
+    
+    def iter_card_chunks(self, first_chunk: int = 100):
+        """
+        逐条解析数据文件，分批返回卡片（可在后台线程中调用）
+        
+        第一批只有first_chunk张，用于尽快显示第一页；之后每批数量翻倍，
+        这样界面按批次重新排序的总开销仍然与一次性加载同一量级。
+        
+        Args:
+            first_chunk: 第一批的卡片数量
+        
+        Yields:
+            List[Dict[str, Any]]: 一批卡片
+        """
+        if not os.path.exists(self.data_file):
+            return
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+        
+        decoder = json.JSONDecoder()
+        skip = re.compile(r'[\s,]*')
+        pos = skip.match(text).end()
+        if not text.startswith('[', pos):
+            raise json.JSONDecodeError("卡片数据应为列表", text, pos)
+        pos += 1
+        
+        chunk = []
+        chunk_size = first_chunk
+        while True:
+            pos = skip.match(text, pos).end()
+            if text.startswith(']', pos):
+                break
+            card, pos = decoder.raw_decode(text, pos)
+            chunk.append(Card(card) if isinstance(card, dict) else card)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+                chunk_size *= 2
+        if chunk:
+            yield chunk
+    
+    @writes
+    def add_loaded_cards(self, generation: int, cards: List[Dict[str, Any]],
+                         index_state: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        提交一批加载好的卡片
+        
+        Args:
+            generation: begin_load返回的加载代号
+            cards: 一批卡片
+            index_state: 快照中与这些卡片一起保存的索引状态（只能作为第一批提交）
+        
+        Returns:
+            bool: 是否被接受（加载已过期时返回False，调用方应停止加载）
+        """
+        if not self.is_current_load(generation):
+            return False
+        # 带墓碑标记的卡片直接进入回收站
+        cards = self._split_tombstones(cards)
+        if index_state is not None and not self.cards:
+            # 直接恢复快照中的索引，之后的新增通知不会重复索引这些卡片
+            self.index.restore_state(index_state, cards)
+            self._loaded_from_snapshot = True
+        self._writable_cards().extend(cards)
+        self.events.emit(CARD_ADDED, [card['id'] for card in cards])
+        return True
+    
+    @writes
+    def finish_load(self, generation: int, error: Optional[Exception] = None) -> bool:
+        """
+        结束加载：文件不存在或格式错误时创建示例数据，执行加载期间推迟的保存
+        
+        Args:
+            generation: begin_load返回的加载代号
+            error: 解析数据文件时遇到的JSON格式错误
+        
+        Returns:
+            bool: 加载是否仍然有效
+        """
+        if not self.is_current_load(generation):
+            return False
+        self.loading = False
+        
+        if error is not None:
+            print(f"警告：数据文件格式错误，将创建新文件。错误：{str(error)}")
+            self._create_sample_cards()
+        elif not os.path.exists(self.data_file):
             print(f"未找到数据文件：{self.data_file}")
-            self.cards = []
             self._create_sample_cards()
+        else:
+            print(f"成功加载 {len(self.cards)} 张卡片")
+            # 从快照加载时快照就是最新的，退出时不必重写
+            self._snapshot_current = self._loaded_from_snapshot
+            if self._save_pending:
+                self.save_cards()
+        self._save_pending = False
+        return True
     
     # 新增：加密密钥（保持不变）
     ENCRYPT_KEY = b"ancient_chinese_cards_2024"
@@ -669,6 +1557,7 @@ class CardManager:
         # 4. 添加ANCC文件头（识别专属格式）
         return b"ANCC_V1" + base64.b64encode(encrypted)
     
+    @reads
     def decrypt_to_cards(self, encrypted_data):
         """解密ANCC文件，转为卡片列表"""
         # 1. 验证文件头
@@ -744,7 +1633,8 @@ class CardManager:
             }
         ]
         
-        self.cards = sample_cards
+        self.cards = [Card(card) for card in sample_cards]
+        self.events.emit(CARDS_REPLACED)
         print(f"已创建 {len(sample_cards)} 张示例卡片")
         # 保存示例数据
         self.save_cards()
@@ -853,18 +1743,20 @@ class CardManager:
         # 添加导入的卡片
         stats['total'] = len(cards)
         
-        for card_data in cards:
-            try:
-                card_id = self.add_card(card_data, allow_duplicates)
-                
-                # 检查是新增还是合并
-                if any(card['id'] == card_id for card in self.cards[-len(cards):]):
-                    stats['added'] += 1
-                else:
-                    stats['merged'] += 1
-            except Exception as e:
-                print(f"导入卡片失败: {str(e)}")
-                stats['failed'] += 1
+        # 导入过程中的变更合并为一次通知和一个撤销操作
+        with self.batch():
+            for card_data in cards:
+                try:
+                    card_id = self.add_card(card_data, allow_duplicates)
+                    
+                    # 检查是新增还是合并
+                    if any(card['id'] == card_id for card in self.cards[-len(cards):]):
+                        stats['added'] += 1
+                    else:
+                        stats['merged'] += 1
+                except Exception as e:
+                    print(f"导入卡片失败: {str(e)}")
+                    stats['failed'] += 1
         
         return stats
     
@@ -1069,6 +1961,7 @@ class CardManager:
         
         return stats
     
+    @reads
     def export_cards_to_text(self, group_by_keyword: bool = False) -> str:
         """
         导出卡片为文本格式
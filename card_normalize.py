@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+繁简、异体字规范化
+
+卡片中繁体、简体和异体字混用（學/学、爲/為/为、眞/真），按码位精确比较时"學"永远找不到"学"。
+normalize_text()把文本规范化为检索用的"影子文本"：小写，繁体和异体字换成对应的简体，
+全角字母数字换成半角。换字逐字进行、不改变长度，所以在影子文本中找到的位置就是原文中的位置，
+可以直接用于高亮。
+
+对照表随程序附带，只收常用的一对一换字（一字对应多个简体字、换字会改变含义的不收，
+例如乾、著、徵），用str.translate一次完成。
+
+影子文本由卡片记录缓存（见Card.normalized），修改字段后重新计算，不在每次搜索时计算；
+搜索、查重和排序都使用影子文本。
+"""
+
+# 繁体、异体字 → 简体（每两个字一组）
+_VARIANT_PAIRS = (
+    "學学習习說说來来時时問问國国會会與与爲为為为無无東东車车長长門门見见貝贝馬马魚鱼鳥鸟龍龙龜龟"
+    "書书樂乐禮礼義义儀仪詩诗語语讀读論论記记詞词談谈謂谓請请議议誠诚諸诸識识變变賢贤貴贵賤贱"
+    "財财貨货買买賣卖費费資资質质責责敗败則则專专傳传轉转輕轻載载軍军連连進进運运過过達达遠远"
+    "還还邊边遲迟適适選选遺遗鄉乡鄰邻陽阳陰阴陳陈陸陆隨随險险難难雖虽雙双離离電电靈灵風风飛飞"
+    "飲饮飯饭養养餘余館馆驚惊體体髮发發发鬥斗齊齐齒齿亂乱亞亚產产們们個个倫伦偉伟僅仅億亿優优"
+    "兒儿兩两冊册凍冻劃划劍剑勞劳勢势勵励勸劝區区協协單单厲厉參参雜杂嚴严園园圓圆圖图團团壞坏"
+    "壓压壽寿夢梦夥伙奪夺奮奋婦妇孫孙寧宁實实寫写審审寶宝將将屬属岡冈島岛嶺岭幣币師师帶带帥帅"
+    "幫帮廣广廟庙廠厂張张彈弹強强徑径從从憂忧懷怀應应戀恋戰战戲戏據据擇择擊击擔担擁拥擾扰攝摄"
+    "敵敌數数斷断於于條条極极構构槍枪標标樓楼樹树橋桥機机權权歡欢歲岁歷历歸归殘残殺杀氣气漢汉"
+    "潔洁濟济濕湿灣湾滅灭滿满漁渔災灾烏乌煙烟熱热燈灯爭争爺爷牆墙獨独獸兽獻献現现環环畫画當当"
+    "疊叠盜盗盡尽監监盤盘眾众睜睁碼码礙碍禍祸禪禅種种稱称穩稳窮穷競竞筆笔節节範范築筑簡简糧粮"
+    "紀纪約约紅红納纳紙纸級级紛纷細细終终組组結结絕绝給给統统絲丝經经綠绿維维網网緊紧線线編编"
+    "緣缘縣县總总織织繼继續续罷罢羅罗聖圣聞闻聯联聲声聽听職职肅肃脈脉腦脑臉脸臨临興兴舉举舊旧"
+    "艱艰莊庄華华萬万葉叶蒼苍蓋盖蘭兰處处號号蟲虫蠶蚕衛卫衝冲補补裝装製制複复襲袭規规視视親亲"
+    "覺觉觀观觸触計计訓训託托許许訴诉診诊詳详試试誌志認认誤误誰谁課课調调謀谋謝谢證证譯译護护"
+    "譽誉讓让豐丰豬猪貓猫負负貢贡貧贫貪贪貫贯貿贸賀贺賞赏賴赖贊赞贈赠趙赵趕赶躍跃軟软輪轮輸输"
+    "辦办辭辞農农這这邏逻郵邮鄭郑醫医釋释鐵铁針针錢钱錯错鏡镜鐘钟鍾钟開开閉闭間间閒闲閱阅闊阔"
+    "關关隊队階阶際际隱隐雞鸡雲云須须頂顶項项順顺頌颂預预領领頭头頻频題题額额顏颜願愿類类顧顾"
+    "顯显飄飘飽饱餓饿驗验驅驱騎骑髒脏鬧闹鳳凤鳴鸣麥麦黃黄點点黨党齡龄龐庞後后裏里裡里麼么蘇苏"
+    "穀谷鬆松幹干係系繫系臺台檯台颱台隻只準准醜丑獲获穫获儘尽嚮向捨舍剋克鬍胡曆历歎叹嘆叹遊游"
+    "眞真綫线峯峰羣群敎教淸清靑青卽即旣既戶户吿告吳吴內内兌兑兪俞敍叙敘叙氷冰乗乘竝并並并恆恒"
+    "彊强迴回廻回衆众異异喫吃菓果栢柏蹟迹跡迹脩修邨村煑煮牀床牕窗窻窗窓窗鷄鸡溼湿迺乃廼乃弔吊"
+    "皁皂秊年凖准況况決决涼凉減减務务"
+)
+
+# 全角字母数字 → 半角
+_FULLWIDTH = (
+    [(code, code - 0xFEE0) for code in range(ord('０'), ord('９') + 1)]
+    + [(code, code - 0xFEE0) for code in range(ord('Ａ'), ord('Ｚ') + 1)]
+    + [(code, code - 0xFEE0) for code in range(ord('ａ'), ord('ｚ') + 1)]
+)
+
+NORMALIZE_TABLE = {ord(source): target for source, target in zip(_VARIANT_PAIRS[0::2], _VARIANT_PAIRS[1::2])}
+NORMALIZE_TABLE.update(_FULLWIDTH)
+
+
+def normalize_text(text: str) -> str:
+    """
+    检索用的规范化文本（逐字对应，长度不变）
+
+    Args:
+        text: 原文
+
+    Returns:
+        str: 小写、繁体和异体字换成简体、全角字母数字换成半角后的文本
+    """
+    text = text.translate(NORMALIZE_TABLE)
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        # 每个字符小写后至少一个字符，总长度不变说明逐字对应
+        return lowered
+    # 少数字符小写后变成多个字符（如"İ"），只取第一个，保持逐字对应
+    return ''.join(char.lower()[0] for char in text)
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+惰性的卡片查询
+
+CardManager.query()返回查询对象，可以链式组合筛选、全文匹配、排序和数量限制：
+
+    card_manager.query().where(fav=True).match("之").order_by("keyword_pinyin").limit(100)
+
+每一步都返回新的查询对象，组合时不做任何计算；run()（或遍历）时才在读锁中一次执行：
+结构化条件（收藏、来源、时间、标签）在列式镜像上筛选，普通文本匹配先用倒排表缩小候选范围，
+再逐张确认。有数量限制时，不排序就在找够后停止扫描，排序则用堆只取前K个。
+结果是CardsView（只读，只保存位置），不复制卡片。确认匹配时同时记下各字段中匹配的位置，
+随结果一起保存（CardsView.match_spans），界面据此高亮，不再重新匹配。
+
+search()接受查询语法（见card_query_syntax.py），fuzzy()按编辑距离模糊匹配（见card_fuzzy.py），
+explain()列出执行计划。
+cached()的查询先查找卡片管理器的搜索结果缓存（见card_search_cache.py）。
+"""
+
+import copy
+import heapq
+import re
+from itertools import islice
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+from card_fuzzy import FuzzyMatch
+from card_highlight import Spans, find_spans, merge_span_list, merge_spans
+from card_index import CardIndex, compute_sort_key
+from card_query_syntax import Node, PlanContext, parse_query
+from card_normalize import normalize_text
+from card_record import card_time, normalized_text
+from card_views import CardsView
+from pinyin_support import pinyin_spans
+
+# where()接受的结构化条件（见CardColumns.filter_rows），fav是favorite的简写
+FILTER_CRITERIA = ('sources', 'created_from', 'created_to', 'favorite', 'tags', 'any_tag')
+
+# 可以排序的字段：文本字段按字符，加"_pinyin"后缀按拼音；时间字段按时间
+TEXT_FIELDS = CardIndex.SEARCH_FIELDS
+TIME_FIELDS = ('created_at', 'updated_at')
+
+# 没有时间的卡片排在最前
+_NO_TIME = -(1 << 62)
+
+
+class TextMatch:
+    """
+    match()的一个条件：在指定字段中查找文本、正则或拼音
+
+    不区分大小写的文本和拼音在规范化文本中查找（繁简、异体字统一，与原文逐字对应，位置可直接用于高亮）；
+    区分大小写和正则按原文精确匹配。
+    """
+
+    __slots__ = ('text', 'fields', 'case_sensitive', 'regex', 'pinyin', 'normalized', 'find')
+
+    def __init__(self, text: str, fields, case_sensitive: bool, regex: bool, pinyin: bool = False):
+        self.text = text
+        self.fields = tuple(fields)
+        self.case_sensitive = case_sensitive
+        self.regex = regex
+        self.pinyin = pinyin
+        self.normalized = not case_sensitive and not regex
+        # find(字段文本)返回匹配的位置列表，空列表表示不匹配
+        if regex:
+            # 正则只编译一次，写错时在这里就抛出re.error
+            pattern = re.compile(text, 0 if case_sensitive else re.IGNORECASE)
+            self.find = lambda value: _regex_spans(pattern, value)
+        elif case_sensitive:
+            self.find = lambda value: find_spans(value, text, True)
+        elif pinyin:
+            normalized = normalize_text(text)
+            self.find = lambda value: merge_span_list(
+                find_spans(value, normalized, True) + pinyin_spans(value, normalized))
+        else:
+            normalized = normalize_text(text)
+            self.find = lambda value: find_spans(value, normalized, True)
+
+    @property
+    def uses_index(self) -> bool:
+        """能否用倒排表缩小候选范围（普通文本，且只在倒排表覆盖的字段中查找）"""
+        return not self.regex and not self.pinyin and set(self.fields) <= set(TEXT_FIELDS)
+
+    def candidates(self, card_manager):
+        """用倒排表得到候选卡片ID，不能使用倒排表时返回None（调用方持有读锁）"""
+        if not self.uses_index:
+            return None
+        return card_manager.index.candidates(self.text)
+
+    def describe(self, card_manager) -> str:
+        """explain的输出行"""
+        if not self.uses_index:
+            return f"全文匹配 \"{self.text}\"：逐张扫描"
+        ids = self.candidates(card_manager)
+        return f"全文匹配 \"{self.text}\"：倒排表求交集后逐张确认  估计 {len(ids or ())} 张"
+
+    def matches(self, card) -> bool:
+        """卡片是否有字段匹配"""
+        return bool(self.spans(card))
+
+    def spans(self, card) -> Spans:
+        """各字段中匹配的位置，不匹配时为空"""
+        find = self.find
+        normalized = self.normalized
+        found = {}
+        for field in self.fields:
+            value = card.get(field)
+            if value:
+                spans = find(normalized_text(card, field) if normalized else str(value))
+                if spans:
+                    found[field] = spans
+        return found
+
+
+class CardQuery:
+    """卡片查询（不可变，组合方法都返回新的查询）"""
+
+    __slots__ = ('_manager', '_criteria', '_predicates', '_matches', '_plans', '_order', '_limit', '_offset',
+                 '_key', '_cache')
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器
+        """
+        self._manager = card_manager
+        self._criteria: Tuple[dict, ...] = ()
+        self._predicates: Tuple[Callable[[Any], bool], ...] = ()
+        self._matches: Tuple[Union[TextMatch, FuzzyMatch], ...] = ()
+        self._plans: Tuple[Node, ...] = ()
+        self._order: Optional[Tuple[Callable[[Any], Any], bool]] = None
+        self._limit: Optional[int] = None
+        self._offset = 0
+        # 规范化的查询键（缓存用），含有无法比较的条件（自定义函数）时为None
+        self._key: Optional[tuple] = ()
+        self._cache = False
+
+    def _derive(self, key_part=None, **changes) -> 'CardQuery':
+        """复制查询并修改部分属性，key_part追加到查询键（False表示无法作为缓存键）"""
+        query = copy.copy(self)
+        for name, value in changes.items():
+            setattr(query, name, value)
+        if query._key is not None and key_part is not None:
+            query._key = None if key_part is False else query._key + (key_part,)
+        return query
+
+    @property
+    def cache_key(self) -> Optional[tuple]:
+        """规范化的查询键，无法缓存时为None"""
+        return self._key
+
+    @property
+    def matches_exactly(self) -> bool:
+        """matches()能否判断所有条件（没有结构化条件）"""
+        return not self._criteria
+
+    @property
+    def offset(self) -> int:
+        """跳过的结果数"""
+        return self._offset
+
+    def cached(self) -> 'CardQuery':
+        """
+        使用搜索结果缓存：执行时先查找缓存，未命中时执行后保存结果
+
+        Returns:
+            CardQuery: 新的查询
+        """
+        return self._derive(_cache=True)
+
+    def where(self, predicate: Optional[Callable[[Any], bool]] = None, **criteria) -> 'CardQuery':
+        """
+        增加筛选条件（与已有条件同时满足）
+
+        Args:
+            predicate: 自定义条件，接收卡片返回是否保留
+            **criteria: 结构化条件，见CardColumns.filter_rows（fav是favorite的简写）
+
+        Returns:
+            CardQuery: 新的查询
+        """
+        if 'fav' in criteria:
+            criteria['favorite'] = criteria.pop('fav')
+        for name in criteria:
+            if name not in FILTER_CRITERIA:
+                raise TypeError(f"未知的筛选条件: {name}")
+        query = self
+        if criteria:
+            key_part = ('where',) + tuple(sorted((name, _freeze(value)) for name, value in criteria.items()))
+            query = query._derive(key_part, _criteria=query._criteria + (criteria,))
+        if predicate is not None:
+            query = query._derive(False, _predicates=query._predicates + (predicate,))
+        return query
+
+    def match(self, text: str, fields=None, case_sensitive: bool = False,
+              regex: bool = False, pinyin: bool = False) -> 'CardQuery':
+        """
+        增加全文匹配条件：任一字段包含文本（或匹配正则）
+
+        Args:
+            text: 要查找的文本或正则，为空时不增加条件
+            fields: 查找的字段，默认全部文本字段
+            case_sensitive: 是否区分大小写
+            regex: text是否为正则表达式
+            pinyin: 字母也按拼音（全拼或首字母）匹配汉字，需要pypinyin（与regex不同时使用）
+
+        Returns:
+            CardQuery: 新的查询
+        """
+        if not text:
+            return self
+        pinyin = pinyin and not regex
+        condition = TextMatch(text, fields or TEXT_FIELDS, case_sensitive, regex, pinyin)
+        normalized = text if case_sensitive or regex else normalize_text(text)
+        key_part = ('match', normalized, tuple(sorted(condition.fields)), case_sensitive, regex, pinyin)
+        return self._derive(key_part, _matches=self._matches + (condition,))
+
+    def fuzzy(self, text: str, max_distance: Optional[int] = None) -> 'CardQuery':
+        """
+        增加模糊匹配条件：关键词与text的编辑距离、或原文中某一段与text的编辑距离不超过上限
+
+        没有指定排序时结果按编辑距离从小到大排列（距离相同时关键词匹配的在前）。
+
+        Args:
+            text: 要查找的文本，为空时不增加条件
+            max_distance: 最大编辑距离，默认每4个字容忍一处
+
+        Returns:
+            CardQuery: 新的查询
+        """
+        if not text:
+            return self
+        condition = FuzzyMatch(text, max_distance)
+        key_part = ('fuzzy', normalize_text(text), condition.max_distance)
+        changes = {'_matches': self._matches + (condition,)}
+        if self._order is None:
+            changes['_order'] = (condition.rank, False)
+        return self._derive(key_part, **changes)
+
+    def search(self, expression: str, fields=None) -> 'CardQuery':
+        """
+        增加用查询语法写的条件，例如 '之 source:论语 fav:true created:2026-01..2026-02'
+
+        Args:
+            expression: 查询文本，为空时不增加条件
+            fields: 没有字段的词查找的字段，默认全部文本字段
+
+        Returns:
+            CardQuery: 新的查询
+
+        Raises:
+            QuerySyntaxError: 查询语法错误
+        """
+        plan = parse_query(expression, fields)
+        if plan is None:
+            return self
+        key_part = ('search', ' '.join(expression.split()), tuple(sorted(fields or TEXT_FIELDS)))
+        return self._derive(key_part, _plans=self._plans + (plan,))
+
+    def order_by(self, key: Union[str, Callable[[Any], Any]], reverse: bool = False) -> 'CardQuery':
+        """
+        设置排序（稳定排序，不改变卡片的存储顺序）
+
+        Args:
+            key: 字段名（keyword、definition等按字符；加"_pinyin"后缀按拼音，
+                keyword_pinyin使用索引缓存的排序键；created_at、updated_at按时间），或排序键函数
+            reverse: 是否降序
+
+        Returns:
+            CardQuery: 新的查询
+        """
+        key_part = ('order', key, reverse) if isinstance(key, str) else False
+        return self._derive(key_part, _order=(self._sort_key(key), reverse))
+
+    def limit(self, count: int, offset: int = 0) -> 'CardQuery':
+        """
+        只取（跳过offset个之后的）前count个结果
+
+        Returns:
+            CardQuery: 新的查询
+        """
+        if count < 0 or offset < 0:
+            raise ValueError("数量和偏移不能为负数")
+        return self._derive(('limit', count, offset), _limit=count, _offset=offset)
+
+    def run(self) -> CardsView:
+        """
+        执行查询
+
+        Returns:
+            CardsView: 结果（只读视图）
+        """
+        manager = self._manager
+        with manager.lock.read():
+            cache = self._result_cache()
+            if cache is not None:
+                result = cache.get(self._key)
+                if result is not None:
+                    return result
+            result = manager._view(*self._positions())
+            if cache is not None:
+                cache.put(self._key, self, result, manager.version)
+            return result
+
+    def _result_cache(self):
+        """使用的搜索结果缓存，不使用缓存时返回None"""
+        if not self._cache or self._key is None:
+            return None
+        return self._manager.search_cache
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.run())
+
+    def chunks(self, chunk_size: int = 500) -> Iterator[Tuple[List[Any], int, int]]:
+        """
+        分块执行不排序的查询，用于界面分帧显示进度
+
+        只在开始时短暂持有读锁取得快照和候选位置，之后在快照上逐块确认，期间卡片可以照常修改。
+        排序的查询（包括按编辑距离排列的模糊匹配）要看到全部结果才能确定顺序，一次执行并给出全部结果。
+
+        Yields:
+            Tuple[CardsView, int, int]: (这一块中匹配的卡片及匹配位置, 已检查的候选数, 候选总数)
+        """
+        if self._order is not None:
+            result = self.run()
+            yield result, len(result), len(result)
+            return
+        manager = self._manager
+        cache = self._result_cache()
+        with manager.lock.read():
+            cached = cache.get(self._key) if cache is not None else None
+            if cached is None:
+                snapshot = manager.snapshot()
+                rows = self._candidate_rows(manager.cards)
+        if cached is not None:
+            # 命中缓存：一次给出全部结果
+            yield cached, len(cached), len(cached)
+            return
+        cards = snapshot._cards
+        verify = self._verify
+        hit_spans = self._hit_spans if self._has_text else None
+        if rows is None:
+            rows = range(len(cards))
+        total = len(rows)
+        skip = self._offset
+        remaining = self._limit
+        matched = []
+        matched_spans = [] if hit_spans else None
+        for start in range(0, total, chunk_size):
+            found = []
+            found_spans = [] if hit_spans else None
+            for row in rows[start:start + chunk_size]:
+                card = cards[row]
+                spans = verify(card)
+                if spans is None:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                found.append(row)
+                if hit_spans:
+                    found_spans.append(hit_spans(card, spans))
+                if remaining is not None and len(found) == remaining:
+                    break
+            matched.extend(found)
+            if hit_spans:
+                matched_spans.extend(found_spans)
+            if remaining is not None:
+                remaining -= len(found)
+            done = total if remaining == 0 else min(total, start + chunk_size)
+            yield CardsView(snapshot, found, found_spans), done, total
+            if done == total:
+                break
+        if cache is not None:
+            # 搜索期间卡片有变化时版本号不同，结果不会被保存
+            cache.put(self._key, self, CardsView(snapshot, matched, matched_spans), snapshot.version)
+
+    def matches(self, card) -> bool:
+        """
+        单张卡片是否满足自定义条件、全文匹配和查询语法条件（用于增量更新结果）
+
+        结构化条件（where的关键字参数）由列式镜像在执行时筛选，这里不检查。
+        """
+        return self.match_spans(card) is not None
+
+    def match_spans(self, card) -> Optional[Spans]:
+        """
+        与matches()相同的判断，满足时返回各字段中匹配的位置（用于增量更新结果时的高亮）
+
+        Returns:
+            Optional[Dict[str, List[Tuple[int, int]]]]: 字段 → 匹配位置，不满足时为None
+        """
+        spans = self._verify(card)
+        if spans is None or not all(plan.matches(card) for plan in self._plans):
+            return None
+        return self._hit_spans(card, spans)
+
+    @property
+    def _has_text(self) -> bool:
+        """是否有文本条件（结果带有匹配位置）"""
+        return bool(self._matches or self._plans)
+
+    def _verify(self, card) -> Optional[Spans]:
+        """
+        逐张确认候选卡片：自定义条件和全文匹配（查询语法条件在取候选时已经精确求出）
+
+        Returns:
+            全文匹配的位置，不满足时为None
+        """
+        for predicate in self._predicates:
+            if not predicate(card):
+                return None
+        if not self._matches:
+            return {}
+        found = []
+        for condition in self._matches:
+            spans = condition.spans(card)
+            if not spans:
+                return None
+            found.append(spans)
+        return merge_spans(*found)
+
+    def _hit_spans(self, card, spans: Spans) -> Spans:
+        """满足条件的卡片的全部匹配位置：全文匹配的位置加上查询语法中文本条件的位置"""
+        if not self._plans:
+            return spans
+        return merge_spans(spans, *(plan.spans(card) for plan in self._plans))
+
+    def explain(self) -> str:
+        """
+        执行计划：每个条件使用的索引和估计的卡片数
+
+        Returns:
+            str: 多行文本
+        """
+        manager = self._manager
+        lines = [f"共 {len(manager.cards)} 张卡片"]
+        with manager.lock.read():
+            for criteria in self._criteria:
+                text = ", ".join(f"{name}={value}" for name, value in criteria.items())
+                lines.append(f"结构化条件 {text}：列式镜像筛选")
+            for condition in self._matches:
+                lines.append(condition.describe(manager))
+            for plan in self._plans:
+                with manager._columns_lock:
+                    context = PlanContext(manager._column_mirror(), manager.index)
+                    lines.append("查询语法：")
+                    lines.extend("  " + line for line in plan.describe(context))
+            if self._predicates:
+                lines.append(f"自定义条件 {len(self._predicates)} 个：逐张检查")
+        if self._order is not None:
+            if self._limit is not None:
+                lines.append(f"排序：用堆取前 {self._offset + self._limit} 个")
+            else:
+                lines.append("排序：完整排序")
+        elif self._limit is not None:
+            lines.append(f"数量限制 {self._limit}：找够后停止扫描")
+        return "\n".join(lines)
+
+    def count(self) -> int:
+        """结果数量（忽略排序）"""
+        return len(self._derive(_order=None).run())
+
+    def first(self):
+        """第一个结果，没有时返回None"""
+        result = self.limit(1, self._offset).run()
+        return result[0] if result else None
+
+    def _sort_key(self, key):
+        """把order_by的参数解析为卡片的排序键函数"""
+        if callable(key):
+            return key
+        if key == 'keyword_pinyin':
+            return self._manager.keyword_sort_key
+        if key.endswith('_pinyin') and key[:-len('_pinyin')] in TEXT_FIELDS:
+            field = key[:-len('_pinyin')]
+            return lambda card: compute_sort_key(normalized_text(card, field))
+        if key in TEXT_FIELDS:
+            # 按规范化文本排序，繁简写法不同的同一个词排在一起
+            return lambda card: normalized_text(card, key)
+        if key in TIME_FIELDS:
+            return lambda card: _time_or_missing(card_time(card, key))
+        if key == 'is_favorite':
+            return lambda card: bool(card.get('is_favorite', False))
+        raise ValueError(f"无法排序的字段: {key}")
+
+    def _positions(self) -> Tuple[List[int], Optional[List[Spans]]]:
+        """在读锁中执行查询，返回结果卡片的位置和各自的匹配位置（没有文本条件时为None）"""
+        cards = self._manager.cards
+        rows = self._candidate_rows(cards)
+        matched = iter(rows) if rows is not None else iter(range(len(cards)))
+        verified = {}
+        if self._predicates or self._matches:
+            matched = self._verified(cards, matched, verified)
+
+        start = self._offset
+        stop = None if self._limit is None else start + self._limit
+        if self._order is None:
+            # 不排序：找够数量后不再扫描
+            positions = list(islice(matched, start, stop))
+        else:
+            key, reverse = self._order
+            row_key = lambda row: key(cards[row])
+            if stop is None:
+                positions = sorted(matched, key=row_key, reverse=reverse)[start:]
+            else:
+                # 有数量限制：堆取前K个（与完整排序后截取的结果相同）
+                top = heapq.nlargest if reverse else heapq.nsmallest
+                positions = top(stop, matched, key=row_key)[start:]
+        if not self._has_text:
+            return positions, None
+        hit_spans = self._hit_spans
+        return positions, [hit_spans(cards[row], verified.get(row, {})) for row in positions]
+
+    def _verified(self, cards, rows, verified: dict) -> Iterator[int]:
+        """逐张确认候选位置，匹配位置（非空时）记入verified"""
+        verify = self._verify
+        for row in rows:
+            spans = verify(cards[row])
+            if spans is not None:
+                if spans:
+                    verified[row] = spans
+                yield row
+
+    def _candidate_rows(self, cards) -> Optional[List[int]]:
+        """用列式镜像和倒排表得到候选位置（升序），没有可用的索引时返回None"""
+        manager = self._manager
+        rows = None
+        for criteria in self._criteria:
+            if (set(criteria) == {'favorite'} and manager._columns is None
+                    and len(cards) < manager.COLUMNAR_THRESHOLD):
+                # 卡片不多时只按收藏筛选，直接扫描比建立列式镜像快
+                wanted = bool(criteria['favorite'])
+                found = [row for row, card in enumerate(cards)
+                         if bool(card.get('is_favorite', False)) == wanted]
+            else:
+                found = manager._filter_rows(criteria)
+            rows = found if rows is None else _intersect(rows, found)
+
+        for plan in self._plans:
+            # 查询语法的条件树在列式镜像和倒排表上按集合运算求出（已精确确认）
+            with manager._columns_lock:
+                found = sorted(plan.rows(PlanContext(manager._column_mirror(), manager.index)))
+            rows = found if rows is None else _intersect(rows, found)
+
+        for condition in self._matches:
+            ids = condition.candidates(manager)
+            if ids is None:
+                continue
+            if rows is None:
+                # 候选ID经"卡片ID → 位置"映射换成位置，不逐张扫描
+                rows = manager._rows_of(ids)
+            else:
+                rows = [row for row in rows if cards[row]['id'] in ids]
+        return rows
+
+
+def _regex_spans(pattern, value: str) -> list:
+    """正则的匹配位置；只匹配到空串时保留一个空区间，表示匹配但没有可高亮的文字"""
+    spans = [match.span() for match in pattern.finditer(value)]
+    return [span for span in spans if span[0] < span[1]] or spans[:1]
+
+
+def _freeze(value):
+    """把条件值转换为可以作为字典键的值"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(map(str, value)))
+    return value
+
+
+def _intersect(rows: List[int], other: List[int]) -> List[int]:
+    """两个升序位置列表的交集"""
+    other_set = set(other)
+    return [row for row in rows if row in other_set]
+
+
+def _time_or_missing(value: Optional[int]) -> int:
+    """时间排序键，没有时间时排在最前"""
+    return value if value is not None else _NO_TIME
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+搜索查询语法
+
+    之 source:论语 tag:诗经 fav:true created:2026-01..2026-02
+    "学而时习" OR keyword:君子 NOT notes:存疑
+    (出处:孟子 OR 出处:荀子) -标签:待复习
+
+- 没有字段的词在默认字段中查找，双引号内是一个短语（可含空格）
+- 字段：keyword/关键词、definition/释义、source/出处、quote/原文、notes/注释（包含即可）、
+  tag/标签（完全相同）、fav/收藏（true/false、是/否）、created/创建、updated/修改（时间范围）
+- 时间范围写作 开始..结束，可以只写一边；时间可以是年、年-月或年-月-日，结束时间包含整个时段
+- 相邻的条件同时满足（也可以写AND），OR满足其一，NOT或前缀"-"表示排除，括号改变优先级
+
+parse_query()把查询解析为条件树；执行时在列式镜像和倒排表上按集合运算得到结果：
+标签由标签索引求出卡片ID再换成行号，时间范围在按时间排序的行号上二分查找，文本条件先用倒排表得到候选，
+只逐张确认候选卡片。同时满足的条件按估计的结果数从小到大执行，后面的条件只检查前面留下的行。
+explain()列出每个条件使用的索引和估计的结果数。spans()给出满足条件的卡片中文本条件匹配的位置。
+"""
+
+import calendar
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from card_columns import MISSING_TIME
+from card_highlight import Spans, find_spans, merge_spans
+from card_index import CardIndex
+from card_normalize import normalize_text
+from card_record import card_time, normalized_text, time_micros
+
+# 字段名（含中文别名）→ 卡片字段
+TEXT_FIELD_NAMES = {
+    'keyword': 'keyword', '关键词': 'keyword',
+    'definition': 'definition', '释义': 'definition',
+    'source': 'source', '出处': 'source',
+    'quote': 'quote', '原文': 'quote',
+    'notes': 'notes', '注释': 'notes',
+}
+TAG_FIELD_NAMES = ('tag', 'tags', '标签')
+FAVORITE_FIELD_NAMES = ('fav', 'favorite', '收藏')
+TIME_FIELD_NAMES = {'created': 'created_at', '创建': 'created_at',
+                    'updated': 'updated_at', '修改': 'updated_at'}
+
+TRUE_WORDS = ('true', 'yes', '1', '是')
+FALSE_WORDS = ('false', 'no', '0', '否')
+
+# 词法单元：引号短语、括号、字段前缀和普通词
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<phrase>"[^"]*"|“[^”]*”)
+      | (?P<open>[(（])
+      | (?P<close>[)）])
+      | (?P<field>[^\s:：()（）"“]+)[:：]
+      | (?P<word>[^\s()（）"“]+)
+    )''', re.VERBOSE)
+
+
+class QuerySyntaxError(ValueError):
+    """查询语法错误"""
+
+
+class PlanContext:
+    """执行查询计划所需的索引：列式镜像（行号即卡片在列表中的位置）和倒排表"""
+
+    def __init__(self, columns, index):
+        columns._ensure()
+        self.columns = columns
+        self.index = index
+        self.cards = columns.cards
+        self._tag_rows: Dict[str, Set[int]] = {}
+
+    def all_rows(self) -> Set[int]:
+        """所有行"""
+        return set(range(len(self.cards)))
+
+    def tag_rows(self, tag: str) -> Set[int]:
+        """有该标签的行（由标签索引求出，同一次查询中缓存）"""
+        rows = self._tag_rows.get(tag)
+        if rows is None:
+            rows = self._tag_rows[tag] = self.columns.tag_rows([tag])
+        return rows
+
+
+class Node:
+    """查询条件树的节点"""
+
+    def estimate(self, context: PlanContext) -> int:
+        """估计的结果数（决定同时满足的条件的执行顺序）"""
+        raise NotImplementedError
+
+    def rows(self, context: PlanContext) -> Set[int]:
+        """满足条件的行"""
+        raise NotImplementedError
+
+    def filter(self, context: PlanContext, rows: Set[int]) -> Set[int]:
+        """在给定的行中满足条件的行（默认与rows()求交集）"""
+        return rows & self.rows(context)
+
+    def matches(self, card) -> bool:
+        """单张卡片是否满足条件"""
+        raise NotImplementedError
+
+    def spans(self, card) -> Spans:
+        """满足条件的卡片中文本条件匹配的位置（默认没有）"""
+        return {}
+
+    def describe(self, context: PlanContext, depth: int = 0) -> List[str]:
+        """explain的输出行"""
+        raise NotImplementedError
+
+    def _line(self, context: PlanContext, depth: int, text: str) -> str:
+        return f"{'  ' * depth}{text}  估计 {self.estimate(context)} 张"
+
+
+class TextTerm(Node):
+    """文本条件：任一字段包含文本（在规范化文本中查找：不区分大小写，繁简、异体字统一）"""
+
+    def __init__(self, text: str, fields: Tuple[str, ...], label: str):
+        self.text = text
+        self.lowered = normalize_text(text)
+        self.fields = fields
+        self.label = label
+
+    def _candidate_ids(self, context: PlanContext) -> Set[str]:
+        return context.index.candidates(self.lowered) or set()
+
+    def estimate(self, context):
+        # 最短的倒排表长度是候选数的上限
+        postings = context.index.postings
+        return min((len(postings.get(char, ())) for char in set(self.lowered)), default=0)
+
+    def rows(self, context):
+        row_of = context.columns.row_of
+        cards = context.cards
+        result = set()
+        for card_id in self._candidate_ids(context):
+            row = row_of(card_id)
+            if row is not None and self.matches(cards[row]):
+                result.add(row)
+        return result
+
+    def filter(self, context, rows):
+        if len(rows) > self.estimate(context):
+            return rows & self.rows(context)
+        cards = context.cards
+        return {row for row in rows if self.matches(cards[row])}
+
+    def matches(self, card):
+        for field in self.fields:
+            value = card.get(field)
+            if value and self.lowered in normalized_text(card, field):
+                return True
+        return False
+
+    def spans(self, card):
+        found = {}
+        for field in self.fields:
+            value = card.get(field)
+            if value:
+                spans = find_spans(normalized_text(card, field), self.lowered, True)
+                if spans:
+                    found[field] = spans
+        return found
+
+    def describe(self, context, depth=0):
+        return [self._line(context, depth, f"文本 {self.label}：倒排表求交集后逐张确认")]
+
+
+class TagTerm(Node):
+    """标签条件"""
+
+    def __init__(self, tag: str):
+        self.tag = tag
+
+    def estimate(self, context):
+        return len(context.tag_rows(self.tag))
+
+    def rows(self, context):
+        return set(context.tag_rows(self.tag))
+
+    def filter(self, context, rows):
+        return rows & context.tag_rows(self.tag)
+
+    def matches(self, card):
+        return self.tag in (card.get('tags') or ())
+
+    def describe(self, context, depth=0):
+        return [self._line(context, depth, f"标签 {self.tag}：标签索引")]
+
+
+class FavoriteTerm(Node):
+    """收藏条件"""
+
+    def __init__(self, favorite: bool):
+        self.favorite = favorite
+
+    def estimate(self, context):
+        count = len(context.columns.favorite_rows)
+        return count if self.favorite else len(context.cards) - count
+
+    def rows(self, context):
+        if self.favorite:
+            return set(context.columns.favorite_rows)
+        return context.all_rows() - context.columns.favorite_rows
+
+    def filter(self, context, rows):
+        if self.favorite:
+            return rows & context.columns.favorite_rows
+        return rows - context.columns.favorite_rows
+
+    def matches(self, card):
+        return bool(card.get('is_favorite', False)) == self.favorite
+
+    def describe(self, context, depth=0):
+        return [self._line(context, depth, f"收藏 {'是' if self.favorite else '否'}：收藏行号集合")]
+
+
+class TimeRange(Node):
+    """时间范围条件"""
+
+    def __init__(self, field: str, lower: Optional[int], upper: Optional[int], label: str):
+        self.field = field
+        self.lower = lower
+        self.upper = upper
+        self.label = label
+
+    def estimate(self, context):
+        return context.columns.count_in_range(self.field, self.lower, self.upper)
+
+    def rows(self, context):
+        return set(context.columns.rows_in_range(self.field, self.lower, self.upper))
+
+    def filter(self, context, rows):
+        if len(rows) > self.estimate(context):
+            return rows & self.rows(context)
+        column = context.columns.created if self.field == 'created_at' else context.columns.updated
+        return {row for row in rows if self._contains(column[row])}
+
+    def _contains(self, value: Optional[int]) -> bool:
+        if value is None or value == MISSING_TIME:
+            return False
+        return ((self.lower is None or value >= self.lower) and
+                (self.upper is None or value <= self.upper))
+
+    def matches(self, card):
+        return self._contains(card_time(card, self.field))
+
+    def describe(self, context, depth=0):
+        return [self._line(context, depth, f"时间 {self.label}：按时间排序的行号二分查找")]
+
+
+class And(Node):
+    """同时满足"""
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def _ordered(self, context):
+        # 排除条件放在最后，只在已经很少的行中检查
+        return sorted(self.children, key=lambda child: (isinstance(child, Not), child.estimate(context)))
+
+    def estimate(self, context):
+        return min(child.estimate(context) for child in self.children)
+
+    def rows(self, context):
+        first, *rest = self._ordered(context)
+        rows = first.rows(context)
+        for child in rest:
+            if not rows:
+                break
+            rows = child.filter(context, rows)
+        return rows
+
+    def filter(self, context, rows):
+        for child in self._ordered(context):
+            if not rows:
+                break
+            rows = child.filter(context, rows)
+        return rows
+
+    def matches(self, card):
+        return all(child.matches(card) for child in self.children)
+
+    def spans(self, card):
+        return merge_spans(*(child.spans(card) for child in self.children))
+
+    def describe(self, context, depth=0):
+        lines = [self._line(context, depth, "同时满足（按估计数从小到大执行）")]
+        for child in self._ordered(context):
+            lines.extend(child.describe(context, depth + 1))
+        return lines
+
+
+class Or(Node):
+    """满足其一"""
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def estimate(self, context):
+        return min(len(context.cards), sum(child.estimate(context) for child in self.children))
+
+    def rows(self, context):
+        return set().union(*(child.rows(context) for child in self.children))
+
+    def filter(self, context, rows):
+        return set().union(*(child.filter(context, rows) for child in self.children))
+
+    def matches(self, card):
+        return any(child.matches(card) for child in self.children)
+
+    def spans(self, card):
+        # 只取满足的分支中的位置
+        return merge_spans(*(child.spans(card) for child in self.children if child.matches(card)))
+
+    def describe(self, context, depth=0):
+        lines = [self._line(context, depth, "满足其一（合并各条件的结果）")]
+        for child in self.children:
+            lines.extend(child.describe(context, depth + 1))
+        return lines
+
+
+class Not(Node):
+    """排除"""
+
+    def __init__(self, child: Node):
+        self.child = child
+
+    def estimate(self, context):
+        return len(context.cards) - self.child.estimate(context)
+
+    def rows(self, context):
+        return context.all_rows() - self.child.rows(context)
+
+    def filter(self, context, rows):
+        return rows - self.child.filter(context, rows)
+
+    def matches(self, card):
+        return not self.child.matches(card)
+
+    def describe(self, context, depth=0):
+        lines = [self._line(context, depth, "排除")]
+        lines.extend(self.child.describe(context, depth + 1))
+        return lines
+
+
+def parse_query(text: str, default_fields=None) -> Optional[Node]:
+    """
+    解析查询
+
+    Args:
+        text: 查询文本
+        default_fields: 没有字段的词查找的字段，默认全部文本字段
+
+    Returns:
+        Optional[Node]: 条件树，查询为空时返回None
+
+    Raises:
+        QuerySyntaxError: 查询语法错误
+    """
+    parser = _Parser(_tokenize(text), tuple(default_fields or CardIndex.SEARCH_FIELDS))
+    return parser.parse()
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """拆分为(类型, 值)的词法单元"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        found = _TOKEN.match(text, position)
+        if found is None or found.end() == position:
+            raise QuerySyntaxError(f"无法识别的内容: {text[position:]}")
+        position = found.end()
+        kind = found.lastgroup
+        value = found.group(kind)
+        if kind == 'phrase':
+            value = value[1:-1]
+        elif kind == 'word' and value in ('AND', 'OR', 'NOT'):
+            kind = value
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    """递归下降解析：OR的优先级最低，其次是AND（含相邻），NOT最高"""
+
+    def __init__(self, tokens, default_fields):
+        self.tokens = tokens
+        self.position = 0
+        self.default_fields = default_fields
+
+    def parse(self) -> Optional[Node]:
+        if not self.tokens:
+            return None
+        node = self._or()
+        if self.position < len(self.tokens):
+            raise QuerySyntaxError(f"多余的内容: {self.tokens[self.position][1]}")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise QuerySyntaxError("查询不完整")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _or(self) -> Node:
+        children = [self._and()]
+        while self._peek() == 'OR':
+            self.position += 1
+            children.append(self._and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _and(self) -> Node:
+        children = [self._not()]
+        while self._peek() not in (None, 'OR', 'close'):
+            if self._peek() == 'AND':
+                self.position += 1
+            children.append(self._not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _not(self) -> Node:
+        kind, value = self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+        if kind == 'NOT':
+            self.position += 1
+            return Not(self._not())
+        if kind == 'word' and value.startswith('-') and len(value) > 1:
+            # "-词"是排除的简写
+            self.tokens[self.position] = ('word', value[1:])
+            return Not(self._not())
+        if kind == 'field' and value.startswith('-') and len(value) > 1:
+            self.tokens[self.position] = ('field', value[1:])
+            return Not(self._not())
+        return self._primary()
+
+    def _primary(self) -> Node:
+        kind, value = self._next()
+        if kind == 'open':
+            node = self._or()
+            if self._next()[0] != 'close':
+                raise QuerySyntaxError("缺少右括号")
+            return node
+        if kind in ('word', 'phrase'):
+            return self._text_term(value, self.default_fields, f'"{value}"')
+        if kind == 'field':
+            return self._field_term(value)
+        raise QuerySyntaxError(f"此处不能是 {value}")
+
+    def _text_term(self, value: str, fields: Tuple[str, ...], label: str) -> TextTerm:
+        # 空的或只有空白的文本（如""）在倒排表中没有候选，不作为"全部卡片"处理，直接报错
+        if not normalize_text(value).strip():
+            raise QuerySyntaxError(f"文本条件不能为空: {label}")
+        return TextTerm(value, fields, label)
+
+    def _field_term(self, name: str) -> Node:
+        kind, value = self._next()
+        if kind not in ('word', 'phrase'):
+            raise QuerySyntaxError(f"{name}: 后缺少值")
+        key = name.lower()
+        if key in TEXT_FIELD_NAMES:
+            return self._text_term(value, (TEXT_FIELD_NAMES[key],), f"{name}:{value}")
+        if key in TAG_FIELD_NAMES:
+            return TagTerm(value)
+        if key in FAVORITE_FIELD_NAMES:
+            if value.lower() in TRUE_WORDS:
+                return FavoriteTerm(True)
+            if value.lower() in FALSE_WORDS:
+                return FavoriteTerm(False)
+            raise QuerySyntaxError(f"无法识别的收藏条件: {value}")
+        if key in TIME_FIELD_NAMES:
+            lower, upper = _parse_range(value)
+            return TimeRange(TIME_FIELD_NAMES[key], lower, upper, f"{name}:{value}")
+        raise QuerySyntaxError(f"未知的字段: {name}")
+
+
+def _parse_range(value: str) -> Tuple[Optional[int], Optional[int]]:
+    """解析时间范围（开始..结束，或单个时段）"""
+    if '..' in value:
+        start, end = value.split('..', 1)
+    else:
+        start = end = value
+    lower = _period(start)[0] if start else None
+    upper = _period(end)[1] if end else None
+    if lower is None and upper is None:
+        raise QuerySyntaxError(f"时间范围不能两边都为空: {value}")
+    return lower, upper
+
+
+def _period(text: str) -> Tuple[int, int]:
+    """年、年-月或年-月-日表示的时段的开始和最后一刻"""
+    parts = text.replace('/', '-').split('-')
+    try:
+        numbers = [int(part) for part in parts]
+        if len(numbers) == 1:
+            start, end = datetime(numbers[0], 1, 1), datetime(numbers[0], 12, 31)
+        elif len(numbers) == 2:
+            year, month = numbers
+            start = datetime(year, month, 1)
+            end = datetime(year, month, calendar.monthrange(year, month)[1])
+        elif len(numbers) == 3:
+            start = end = datetime(*numbers)
+        else:
+            raise ValueError(text)
+    except ValueError:
+        raise QuerySyntaxError(f"无法识别的时间: {text}") from None
+    return time_micros(start), time_micros(end.replace(hour=23, minute=59, second=59, microsecond=999999))
+
+
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑的卡片记录
+
+每张卡片原本是一个有九、十个字符串键的dict，卡片很多时dict本身的开销占了大部分内存。
+Card用__slots__保存固定字段，同时提供与dict兼容的读写方式（card['keyword']、card.get、
+card.update、card.copy、'tags' in card、json序列化等），现有代码不需要修改。
+
+- 来源和标签在大量卡片之间重复（例如《论语·学而》），保存时使用驻留字符串，只占一份内存
+- 创建/修改时间按整数（微秒）保存，读取时还原为原来的ISO格式字符串；
+  无法原样还原的时间文本（其他格式、带时区）按原文本保存
+- 固定字段以外的键保存在额外字典中，没有额外键时不占用字典
+- 检索用的规范化文本（见card_normalize.py）在第一次使用时缓存，修改字段后作废；不随pickle保存
+- 整个卡片列表可以按槽拆成列（cards_to_columns），写入预热快照后一次恢复（cards_from_columns）
+- 保存为JSON前用cards_to_json一次把整个列表转换为dict，不经过json的default回调逐张转换
+"""
+
+import sys
+from collections import deque
+from collections.abc import Mapping, MutableMapping
+from operator import attrgetter
+from datetime import date, datetime, time, timedelta
+from itertools import repeat
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from card_normalize import normalize_text
+from card_views import ReadOnlyCards
+
+# 按顺序列出的卡片字段（也是转换回dict和保存为JSON时的键顺序）
+CARD_FIELDS = ('id', 'keyword', 'definition', 'source', 'quote', 'notes', 'tags',
+               'created_at', 'updated_at', 'is_favorite')
+
+# 时间字段 → 保存整数时间的槽
+_TIME_SLOTS = {'created_at': '_created', 'updated_at': '_updated'}
+# 直接保存的字段
+_PLAIN_FIELDS = frozenset(CARD_FIELDS) - frozenset(_TIME_SLOTS)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_time(text: str):
+    """
+    把ISO时间文本转换为整数（自1970-01-01起的微秒数，不做时区换算）
+
+    Returns:
+        int或str: 能原样还原时返回整数，否则返回原文本
+    """
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return text
+    if moment.tzinfo is not None:
+        return text
+    value = (moment - _EPOCH) // _MICROSECOND
+    # datetime.isoformat()生成的两种标准长度可以直接确定能原样还原，其他格式需要核对
+    if text[10:11] == 'T' and ((len(text) == 26 and text[19] == '.' and moment.microsecond)
+                               or (len(text) == 19 and not moment.microsecond)):
+        return value
+    return value if decode_time(value) == text else text
+
+
+def decode_time(value) -> str:
+    """把encode_time的结果还原为ISO时间文本"""
+    if isinstance(value, int):
+        return (_EPOCH + value * _MICROSECOND).isoformat()
+    return value
+
+
+def time_micros(value) -> Optional[int]:
+    """
+    把时间（datetime、date或ISO时间文本）转换为与encode_time相同的整数，无法识别时返回None
+
+    带时区的时间先换算为本地时间（卡片中的时间都是本地时间）。
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, date):
+        moment = datetime.combine(value, time())
+    elif isinstance(value, str):
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def card_time(card: Mapping, key: str) -> Optional[int]:
+    """卡片的创建/修改时间（整数），Card直接读取已编码的值"""
+    if isinstance(card, Card):
+        value = getattr(card, _TIME_SLOTS[key], None)
+        if isinstance(value, int):
+            return value
+    return time_micros(card.get(key))
+
+
+def _intern_tags(tags):
+    """标签列表中的字符串使用驻留字符串"""
+    if isinstance(tags, (list, tuple)):
+        return [sys.intern(tag) if type(tag) is str else tag for tag in tags]
+    return tags
+
+
+class Card(MutableMapping):
+    """
+    使用__slots__的卡片记录，可以像dict一样使用
+
+    未设置的字段与dict中不存在的键行为一致（card['tags']抛出KeyError，card.get返回默认值）。
+    """
+
+    __slots__ = ('id', 'keyword', 'definition', 'source', 'quote', 'notes', 'tags',
+                 '_created', '_updated', 'is_favorite', '_extra', '_normalized')
+
+    # pickle和复制时保存的槽（不含缓存的规范化文本）
+    _STORED_SLOTS = __slots__[:-1]
+
+    def __init__(self, data: Optional[Mapping] = None, **fields):
+        """
+        Args:
+            data: 卡片数据（dict或Card）
+            **fields: 其他字段
+        """
+        self._extra: Optional[Dict[str, Any]] = None
+        if data is not None:
+            for key, value in data.items():
+                self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Card':
+        """从dict创建卡片记录（已经是Card时直接返回）"""
+        if isinstance(data, Card):
+            return data
+        return cls(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通dict（用于JSON序列化；直接读取槽，键的顺序与遍历卡片相同）"""
+        data = {}
+        extra = self._extra
+        for key, slot, is_time in _FIELD_SLOTS:
+            value = getattr(self, slot, _UNSET)
+            if value is not _UNSET:
+                data[key] = decode_time(value) if is_time else value
+            elif is_time and extra is not None and key in extra:
+                data[key] = extra[key]
+        if extra is not None:
+            for key, value in extra.items():
+                if key not in _TIME_SLOTS:
+                    data[key] = value
+        return data
+
+    def _slot_values(self) -> tuple:
+        """保存的槽的值（未设置的槽为_UNSET）"""
+        try:
+            return _get_stored_slots(self)
+        except AttributeError:
+            return tuple(map(getattr, repeat(self), self._STORED_SLOTS, repeat(_UNSET)))
+
+    def copy(self) -> 'Card':
+        """浅拷贝（标签列表会复制，修改副本的标签不影响原卡片）"""
+        card = _restore_card(*self._slot_values())
+        if isinstance(getattr(card, 'tags', None), list):
+            card.tags = list(card.tags)
+        if card._extra is not None:
+            card._extra = dict(card._extra)
+        return card
+
+    # ---- dict兼容接口 ----
+
+    def __getitem__(self, key):
+        if key in _PLAIN_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        slot = _TIME_SLOTS.get(key)
+        if slot is not None:
+            try:
+                return decode_time(getattr(self, slot))
+            except AttributeError:
+                pass
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        """与dict.get相同（不经过异常，读取更快）"""
+        if key in _PLAIN_FIELDS:
+            return getattr(self, key, default)
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def normalized(self, field: str) -> str:
+        """
+        字段的规范化文本（小写、繁体和异体字换成简体，与原文逐字对应），用于搜索、查重和排序
+
+        第一次使用时计算并缓存，修改任何字段后重新计算。
+        """
+        cache = getattr(self, '_normalized', None)
+        if cache is None:
+            cache = self._normalized = {}
+        text = cache.get(field)
+        if text is None:
+            value = self.get(field)
+            original = value if type(value) is str else str(value or '')
+            text = normalize_text(original)
+            # 与原文相同时共用原来的字符串，不多占内存
+            cache[field] = text = original if text == original else text
+        return text
+
+    def __setitem__(self, key, value):
+        self._normalized = None
+        if key == 'source' and type(value) is str:
+            self.source = sys.intern(value)
+        elif key == 'tags':
+            self.tags = _intern_tags(value)
+        elif key in _PLAIN_FIELDS:
+            setattr(self, key, value)
+        elif key in _TIME_SLOTS and type(value) is str:
+            setattr(self, _TIME_SLOTS[key], encode_time(value))
+            self._pop_extra(key)
+        else:
+            if key in _TIME_SLOTS:
+                # 非文本的时间值原样保存在额外字典中
+                self._delete_slot(_TIME_SLOTS[key])
+            if self._extra is None:
+                self._extra = {}
+            self._extra[sys.intern(key) if type(key) is str else key] = value
+
+    def __delitem__(self, key):
+        self._normalized = None
+        if key in _PLAIN_FIELDS:
+            if not self._delete_slot(key):
+                raise KeyError(key)
+            return
+        found = key in _TIME_SLOTS and self._delete_slot(_TIME_SLOTS[key])
+        if self._pop_extra(key) or found:
+            return
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in _PLAIN_FIELDS:
+            return hasattr(self, key)
+        if key in _TIME_SLOTS and hasattr(self, _TIME_SLOTS[key]):
+            return True
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator:
+        for key in CARD_FIELDS:
+            if key in self:
+                yield key
+        if self._extra is not None:
+            for key in self._extra:
+                if key not in _TIME_SLOTS:
+                    yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Card({self.to_dict()!r})"
+
+    def __reduce__(self):
+        """pickle时只保存槽的值（比默认的状态字典更小更快），恢复时每张卡片只调用一次_restore_card"""
+        return _restore_card, self._slot_values()
+
+    def _delete_slot(self, slot: str) -> bool:
+        """清除一个槽，返回之前是否有值"""
+        try:
+            delattr(self, slot)
+            return True
+        except AttributeError:
+            return False
+
+    def _pop_extra(self, key) -> bool:
+        """从额外字典中移除一个键，返回之前是否存在"""
+        if self._extra is None or key not in self._extra:
+            return False
+        del self._extra[key]
+        if not self._extra:
+            self._extra = None
+        return True
+
+
+class _Unset:
+    """pickle中表示未设置的槽"""
+
+    def __reduce__(self):
+        return '_UNSET'
+
+
+_UNSET = _Unset()
+
+# 字段 → (字段, 保存该字段的槽, 是否为时间字段)，按CARD_FIELDS的顺序
+_FIELD_SLOTS = tuple((key, _TIME_SLOTS.get(key, key), key in _TIME_SLOTS) for key in CARD_FIELDS)
+# 一次取出全部保存的槽的值（有槽未设置时抛出AttributeError）
+_get_stored_slots = attrgetter(*Card._STORED_SLOTS)
+
+
+def _restore_card(*values) -> Card:
+    """从保存的槽值（顺序同Card._STORED_SLOTS）恢复卡片"""
+    card = Card.__new__(Card)
+    if _UNSET not in values:
+        # 常见情况：所有槽都有值，一次解包赋值
+        (card.id, card.keyword, card.definition, card.source, card.quote, card.notes, card.tags,
+         card._created, card._updated, card.is_favorite, card._extra) = values
+        return card
+    for slot, value in zip(Card._STORED_SLOTS, values):
+        if value is not _UNSET:
+            object.__setattr__(card, slot, value)
+    return card
+
+
+def cards_to_columns(cards: Sequence[Card]) -> Dict[str, Any]:
+    """
+    把卡片列表按槽拆成列（写入预热快照用）
+
+    每个槽一列值；有卡片没有设置这个槽时，只保存设置了的行号和值。列中只有字符串、整数、
+    列表等内置对象，pickle读写都比逐张卡片保存和恢复快得多。
+
+    Args:
+        cards: 卡片列表（都是Card）
+
+    Returns:
+        Dict[str, Any]: {'count': 卡片数, 'columns': 槽 → 值列表, 'rows': 槽 → 设置了的行号（部分设置的槽）}
+    """
+    columns = {}
+    partial = {}
+    for slot in Card._STORED_SLOTS:
+        values = [getattr(card, slot, _UNSET) for card in cards]
+        if any(value is _UNSET for value in values):
+            rows = [row for row, value in enumerate(values) if value is not _UNSET]
+            if not rows:
+                continue
+            partial[slot] = rows
+            values = [values[row] for row in rows]
+        columns[slot] = values
+    return {'count': len(cards), 'columns': columns, 'rows': partial}
+
+
+def cards_from_columns(state: Mapping) -> List[Card]:
+    """
+    从cards_to_columns的结果恢复卡片列表
+
+    先一次创建全部空记录，再按列用槽描述符赋值（map在C中逐个调用，没有逐张卡片的Python循环）。
+    """
+    cards = list(map(Card.__new__, repeat(Card, state['count'])))
+    partial = state['rows']
+    for slot, values in state['columns'].items():
+        rows = partial.get(slot)
+        targets = cards if rows is None else map(cards.__getitem__, rows)
+        # deque(maxlen=0)只消费迭代器，不保存结果
+        deque(map(getattr(Card, slot).__set__, targets, values), maxlen=0)
+    return cards
+
+
+def normalized_text(card: Mapping, field: str) -> str:
+    """卡片字段的规范化文本，Card使用缓存，普通dict每次计算"""
+    if isinstance(card, Card):
+        return card.normalized(field)
+    return normalize_text(str(card.get(field) or ''))
+
+
+def cards_to_json(cards) -> List[Any]:
+    """把卡片列表一次转换为可以直接json序列化的列表（Card转换为dict，其他原样保留）"""
+    return [card.to_dict() if type(card) is Card else card for card in cards]
+
+
+def card_to_json(value):
+    """json.dump的default参数：把Card转换为dict、只读卡片序列转换为list"""
+    if isinstance(value, Card):
+        return value.to_dict()
+    if isinstance(value, ReadOnlyCards):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+搜索结果缓存
+
+切换视图时用户常常重复执行同样几次搜索。缓存以查询的规范化键（文本、字段、选项、排序和数量限制）
+为键保存结果视图和结果时的集合版本号，容量有限，按最近最少使用淘汰。
+
+卡片变更时只作废可能受影响的结果：变更的卡片在结果中，或者变更后满足查询条件（可能进入结果）。
+其余结果仍然有效，版本号更新为新版本。结果视图持有当时的快照，但其中的卡片都没有变化，
+与当前卡片是同一批对象、相对顺序也相同。读取时版本号与集合版本号不一致的结果（漏掉了变更通知）
+一律视为失效。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from card_events import CardEvent, CARD_DELETED, CARDS_REPLACED
+
+
+class _Entry:
+    """一条缓存的结果"""
+
+    __slots__ = ('query', 'result', 'ids', 'version')
+
+    def __init__(self, query, result, version: int):
+        self.query = query
+        self.result = result
+        self.ids = {card.get('id') for card in result}
+        self.version = version
+
+
+class SearchCache:
+    """按查询和集合版本号缓存结果的LRU缓存"""
+
+    def __init__(self, card_manager, capacity: int = 32):
+        """
+        Args:
+            card_manager: 卡片管理器（需要以immediate方式订阅其变更事件，且在版本号递增之后）
+            capacity: 最多缓存的结果数
+        """
+        self.card_manager = card_manager
+        self.capacity = capacity
+        self._entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        # 多个读线程可能同时查找和写入
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """取出有效的结果，没有时返回None"""
+        version = self.card_manager.version
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+    def put(self, key, query, result, version: int):
+        """
+        保存结果
+
+        Args:
+            key: 查询的规范化键
+            query: 查询（用于判断变更的卡片是否满足条件）
+            result: 结果视图
+            version: 得到结果时的集合版本号，已经过时的结果不保存
+        """
+        if version != self.card_manager.version:
+            return
+        entry = _Entry(query, result, version)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时只作废可能受影响的结果，其余结果更新到新版本"""
+        if not self._entries:
+            return
+        if event.type == CARDS_REPLACED:
+            self.clear()
+            return
+        version = self.card_manager.version
+        changed = list(event.card_ids)
+        cards = []
+        if event.type != CARD_DELETED:
+            get_card = self.card_manager.get_card
+            cards = [card for card in map(get_card, changed) if card is not None]
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if self._affected(entry, event.type, changed, cards):
+                    del self._entries[key]
+                elif entry.version == version - 1:
+                    entry.version = version
+
+    @staticmethod
+    def _affected(entry: _Entry, event_type: str, changed, cards) -> bool:
+        """变更是否可能改变这条结果"""
+        query = entry.query
+        if not query.matches_exactly:
+            # 查询含有无法逐张判断的条件
+            return True
+        if any(card_id in entry.ids for card_id in changed):
+            return True
+        if event_type == CARD_DELETED:
+            # 跳过的前几个结果被删除时结果整体前移
+            return query.offset > 0
+        return any(query.matches(card) for card in cards)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+预热快照：把解析好的卡片和派生索引用pickle保存在数据文件旁边
+
+启动时一次读入快照即可恢复全部内存状态，省去JSON解析和索引重建。
+快照记录了数据文件的大小和修改时间（纳秒），任何一项对不上（例如文件被其他程序修改、
+从备份恢复、换了一台电脑同步过来）都视为过期，调用方应回退到完整加载。与Python的.pyc缓存一样
+不核对内容摘要，启动时不必再把数据文件读一遍。
+
+快照只在退出程序时写一次（见CardManager.save_snapshot），不在每次保存时写。
+
+文件格式：两个连续的pickle对象，先是很小的头部（用于校验），然后是卡片和索引。
+卡片按槽拆成列保存（见card_record.cards_to_columns），不逐张pickle卡片对象，读入比解析JSON更快。
+"""
+
+import gc
+import io
+import os
+import pickle
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# 快照格式版本，卡片或索引结构变化时递增，旧快照自动失效
+SNAPSHOT_VERSION = 4
+
+
+def snapshot_path(data_file: str) -> str:
+    """数据文件对应的快照文件路径（cards.json → cards.snapshot）"""
+    return os.path.splitext(data_file)[0] + ".snapshot"
+
+
+@contextmanager
+def gc_paused():
+    """暂停循环垃圾回收（恢复大量对象期间使用），退出时恢复原来的状态"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def write_snapshot(data_file: str, payload: Dict[str, Any]) -> bool:
+    """
+    写入快照（数据文件必须已经保存好）
+
+    Args:
+        data_file: 数据文件路径
+        payload: 要保存的内存状态（卡片和索引）
+
+    Returns:
+        bool: 是否写入成功
+    """
+    path = snapshot_path(data_file)
+    temp_path = path + ".tmp"
+    try:
+        stat = os.stat(data_file)
+        header = {
+            'version': SNAPSHOT_VERSION,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        # 先写临时文件再替换，避免中途退出留下半个快照
+        with open(temp_path, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        print(f"写入快照失败: {str(e)}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+
+
+def read_snapshot(data_file: str) -> Optional[Dict[str, Any]]:
+    """
+    读取快照（一次读入整个文件）
+
+    Args:
+        data_file: 数据文件路径
+
+    Returns:
+        Optional[Dict[str, Any]]: 快照中的内存状态，快照不存在、损坏或过期时返回None
+    """
+    path = snapshot_path(data_file)
+    try:
+        stat = os.stat(data_file)
+        with open(path, 'rb') as f:
+            stream = io.BytesIO(f.read())
+        header = pickle.load(stream)
+        if (not isinstance(header, dict)
+                or header.get('version') != SNAPSHOT_VERSION
+                or header.get('size') != stat.st_size
+                or header.get('mtime_ns') != stat.st_mtime_ns):
+            return None
+        # 读入的对象都会保留，暂停循环垃圾回收，免得反复遍历刚创建的大量对象
+        with gc_paused():
+            payload = pickle.load(stream)
+        return payload if isinstance(payload, dict) else None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取快照失败，将重新加载数据: {str(e)}")
+        return None
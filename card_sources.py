@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+出处层级索引：典籍 → 篇章
+
+出处是自由文本，常见写法有《论语·学而》、《庄子》〈逍遥游〉、司马迁《史记·项羽本纪》、论语·为政等。
+parse_source把它拆成(典籍, 篇章)：有书名号时取书名号内的部分（前面的作者名不计），
+按间隔号拆出篇章，书名号之后的文字也算篇章；没有书名号时整个出处按间隔号拆分。
+
+SourceIndex按规范化文本（繁简、异体字统一，见card_normalize.py）把卡片归入典籍和篇章，
+并维护每个典籍的卡片数，每次变更只调整受影响的卡片，计数是O(1)更新的。
+典籍的排列顺序只在典籍增减时重新排序，所以界面上按典籍浏览不必扫描卡片。
+索引第一次使用时建立，之后以immediate方式订阅变更事件增量更新。
+"""
+
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from card_events import CardEvent, CARD_DELETED, CARDS_REPLACED
+from card_normalize import normalize_text
+
+# 书名号内的书名
+_BOOK_TITLE = re.compile(r"《([^》]+)》")
+# 典籍与篇章之间的间隔号（含常见的几种写法）
+_SEPARATOR = re.compile(r"\s*[·•・‧]\s*")
+# 书名号之后的篇章两端要去掉的符号
+_CHAPTER_MARKS = " \t〈〉<>，,。"
+
+# 没有出处的卡片归入的典籍名
+NO_SOURCE = "（未注明出处）"
+# 只有典籍、没有篇章的卡片归入的篇章名
+NO_CHAPTER = "（未分篇）"
+
+
+def parse_source(source: Optional[str]) -> Tuple[str, str]:
+    """
+    把出处拆成(典籍, 篇章)
+
+    Returns:
+        Tuple[str, str]: (典籍, 篇章)，没有篇章时篇章为""，没有出处时都为""
+    """
+    source = (source or "").strip()
+    match = _BOOK_TITLE.search(source)
+    title = match.group(1).strip() if match else source
+    parts = _SEPARATOR.split(title, 1)
+    book = parts[0].strip()
+    chapter = parts[1].strip() if len(parts) > 1 else ""
+    if match and not chapter:
+        chapter = source[match.end():].strip(_CHAPTER_MARKS)
+    return book, chapter
+
+
+def source_key(source: Optional[str]) -> Tuple[str, str]:
+    """出处的索引键：规范化的(典籍, 篇章)"""
+    book, chapter = parse_source(source)
+    return normalize_text(book), normalize_text(chapter)
+
+
+class SourceIndex:
+    """
+    出处层级索引
+
+    - books: 典籍键 → 篇章键 → 卡片ID集合（键为规范化文本，篇章键""表示没有篇章）
+    - book_counts: 典籍键 → 卡片数
+    - labels: (典籍键,) 或 (典籍键, 篇章键) → 显示名称（最先出现的原文写法）
+    """
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表和ID索引）
+        """
+        self.card_manager = card_manager
+        self.books: Dict[str, Dict[str, Set[str]]] = {}
+        self.book_counts: Dict[str, int] = {}
+        self.labels: Dict[tuple, str] = {}
+        self._card_keys: Dict[str, Tuple[str, str]] = {}
+        self._book_order: Optional[List[str]] = None  # 排好序的典籍键，典籍增减时作废
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前卡片列表重建"""
+        self.books = {}
+        self.book_counts = {}
+        self.labels = {}
+        self._card_keys = {}
+        self._book_order = None
+        for card in self.card_manager.cards:
+            self._add(card)
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时增量更新（在卡片索引之后订阅，按ID取到的是当前的卡片）"""
+        if event.type == CARDS_REPLACED:
+            self.rebuild()
+            return
+        get_card = self.card_manager.index.get
+        for card_id in event.card_ids:
+            card = None if event.type == CARD_DELETED else get_card(card_id)
+            if card is not None and self._card_keys.get(card_id) == source_key(card.get('source')):
+                continue  # 出处没有变化（例如只是收藏）
+            self._remove(card_id)
+            if card is not None:
+                self._add(card)
+
+    def book_list(self) -> List[Tuple[str, str, int]]:
+        """
+        所有典籍
+
+        Returns:
+            List[Tuple[str, str, int]]: [(典籍键, 显示名称, 卡片数), ...]，按典籍排列，没有出处的在最后
+        """
+        if self._book_order is None:
+            self._book_order = sorted(self.books, key=lambda book: (not book, book))
+        labels = self.labels
+        counts = self.book_counts
+        return [(book, labels[(book,)], counts[book]) for book in self._book_order]
+
+    def chapter_list(self, book: str) -> List[Tuple[str, str, int]]:
+        """
+        某个典籍的篇章
+
+        Returns:
+            List[Tuple[str, str, int]]: [(篇章键, 显示名称, 卡片数), ...]，没有篇章的在最后
+        """
+        chapters = self.books.get(book, {})
+        return [(chapter, self.labels[(book, chapter)], len(chapters[chapter]))
+                for chapter in sorted(chapters, key=lambda chapter: (not chapter, chapter))]
+
+    def count(self, book: str, chapter: Optional[str] = None) -> int:
+        """典籍（或其中某一篇章）的卡片数"""
+        if chapter is None:
+            return self.book_counts.get(book, 0)
+        return len(self.books.get(book, {}).get(chapter, ()))
+
+    def card_ids(self, book: str, chapter: Optional[str] = None) -> Set[str]:
+        """典籍（或其中某一篇章）的卡片ID"""
+        chapters = self.books.get(book, {})
+        if chapter is not None:
+            return set(chapters.get(chapter, ()))
+        return set().union(*chapters.values())
+
+    def _add(self, card):
+        """把一张卡片加入索引"""
+        card_id = card.get('id')
+        if card_id is None or card_id in self._card_keys:
+            return
+        book_label, chapter_label = parse_source(card.get('source'))
+        book, chapter = key = normalize_text(book_label), normalize_text(chapter_label)
+        self._card_keys[card_id] = key
+        chapters = self.books.get(book)
+        if chapters is None:
+            chapters = self.books[book] = {}
+            self.book_counts[book] = 0
+            self._book_order = None
+            self.labels[(book,)] = book_label or NO_SOURCE
+        posting = chapters.get(chapter)
+        if posting is None:
+            posting = chapters[chapter] = set()
+            self.labels[key] = chapter_label or NO_CHAPTER
+        posting.add(card_id)
+        self.book_counts[book] += 1
+
+    def _remove(self, card_id: str):
+        """把一张卡片移出索引"""
+        key = self._card_keys.pop(card_id, None)
+        if key is None:
+            return
+        book, chapter = key
+        chapters = self.books[book]
+        posting = chapters[chapter]
+        posting.discard(card_id)
+        self.book_counts[book] -= 1
+        if not posting:
+            del chapters[chapter]
+            del self.labels[key]
+        if not chapters:
+            del self.books[book]
+            del self.book_counts[book]
+            del self.labels[(book,)]
+            self._book_order = None
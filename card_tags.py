@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+标签索引：标签 → 卡片ID集合
+
+标签管理（列出标签和卡片数、重命名、删除）和按标签筛选卡片都使用这一个索引。
+TagIndex按卡片ID保存（不依赖卡片在列表中的位置，删除卡片不必重建），
+每次变更只把受影响卡片的旧标签和新标签各调整一次，所以标签的卡片数是O(1)更新的，
+取卡片数就是取集合大小。按标签筛选时先在这里求出卡片ID（多个标签的且/或是集合运算），
+列式镜像再经"卡片ID → 行号"换成行号（见card_columns.py），与收藏、搜索条件以集合运算组合。
+
+索引第一次使用时建立，之后以immediate方式订阅变更事件增量更新。
+"""
+
+import re
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from card_events import CardEvent, CARD_DELETED, CARDS_REPLACED
+
+# 输入多个标签时的分隔符
+_TAG_SEPARATORS = re.compile(r"[,，、;；\s]+")
+
+
+def clean_tags(tags: Union[str, Iterable[str], None]) -> List[str]:
+    """
+    整理标签：去掉首尾空白和空标签，去重并保持原有顺序
+
+    Args:
+        tags: 一个标签或多个标签
+
+    Returns:
+        List[str]: 整理后的标签
+    """
+    if tags is None:
+        return []
+    if isinstance(tags, str):
+        tags = [tags]
+    result = []
+    for tag in tags:
+        tag = str(tag).strip()
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def parse_tags(text: str) -> List[str]:
+    """把输入的文本拆成标签（逗号、顿号、分号或空白分隔）"""
+    return clean_tags(_TAG_SEPARATORS.split(text or ""))
+
+
+class TagIndex:
+    """
+    标签索引
+
+    - tag_ids: 标签 → 有该标签的卡片ID集合
+    """
+
+    def __init__(self, card_manager):
+        """
+        Args:
+            card_manager: 卡片管理器（读取其cards列表和ID索引）
+        """
+        self.card_manager = card_manager
+        self.tag_ids: Dict[str, Set[str]] = {}
+        self._card_tags: Dict[str, frozenset] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前卡片列表重建"""
+        self.tag_ids = {}
+        self._card_tags = {}
+        for card in self.card_manager.cards:
+            self._add(card)
+
+    def on_cards_changed(self, event: CardEvent):
+        """卡片变更时增量更新（在卡片索引之后订阅，按ID取到的是当前的卡片）"""
+        if event.type == CARDS_REPLACED:
+            self.rebuild()
+            return
+        get_card = self.card_manager.index.get
+        for card_id in event.card_ids:
+            card = None if event.type == CARD_DELETED else get_card(card_id)
+            if card is None:
+                self._remove(card_id)
+                continue
+            old = self._card_tags.get(card_id)
+            new = frozenset(card.get('tags') or ())
+            if old is None:
+                self._add(card)
+            elif old != new:
+                # 只调整增减的标签
+                self._card_tags[card_id] = new
+                for tag in old - new:
+                    self._discard(tag, card_id)
+                for tag in new - old:
+                    self.tag_ids.setdefault(tag, set()).add(card_id)
+
+    def count(self, tag: str) -> int:
+        """有该标签的卡片数"""
+        return len(self.tag_ids.get(tag, ()))
+
+    def counts(self) -> List[Tuple[str, int]]:
+        """
+        所有标签及其卡片数
+
+        Returns:
+            List[Tuple[str, int]]: [(标签, 卡片数), ...]，卡片多的在前，数量相同按标签排列
+        """
+        return sorted(((tag, len(ids)) for tag, ids in self.tag_ids.items()),
+                      key=lambda item: (-item[1], item[0]))
+
+    def card_ids(self, tags: Union[str, Iterable[str]], any_tag: bool = False) -> Set[str]:
+        """
+        有指定标签的卡片ID（集合运算）
+
+        Args:
+            tags: 一个或多个标签
+            any_tag: True时有其中任一标签即可，否则需要全部标签
+        """
+        postings = [self.tag_ids.get(tag, set()) for tag in clean_tags(tags)]
+        if not postings:
+            return set()
+        if any_tag:
+            return set().union(*postings)
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def _add(self, card):
+        """把一张卡片加入索引"""
+        card_id = card.get('id')
+        if card_id is None or card_id in self._card_tags:
+            return
+        tags = frozenset(card.get('tags') or ())
+        self._card_tags[card_id] = tags
+        for tag in tags:
+            self.tag_ids.setdefault(tag, set()).add(card_id)
+
+    def _remove(self, card_id: str):
+        """把一张卡片移出索引"""
+        for tag in self._card_tags.pop(card_id, ()):
+            self._discard(tag, card_id)
+
+    def _discard(self, tag: str, card_id: str):
+        """从标签的卡片集合中移除一张卡片，集合为空时删除该标签"""
+        ids = self.tag_ids.get(tag)
+        if ids is not None:
+            ids.discard(card_id)
+            if not ids:
+                del self.tag_ids[tag]
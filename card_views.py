@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+只读的卡片序列
+
+CardManager.snapshot()返回CardsSnapshot：它直接引用当时的卡片列表，不复制。
+卡片管理器在快照存在期间采用写时复制——修改前先换一个新列表、修改卡片前先换成卡片副本，
+所以快照中的列表和卡片都不会再变，后台线程可以不持锁地遍历、搜索或序列化。
+
+筛选、排序和收藏的结果是CardsView：只保存快照中各卡片的位置（紧凑的整数数组），
+不复制卡片列表，也无法通过它改变卡片的存储顺序。需要可修改的列表时用list(view)。
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class ReadOnlyCards(Sequence):
+    """卡片列表的只读视图（不复制列表）"""
+
+    __slots__ = ('_cards', '__weakref__')
+
+    def __init__(self, cards: List[Any]):
+        self._cards = cards
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyCards(self._cards[index])
+        return self._cards[index]
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __iter__(self):
+        return iter(self._cards)
+
+    def __reversed__(self):
+        return reversed(self._cards)
+
+    def __eq__(self, other):
+        if isinstance(other, (ReadOnlyCards, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self._cards)}张卡片)"
+
+
+class CardsSnapshot(ReadOnlyCards):
+    """某一时刻的卡片集合：卡片列表、回收站和版本号"""
+
+    __slots__ = ('trash', 'version')
+
+    def __init__(self, cards: List[Any], trash: Tuple[Any, ...], version: int):
+        super().__init__(cards)
+        self.trash = trash
+        self.version = version
+
+    def stored_cards(self) -> List[Any]:
+        """写入数据文件的卡片：卡片列表之后是回收站中的卡片"""
+        if not self.trash:
+            return self._cards
+        return self._cards + list(self.trash)
+
+
+class CardsView(ReadOnlyCards):
+    """快照中若干位置上的卡片（按位置数组的顺序），切片也不复制卡片"""
+
+    __slots__ = ('_positions', '_snapshot', '_spans')
+
+    def __init__(self, snapshot: ReadOnlyCards, positions: Iterable[int], spans: Optional[Sequence[dict]] = None):
+        """
+        Args:
+            snapshot: 卡片快照（视图持有它，保证卡片管理器对之后的修改写时复制）
+            positions: 卡片在快照中的位置
+            spans: 与positions对应的每张卡片的匹配位置（字段 → [(开始, 结束), ...]），没有文本条件时为None
+        """
+        super().__init__(snapshot._cards)
+        self._snapshot = snapshot
+        self._positions = positions if isinstance(positions, array) else array('l', positions)
+        self._spans = tuple(spans) if spans is not None else None
+
+    @property
+    def positions(self) -> memoryview:
+        """卡片在快照中的位置（只读）"""
+        return memoryview(self._positions).toreadonly()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            spans = self._spans[index] if self._spans is not None else None
+            return CardsView(self._snapshot, self._positions[index], spans)
+        return self._cards[self._positions[index]]
+
+    def match_spans(self, index: int) -> dict:
+        """
+        第index张卡片中匹配的位置（查询时记下的，不要修改）
+
+        Returns:
+            Dict[str, List[Tuple[int, int]]]: 字段 → 匹配位置，查询没有文本条件时为空
+        """
+        if self._spans is None:
+            return {}
+        return self._spans[index]
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        return map(self._cards.__getitem__, self._positions)
+
+    def __reversed__(self):
+        return map(self._cards.__getitem__, reversed(self._positions))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试共用的夹具：在临时目录中写入卡片数据文件并创建卡片管理器
+
+pytest运行时临时目录由tmp_path提供并自动清理；测试脚本单独运行（python test_xxx.py）时，
+main()用temporary_manager_factory()得到同样的工厂，退出时删除临时目录。
+"""
+
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_manager import CardManager
+
+
+class ManagerFactory:
+    """在一个临时目录中创建卡片管理器，每次调用使用单独的子目录（数据文件、备份和快照互不影响）"""
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: 临时目录
+        """
+        self.directory = str(directory)
+        self._count = 0
+
+    def write(self, cards) -> str:
+        """
+        写入卡片数据文件
+
+        Args:
+            cards: 卡片字典列表
+
+        Returns:
+            str: 数据文件路径
+        """
+        data_file = self._data_file()
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump(cards, f, ensure_ascii=False, indent=2)
+        return data_file
+
+    def __call__(self, cards=None, **options) -> CardManager:
+        """
+        创建卡片管理器
+
+        Args:
+            cards: 卡片字典列表，None表示没有数据文件（管理器创建示例卡片）
+            **options: 传给CardManager的其他参数（如soft_delete）
+        """
+        data_file = self._data_file() if cards is None else self.write(cards)
+        return CardManager(data_file, **options)
+
+    def _data_file(self) -> str:
+        """新的子目录中的数据文件路径"""
+        data_dir = os.path.join(self.directory, f"data{self._count}")
+        self._count += 1
+        os.makedirs(data_dir)
+        return os.path.join(data_dir, "cards.json")
+
+
+@contextmanager
+def temporary_manager_factory():
+    """测试脚本单独运行时使用的工厂，退出时删除临时目录"""
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as directory:
+        yield ManagerFactory(directory)
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    """创建卡片管理器的工厂：make_manager(cards, soft_delete=True)，数据文件写在tmp_path下"""
+    return ManagerFactory(tmp_path)
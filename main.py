@@ -3,26 +3,94 @@
 
 """
 古文卡片学习软件主程序入口
+
+运行参数：
+    --profile-startup  输出启动各阶段（导入模块、Tk初始化、加载设置、加载卡片、首次绘制）的耗时
 """
 
+import time
+
+# 启动计时起点（在导入其他模块之前记录，用于--profile-startup统计导入耗时）
+_STARTUP_BEGIN = time.perf_counter()
+
 import tkinter as tk
 from tkinter import messagebox, font, ttk
 import json
+import queue
 import sys
 import os
+import threading
 from datetime import datetime
 
-# 导入自定义模块
+# 导入自定义模块（更新管理器依赖的网络库较大，第一次检查更新时才导入）
 from ui.main_window import MainWindow
 from ui.settings_manager import SettingsManager
 from card_manager import CardManager
-from update_manager import UpdateChecker
+
+
+class StartupProfiler:
+    """
+    启动耗时统计（--profile-startup）
+    
+    依次发生的阶段用mark()记录从上一个标记到现在的耗时；
+    与界面并行的阶段（后台加载卡片）用begin_background()/end_background()单独计时。
+    """
+    
+    def __init__(self, start=None):
+        """
+        Args:
+            start: 计时起点（time.perf_counter()的值），默认为现在
+        """
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        self.phases = []  # [(阶段名称, 耗时秒数)]
+        self.background = []  # [(阶段名称, 耗时秒数)]
+        self._running = {}  # 进行中的后台阶段 {阶段名称: 开始时间}
+    
+    def mark(self, phase):
+        """记录一个依次发生的阶段（从上一个标记到现在）"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+    
+    def begin_background(self, phase):
+        """开始一个后台阶段"""
+        self._running[phase] = time.perf_counter()
+    
+    def end_background(self, phase):
+        """结束一个后台阶段（未开始或已结束时忽略）"""
+        started = self._running.pop(phase, None)
+        if started is not None:
+            self.background.append((phase, time.perf_counter() - started))
+    
+    def is_running(self, phase=None):
+        """是否有（指定的）后台阶段尚未结束"""
+        return phase in self._running if phase is not None else bool(self._running)
+    
+    def report(self):
+        """生成各阶段耗时报告"""
+        lines = ["启动耗时分析："]
+        for phase, seconds in self.phases:
+            lines.append(f"  {phase:<12}{seconds * 1000:9.1f} ms")
+        lines.append(f"  {'合计':<12}{(self._last - self.start) * 1000:9.1f} ms")
+        for phase, seconds in self.background:
+            lines.append(f"  {phase + '（后台）':<12}{seconds * 1000:9.1f} ms")
+        return "\n".join(lines)
+
 
 class AncientChineseCardsApp:
     """古文卡片学习软件主应用类"""
     
-    def __init__(self):
-        """初始化应用程序"""
+    def __init__(self, profiler=None):
+        """
+        初始化应用程序
+        
+        Args:
+            profiler: 启动耗时统计（StartupProfiler），为None时不统计
+        """
+        self.profiler = profiler
+        self._profile_reported = False
+        
         self.root = tk.Tk()
         self.root.title("古文卡片学习软件")
         self.root.geometry("1024x768")
@@ -35,32 +103,65 @@ class AncientChineseCardsApp:
         
         # 自动绑定子窗口创建事件，所有新窗口自动应用图标
         self.root.bind("<Create>", self._on_window_create)
+        self._profile_mark("Tk初始化")
         
-        # 初始化卡片管理器
-        self.card_manager = CardManager()
+        # 初始化卡片管理器（不在这里同步加载，窗口显示后由load_cards在后台加载）
+        self.card_manager = CardManager(auto_load=False)
         
         # 初始化设置管理器
         self.settings_manager = SettingsManager(self)
+        # 删除的卡片移入回收站（默认关闭，可在设置中开启）
+        self.card_manager.soft_delete = self.settings_manager.get_setting("data", "soft_delete", False) is True
+        self._profile_mark("加载设置")
         
-        # 初始化更新管理器（新增）
-        self.update_checker = UpdateChecker(self)
+        # 更新管理器在第一次使用时才创建（见update_checker属性）
+        self._update_checker = None
         
         # 设置中文字体
         self.setup_fonts()
         
         # 创建主窗口
         self.main_window = MainWindow(self.root, self.card_manager, self)
-        
-        # 加载卡片数据
+        self._profile_mark("创建主窗口")
         
         # 启动时自动检测更新（根据设置）
         if self.settings_manager.get_setting("update", "auto_check_update"):
             self.root.after(1000, self._auto_check_update)  # 延迟1秒检测，不阻塞启动
+        
+        # 加载卡片数据（后台线程解析，分批显示）
         self.load_cards()
         
         # 设置窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    @property
+    def update_checker(self):
+        """更新管理器（第一次使用时才导入并创建）"""
+        if self._update_checker is None:
+            from update_manager import UpdateChecker
+            self._update_checker = UpdateChecker(self)
+        return self._update_checker
+    
+    def _profile_mark(self, phase):
+        """记录启动阶段耗时（未开启统计时什么都不做）"""
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+    
+    def _report_startup_profile(self):
+        """首次绘制和卡片加载都完成后输出一次启动耗时报告"""
+        if self.profiler is None or self._profile_reported or self.profiler.is_running():
+            return
+        if not any(phase == "首次绘制" for phase, _ in self.profiler.phases):
+            return
+        self._profile_reported = True
+        print(self.profiler.report())
+    
+    def _on_cards_loaded(self):
+        """后台加载结束（完成、出错或被取代）"""
+        if self.profiler is not None:
+            self.profiler.end_background("加载卡片")
+            self._report_startup_profile()
+    
     def setup_fonts(self):
         """设置应用程序字体"""
         # 尝试使用系统中文字体
@@ -82,20 +183,105 @@ class AncientChineseCardsApp:
         # self.settings_manager.apply_settings()
     
     def load_cards(self):
-        """加载卡片数据（后台加载，无加载窗口）"""
-        try:
-            # 直接加载卡片数据
-            self.card_manager.load_cards()
-            
+        """
+        加载卡片数据（后台线程解析，无加载窗口）
+        
+        解析好的卡片分批送回主线程，第一批很小以便尽快显示第一页。
+        卡片管理器已经加载过或正在加载时不重复加载；加载期间数据被整体替换
+        （例如导入时选择替换全部）时，过期的加载结果按加载代号丢弃。
+        """
+        if self.card_manager.load_generation > 0:
+            return
+        generation = self.card_manager.begin_load()
+        if self.profiler is not None:
+            self.profiler.begin_background("加载卡片")
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                # 优先使用预热快照，一次恢复全部卡片和索引
+                snapshot = self.card_manager.load_snapshot()
+                if snapshot is not None:
+                    results.put(('snapshot', snapshot))
+                else:
+                    for chunk in self.card_manager.iter_card_chunks():
+                        if not self.card_manager.is_current_load(generation):
+                            return
+                        results.put(('chunk', chunk))
+                results.put(('done', None))
+            except json.JSONDecodeError as e:
+                results.put(('invalid', e))
+            except Exception as e:
+                results.put(('error', e))
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(self.LOAD_POLL_INTERVAL, lambda: self._poll_loaded_cards(generation, results))
+    
+    # 主线程检查后台加载结果的间隔（毫秒）
+    LOAD_POLL_INTERVAL = 20
+    
+    def _poll_loaded_cards(self, generation, results):
+        """在主线程中取出后台解析好的卡片（同一轮取到的多批合并为一次通知）"""
+        finished = None
+        with self.card_manager.batch():
+            while finished is None:
+                try:
+                    kind, payload = results.get_nowait()
+                except queue.Empty:
+                    break
+                if kind in ('chunk', 'snapshot'):
+                    cards, index_state = payload if kind == 'snapshot' else (payload, None)
+                    if not self.card_manager.add_loaded_cards(generation, cards, index_state):
+                        # 加载已被取代，丢弃剩余结果
+                        self._on_cards_loaded()
+                        return
+                else:
+                    finished = (kind, payload)
+        
+        status_bar = getattr(self.main_window, 'status_bar', None)
+        if finished is None:
+            if status_bar is not None:
+                status_bar.config(text=f"正在加载卡片... 已加载 {len(self.card_manager.cards)} 张")
+            self.root.after(self.LOAD_POLL_INTERVAL, lambda: self._poll_loaded_cards(generation, results))
+            return
+        
+        kind, error = finished
+        self._on_cards_loaded()
+        if kind == 'error':
+            # 读取失败：退出加载状态，不创建示例数据，避免覆盖原文件
+            if self.card_manager.is_current_load(generation):
+                self.card_manager.cancel_load()
+            messagebox.showerror("错误", f"加载卡片失败: {str(error)}")
+            return
+        
+        if self.card_manager.finish_load(generation, error if kind == 'invalid' else None):
             # 更新状态栏显示加载结果
-            if hasattr(self.main_window, 'status_bar'):
-                self.main_window.status_bar.config(text=f"已加载 {len(self.card_manager.cards)} 张卡片")
-            
-            # 移除重复的刷新调用，因为show_overview已经会刷新列表
-            # if hasattr(self.main_window, 'refresh_list_view'):
-            #     self.main_window.refresh_list_view()
-        except Exception as e:
-            messagebox.showerror("错误", f"加载卡片失败: {str(e)}")
+            if status_bar is not None:
+                status_bar.config(text=f"已加载 {len(self.card_manager.cards)} 张卡片")
+            # 空闲时整理回收站
+            self.root.after(self.TRASH_COMPACT_DELAY, self.compact_trash)
+    
+    # 加载完成后整理回收站的延迟（毫秒）
+    TRASH_COMPACT_DELAY = 5000
+    
+    def compact_trash(self):
+        """后台查找回收站中过期的卡片，再回到主线程清除并重写数据文件"""
+        if not self.card_manager.trash or self.card_manager.loading:
+            return
+        results = queue.Queue()
+        threading.Thread(target=lambda: results.put(self.card_manager.expired_trash_ids()),
+                         daemon=True).start()
+        
+        def poll():
+            try:
+                expired = results.get_nowait()
+            except queue.Empty:
+                self.root.after(self.LOAD_POLL_INTERVAL, poll)
+                return
+            if expired and not self.card_manager.loading:
+                self.card_manager.compact_trash(expired)
+        
+        self.root.after(self.LOAD_POLL_INTERVAL, poll)
     
     # 加载窗口相关功能已移除
     
@@ -174,8 +360,9 @@ class AncientChineseCardsApp:
     
     def _check_update_before_exit(self):
         """退出前检查更新"""
-        # 调用更新管理器的退出检查
-        if hasattr(self, 'update_checker') and self.update_checker:
+        # 调用更新管理器的退出检查（没有用过更新管理器且没有稍后更新标记时不必导入它）
+        pending_update = self.settings_manager.get_setting("update", "pending_update", "")
+        if self._update_checker is not None or pending_update:
             if hasattr(self.update_checker, 'on_app_exit'):
                 self.update_checker.on_app_exit()
                 return  # 关键：让update_checker负责销毁窗口
@@ -218,7 +405,6 @@ class AncientChineseCardsApp:
             if self.update_checker.is_update_available():
                 self.root.after(0, self.update_checker.show_update_prompt)  # 回到主线程显示窗口
         # 后台线程检测，不阻塞UI
-        import threading
         threading.Thread(target=check, daemon=True).start()
     
     def _set_window_icon(self, window):
@@ -251,9 +437,20 @@ class AncientChineseCardsApp:
     
     def run(self):
         """运行应用程序"""
+        if self.profiler is not None:
+            # 处理完窗口显示和绘制事件，此时第一帧已经画出
+            self.root.update()
+            self._profile_mark("首次绘制")
+            self._report_startup_profile()
         self.root.mainloop()
+        # 退出时写一次预热快照（有未保存的修改时不写），下次启动直接恢复卡片和索引
+        self.card_manager.save_snapshot()
 
 
 if __name__ == "__main__":
-    app = AncientChineseCardsApp()
-    app.run()
\ No newline at end of file
+    profiler = None
+    if "--profile-startup" in sys.argv[1:]:
+        profiler = StartupProfiler(_STARTUP_BEGIN)
+        profiler.mark("导入模块")
+    app = AncientChineseCardsApp(profiler)
+    app.run()
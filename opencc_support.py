@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+繁简转换支持，按需导入OpenCC
+
+创建OpenCC转换器要加载转换词典，比较慢，不能每转换一行就创建一次。
+转换器在第一次需要时创建，之后整个进程复用；导入结果（包括没有安装）只确定一次。
+"""
+
+from typing import Any, Optional
+
+_converter: Optional[Any] = None
+_loaded = False
+
+
+def get_converter() -> Optional[Any]:
+    """
+    获取繁体转简体的OpenCC转换器（第一次调用时才导入和创建）
+
+    Returns:
+        Optional[OpenCC]: 转换器，没有安装opencc时返回None
+    """
+    global _converter, _loaded
+    if not _loaded:
+        _loaded = True
+        try:
+            from opencc import OpenCC
+            _converter = OpenCC('t2s')
+        except ImportError:
+            _converter = None
+    return _converter
+
+
+def to_simplified(text: str) -> str:
+    """繁体转简体，没有安装opencc时原样返回"""
+    converter = get_converter()
+    if converter is None:
+        return text
+    return converter.convert(text)
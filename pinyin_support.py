@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+拼音支持，按需导入pypinyin
+
+导入pypinyin要加载拼音词典，比较慢，所以不在启动时导入，而是在第一次需要拼音时才导入。
+导入结果（包括没有安装）只确定一次，之后直接复用，不会每次都重新尝试导入。
+
+pinyin_spans()按拼音（全拼或首字母）查找，返回匹配的汉字位置，用于拼音搜索和高亮。
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+_lazy_pinyin: Optional[Callable[..., List[str]]] = None
+_loaded = False
+
+
+def get_lazy_pinyin() -> Optional[Callable[..., List[str]]]:
+    """
+    获取pypinyin.lazy_pinyin函数（第一次调用时才导入）
+
+    Returns:
+        Optional[Callable]: lazy_pinyin函数，没有安装pypinyin时返回None
+    """
+    global _lazy_pinyin, _loaded
+    if not _loaded:
+        _loaded = True
+        try:
+            from pypinyin import lazy_pinyin
+            _lazy_pinyin = lazy_pinyin
+        except ImportError:
+            _lazy_pinyin = None
+    return _lazy_pinyin
+
+
+def pinyin_available() -> bool:
+    """是否安装了pypinyin"""
+    return get_lazy_pinyin() is not None
+
+
+@lru_cache(maxsize=4096)
+def _syllables(text: str) -> Tuple[str, ...]:
+    """每个字的拼音（非汉字为字符本身），与text逐字对应"""
+    lazy_pinyin = get_lazy_pinyin()
+    # 传入单字列表，每个字各得到一个拼音，不会把连续的非汉字合成一项
+    syllables = lazy_pinyin(list(text))
+    if len(syllables) != len(text):
+        syllables = [(lazy_pinyin(char) or [char])[0] for char in text]
+    return tuple((syllable or ' ').lower() for syllable in syllables)
+
+
+def pinyin_spans(text: str, query: str) -> List[Tuple[int, int]]:
+    """
+    按拼音查找：query与text连续几个字的全拼（从某个字的拼音开头开始，最后一个字可以只写开头）
+    或首字母相同，例如"xueer"、"xuee"和"xe"都匹配"学而"
+
+    Args:
+        text: 字段文本
+        query: 小写字母
+
+    Returns:
+        List[Tuple[int, int]]: 匹配的字的位置(开始, 结束)，没有pypinyin或query不是字母时为空
+    """
+    if not query or not (query.isascii() and query.isalpha()) or get_lazy_pinyin() is None:
+        return []
+    syllables = _syllables(text)
+    spans = []
+
+    # 全拼：每个字的拼音在连接后的字符串中的起点
+    joined = ''.join(syllables)
+    starts = []
+    offset = 0
+    for syllable in syllables:
+        starts.append(offset)
+        offset += len(syllable)
+    index = 0
+    while index < len(syllables):
+        if joined.startswith(query, starts[index]):
+            last = bisect_right(starts, starts[index] + len(query) - 1) - 1
+            spans.append((index, last + 1))
+            index = last + 1
+        else:
+            index += 1
+
+    # 首字母：与字一一对应
+    initials = ''.join(syllable[0] for syllable in syllables)
+    start = initials.find(query)
+    while start != -1:
+        spans.append((start, start + len(query)))
+        start = initials.find(query, start + len(query))
+    return sorted(set(spans))
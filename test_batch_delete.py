@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量删除测试脚本
+验证批量删除只保存一次、发出一次删除事件，撤销时全部卡片回到原位置，撤销历史有内存上限
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_events import CARD_ADDED, CARD_DELETED
+
+
+def make_cards(count):
+    """count张卡片"""
+    return [{'id': f"card{i}", 'keyword': f"关键词{i}", 'definition': "释义", 'source': "",
+             'quote': "", 'notes': "", 'tags': []} for i in range(count)]
+
+
+def test_delete_and_undo_restores_positions(make_manager):
+    """测试批量删除一次保存，撤销后顺序与删除前完全一致"""
+    card_manager = make_manager(make_cards(2000))
+    original = [card['id'] for card in card_manager.cards]
+    events = []
+    card_manager.subscribe(lambda event: events.append((event.type, len(event.card_ids))))
+    saves = []
+    save_cards = card_manager.save_cards
+    card_manager.save_cards = lambda: saves.append(1) or save_cards()
+
+    doomed = original[::3] + ["不存在的卡片"]
+    assert card_manager.delete_cards(doomed) == len(original[::3])
+    assert len(saves) == 1 and events == [(CARD_DELETED, len(original[::3]))]
+    assert [card['id'] for card in card_manager.cards] == [card_id for card_id in original
+                                                           if card_id not in set(doomed)]
+
+    assert card_manager.undo_last_action()
+    assert len(saves) == 2 and events[-1] == (CARD_ADDED, len(original[::3]))
+    assert [card['id'] for card in card_manager.cards] == original
+    assert card_manager.get_card(original[3]) is card_manager.cards[3]
+    assert not card_manager.can_undo()
+    print("✓ 批量删除可一次撤销并恢复原位置")
+
+
+def test_undo_history_bounded(make_manager):
+    """测试撤销历史超过内存预算时丢弃最早的操作"""
+    card_manager = make_manager(make_cards(60))
+    card_manager.delete_card("card0")
+    # 预算约够保存20次单张删除
+    card_manager.history.memory_budget = card_manager.history.memory_usage * 20
+    for i in range(1, 60):
+        card_manager.delete_card(f"card{i}")
+    kept = len(card_manager.history)
+    assert 10 < kept < 60
+    assert card_manager.history.memory_usage <= card_manager.history.memory_budget
+    assert card_manager.delete_cards([]) == 0
+    while card_manager.undo_last_action():
+        pass
+    assert [card['id'] for card in card_manager.cards] == [f"card{i}" for i in range(60 - kept, 60)]
+    print("✓ 撤销历史有上限")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试批量删除...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_delete_and_undo_restores_positions(make_manager)
+        test_undo_history_bounded(make_manager)
+    print("=" * 50)
+    print("批量删除测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式镜像测试脚本
+验证按来源、时间范围、收藏和标签筛选的结果与逐张判断一致，且卡片增删改后镜像随之更新
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_columns import CardColumns, get_numpy
+
+SOURCES = ["《论语·学而》", "《论语·为政》", "《孟子·梁惠王上》", ""]
+TAGS = ["实词", "虚词", "成语"]
+
+
+def make_cards(count):
+    """count张卡片，来源、标签、收藏和创建时间各不相同"""
+    start = datetime(2026, 1, 1, 8, 0, 0, 1)
+    cards = []
+    for i in range(count):
+        cards.append({
+            'id': f"card{i}", 'keyword': f"词{i}", 'definition': "释义", 'source': SOURCES[i % 4],
+            'quote': "", 'notes': "", 'tags': [TAGS[j] for j in range(3) if i % (j + 2) == 0],
+            'created_at': (start + timedelta(days=i % 60)).isoformat(),
+            'updated_at': start.isoformat(), 'is_favorite': i % 5 == 0,
+        })
+    return cards
+
+
+def expected(card_manager, sources=None, created_from=None, created_to=None, favorite=None, tags=None):
+    """逐张判断的筛选结果（用于对照）"""
+    result = []
+    for card in card_manager.cards:
+        if sources is not None and card['source'] not in sources:
+            continue
+        if created_from is not None and card['created_at'] < created_from:
+            continue
+        if created_to is not None and card['created_at'][:10] > created_to:
+            continue
+        if favorite is not None and card.get('is_favorite', False) != favorite:
+            continue
+        if tags is not None and not all(tag in card.get('tags', []) for tag in tags):
+            continue
+        result.append(card['id'])
+    return result
+
+
+CASES = [
+    {'sources': ["《论语·学而》", "《孟子·梁惠王上》"]},
+    {'created_from': "2026-01-10", 'created_to': "2026-01-20"},
+    {'favorite': True},
+    {'tags': ["实词", "虚词"]},
+    {'sources': ["《论语·学而》"], 'favorite': False, 'tags': ["实词"], 'created_to': "2026-02-01"},
+    {'sources': ["不存在的来源"]},
+]
+
+
+def check(card_manager, columns):
+    """所有筛选条件下，镜像结果与逐张判断一致"""
+    for case in CASES:
+        ids = [card['id'] for card in columns.filter(**case)]
+        assert ids == expected(card_manager, **case), case
+
+
+def test_filters_match_row_scan(make_manager):
+    """测试各种筛选条件的结果（两种实现）"""
+    card_manager = make_manager(make_cards(500))
+    check(card_manager, CardColumns(card_manager, use_numpy=False))
+    if get_numpy() is not None:
+        check(card_manager, CardColumns(card_manager, use_numpy=True))
+    any_tag = CardColumns(card_manager).filter(tags=["虚词", "成语"], any_tag=True)
+    assert [card['id'] for card in any_tag] == [card['id'] for card in card_manager.cards
+                                                if {"虚词", "成语"} & set(card['tags'])]
+    print("✓ 筛选结果与逐张判断一致")
+
+
+def test_mirror_follows_changes(make_manager):
+    """测试增删改、收藏之后镜像仍然正确"""
+    card_manager = make_manager(make_cards(200))
+    card_manager.filter_cards(favorite=True)
+    columns = card_manager._columns
+    check(card_manager, columns)
+
+    card_manager.toggle_favorite("card1")
+    card_manager.update_card("card2", {'source': "《孟子·梁惠王上》", 'tags': ["实词", "虚词"]})
+    with card_manager.batch():
+        for i in range(3):
+            card_manager.add_card({'keyword': f"新词{i}", 'definition': "新增", 'source': "《论语·学而》",
+                                   'tags': ["实词"]})
+    assert not columns._dirty and len(columns._pending) == 3
+    check(card_manager, columns)
+
+    card_manager.delete_card("card10")
+    check(card_manager, columns)
+    assert card_manager.filter_cards(favorite=True) == card_manager.get_favorite_cards()
+    print("✓ 镜像随卡片变更更新")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试列式镜像...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_filters_match_row_scan(make_manager)
+        test_mirror_follows_changes(make_manager)
+    print("=" * 50)
+    print("列式镜像测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+逐字索引和语境索引测试脚本
+验证逐字索引与逐张查找的结果一致并随增删改增量更新，
+以及语境索引按出处排列、每处出现一行、分页时只生成当前一页
+"""
+
+import os
+import random
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_concordance import CONCORDANCE_FIELDS, is_han
+from card_normalize import normalize_text
+
+CHARS = "之其而以于者也乎学习仁义礼智信"
+
+
+def fill_cards(cards):
+    """补全卡片的ID和缺少的字段"""
+    for i, card in enumerate(cards):
+        card.setdefault('id', f"card{i}")
+        for field in ('keyword', 'definition', 'source', 'quote', 'notes'):
+            card.setdefault(field, "")
+        card.setdefault('tags', [])
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def expected_ids(card_manager, char):
+    """逐张查找关键词或原文含有该字的卡片ID"""
+    char = normalize_text(char)
+    return {card['id'] for card in card_manager.cards
+            if any(char in normalize_text(card[field]) for field in CONCORDANCE_FIELDS)}
+
+
+def test_char_index_matches_scan(make_manager):
+    """测试逐字索引与逐张查找一致，并随增删改更新"""
+    rng = random.Random(11)
+    card_manager = make_manager(fill_cards([
+        {'keyword': "".join(rng.choice(CHARS) for _ in range(2)),
+         'quote': "".join(rng.choice(CHARS) for _ in range(rng.randint(0, 12))),
+         'definition': "之乎"}  # 释义不参与逐字索引
+        for _ in range(300)]))
+    for char in CHARS:
+        assert set(ids(card_manager.cards_with_char(char))) == expected_ids(card_manager, char), char
+
+    card_manager.update_card("card0", {'keyword': "鸿鹄", 'quote': "燕雀安知鸿鹄之志"})
+    card_id = card_manager.add_card({'keyword': "鸿鹄", 'definition': "大鸟", 'quote': "鸿鹄将至"})
+    card_manager.delete_cards(["card1"])
+    assert set(ids(card_manager.cards_with_char("鹄"))) == {"card0", card_id}
+    for char in "之学鸿":
+        assert set(ids(card_manager.cards_with_char(char))) == expected_ids(card_manager, char), char
+    card_manager.undo_last_action()
+    assert "card1" in ids(card_manager.cards_with_char(card_manager.get_card("card1")['keyword'][0]))
+
+    assert is_han("之") and is_han("學") and not is_han("a") and not is_han("之乎")
+    try:
+        card_manager.cards_with_char("ab")
+        assert False, "非汉字应当报错"
+    except ValueError:
+        pass
+    print("✓ 逐字索引正确")
+
+
+def test_concordance_lines(make_manager):
+    """测试语境索引按出处排列，每处出现一行，前后文取自原文"""
+    card_manager = make_manager(fill_cards([
+        {'keyword': "之", 'source': "《孟子·梁惠王上》", 'quote': "老吾老，以及人之老"},
+        {'keyword': "學而", 'source': "《論語·學而》", 'quote': "學而時習之，不亦說乎？有朋自遠方來"},
+        {'keyword': "之乎者也", 'source': "", 'quote': ""},
+        {'keyword': "知之", 'source': "《论语·为政》", 'quote': "知之为知之，不知为不知"},
+    ]))
+    concordance = card_manager.concordance("之", context=3, page_size=2)
+    assert ids(concordance.cards) == ["card0", "card3", "card1", "card2"]
+    assert len(concordance) == 5 and concordance.page_count == 3
+
+    lines = list(concordance)
+    assert [(line.card['id'], line.field, line.start) for line in lines] == [
+        ("card0", 'quote', 7), ("card3", 'quote', 1), ("card3", 'quote', 4),
+        ("card1", 'quote', 4), ("card2", 'keyword', 0)]
+    assert (lines[1].left, lines[1].match, lines[1].right) == ("知", "之", "为知之")
+    assert (lines[3].left, lines[3].right) == ("而時習", "，不亦")
+    assert [line.start for line in concordance.page(1)] == [4, 4]
+    assert concordance[-1].field == 'keyword' and concordance.page(3) == []
+
+    # 繁体字查到简体和繁体写法
+    assert ids(card_manager.concordance("學").cards) == ["card1"]
+    print("✓ 语境索引正确")
+
+
+def test_concordance_is_lazy(make_manager):
+    """测试翻页时只生成当前一页"""
+    card_manager = make_manager(fill_cards([{'keyword': "之", 'source': f"《书{i:05d}》", 'quote': "之" * 20}
+                                            for i in range(2000)]))
+    concordance = card_manager.concordance("之", page_size=50)
+    assert len(concordance) == 40000 and concordance.page_count == 800
+    created = []
+    original = concordance._line
+    concordance._line = lambda index: created.append(index) or original(index)
+    page = concordance.page(799)
+    assert len(page) == 50 and len(created) == 50
+    assert page[-1].card['source'] == "《书01999》" and page[-1].start == 19
+
+    # 之后的修改不影响已经生成的语境索引
+    card_manager.update_card("card1999", {'quote': ""})
+    assert concordance[39999].start == 19
+    assert len(card_manager.concordance("之")) == 39981
+    print("✓ 语境索引按页生成")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试逐字索引和语境索引...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_char_index_matches_scan(make_manager)
+        test_concordance_lines(make_manager)
+        test_concordance_is_lazy(make_manager)
+    print("=" * 50)
+    print("逐字索引和语境索引测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡片变更事件测试脚本
+验证CardManager在增删改和收藏时发出正确的事件，批量操作中的事件会被合并
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_events import (CardEventBus, CARD_ADDED, CARD_UPDATED, CARD_DELETED,
+                         CARD_FAVORITED, CARDS_REPLACED)
+
+
+def record(card_manager):
+    """订阅事件并返回记录列表"""
+    events = []
+    card_manager.subscribe(lambda event: events.append((event.type, event.card_ids)))
+    return events
+
+
+def test_single_operations(make_manager):
+    """测试单个操作各自发出对应类型的事件"""
+    card_manager = make_manager()  # 没有数据文件，含3张示例卡片
+    events = record(card_manager)
+
+    card_id = card_manager.add_card({'keyword': '知之为知之', 'definition': '知道就是知道'})
+    card_manager.update_card(card_id, {'notes': '出自《论语·为政》'})
+    card_manager.toggle_favorite(card_id)
+    card_manager.delete_card(card_id)
+    card_manager.undo_last_action()
+    card_manager.clear_cards()
+
+    assert events == [
+        (CARD_ADDED, (card_id,)),
+        (CARD_UPDATED, (card_id,)),
+        (CARD_FAVORITED, (card_id,)),
+        (CARD_DELETED, (card_id,)),
+        (CARD_ADDED, (card_id,)),
+        (CARDS_REPLACED, ()),
+    ]
+    print("✓ 单个操作发出对应事件")
+
+
+def test_batch_coalescing(make_manager):
+    """测试批量操作中的事件被合并"""
+    card_manager = make_manager()
+    sample_ids = [card['id'] for card in card_manager.get_all_cards()]
+    events = record(card_manager)
+
+    # 批量收藏：一次事件
+    card_manager.toggle_favorites(sample_ids)
+    assert events == [(CARD_FAVORITED, tuple(sample_ids))]
+    kept_id = card_manager.add_card({'keyword': '学而', 'definition': '学习'})
+    events.clear()
+
+    with card_manager.batch():
+        new_id = card_manager.add_card({'keyword': '三人行', 'definition': '几个人同行'})
+        card_manager.update_card(new_id, {'notes': '新增后修改仍算新增'})
+        temp_id = card_manager.add_card({'keyword': '临时', 'definition': '马上删除'})
+        card_manager.delete_card(temp_id)
+        card_manager.toggle_favorite(kept_id)
+        card_manager.update_card(kept_id, {'notes': '收藏后修改算修改'})
+        card_manager.delete_card(sample_ids[1])
+    assert events == [
+        (CARD_DELETED, (sample_ids[1],)),
+        (CARD_ADDED, (new_id,)),
+        (CARD_UPDATED, (kept_id,)),
+    ]
+    events.clear()
+
+    # 批次中出现整体替换时只派发一次替换事件
+    with card_manager.batch():
+        card_manager.clear_cards()
+        card_manager.add_cards([{'keyword': '温故', 'definition': '复习'}])
+    assert events == [(CARDS_REPLACED, ())]
+    print("✓ 批量操作的事件已合并")
+
+
+def test_listener_errors_isolated():
+    """测试单个监听者出错不影响其他监听者"""
+    bus = CardEventBus()
+    received = []
+
+    def broken(event):
+        raise RuntimeError("监听者出错")
+
+    bus.subscribe(broken)
+    bus.subscribe(lambda event: received.append(event.type))
+    bus.emit(CARD_UPDATED, ["a"])
+    bus.unsubscribe(broken)
+    bus.emit(CARD_DELETED, ["a"])
+    # 没有卡片ID的单卡事件不派发
+    bus.emit(CARD_UPDATED, [])
+    assert received == [CARD_UPDATED, CARD_DELETED]
+    print("✓ 监听者出错被隔离")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试卡片变更事件...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_single_operations(make_manager)
+        test_batch_coalescing(make_manager)
+        test_listener_errors_isolated()
+    print("=" * 50)
+    print("卡片变更事件测试完成！")
+
+
+if __name__ == "__main__":
+    main()
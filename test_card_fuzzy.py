@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模糊搜索测试脚本
+验证编辑距离计算、错一个字也能找到并按距离排序、n-gram候选与逐张计算的结果一致，
+以及卡片变更后候选索引的增量更新
+"""
+
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_events import CARD_UPDATED, CardEvent
+from card_fuzzy import FuzzyMatch, edit_distance, substring_distance
+from ui.search_panel import SearchPanel
+
+CHARS = "学而时习之不亦说乎有朋自远方来人知愠君子务本道生孝弟仁"
+
+
+def make_cards(count, seed=7):
+    """count张随机关键词和原文的卡片"""
+    rng = random.Random(seed)
+    cards = [{'id': f"card{i}", 'keyword': "".join(rng.choice(CHARS) for _ in range(rng.randint(2, 4))),
+              'definition': "", 'source': "", 'notes': "", 'tags': [],
+              'quote': "".join(rng.choice(CHARS) for _ in range(rng.randint(8, 20)))}
+             for i in range(count)]
+    cards[0].update(keyword="学而时习", quote="学而时习之，不亦说乎")
+    cards[1].update(keyword="君子务本", quote="君子务本，本立而道生")
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def test_distances():
+    """测试编辑距离和近似子串匹配"""
+    assert edit_distance("学而时习", "学而时习", 1) == 0
+    assert edit_distance("学而十习", "学而时习", 1) == 1
+    assert edit_distance("学时习", "学而时习", 1) == 1
+    assert edit_distance("学而", "学而时习", 1) is None
+    assert substring_distance("不亦說乎", "学而时习之，不亦说乎", 1) == (1, 6, 10)
+    assert substring_distance("本立道生", "君子务本，本立而道生", 1) == (1, 5, 10)
+    assert substring_distance("有朋", "学而时习之", 1) is None
+    print("✓ 编辑距离正确")
+
+
+def test_typo_search(make_manager):
+    """测试错一个字也能找到，结果按距离排列并带有匹配位置"""
+    card_manager = make_manager(make_cards(200))
+    assert not card_manager.query().match("学而十习").run()
+
+    result = card_manager.query().fuzzy("学而十习").run()
+    assert result[0]['id'] == "card0"
+    assert result.match_spans(0)['keyword'] == [(0, 4)]
+    ranks = [FuzzyMatch("学而十习").rank(card) for card in result]
+    assert ranks == sorted(ranks)
+
+    result = card_manager.query().fuzzy("本立道生").limit(1).run()
+    assert ids(result) == ["card1"] and result.match_spans(0)['quote'] == [(5, 10)]
+
+    # 分块执行一次给出全部结果；修改后的卡片能被找到
+    query = card_manager.query().fuzzy("君子无本").cached()
+    assert [card for cards, _, _ in query.chunks(10) for card in cards][0]['id'] == "card1"
+    card_manager.update_card("card2", {'keyword': "君子无本"})
+    assert ids(query.run())[0] == "card2"
+    card_manager.delete_cards(["card2"])
+    assert "card2" not in ids(query.run())
+    print("✓ 错字搜索正确")
+
+
+def test_candidates_match_scan(make_manager):
+    """测试n-gram候选得到的结果与逐张计算编辑距离一致"""
+    card_manager = make_manager(make_cards(1500))
+    rng = random.Random(3)
+    for _ in range(30):
+        text = "".join(rng.choice(CHARS) for _ in range(rng.randint(2, 8)))
+        condition = FuzzyMatch(text)
+        expected = {card['id'] for card in card_manager.cards if condition.matches(card)}
+        assert set(ids(card_manager.query().fuzzy(text).run())) == expected, text
+    print("✓ 候选结果与逐张计算一致")
+
+
+def test_large_collection_is_fast(make_manager):
+    """测试大量卡片时只对候选计算编辑距离"""
+    card_manager = make_manager(make_cards(20000))
+    card_manager.query().fuzzy("学而").run()  # 建立候选索引
+    start = time.perf_counter()
+    result = card_manager.query().fuzzy("学而十习之，不亦").run()
+    elapsed = time.perf_counter() - start
+    assert result[0]['id'] == "card0"
+    candidates = FuzzyMatch("学而十习之，不亦").candidates(card_manager)
+    assert len(candidates) < 2000
+    assert "模糊匹配" in card_manager.query().fuzzy("学而十习").explain()
+    print(f"✓ 20000张卡片模糊搜索耗时 {elapsed * 1000:.0f}ms，候选 {len(candidates)} 张")
+
+
+class Value:
+    """代替tk变量"""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class Listbox:
+    """代替结果列表框"""
+
+    def __init__(self):
+        self.items = []
+
+    def delete(self, first, last=None):
+        if last is None:
+            del self.items[first]
+        else:
+            del self.items[first:]
+
+    def insert(self, index, text):
+        self.items.insert(len(self.items) if index == "end" else index, text)
+
+
+def make_search_panel(card_manager):
+    """只有结果列表的搜索面板（不创建Tk组件），搜索任务在调度时直接执行完"""
+    panel = SearchPanel.__new__(SearchPanel)
+    panel.card_manager = card_manager
+    panel.search_results, panel.search_spans = [], []
+    panel._search_criteria = None
+    panel.results_listbox = Listbox()
+    panel.results_title_var = Value()
+    panel.main_window = type("MainWindow", (), {})()
+    panel.main_window.status_bar = type("StatusBar", (), {'config': lambda self, text: None})()
+    panel.main_window.scheduler = type("Scheduler", (), {
+        'is_running': lambda self, name: False,
+        'run': lambda self, name, task, label=None: [step for step in task],
+    })()
+    card_manager.subscribe(panel.on_cards_changed)
+    return panel
+
+
+def test_fuzzy_results_follow_changes(make_manager):
+    """测试模糊搜索的结果在卡片修改后重新按相似程度排列，而不是把新匹配的卡片追加到末尾"""
+    card_manager = make_manager(make_cards(200))
+    panel = make_search_panel(card_manager)
+    panel.search_var = Value("君子无本")
+    for option in ('use_syntax', 'use_regex', 'use_pinyin', 'case_sensitive', 'search_in_keyword',
+                   'search_in_definition', 'search_in_source', 'search_in_quote', 'search_in_notes'):
+        setattr(panel, option, Value(False))
+    panel.use_fuzzy = Value(True)
+    panel.perform_search()
+    assert ids(panel.search_results)[0] == "card1"
+
+    card_manager.update_card("card2", {'keyword': "君子无本"})
+    expected = ids(card_manager.query().fuzzy("君子无本").run())
+    assert ids(panel.search_results) == expected and expected[0] == "card2"
+    assert len(panel.results_listbox.items) == len(expected)
+    panel.on_cards_changed(CardEvent(CARD_UPDATED, ["card1"]))
+    assert ids(panel.search_results) == expected
+    print("✓ 模糊搜索结果随卡片修改重新排列")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试模糊搜索...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_distances()
+        test_typo_search(make_manager)
+        test_candidates_match_scan(make_manager)
+        test_large_collection_is_fast(make_manager)
+        test_fuzzy_results_follow_changes(make_manager)
+    print("=" * 50)
+    print("模糊搜索测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分批加载测试脚本
+验证卡片数据可以逐批解析提交、加载期间推迟保存，且过期的加载结果会被丢弃
+"""
+
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_manager import CardManager
+
+
+def make_cards(count):
+    """count张卡片"""
+    return [{'id': f"card{i}", 'keyword': f"关键词{i}", 'definition': "释义", 'source': "",
+             'quote': "", 'notes': "", 'tags': []} for i in range(count)]
+
+
+def test_chunks_grow_geometrically(make_manager):
+    """测试第一批很小，之后每批翻倍，且内容与文件一致"""
+    card_manager = make_manager(make_cards(1000), auto_load=False)
+    assert card_manager.cards == [] and card_manager.load_generation == 0
+
+    chunks = list(card_manager.iter_card_chunks())
+    assert [len(chunk) for chunk in chunks] == [100, 200, 400, 300]
+    assert [card['id'] for chunk in chunks for card in chunk] == [f"card{i}" for i in range(1000)]
+    print("✓ 卡片按批次解析")
+
+
+def test_progressive_load_and_deferred_save(make_manager):
+    """测试逐批提交卡片，加载期间的保存推迟到加载结束"""
+    data_file = make_manager.write(make_cards(500))
+    card_manager = CardManager(data_file, auto_load=False)
+    generation = card_manager.begin_load()
+    chunks = card_manager.iter_card_chunks()
+
+    assert card_manager.add_loaded_cards(generation, next(chunks))
+    assert len(card_manager.cards) == 100
+    # 加载期间新增卡片：不能用不完整的数据覆盖文件
+    card_manager.add_card({'keyword': '新卡片', 'definition': '加载中添加'})
+    with open(data_file, encoding='utf-8') as f:
+        assert len(json.load(f)) == 500
+
+    for chunk in chunks:
+        assert card_manager.add_loaded_cards(generation, chunk)
+    assert card_manager.finish_load(generation)
+    with open(data_file, encoding='utf-8') as f:
+        assert len(json.load(f)) == 501
+    print("✓ 分批加载完成后才保存")
+
+
+def test_stale_load_discarded(make_manager):
+    """测试加载期间数据被整体替换后，旧的加载结果被丢弃"""
+    card_manager = make_manager(make_cards(300), auto_load=False)
+    generation = card_manager.begin_load()
+    chunks = card_manager.iter_card_chunks()
+    card_manager.add_loaded_cards(generation, next(chunks))
+
+    card_manager.clear_cards()
+    assert not card_manager.add_loaded_cards(generation, next(chunks))
+    assert not card_manager.finish_load(generation)
+    assert card_manager.cards == []
+
+    # 已经加载过的管理器不需要再次加载
+    assert make_manager(make_cards(10)).load_generation == 1
+    print("✓ 过期的加载结果被丢弃")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试分批加载...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_chunks_grow_geometrically(make_manager)
+        test_progressive_load_and_deferred_save(make_manager)
+        test_stale_load_discarded(make_manager)
+    print("=" * 50)
+    print("分批加载测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+读写锁和只读快照测试脚本
+验证读锁可以并发、写锁独占且可重入，快照在之后的修改中保持不变，
+以及后台线程搜索、序列化与前台修改同时进行时没有竞争
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_lock import ReadWriteLock
+from card_manager import CardManager
+from card_record import card_to_json
+
+
+def make_cards(count):
+    """count张卡片"""
+    cards = [{'id': f"card{i}", 'keyword': f"关键词{i}", 'definition': f"释义{i}", 'source': "",
+              'quote': "", 'notes': "", 'tags': []} for i in range(count)]
+    return cards
+
+
+def test_lock_semantics():
+    """测试读锁并发、写锁独占、重入和禁止升级"""
+    lock = ReadWriteLock()
+    inside = []
+    both_reading = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.read():
+            both_reading.wait()
+            inside.append(1)
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(inside) == 2
+
+    # 写锁期间其他线程无法读取
+    order = []
+
+    def late_reader():
+        with lock.read():
+            order.append("读")
+
+    with lock.write():
+        thread = threading.Thread(target=late_reader)
+        thread.start()
+        time.sleep(0.05)
+        order.append("写")
+        # 重入
+        with lock.write(), lock.read():
+            pass
+    thread.join()
+    assert order == ["写", "读"]
+
+    other = ReadWriteLock()
+    with other.read(), other.read():
+        try:
+            with other.write():
+                pass
+            assert False, "读锁不能升级为写锁"
+        except RuntimeError:
+            pass
+    print("✓ 读写锁语义正确")
+
+
+def test_snapshot_is_immutable(make_manager):
+    """测试快照不复制列表，之后的各种修改都不影响快照"""
+    card_manager = make_manager(make_cards(20), soft_delete=True)
+    snapshot = card_manager.snapshot()
+    assert snapshot._cards is card_manager.cards
+    before = [dict(card) for card in snapshot]
+
+    card_manager.toggle_favorite("card1")
+    card_manager.update_card("card2", {'notes': "修改"})
+    card_manager.delete_cards(["card3"])
+    card_manager.add_card({'keyword': "新词", 'definition': "新释义"})
+    card_manager.undo_last_action()
+    card_manager.undo_last_action()
+
+    assert [dict(card) for card in snapshot] == before
+    assert card_manager.get_card("card1")['is_favorite'] is True
+    assert card_manager.get_card("card1") is card_manager.cards[1]
+    assert card_manager.get_card("card2")['notes'] == "修改"
+    assert snapshot.version < card_manager.version
+
+    # 没有快照时直接原地修改，不产生副本
+    del snapshot
+    card = card_manager.get_card("card4")
+    card_manager.toggle_favorite("card4")
+    assert card_manager.get_card("card4") is card
+    print("✓ 快照在修改后保持不变")
+
+
+def test_background_readers_during_edits(make_manager):
+    """测试后台线程搜索、序列化和保存时前台持续修改卡片"""
+    card_manager = make_manager(make_cards(300), soft_delete=True)
+    errors = []
+    stop = threading.Event()
+
+    def background():
+        try:
+            while not stop.is_set():
+                snapshot = card_manager.snapshot()
+                text = json.dumps(snapshot.stored_cards(), ensure_ascii=False, default=card_to_json)
+                assert len(json.loads(text)) == len(snapshot) + len(snapshot.trash)
+                card_manager.search_cards("关键词1")
+                card_manager.filter_cards(favorite=True)
+                card_manager.save_cards()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=background) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for i in range(150):
+        card_manager.toggle_favorite(f"card{i}")
+        card_manager.update_card(f"card{i + 1}", {'notes': f"注释{i}"})
+        if i % 10 == 0:
+            card_manager.delete_cards([f"card{i + 2}"])
+            card_manager.add_card({'keyword': f"新词{i}", 'definition': "新增"})
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+
+    card_manager.save_cards()
+    assert CardManager(card_manager.data_file).cards == card_manager.cards
+    print("✓ 后台读取与前台修改同时进行没有竞争")
+
+
+def test_modified_marks_during_save(make_manager):
+    """测试保存期间的修改保留标记，保存失败时已换出的标记并回"""
+    card_manager = make_manager(make_cards(10))
+    card_manager.modified_cards.update({"card1", "card2"})
+
+    def modify_while_saving():
+        # 序列化和写文件时没有持有锁，前台修改卡片在写锁内标记
+        with card_manager.lock.write():
+            card_manager.modified_cards.add("card3")
+        return None
+
+    card_manager._create_backup = modify_while_saving
+    assert card_manager.save_cards()
+    assert card_manager.modified_cards == {"card3"}
+
+    def fail():
+        raise OSError("磁盘已满")
+
+    card_manager._create_backup = fail
+    assert not card_manager.save_cards()
+    assert card_manager.modified_cards == {"card3"}
+    assert card_manager.has_modified_cards()
+    print("✓ 保存期间和保存失败时修改标记正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试读写锁...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_lock_semantics()
+        test_snapshot_is_immutable(make_manager)
+        test_background_readers_during_edits(make_manager)
+        test_modified_marks_during_save(make_manager)
+    print("=" * 50)
+    print("读写锁测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+繁简、异体字规范化测试脚本
+验证规范化文本逐字对应、由卡片记录缓存并在修改后重新计算，
+以及搜索、模糊搜索、查重和排序都不区分繁简和异体字写法
+"""
+
+import os
+import pickle
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_normalize import normalize_text
+from card_record import Card
+
+
+def make_cards():
+    """含繁体、简体和异体字的卡片"""
+    cards = [
+        {'id': "card0", 'keyword': "學而", 'definition': "學習", 'source': "《論語·學而》",
+         'quote': "學而時習之，不亦說乎", 'notes': "", 'tags': []},
+        {'id': "card1", 'keyword': "为仁", 'definition': "实行仁德", 'source': "《论语·颜渊》",
+         'quote': "克己复礼为仁", 'notes': "", 'tags': []},
+        {'id': "card2", 'keyword': "眞人", 'definition': "得道的人", 'source': "《莊子》",
+         'quote': "古之眞人", 'notes': "ＡＢＣ", 'tags': []},
+        {'id': "card3", 'keyword': "学问", 'definition': "学习和请教", 'source': "《荀子》",
+         'quote': "", 'notes': "", 'tags': []},
+    ]
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def test_normalize_text():
+    """测试规范化逐字对应，繁体、异体字和全角字母统一"""
+    assert normalize_text("學而時習之，不亦說乎") == "学而时习之，不亦说乎"
+    assert normalize_text("爲為为") == "为为为"
+    assert normalize_text("眞ＡＢｃ") == "真abc"
+    for text in ("學而時習", "乾坤", "Hello 世界", "İstanbul", "ŞEHİR İçi", "ﬁ"):
+        assert len(normalize_text(text)) == len(text)
+    # 小写后会变成多个字符的字母也逐字对应，找到的位置就是原文中的位置
+    assert normalize_text("İstanbul") == "istanbul"
+    text = "İİ學而 Stanbul"
+    assert normalize_text(text).index("stan") == text.index("Stan")
+
+    # 卡片记录缓存规范化文本，修改后重新计算，pickle不保存缓存
+    card = Card({'id': "x", 'keyword': "學而", 'quote': "学而"})
+    assert card.normalized('keyword') == "学而"
+    assert card.normalized('quote') is card['quote']
+    card['keyword'] = "論語"
+    assert card.normalized('keyword') == "论语"
+    restored = pickle.loads(pickle.dumps(card))
+    assert restored.to_dict() == card.to_dict() and getattr(restored, '_normalized', None) is None
+    assert card.copy().normalized('keyword') == "论语"
+    print("✓ 规范化文本正确")
+
+
+def test_search_ignores_variants(make_manager):
+    """测试简体能找到繁体、异体字，匹配位置对应原文"""
+    card_manager = make_manager(make_cards())
+    result = card_manager.query().match("学而").run()
+    assert ids(result) == ["card0"]
+    assert result.match_spans(0)['keyword'] == [(0, 2)] and result.match_spans(0)['source'] == [(4, 6)]
+
+    assert ids(card_manager.query().match("學").run()) == ["card0", "card3"]
+    assert ids(card_manager.query().match("爲仁").run()) == ["card1"]
+    assert ids(card_manager.query().match("真人").run()) == ["card2"]
+    assert ids(card_manager.query().match("abc").run()) == ["card2"]
+    assert ids(card_manager.query().search("source:论语 學").run()) == ["card0"]
+    assert ids(card_manager.query().fuzzy("學而時習之").run()) == ["card0"]
+
+    # 区分大小写和正则按原文精确匹配
+    assert ids(card_manager.query().match("学而", case_sensitive=True).run()) == []
+    assert ids(card_manager.query().match("學.", regex=True, fields=["keyword"]).run()) == ["card0"]
+
+    # 修改后按新的文本查找
+    card_manager.update_card("card3", {'keyword': "學問"})
+    assert ids(card_manager.query().match("学问").run()) == ["card3"]
+    print("✓ 搜索不区分繁简和异体字")
+
+
+def test_dedupe_and_sort(make_manager):
+    """测试查重和排序使用规范化文本"""
+    card_manager = make_manager(make_cards())
+    assert card_manager.find_duplicate_card("学而", "学习") == "card0"
+    assert card_manager.add_card({'keyword': "爲仁 ", 'definition': "實行仁德"}) == "card1"
+    assert len(card_manager.cards) == 4
+
+    card_manager.add_card({'keyword': "学而", 'definition': "另一义项"})
+    keywords = [card['keyword'] for card in card_manager.query().order_by("keyword").run()]
+    assert keywords.index("学而") == keywords.index("學而") + 1
+    print("✓ 查重和排序不区分繁简和异体字")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试繁简、异体字规范化...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_normalize_text()
+        test_search_ignores_variants(make_manager)
+        test_dedupe_and_sort(make_manager)
+    print("=" * 50)
+    print("繁简、异体字规范化测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡片查询测试脚本
+验证链式查询组合时不执行、结果与逐张筛选后完整排序一致，
+有数量限制时提前停止扫描或用堆取前K个，以及分块执行
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_views import CardsView
+
+
+def make_cards(count):
+    """count张卡片：每三张收藏一张，关键词有重复"""
+    cards = [{'id': f"card{i}", 'keyword': f"词{(i * 7) % 13:02d}", 'definition': "之乎" if i % 2 else "者也",
+              'source': f"书{i % 4}", 'quote': "", 'notes': "", 'tags': [],
+              'created_at': f"2026-01-{i % 28 + 1:02d}T00:00:00", 'is_favorite': i % 3 == 0}
+             for i in range(count)]
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def test_query_matches_naive(make_manager):
+    """测试组合查询的结果与逐张筛选、完整排序后截取一致"""
+    card_manager = make_manager(make_cards(200))
+    cards = card_manager.cards
+    key = card_manager.keyword_sort_key
+
+    query = card_manager.query().where(fav=True).match("之").order_by("keyword_pinyin").limit(10)
+    result = query.run()
+    assert isinstance(result, CardsView)
+    expected = sorted((card for card in cards if card['is_favorite'] and "之" in card['definition']), key=key)
+    assert ids(result) == ids(expected[:10])
+
+    # 降序、偏移和按时间排序（排序稳定，与sorted一致）
+    descending = card_manager.query().where(sources=["书1", "书2"]).order_by("created_at", reverse=True)
+    expected = sorted((card for card in cards if card['source'] in ("书1", "书2")),
+                      key=lambda card: card['created_at'], reverse=True)
+    assert ids(descending.run()) == ids(expected)
+    assert ids(descending.limit(5, offset=3).run()) == ids(expected[3:8])
+    assert ids(descending.limit(5, offset=3)) == ids(expected[3:8])
+
+    # 正则、区分大小写和自定义条件
+    regex = card_manager.query().match(r"词0[0-2]", fields=["keyword"], regex=True)
+    assert ids(regex.run()) == [card['id'] for card in cards if card['keyword'] in ("词00", "词01", "词02")]
+    assert card_manager.query().where(lambda card: card['id'].endswith("7")).count() == 20
+    assert card_manager.query().match("者也").first()['id'] == "card0"
+
+    # 未知的条件
+    try:
+        card_manager.query().where(color="红")
+        assert False, "应当拒绝未知的筛选条件"
+    except TypeError:
+        pass
+    print("✓ 查询结果与逐张筛选一致")
+
+
+def test_query_is_lazy_and_immutable(make_manager):
+    """测试组合时不执行、各步骤返回新查询，没有排序时找够数量就停止扫描"""
+    card_manager = make_manager(make_cards(200))
+    checked = []
+
+    def predicate(card):
+        checked.append(card['id'])
+        return True
+
+    base = card_manager.query().where(predicate)
+    limited = base.limit(5)
+    assert not checked and base._limit is None
+
+    assert ids(limited.run()) == [f"card{i}" for i in range(5)]
+    assert len(checked) == 5
+
+    # 有排序时用堆只保留前K个（结果同完整排序）
+    ordered = base.order_by("keyword")
+    assert ids(ordered.limit(3).run()) == ids(ordered.run()[:3])
+    print("✓ 查询惰性执行")
+
+
+def test_chunks_and_manager_methods(make_manager):
+    """测试分块执行，以及收藏、搜索和排序方法都经由查询"""
+    card_manager = make_manager(make_cards(1200))
+    query = card_manager.query().match("之")
+    chunks = list(query.chunks(500))
+    found = [card for cards, _, _ in chunks for card in cards]
+    assert ids(found) == ids(query.run())
+    assert chunks[-1][1] == chunks[-1][2]
+
+    # 分块执行时的数量限制
+    limited = list(query.limit(3).chunks(500))
+    assert len(limited) == 1 and len(limited[0][0]) == 3
+
+    assert ids(card_manager.get_favorite_cards()) == ids(card_manager.query().where(favorite=True))
+    assert ids(card_manager.search_cards("之乎")) == ids(query.run())
+    assert ids(card_manager.sort_cards()) == ids(sorted(card_manager.cards, key=card_manager.keyword_sort_key))
+
+    # 删除和撤销后，文本条件的候选位置仍与逐张查找一致
+    card_manager.delete_cards(["card1", "card500"])
+    expected = [card['id'] for card in card_manager.cards if "之" in card['definition']]
+    assert ids(card_manager.query().match("之").run()) == expected
+    card_manager.undo_last_action()
+    expected = [card['id'] for card in card_manager.cards if "之" in card['definition']]
+    assert ids(card_manager.query().match("之").run()) == expected
+    print("✓ 分块执行和管理器方法正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试卡片查询...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_query_matches_naive(make_manager)
+        test_query_is_lazy_and_immutable(make_manager)
+        test_chunks_and_manager_methods(make_manager)
+    print("=" * 50)
+    print("卡片查询测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询语法测试脚本
+验证字段、标签、收藏、时间范围、AND/OR/NOT和引号短语的解析，
+按索引执行的结果与逐张判断一致，以及执行计划和语法错误提示
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_query_syntax import And, Not, Or, QuerySyntaxError, TextTerm, TimeRange, parse_query
+
+SOURCES = ["《论语·学而》", "《孟子·梁惠王上》", "《荀子·劝学》", "《诗经·关雎》"]
+TAGS = [[], ["诗"], ["诗", "待复习"], ["待复习"]]
+
+
+def make_cards(count):
+    """count张卡片：来源、标签、收藏和创建月份轮流变化"""
+    cards = [{'id': f"card{i}", 'keyword': f"君子{i}" if i % 5 == 0 else f"学而{i}",
+              'definition': "不亦说乎" if i % 2 else "人不知而不愠", 'source': SOURCES[i % 4],
+              'quote': "", 'notes': "存疑" if i % 7 == 0 else "", 'tags': TAGS[i % 4],
+              'created_at': f"2026-{i % 6 + 1:02d}-{i % 27 + 1:02d}T12:00:00", 'is_favorite': i % 3 == 0}
+             for i in range(count)]
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def test_parse():
+    """测试解析出的条件树结构"""
+    node = parse_query('之 source:论语 OR NOT "学而 时习"')
+    assert isinstance(node, Or) and isinstance(node.children[0], And)
+    assert isinstance(node.children[1], Not) and node.children[1].child.text == "学而 时习"
+    assert node.children[0].children[1].fields == ('source',)
+
+    node = parse_query('(出处：孟子 OR 出处：荀子) -标签:待复习 created:2026-01..2026-02')
+    assert isinstance(node, And) and len(node.children) == 3
+    assert isinstance(node.children[1], Not)
+    time_range = node.children[2]
+    assert isinstance(time_range, TimeRange) and time_range.lower < time_range.upper
+
+    assert isinstance(parse_query("keyword:之", ["definition"]), TextTerm)
+    assert parse_query("   ") is None
+    for bad in ("source:", "(之", "color:红", "fav:也许", "created:2026-13", "之 )",
+                '""', '"  "', 'quote:""', '之 OR ""', '-""'):
+        try:
+            parse_query(bad)
+            assert False, f"应当报告语法错误: {bad}"
+        except QuerySyntaxError:
+            pass
+    print("✓ 查询语法解析正确")
+
+
+def test_execution_matches_scan(make_manager):
+    """测试按索引执行的结果与逐张判断一致"""
+    card_manager = make_manager(make_cards(400))
+    queries = [
+        "source:论语",
+        "keyword:君子 fav:true",
+        "tag:诗 AND NOT tag:待复习",
+        "created:2026-02..2026-03 收藏:否",
+        "created:..2026-01",
+        '"不亦说" OR notes:存疑',
+        "(source:孟子 OR source:荀子) -fav:true 学而",
+        "NOT tag:诗",
+        "关键词:不存在的词",
+    ]
+    for text in queries:
+        node = parse_query(text)
+        expected = [card['id'] for card in card_manager.cards if node.matches(card)]
+        assert ids(card_manager.query().search(text).run()) == expected, text
+
+    # 时间范围包含结束月份的最后一天
+    february = card_manager.query().search("created:2026-02").run()
+    assert february and all(card['created_at'].startswith("2026-02") for card in february)
+
+    # 与其他查询条件组合，修改卡片后结果随之更新
+    query = card_manager.query().search("tag:诗").where(fav=True).order_by("keyword").limit(3)
+    first = query.run()[0]
+    card_manager.update_card(first['id'], {'tags': []})
+    assert first['id'] not in ids(query.run())
+    print("✓ 按索引执行的结果正确")
+
+
+def test_explain(make_manager):
+    """测试执行计划列出使用的索引和估计数"""
+    card_manager = make_manager(make_cards(100))
+    plan = card_manager.query().search("tag:诗 created:2026-01..2026-02 source:论语").limit(10).explain()
+    assert "标签索引" in plan and "二分查找" in plan and "倒排表" in plan
+    assert "估计" in plan and "找够后停止扫描" in plan
+    print("✓ 执行计划正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试查询语法...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_parse()
+        test_execution_matches_scan(make_manager)
+        test_explain(make_manager)
+    print("=" * 50)
+    print("查询语法测试完成！")
+
+
+if __name__ == "__main__":
+    main()
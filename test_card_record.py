@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡片记录测试脚本
+验证Card与dict的用法兼容、时间按整数保存且能原样还原、来源和标签使用驻留字符串，
+以及CardManager保存和读取后数据不变
+"""
+
+import json
+import os
+import pickle
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_manager import CardManager
+from card_record import Card, card_to_json, cards_to_json, encode_time, decode_time
+
+
+def sample_dict():
+    """一张典型的卡片数据"""
+    return {
+        'id': 'card1',
+        'keyword': '学而时习之',
+        'definition': '学习了知识然后按时复习它。',
+        'source': '《论语·学而》',
+        'quote': '子曰："学而时习之，不亦说乎？"',
+        'notes': '',
+        'tags': ['实词'],
+        'created_at': '2026-01-05T08:30:00.123456',
+        'updated_at': '2026-01-05T08:30:00',
+        'reviewed': 3,
+    }
+
+
+def test_dict_compatible():
+    """测试Card可以像dict一样读写"""
+    data = sample_dict()
+    card = Card(data)
+    assert card == data and dict(card) == data and len(card) == len(data)
+    assert card['keyword'] == '学而时习之' and card.get('reviewed') == 3
+    assert 'is_favorite' not in card and card.get('is_favorite', False) is False
+
+    card['is_favorite'] = True
+    card.update({'notes': '开篇第一句', 'updated_at': '2026-02-01T09:00:00.5'})
+    assert card['notes'] == '开篇第一句' and card['updated_at'] == '2026-02-01T09:00:00.5'
+    del card['reviewed']
+    assert list(card) == ['id', 'keyword', 'definition', 'source', 'quote', 'notes', 'tags',
+                          'created_at', 'updated_at', 'is_favorite']
+
+    # 与dict一样，没有的键抛出KeyError
+    missing = Card({'id': 'card2', 'keyword': '温故知新'})
+    try:
+        missing['tags']
+        assert False, "缺少的字段应抛出KeyError"
+    except KeyError:
+        pass
+
+    # 副本的标签修改不影响原卡片
+    copied = card.copy()
+    copied['tags'].append('成语')
+    assert card['tags'] == ['实词'] and copied['tags'] == ['实词', '成语']
+    print("✓ Card与dict用法兼容")
+
+
+def test_compact_storage():
+    """测试时间按整数保存、来源和标签驻留"""
+    first = Card(json.loads(json.dumps(sample_dict(), ensure_ascii=False)))
+    second = Card(json.loads(json.dumps(sample_dict(), ensure_ascii=False)))
+    assert isinstance(first._created, int) and isinstance(first._updated, int)
+    assert first['created_at'] == '2026-01-05T08:30:00.123456'
+    assert first['updated_at'] == '2026-01-05T08:30:00'
+    assert first['source'] is second['source']
+    assert first['tags'][0] is second['tags'][0]
+    assert not hasattr(first, '__dict__')
+
+    # 无法原样还原的时间文本按原文本保存
+    for text in ('2026-01-05 08:30', '2026-01-05T08:30:00+08:00', '昨天', '2026-01-05T08:30:00,123456'):
+        assert encode_time(text) == text or decode_time(encode_time(text)) == text
+        assert Card({'created_at': text})['created_at'] == text
+    print("✓ 时间和重复字符串紧凑保存")
+
+
+def test_serialization_roundtrip(make_manager):
+    """测试JSON、pickle和CardManager保存读取后数据不变"""
+    card = Card(sample_dict())
+    assert json.loads(json.dumps([card], default=card_to_json)) == [sample_dict()]
+    assert pickle.loads(pickle.dumps(card)) == card
+
+    # 整个列表一次转换为dict：键的顺序与逐张转换相同，缺少的字段、额外的键和非文本时间都保留
+    partial = Card({'id': "p", 'keyword': "之", 'created_at': 12, 'extra': [1]})
+    converted = cards_to_json([card, partial, {'id': "plain"}])
+    assert converted == [dict(card.items()), dict(partial.items()), {'id': "plain"}]
+    assert [list(item) for item in converted[:2]] == [list(card), list(partial)]
+    # 所有槽都有值和部分槽没有值的卡片，pickle和复制后都不变
+    for item in (card, partial):
+        restored = pickle.loads(pickle.dumps(item))
+        assert restored == item and list(restored) == list(item) and 'notes' not in partial
+        assert item.copy() == item
+
+    data_file = make_manager.write([sample_dict()])
+    card_manager = CardManager(data_file)
+    assert all(isinstance(item, Card) for item in card_manager.cards)
+    new_id = card_manager.add_card({'keyword': '温故知新', 'definition': '复习旧知识'})
+    assert isinstance(card_manager.get_card(new_id), Card)
+
+    with open(data_file, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved[0] == sample_dict()
+    assert CardManager(data_file).cards == card_manager.cards
+    print("✓ 保存和读取后数据不变")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试卡片记录...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_dict_compatible()
+        test_compact_storage()
+        test_serialization_roundtrip(make_manager)
+    print("=" * 50)
+    print("卡片记录测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预热快照测试脚本
+验证卡片索引随增删改保持一致，快照只在退出时写入、能直接恢复卡片和索引，
+数据文件变化或有未保存的修改时不使用快照（启动用时见benchmark_card_snapshot.py）
+"""
+
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_manager import CardManager
+from card_snapshot import snapshot_path
+
+
+def make_cards(count):
+    """count张卡片"""
+    return [{'id': f"card{i}", 'keyword': f"关键词{i}", 'definition': "释义" if i % 2 else "解释",
+             'source': "《论语》", 'quote': "", 'notes': "", 'tags': []} for i in range(count)]
+
+
+def linear_search(card_manager, query):
+    """不使用索引的搜索结果（用于对照）"""
+    query = query.lower()
+    return [card['id'] for card in card_manager.cards
+            if any(query in card[field].lower() for field in ('keyword', 'definition', 'source', 'quote', 'notes'))]
+
+
+def test_index_follows_changes(make_manager):
+    """测试索引在增删改（包括批量操作中途）后与卡片一致"""
+    card_manager = make_manager(make_cards(20))
+    with card_manager.batch():
+        new_id = card_manager.add_card({'keyword': '学而时习之', 'definition': '学习后按时复习'})
+        # 批量操作中途索引已经更新
+        assert card_manager.get_card(new_id)['keyword'] == '学而时习之'
+        card_manager.update_card(new_id, {'keyword': '温故知新', 'definition': '复习旧知识',
+                                          'source': '', 'quote': '', 'notes': '', 'tags': []})
+        card_manager.delete_card("card3")
+    assert card_manager.get_card("card3") is None
+
+    # 修改按ID取卡片重新索引，不遍历卡片列表；整张替换的卡片和快照存在时复制出的卡片同样能找到
+    def no_scan(card_ids):
+        raise AssertionError("修改卡片时遍历了卡片列表")
+    card_manager.index._reindex = no_scan
+    card_manager.update_card({'id': "card5", 'keyword': "有朋自远方来", 'definition': "朋友",
+                              'source': "", 'quote': "", 'notes': "", 'tags': []})
+    held = card_manager.snapshot()
+    card_manager.update_card("card6", {'definition': "不亦乐乎"})
+    del card_manager.index._reindex
+    del held
+    for query in ("温故", "学而", "释义", "关键词1", "论语", "不存在", "有朋", "乐乎", "关键词5"):
+        assert [card['id'] for card in card_manager.search_cards(query)] == linear_search(card_manager, query)
+    print("✓ 索引随增删改保持一致")
+
+
+def test_snapshot_restores_state(make_manager):
+    """测试退出时生成快照，下次加载直接从快照恢复"""
+    data_file = make_manager.write(make_cards(300))
+    first = CardManager(data_file)
+    assert not first._loaded_from_snapshot
+    # 加载和保存都不写快照，退出时才写
+    first.save_cards()
+    assert not os.path.exists(snapshot_path(data_file))
+    assert first.save_snapshot()
+    assert os.path.exists(snapshot_path(data_file))
+
+    second = CardManager(data_file)
+    assert second._loaded_from_snapshot
+    assert [card['id'] for card in second.cards] == [card['id'] for card in first.cards]
+    assert [card.to_dict() for card in second.cards] == [card.to_dict() for card in first.cards]
+    assert second.get_card("card42") is second.cards[42]
+    assert second.index.postings == first.index.postings
+    assert [card['id'] for card in second.search_cards("关键词29")] == linear_search(second, "关键词29")
+    # 没有修改时快照已经是最新的，不重复写入
+    mtime = os.stat(snapshot_path(data_file)).st_mtime_ns
+    assert second.save_snapshot() and os.stat(snapshot_path(data_file)).st_mtime_ns == mtime
+    print("✓ 从快照恢复卡片和索引")
+
+
+def test_snapshot_follows_saves(make_manager):
+    """测试修改保存后退出时快照随之更新，删除后恢复的索引中没有已删除的卡片"""
+    data_file = make_manager.write(make_cards(50))
+    card_manager = CardManager(data_file)
+    card_manager.save_snapshot()
+    card_manager.delete_card("card7")
+    new_id = card_manager.add_card({'keyword': '三人行', 'definition': '必有我师'})
+    # 修改后数据文件已变化，旧快照不再使用
+    assert not CardManager(data_file)._loaded_from_snapshot
+    assert card_manager.save_snapshot()
+
+    restored = CardManager(data_file)
+    assert restored._loaded_from_snapshot
+    assert restored.get_card("card7") is None
+    assert restored.get_card(new_id)['keyword'] == '三人行'
+    assert [card['id'] for card in restored.search_cards("我师")] == [new_id]
+    # 恢复后先修改再搜索，解开的倒排表随之更新
+    restored.update_card(new_id, {'keyword': '温故知新', 'definition': '可以为师矣'})
+    assert [card['id'] for card in restored.search_cards("温故")] == [new_id]
+    assert restored.search_cards("三人行") == []
+    print("✓ 快照随保存更新")
+
+
+def test_unsaved_changes_skip_snapshot(make_manager):
+    """测试有未保存的修改时不写快照（快照必须与数据文件一致）"""
+    data_file = make_manager.write(make_cards(20))
+    card_manager = CardManager(data_file)
+    # 模拟保存失败：修改只留在内存中
+    save_cards = card_manager.save_cards
+    card_manager.save_cards = lambda: False
+    card_manager.toggle_favorite("card0")
+    assert not card_manager.save_snapshot()
+    assert not os.path.exists(snapshot_path(data_file))
+
+    save_cards()
+    assert card_manager.save_snapshot()
+    restored = CardManager(data_file)
+    assert restored._loaded_from_snapshot and restored.get_card("card0")['is_favorite']
+    print("✓ 有未保存的修改时不写快照")
+
+
+def test_stale_or_broken_snapshot_rebuilt(make_manager):
+    """测试数据文件被外部修改或快照损坏时回退到完整加载"""
+    data_file = make_manager.write(make_cards(30))
+    CardManager(data_file).save_snapshot()
+
+    # 其他程序修改了数据文件
+    with open(data_file, 'r', encoding='utf-8') as f:
+        cards = json.load(f)
+    cards[0]['keyword'] = '外部修改'
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(cards, f, ensure_ascii=False, indent=2)
+    stale = CardManager(data_file)
+    assert not stale._loaded_from_snapshot
+    assert stale.get_card("card0")['keyword'] == '外部修改'
+    assert not CardManager(data_file)._loaded_from_snapshot
+    assert stale.save_snapshot()
+    assert CardManager(data_file)._loaded_from_snapshot
+
+    # 快照文件损坏（退出时重新写入）
+    with open(snapshot_path(data_file), 'wb') as f:
+        f.write(b"broken")
+    broken = CardManager(data_file)
+    assert not broken._loaded_from_snapshot and len(broken.cards) == 30
+    print("✓ 过期或损坏的快照被重建")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试预热快照...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_index_follows_changes(make_manager)
+        test_snapshot_restores_state(make_manager)
+        test_snapshot_follows_saves(make_manager)
+        test_unsaved_changes_skip_snapshot(make_manager)
+        test_stale_or_broken_snapshot_rebuilt(make_manager)
+    print("=" * 50)
+    print("预热快照测试完成！")
+
+
+if __name__ == "__main__":
+    main()
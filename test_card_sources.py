@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+出处层级索引测试脚本
+验证出处拆分为典籍和篇章、按典籍和篇章分组计数与逐张统计一致，
+以及增删改和撤销后计数的增量更新
+"""
+
+import os
+import random
+import sys
+from collections import Counter
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_sources import NO_CHAPTER, NO_SOURCE, parse_source, source_key
+
+SOURCES = ["《论语·学而》", "《论语·为政》", "《論語·學而》", "《论语》", "《庄子》〈逍遥游〉",
+           "司马迁《史记·项羽本纪》", "孟子·梁惠王上", "孟子", "", "《庄子・齐物论》"]
+
+
+def make_cards(sources):
+    """出处为sources的卡片"""
+    cards = [{'id': f"card{i}", 'keyword': f"词{i}", 'definition': "", 'source': source,
+              'quote': "", 'notes': "", 'tags': []}
+             for i, source in enumerate(sources)]
+    return cards
+
+
+def expected_counts(card_manager):
+    """逐张统计各典籍、各篇章的卡片数"""
+    books = Counter()
+    chapters = Counter()
+    for card in card_manager.cards:
+        book, chapter = source_key(card['source'])
+        books[book] += 1
+        chapters[(book, chapter)] += 1
+    return books, chapters
+
+
+def assert_counts_match(card_manager):
+    """出处索引的计数与逐张统计一致"""
+    books, chapters = expected_counts(card_manager)
+    listed = card_manager.source_books()
+    assert {book: count for book, _, count in listed} == dict(books)
+    for book, _, count in listed:
+        chapter_counts = {(book, chapter): n for chapter, _, n in card_manager.source_chapters(book)}
+        assert chapter_counts == {key: n for key, n in chapters.items() if key[0] == book}
+        assert len(card_manager.cards_in_source(book)) == count
+
+
+def test_parse_source():
+    """测试出处拆分为典籍和篇章"""
+    assert parse_source("《论语·学而》") == ("论语", "学而")
+    assert parse_source("《庄子》〈逍遥游〉") == ("庄子", "逍遥游")
+    assert parse_source("司马迁《史记·项羽本纪》") == ("史记", "项羽本纪")
+    assert parse_source("孟子 · 梁惠王上") == ("孟子", "梁惠王上")
+    assert parse_source("《论语》") == ("论语", "")
+    assert parse_source("  ") == ("", "")
+    assert source_key("《論語·學而》") == ("论语", "学而")
+    print("✓ 出处拆分正确")
+
+
+def test_grouping_and_counts(make_manager):
+    """测试按典籍和篇章分组，繁简写法归入同一节点"""
+    card_manager = make_manager(make_cards(SOURCES))
+    books = card_manager.source_books()
+    assert [(label, count) for _, label, count in books][-1] == (NO_SOURCE, 1)
+    assert ("论语", 4) in [(book, count) for book, _, count in books]
+    assert card_manager.source_chapters("论语") == [
+        ("为政", "为政", 1), ("学而", "学而", 2), ("", NO_CHAPTER, 1)]
+    assert [card['id'] for card in card_manager.cards_in_source("论语", "学而")] == ["card0", "card2"]
+    assert [card['id'] for card in card_manager.cards_in_source("庄子")] == ["card4", "card9"]
+    assert_counts_match(card_manager)
+    print("✓ 按典籍和篇章分组正确")
+
+
+def test_incremental_updates(make_manager):
+    """测试增删改、收藏和撤销后计数与逐张统计一致"""
+    rng = random.Random(4)
+    card_manager = make_manager(make_cards([rng.choice(SOURCES) for _ in range(200)]))
+    assert_counts_match(card_manager)
+    for step in range(200):
+        action = rng.random()
+        card_ids = [card['id'] for card in card_manager.cards]
+        if action < 0.3:
+            card_manager.add_card({'keyword': f"新{step}", 'definition': f"义{step}",
+                                   'source': rng.choice(SOURCES + ["《荀子·劝学》"])})
+        elif action < 0.6 and card_ids:
+            card_manager.update_card(rng.choice(card_ids), {'source': rng.choice(SOURCES)})
+        elif action < 0.75 and card_ids:
+            card_manager.delete_cards(rng.sample(card_ids, min(3, len(card_ids))))
+        elif action < 0.85 and card_ids:
+            card_manager.toggle_favorite(rng.choice(card_ids))
+        else:
+            card_manager.undo_last_action()
+        if step % 10 == 0:
+            # 按出处取出的卡片保持列表顺序（"卡片ID → 位置"映射随增删更新或重建）
+            for book, _, count in card_manager.source_books():
+                found = [card['id'] for card in card_manager.cards_in_source(book)]
+                assert len(found) == count
+                assert found == [card['id'] for card in card_manager.cards if card['id'] in set(found)]
+    assert_counts_match(card_manager)
+    # 按出处浏览不需要建立列式镜像
+    assert card_manager._columns is None
+
+    # 典籍的最后一张卡片删除后，典籍节点随之消失
+    card_id = card_manager.add_card({'keyword': "劝学", 'definition': "勉励学习", 'source': "《荀子·劝学》"})
+    card_manager.delete_cards([card_id] + [card['id'] for card in card_manager.cards_in_source("荀子")])
+    assert "荀子" not in [book for book, _, _ in card_manager.source_books()]
+    assert card_manager.source_chapters("荀子") == []
+    print("✓ 计数增量更新正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试出处层级索引...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_parse_source()
+        test_grouping_and_counts(make_manager)
+        test_incremental_updates(make_manager)
+    print("=" * 50)
+    print("出处层级索引测试完成！")
+
+
+if __name__ == "__main__":
+    main()
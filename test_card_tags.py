@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签管理和标签筛选测试脚本
+验证批量加标签、去标签、重命名和删除标签（含撤销），标签计数与逐张统计一致，
+多个标签的且/或与收藏、搜索组合筛选的结果，以及卡片概览按标签、出处、收藏筛选后的增量更新
+"""
+
+import os
+import random
+import sys
+from collections import Counter
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_tags import clean_tags, parse_tags
+from test_virtual_list import MockScrollbar, MockTreeview
+from ui.main_window import MainWindow
+from ui.virtual_list import VirtualTreeview
+
+TAGS = ["虚词", "实词", "论语", "孟子", "通假", "古今异义"]
+
+
+def make_cards(count, seed=2):
+    """count张随机标签的卡片"""
+    rng = random.Random(seed)
+    sources = ["《论语·里仁》", "《孟子·梁惠王上》", "《论语·为政》", "", "《荀子·劝学》"]
+    cards = [{'id': f"card{i}", 'keyword': f"词{i}", 'definition': f"义{i}", 'source': sources[i % 5],
+              'quote': "学而时习之" if i % 3 == 0 else "有朋自远方来", 'notes': "",
+              'tags': rng.sample(TAGS, rng.randint(0, 3)), 'is_favorite': i % 4 == 0}
+             for i in range(count)]
+    return cards
+
+
+def ids(cards):
+    """卡片ID集合"""
+    return {card['id'] for card in cards}
+
+
+def assert_counts_match(card_manager):
+    """标签计数与逐张统计一致"""
+    expected = Counter(tag for card in card_manager.cards for tag in card.get('tags') or ())
+    assert dict(card_manager.tag_counts()) == dict(expected)
+    for tag, count in expected.items():
+        assert card_manager.tag_count(tag) == count
+
+
+def test_parse_tags():
+    """测试标签输入的拆分和整理"""
+    assert parse_tags("虚词, 论语，孟子、虚词  通假") == ["虚词", "论语", "孟子", "通假"]
+    assert parse_tags("") == [] and clean_tags(None) == []
+    assert clean_tags(" 虚词 ") == ["虚词"]
+    print("✓ 标签拆分正确")
+
+
+def test_bulk_tagging_and_undo(make_manager):
+    """测试批量加标签、去标签、重命名和删除标签，以及撤销"""
+    card_manager = make_manager(make_cards(50))
+    assert_counts_match(card_manager)
+    before = {card['id']: list(card['tags']) for card in card_manager.cards}
+
+    selected = ["card1", "card2", "card3"]
+    card_manager.add_tags(selected, ["重点", "虚词"])
+    assert all("重点" in card_manager.get_card(card_id)['tags'] for card_id in selected)
+    assert card_manager.tag_count("重点") == 3
+    assert_counts_match(card_manager)
+
+    # 一次批量操作是一个撤销操作
+    assert card_manager.undo_last_action()
+    assert {card['id']: card['tags'] for card in card_manager.cards} == before
+    assert card_manager.tag_count("重点") == 0
+    assert card_manager.redo_last_action()
+    assert card_manager.tag_count("重点") == 3
+
+    assert card_manager.remove_tags(["card1", "card2"], "重点") == 2
+    assert card_manager.tag_count("重点") == 1
+
+    count = card_manager.tag_count("论语")
+    merged = ids(card_manager.query().where(tags=["论语"], any_tag=True).run())
+    merged |= ids(card_manager.query().where(tags=["孟子"]).run())
+    card_manager.rename_tag("论语", "孟子")
+    assert card_manager.tag_count("论语") == 0 and card_manager.tag_count("孟子") == len(merged)
+    assert all(card['tags'].count("孟子") <= 1 for card in card_manager.cards)
+    assert count > 0
+
+    card_manager.delete_tag("虚词")
+    assert card_manager.tag_count("虚词") == 0
+    assert_counts_match(card_manager)
+    card_manager.undo_last_action()
+    assert card_manager.tag_count("虚词") > 0
+    assert_counts_match(card_manager)
+
+    # 删除卡片后计数随之减少
+    tagged = [card['id'] for card in card_manager.cards if "实词" in card['tags']]
+    card_manager.delete_cards(tagged[:2])
+    assert card_manager.tag_count("实词") == len(tagged) - 2
+    assert_counts_match(card_manager)
+    print("✓ 批量标签操作和撤销正确")
+
+
+def test_tag_filters(make_manager):
+    """测试多个标签的且/或与收藏、搜索组合筛选"""
+    card_manager = make_manager(make_cards(400))
+    cards = card_manager.cards
+
+    def expected(tags, any_tag=False, favorite=None, text=None):
+        check = any if any_tag else all
+        return {card['id'] for card in cards
+                if check(tag in card['tags'] for tag in tags)
+                and (favorite is None or card['is_favorite'] == favorite)
+                and (text is None or text in card['quote'])}
+
+    for tags in (["虚词"], ["虚词", "论语"], ["论语", "孟子", "通假"]):
+        for any_tag in (False, True):
+            for favorite in (None, True, False):
+                query = card_manager.query().where(tags=tags, any_tag=any_tag)
+                if favorite is not None:
+                    query = query.where(favorite=favorite)
+                assert ids(query.run()) == expected(tags, any_tag, favorite), (tags, any_tag, favorite)
+            found = ids(card_manager.query().where(tags=tags, any_tag=any_tag, fav=True).match("学而").run())
+            assert found == expected(tags, any_tag, True, "学而")
+
+    # 查询语法中的标签和收藏条件同样以集合运算求出
+    found = ids(card_manager.query().search("(tag:虚词 OR tag:通假) fav:true 学而").run())
+    assert found == expected(["虚词", "通假"], True, True, "学而")
+    assert ids(card_manager.query().search("tag:虚词 fav:false").run()) == expected(["虚词"], favorite=False)
+
+    # 收藏和修改标签后筛选结果随之更新
+    card_manager.add_tags(["card1"], ["虚词"])
+    for _ in range(2):
+        favorite = card_manager.toggle_favorite("card1")
+        assert ("card1" in ids(card_manager.query().where(tags=["虚词"], fav=True).run())) == favorite
+        assert ("card1" in ids(card_manager.query().search("tag:虚词 fav:false").run())) != favorite
+    card_manager.remove_tags(["card1"], ["虚词"])
+    assert "card1" not in ids(card_manager.query().where(tags=["虚词"]).run())
+    print("✓ 标签与收藏、搜索组合筛选正确")
+
+
+def make_list_window(card_manager):
+    """只有卡片列表的主窗口（不创建Tk组件），卡片变更时按事件增量更新列表"""
+    window = MainWindow.__new__(MainWindow)
+    window.card_manager = card_manager
+    window.is_favorites_view = False
+    window.source_filter = None
+    window.tag_filter = None
+    window._filter_ids = None
+    window._list_stale = False
+    window.sort_column = "created_at"
+    window.sort_order = "asc"
+    window.scheduler = type("Scheduler", (), {'is_running': lambda self, name: False})()
+    window.virtual_list = VirtualTreeview(MockTreeview(), MockScrollbar())
+    card_manager.subscribe(window.on_cards_changed)
+    return window
+
+
+def show_filtered(window, tags=None, any_tag=False, source=None, favorite=False):
+    """设置筛选条件并按筛选结果重建列表（即refresh_list_view按出处浏览时的做法）"""
+    window.tag_filter = (tuple(tags), any_tag) if tags else None
+    window.source_filter = source
+    window.is_favorites_view = favorite
+    window._update_filter_ids()
+    cards = list(window.card_manager.cards_with_ids(window._filter_ids if window._filter_ids is not None
+                                                    else ids(window.card_manager.cards)))
+    window.virtual_list.set_items(cards, lambda card: card['id'], window._card_row_values)
+
+
+def test_filter_ids_and_incremental_rows(make_manager):
+    """测试标签、出处、收藏筛选由索引求交集，以及列表按缓存的筛选结果增量更新"""
+    card_manager = make_manager(make_cards(300))
+    book = card_manager.source_books()[0][0]
+    in_book = ids(card_manager.cards_in_source(book))
+    assert in_book
+
+    def expected(tags, any_tag=False, source=False, favorite=False):
+        check = any if any_tag else all
+        in_book = ids(card_manager.cards_in_source(book))
+        return {card['id'] for card in card_manager.cards
+                if (not tags or check(tag in card['tags'] for tag in tags))
+                and (not source or card['id'] in in_book)
+                and (not favorite or card['is_favorite'])}
+
+    assert card_manager.filter_ids() is None
+    for tags in ([], ["虚词"], ["虚词", "论语"]):
+        for any_tag in (False, True):
+            for source in (False, True):
+                for favorite in (False, True):
+                    if not (tags or source or favorite):
+                        continue
+                    found = card_manager.filter_ids(tags, any_tag, (book, None) if source else None, favorite)
+                    assert found == expected(tags, any_tag, source, favorite), (tags, any_tag, source, favorite)
+    # 按ID取出的卡片保持原有顺序
+    order = [card['id'] for card in card_manager.cards_with_ids(expected(["虚词"]))]
+    assert order == [card['id'] for card in card_manager.cards if card['id'] in expected(["虚词"])]
+
+    window = make_list_window(card_manager)
+    show_filtered(window, ["虚词"], source=(book, None), favorite=True)
+    assert ids(window.virtual_list.items) == expected(["虚词"], source=True, favorite=True)
+
+    # 加标签、收藏、改出处后，列表按重新求出的筛选结果增减行
+    outside = [card['id'] for card in card_manager.cards if card['id'] in in_book and not card['is_favorite']][:3]
+    card_manager.add_tags(outside, ["虚词"])
+    assert not set(outside) & ids(window.virtual_list.items)
+    for card_id in outside:
+        card_manager.toggle_favorite(card_id)
+    assert set(outside) <= ids(window.virtual_list.items)
+    card_manager.update_card(outside[0], {'source': "《庄子·逍遥游》"})
+    card_manager.remove_tags([outside[1]], ["虚词"])
+    assert ids(window.virtual_list.items) == expected(["虚词"], source=True, favorite=True)
+    assert outside[2] in ids(window.virtual_list.items) and outside[0] not in ids(window.virtual_list.items)
+    card_manager.unsubscribe(window.on_cards_changed)
+    print("✓ 筛选结果由索引求交集，列表按筛选结果增量更新")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试标签管理和标签筛选...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_parse_tags()
+        test_bulk_tagging_and_undo(make_manager)
+        test_tag_filters(make_manager)
+        test_filter_ids_and_incremental_rows(make_manager)
+    print("=" * 50)
+    print("标签管理和标签筛选测试完成！")
+
+
+if __name__ == "__main__":
+    main()
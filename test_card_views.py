@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读卡片视图测试脚本
+验证获取、筛选、排序和搜索返回的视图不复制卡片列表、无法修改，
+并且在之后的修改中保持不变、不会改变卡片的存储顺序
+"""
+
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_record import card_to_json
+from card_views import CardsView
+
+
+def make_cards(count):
+    """count张卡片，关键词顺序与存储顺序相反"""
+    cards = [{'id': f"card{i}", 'keyword': f"词{count - i:03d}", 'definition': "释义", 'source': "",
+              'quote': "", 'notes': "", 'tags': [], 'is_favorite': i % 3 == 0} for i in range(count)]
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def test_views_are_read_only(make_manager):
+    """测试所有卡片和各种结果都是只读的，不能排序或追加"""
+    card_manager = make_manager(make_cards(10))
+    all_cards = card_manager.get_all_cards()
+    assert all_cards._cards is card_manager.cards
+    for view in (all_cards, card_manager.search_cards(""), card_manager.sort_cards(),
+                 card_manager.get_favorite_cards()):
+        for attempt in (lambda: view.sort(key=lambda card: card['keyword']),
+                        lambda: view.append({}), lambda: view.__setitem__(0, {})):
+            try:
+                attempt()
+                assert False, "视图不应可修改"
+            except (AttributeError, TypeError):
+                pass
+    assert ids(card_manager.cards) == [f"card{i}" for i in range(10)]
+    print("✓ 视图只读")
+
+
+def test_sorted_and_filtered_views(make_manager):
+    """测试排序、收藏和搜索视图只保存位置，结果正确且不改变存储顺序"""
+    card_manager = make_manager(make_cards(10))
+    original = ids(card_manager.cards)
+
+    by_keyword = card_manager.sort_cards()
+    assert isinstance(by_keyword, CardsView)
+    assert ids(by_keyword) == list(reversed(original))
+    assert list(by_keyword.positions) == list(range(9, -1, -1))
+    assert ids(by_keyword[2:4]) == ["card7", "card6"] and isinstance(by_keyword[2:4], CardsView)
+    assert by_keyword[-1]['id'] == "card0" and ids(reversed(by_keyword))[:2] == ["card0", "card1"]
+    assert ids(card_manager.cards) == original
+
+    favorites = card_manager.get_favorite_cards()
+    assert ids(favorites) == ["card0", "card3", "card6", "card9"]
+    assert favorites == card_manager.filter_cards(favorite=True) == [card_manager.get_card(card_id)
+                                                                     for card_id in ids(favorites)]
+    assert ids(card_manager.search_cards("词005")) == ["card5"]
+
+    # 视图可以直接序列化
+    text = json.dumps(favorites, ensure_ascii=False, default=card_to_json)
+    assert [card['id'] for card in json.loads(text)] == ids(favorites)
+    print("✓ 排序和筛选视图正确")
+
+
+def test_views_unchanged_by_later_edits(make_manager):
+    """测试取得视图后删除、新增和修改卡片，视图内容不变"""
+    card_manager = make_manager(make_cards(10))
+    all_cards = card_manager.get_all_cards()
+    favorites = card_manager.get_favorite_cards()
+    before_all = ids(all_cards)
+    before_favorites = [dict(card) for card in favorites]
+
+    card_manager.delete_cards(["card0", "card4"])
+    card_manager.add_card({'keyword': "新词", 'definition': "新释义"})
+    card_manager.toggle_favorite("card3")
+
+    assert ids(all_cards) == before_all
+    assert [dict(card) for card in favorites] == before_favorites
+    assert ids(card_manager.get_favorite_cards()) == ["card6", "card9"]
+    print("✓ 视图不受之后的修改影响")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试只读卡片视图...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_views_are_read_only(make_manager)
+        test_sorted_and_filtered_views(make_manager)
+        test_views_unchanged_by_later_edits(make_manager)
+    print("=" * 50)
+    print("只读卡片视图测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匹配位置测试脚本
+验证查询结果随每张卡片带有各字段中匹配的位置（普通文本、正则、查询语法和拼音），
+分块执行、缓存和切片保留这些位置，以及结果列表的标记文本
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_highlight import mark_spans, merge_spans, snippet
+from pinyin_support import pinyin_available, pinyin_spans
+
+
+def make_cards():
+    """几张卡片"""
+    cards = [
+        {'id': "card0", 'keyword': "学而", 'definition': "学习而时常温习", 'source': "《论语·学而》",
+         'quote': "学而时习之，不亦说乎", 'notes': "", 'tags': ["诗"]},
+        {'id': "card1", 'keyword': "君子", 'definition': "有德之人", 'source': "《论语·为政》",
+         'quote': "人不知而不愠，不亦君子乎", 'notes': "Junzi", 'tags': []},
+        {'id': "card2", 'keyword': "劝学", 'definition': "勉励学习", 'source': "《荀子》",
+         'quote': "君子曰：学不可以已", 'notes': "", 'tags': ["诗"]},
+    ]
+    return cards
+
+
+def test_spans_from_query(make_manager):
+    """测试全文匹配、正则和查询语法的结果带有匹配位置"""
+    card_manager = make_manager(make_cards())
+
+    result = card_manager.query().match("学").run()
+    assert [card['id'] for card in result] == ["card0", "card2"]
+    spans = result.match_spans(0)
+    assert spans['keyword'] == [(0, 1)] and spans['definition'] == [(0, 1)]
+    assert spans['source'] == [(4, 5)] and spans['quote'] == [(0, 1)]
+    assert result.match_spans(1)['keyword'] == [(1, 2)]
+
+    # 不区分大小写和多个条件的位置合并
+    result = card_manager.query().match("junzi").match("不亦").run()
+    assert result.match_spans(0) == {'notes': [(0, 5)], 'quote': [(7, 9)]}
+
+    # 正则：每处匹配的实际长度
+    result = card_manager.query().match(r"学.", fields=["quote"], regex=True).run()
+    assert [result.match_spans(i)['quote'] for i in range(len(result))] == [[(0, 2)], [(4, 6)]]
+
+    # 查询语法：只取满足的分支和文本条件，排除条件和标签没有位置
+    result = card_manager.query().search("(君子 OR 劝学) -keyword:学而 tag:诗").run()
+    assert [card['id'] for card in result] == ["card2"]
+    assert result.match_spans(0) == {'keyword': [(0, 2)], 'quote': [(0, 2)]}
+
+    # 没有文本条件的查询、切片和增量判断
+    assert card_manager.query().where(fav=False).run().match_spans(0) == {}
+    ordered = card_manager.query().match("而").order_by("keyword", reverse=True).run()
+    assert ordered[1:].match_spans(0) == ordered.match_spans(1)
+    query = card_manager.query().match("君子")
+    assert query.match_spans(card_manager.get_card("card0")) is None
+    assert query.match_spans(card_manager.get_card("card1"))['keyword'] == [(0, 2)]
+    print("✓ 查询结果带有匹配位置")
+
+
+def test_spans_in_chunks_and_cache(make_manager):
+    """测试分块执行和缓存的结果保留匹配位置"""
+    card_manager = make_manager(make_cards())
+    query = card_manager.query().match("学而").cached()
+    chunks = list(query.chunks(2))
+    found = [(card['id'], cards.match_spans(i)) for cards, _, _ in chunks for i, card in enumerate(cards)]
+    assert found == [("card0", {'keyword': [(0, 2)], 'source': [(4, 6)], 'quote': [(0, 2)]})]
+
+    cached = query.run()
+    assert card_manager.search_cache.hits == 1
+    assert cached.match_spans(0) == found[0][1]
+    print("✓ 分块执行和缓存保留匹配位置")
+
+
+def test_marking():
+    """测试位置合并和列表中的标记文本"""
+    assert merge_spans({'a': [(3, 5)]}, {'a': [(0, 1), (4, 7)], 'b': [(2, 3)]}) == \
+        {'a': [(0, 1), (3, 7)], 'b': [(2, 3)]}
+    assert mark_spans("学而时习之", [(0, 2), (4, 5)]) == "【学而】时习【之】"
+    assert mark_spans("学而", [(1, 1)]) == "学而"
+    assert snippet("子曰学而时习之不亦说乎有朋自远方来", [(13, 15)], context=2) == "…有朋【自远】方来"
+    print("✓ 标记文本正确")
+
+
+def test_pinyin_spans(make_manager):
+    """测试拼音匹配的位置（需要pypinyin）"""
+    if not pinyin_available():
+        assert pinyin_spans("学而", "xueer") == []
+        print("✓ 未安装pypinyin，跳过拼音匹配测试")
+        return
+    assert pinyin_spans("子曰学而时习之", "xueer") == [(2, 4)]
+    assert pinyin_spans("子曰学而时习之", "xuee") == [(2, 4)]
+    assert pinyin_spans("子曰学而时习之", "xe") == [(2, 4)]
+    # 全拼和首字母都匹配的位置只返回一次
+    assert pinyin_spans("子曰学而时习之", "x") == [(2, 3), (5, 6)]
+    card_manager = make_manager(make_cards())
+    result = card_manager.query().match("junzi", pinyin=True).run()
+    assert [card['id'] for card in result] == ["card1", "card2"]
+    assert result.match_spans(0)['keyword'] == [(0, 2)] and result.match_spans(0)['notes'] == [(0, 5)]
+    assert mark_spans("Junzi", result.match_spans(0)['notes']) == "【Junzi】"
+
+    # 多个全文条件和查询语法条件的位置合并后互不重叠
+    result = card_manager.query().match("x", pinyin=True).match("xue", pinyin=True).run()
+    for row in range(len(result)):
+        for spans in result.match_spans(row).values():
+            assert all(a[1] < b[0] for a, b in zip(spans, spans[1:])), spans
+    assert mark_spans("学而时习之，不亦说乎", result.match_spans(0)['quote']) == "【学】而时【习】之，不亦说乎"
+    print("✓ 拼音匹配位置正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试匹配位置...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_spans_from_query(make_manager)
+        test_spans_in_chunks_and_cache(make_manager)
+        test_marking()
+        test_pinyin_spans(make_manager)
+    print("=" * 50)
+    print("匹配位置测试完成！")
+
+
+if __name__ == "__main__":
+    main()
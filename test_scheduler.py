@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分帧调度器测试脚本
+验证长任务按时间预算分帧执行、报告进度，并且新任务会取代同名旧任务
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ui.scheduler import ChunkedScheduler, chunked_sort
+
+
+class MockRoot:
+    """模拟根窗口的after队列"""
+    def __init__(self):
+        self.jobs = {}
+        self._counter = 0
+
+    def after(self, delay, callback):
+        self._counter += 1
+        job = f"after#{self._counter}"
+        self.jobs[job] = callback
+        return job
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_frame(self):
+        """执行一帧中到期的回调"""
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+def slow_task(steps, log):
+    """每步耗时约1毫秒的任务"""
+    for step in range(steps):
+        time.sleep(0.001)
+        log.append(step)
+        yield (step + 1, steps)
+    log.append("done")
+
+
+def test_small_task_runs_synchronously():
+    """测试预算内能完成的任务同步完成"""
+    root = MockRoot()
+    scheduler = ChunkedScheduler(root, budget_ms=1000)
+    log = []
+    scheduler.run('refresh', slow_task(3, log))
+    assert log == [0, 1, 2, "done"]
+    assert not scheduler.is_running('refresh')
+    assert not root.jobs
+    print("✓ 小任务同步完成")
+
+
+def test_large_task_spread_across_frames():
+    """测试长任务分帧执行并报告进度"""
+    root = MockRoot()
+    progress = []
+    scheduler = ChunkedScheduler(root, budget_ms=5,
+                                 on_progress=lambda label, done, total: progress.append((label, done, total)))
+    log = []
+    scheduler.run('refresh', slow_task(50, log), label="正在刷新")
+    assert scheduler.is_running('refresh')
+    assert 0 < len(log) < 50
+
+    frames = 1
+    while root.jobs:
+        root.run_frame()
+        frames += 1
+    assert log[-1] == "done" and len(log) == 51
+    assert frames > 2
+    assert progress and progress[0][0] == "正在刷新" and progress[-1][2] == 50
+    print(f"✓ 长任务分 {frames} 帧完成")
+
+
+def test_newer_task_supersedes_older():
+    """测试同名新任务取代旧任务"""
+    root = MockRoot()
+    scheduler = ChunkedScheduler(root, budget_ms=2)
+    old_log, new_log = [], []
+    scheduler.run('search', slow_task(100, old_log))
+    scheduler.run('search', slow_task(5, new_log))
+    while root.jobs:
+        root.run_frame()
+    assert "done" not in old_log
+    assert new_log[-1] == "done"
+    print("✓ 新任务取代未完成的旧任务")
+
+
+def test_chunked_sort_matches_sort():
+    """测试分块排序与list.sort结果一致（含稳定性和降序）"""
+    items = [{'k': value % 7, 'n': value} for value in range(2000)]
+    for reverse in (False, True):
+        generator = chunked_sort(items, lambda item: item['k'], reverse, chunk_size=300)
+        try:
+            while True:
+                next(generator)
+        except StopIteration as stop:
+            result = stop.value
+        assert result == sorted(items, key=lambda item: item['k'], reverse=reverse)
+    print("✓ 分块排序结果正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试分帧调度器...")
+    print("=" * 50)
+    test_small_task_runs_synchronously()
+    test_large_task_spread_across_frames()
+    test_newer_task_supersedes_older()
+    test_chunked_sort_matches_sort()
+    print("=" * 50)
+    print("分帧调度器测试完成！")
+
+
+if __name__ == "__main__":
+    main()
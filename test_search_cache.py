@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索结果缓存测试脚本
+验证重复搜索直接命中缓存，修改卡片只作废可能受影响的结果，
+容量超出时淘汰最久未用的结果，以及查询键的规范化
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+
+def make_cards(count):
+    """count张卡片"""
+    cards = [{'id': f"card{i}", 'keyword': f"学而{i}" if i % 2 else f"君子{i}", 'definition': "释义",
+              'source': "《论语》", 'quote': "", 'notes': "", 'tags': []} for i in range(count)]
+    return cards
+
+
+def ids(cards):
+    """卡片ID列表"""
+    return [card['id'] for card in cards]
+
+
+def test_repeat_search_hits(make_manager):
+    """测试重复搜索命中缓存，查询键不区分大小写和多余空白"""
+    card_manager = make_manager(make_cards(50), soft_delete=True)
+    cache = card_manager.search_cache
+    first = card_manager.search_cards("君子")
+    assert card_manager.search_cards("君子") is first and cache.hits == 1
+
+    query = card_manager.query().match("ABC", fields=["keyword", "notes"]).cached()
+    same = card_manager.query().match("abc", fields=["notes", "keyword"])
+    assert query.cache_key == same.cache_key
+    assert (card_manager.query().search("tag:诗   source:论语").cache_key ==
+            card_manager.query().search(" tag:诗 source:论语").cache_key)
+    assert card_manager.query().where(lambda card: True).cache_key is None
+
+    # 分块执行的结果同样写入缓存
+    chunked = card_manager.query().match("学而").cached()
+    found = [card for cards, _, _ in chunked.chunks(10) for card in cards]
+    assert ids(chunked.run()) == ids(found) and cache.hits == 2
+    print("✓ 重复搜索命中缓存")
+
+
+def test_selective_invalidation(make_manager):
+    """测试修改卡片只作废可能包含它的结果"""
+    card_manager = make_manager(make_cards(50), soft_delete=True)
+    cache = card_manager.search_cache
+    junzi = card_manager.search_cards("君子")
+    xueer = card_manager.search_cards("学而")
+
+    # 修改一张"学而"卡片：君子的结果不受影响，学而的结果被作废
+    card_manager.update_card("card1", {'notes': "新注释"})
+    assert card_manager.search_cards("君子") is junzi
+    refreshed = card_manager.search_cards("学而")
+    assert refreshed is not xueer and ids(refreshed) == ids(xueer)
+
+    # 修改后开始匹配的卡片会作废结果
+    card_manager.update_card("card3", {'notes': "君子务本"})
+    assert "card3" in ids(card_manager.search_cards("君子"))
+
+    # 删除和恢复不在结果中的卡片不影响结果
+    junzi = card_manager.search_cards("君子")
+    card_manager.delete_cards(["card5"])
+    assert card_manager.search_cards("君子") is junzi
+    card_manager.restore_from_trash(["card5"])
+    assert card_manager.search_cards("君子") is junzi
+
+    # 删除结果中的卡片
+    card_manager.delete_cards(["card0"])
+    assert "card0" not in ids(card_manager.search_cards("君子"))
+
+    # 没有变更通知的版本变化使所有结果失效
+    junzi = card_manager.search_cards("君子")
+    card_manager.purge_trash()
+    assert card_manager.search_cards("君子") is not junzi
+
+    # 整体替换清空缓存
+    card_manager.clear_cards()
+    assert len(cache) == 0 and not card_manager.search_cards("君子")
+    print("✓ 只作废受影响的结果")
+
+
+def test_lru_eviction(make_manager):
+    """测试容量超出时淘汰最久未用的结果"""
+    card_manager = make_manager(make_cards(20), soft_delete=True)
+    cache = card_manager.search_cache
+    cache.capacity = 3
+    first = card_manager.search_cards("学而1")
+    card_manager.search_cards("学而3")
+    card_manager.search_cards("学而5")
+    assert card_manager.search_cards("学而1") is first
+    card_manager.search_cards("学而7")
+    assert len(cache) == 3
+    assert card_manager.search_cards("学而1") is first
+    hits = cache.hits
+    card_manager.search_cards("学而3")
+    assert cache.hits == hits
+    print("✓ 按最近最少使用淘汰")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试搜索结果缓存...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_repeat_search_hits(make_manager)
+        test_selective_invalidation(make_manager)
+        test_lru_eviction(make_manager)
+    print("=" * 50)
+    print("搜索结果缓存测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入时出处识别测试脚本
+验证Aho-Corasick自动机与逐词查找的结果一致、加词后重新编译，
+用户词表可以补充常见典籍和作者，以及繁简转换器只创建一次
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aho_corasick import AhoCorasick
+
+CHARS = "论语孟子大学中庸史记汉书庄老司马迁"
+
+
+def naive_find(words, text):
+    """逐词逐位置查找，作为对照"""
+    return sorted((start, word) for word in set(words) if word
+                  for start in range(len(text) - len(word) + 1) if text.startswith(word, start))
+
+
+def test_automaton_matches_naive():
+    """测试自动机找到的词与逐词查找一致（含互为前后缀、重叠的词）"""
+    automaton = AhoCorasick(["he", "she", "his", "hers", "她", ""])
+    assert sorted(automaton.finditer("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+    assert automaton.search("this") and not automaton.search("tea")
+    assert len(automaton) == 5 and "she" in automaton
+
+    rng = random.Random(5)
+    for _ in range(200):
+        words = ["".join(rng.choice(CHARS) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 20))]
+        text = "".join(rng.choice(CHARS) for _ in range(rng.randint(0, 30)))
+        automaton = AhoCorasick(words)
+        assert sorted(automaton.finditer(text)) == naive_find(words, text), (words, text)
+        assert automaton.search(text) == bool(naive_find(words, text))
+
+    # 加词后下一次查找时重新编译
+    automaton = AhoCorasick(["论语"])
+    assert not automaton.search("荀子·劝学")
+    automaton.add_words(["荀子"])
+    assert automaton.search("荀子·劝学")
+    print("✓ 自动机匹配正确")
+
+
+def test_source_detection_with_user_dictionaries(tmp_path):
+    """测试出处识别使用常见词表，用户词表可以补充"""
+    from ui.import_export import AUTHORS_FILE, BOOKS_FILE, CardManager
+
+    directory = str(tmp_path)
+    manager = CardManager(dictionary_dir=directory)
+    card = manager._match_fields_by_semantics(["学：学习", "论语学而", "学而时习之"])
+    assert card["source"] == "论语学而" and card["original_text"] == "学而时习之"
+    card = manager._match_fields_by_semantics(["学：学习", "荀子劝学", "君子曰学不可以已"])
+    assert card["source"] == ""
+
+    with open(os.path.join(directory, BOOKS_FILE), 'w', encoding='utf-8') as f:
+        f.write("# 补充典籍\n荀子\n\n论语\n")
+    with open(os.path.join(directory, AUTHORS_FILE), 'w', encoding='utf-8') as f:
+        f.write("韩愈\n")
+    manager = CardManager(dictionary_dir=directory)
+    assert manager.common_books.count("荀子") == 1 and manager.common_books.count("论语") == 1
+    card = manager._match_fields_by_semantics(["学：学习", "荀子劝学", "君子曰学不可以已"])
+    assert card["source"] == "荀子劝学"
+    card = manager._match_fields_by_semantics(["师：老师", "韩愈师说", "古之学者必有师"])
+    assert card["source"] == "韩愈师说"
+
+    stats = manager.import_cards_from_text("学：学习，荀子劝学，君子曰学不可以已")
+    assert stats["added"] == 1 and manager.cards[0]["source"] == "荀子劝学"
+    # 繁简写法不同也算重复，同一次导入中的重复行同样合并
+    stats = manager.import_cards_from_text("學：學習，荀子勸學，君子曰學不可以已\n师：老师，韩愈师说，古之学者必有师\n"
+                                           "師：老師，韩愈師說，古之學者必有師")
+    assert stats["added"] == 1 and stats["merged"] == 2
+    print("✓ 出处识别使用用户词表")
+
+
+def test_converter_cached():
+    """测试繁简转换器只尝试创建一次"""
+    import opencc_support
+    first = opencc_support.get_converter()
+    assert opencc_support.get_converter() is first
+    if first is None:
+        assert opencc_support.to_simplified("學而") == "學而"
+    else:
+        assert opencc_support.to_simplified("學而") == "学而"
+    print("✓ 繁简转换器被缓存")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试导入时出处识别...")
+    print("=" * 50)
+    test_automaton_matches_naive()
+    with tempfile.TemporaryDirectory() as directory:
+        test_source_detection_with_user_dictionaries(directory)
+    test_converter_cached()
+    print("=" * 50)
+    print("导入时出处识别测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动优化测试脚本
+验证导入主程序时不会导入更新管理器、网络库和拼音库，以及启动耗时统计的报告内容
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_heavy_modules_not_imported():
+    """测试导入主程序后，更新管理器、requests和pypinyin都还没有被导入"""
+    code = (
+        "import sys\n"
+        "import main\n"
+        "from card_manager import CardManager\n"
+        "print(','.join(name for name in ('update_manager', 'requests', 'pypinyin', 'ui.import_export')"
+        " if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1:] in ([], [""]), result.stdout
+    print("✓ 启动时不导入按需使用的模块")
+
+
+def test_pinyin_loader_cached():
+    """测试拼音库只尝试导入一次"""
+    import pinyin_support
+    first = pinyin_support.get_lazy_pinyin()
+    assert pinyin_support.get_lazy_pinyin() is first
+    assert pinyin_support.pinyin_available() == (first is not None)
+    print("✓ 拼音库导入结果被缓存")
+
+
+def test_profiler_report():
+    """测试启动耗时统计的阶段记录和报告"""
+    from main import StartupProfiler
+    profiler = StartupProfiler()
+    profiler.mark("导入模块")
+    profiler.begin_background("加载卡片")
+    time.sleep(0.002)
+    profiler.mark("Tk初始化")
+    assert profiler.is_running() and profiler.is_running("加载卡片")
+    profiler.end_background("加载卡片")
+    profiler.end_background("加载卡片")
+    assert not profiler.is_running()
+
+    report = profiler.report()
+    assert [phase for phase, _ in profiler.phases] == ["导入模块", "Tk初始化"]
+    assert len(profiler.background) == 1
+    for text in ("导入模块", "Tk初始化", "合计", "加载卡片（后台）", "ms"):
+        assert text in report
+    print("✓ 启动耗时报告正确")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试启动优化...")
+    print("=" * 50)
+    test_heavy_modules_not_imported()
+    test_pinyin_loader_cached()
+    test_profiler_report()
+    print("=" * 50)
+    print("启动优化测试完成！")
+
+
+if __name__ == "__main__":
+    main()
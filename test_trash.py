@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回收站测试脚本
+验证软删除的卡片从列表、索引和搜索中隐藏，可从回收站恢复，重新加载后仍在回收站，
+撤销删除时回到原位置，过期的卡片由整理清除
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_events import CARD_ADDED, CARD_DELETED
+from card_manager import CardManager
+from card_snapshot import snapshot_path
+
+
+def make_cards(count):
+    """count张卡片"""
+    cards = [{'id': f"card{i}", 'keyword': f"关键词{i}", 'definition': "释义", 'source': "",
+              'quote': "", 'notes': "", 'tags': []} for i in range(count)]
+    return cards
+
+
+def test_soft_delete_hidden_and_restore(make_manager):
+    """测试删除后卡片进入回收站、从视图和索引中隐藏，恢复后重新可见"""
+    card_manager = make_manager(make_cards(10), soft_delete=True)
+    events = []
+    card_manager.subscribe(lambda event: events.append((event.type, event.card_ids)))
+
+    assert card_manager.delete_cards(["card2", "card5"]) == 2
+    assert [card['id'] for card in card_manager.get_trash_cards()] == ["card5", "card2"]
+    assert card_manager.get_card("card2") is None
+    assert not card_manager.search_cards("关键词5")
+    assert len(card_manager.get_all_cards()) == 8
+    assert 'deleted_at' in card_manager.trash["card2"]
+
+    assert card_manager.restore_from_trash(["card2", "不存在的卡片"]) == 1
+    assert card_manager.cards[-1]['id'] == "card2" and 'deleted_at' not in card_manager.cards[-1]
+    assert card_manager.get_card("card2") is card_manager.cards[-1]
+    assert list(card_manager.trash) == ["card5"]
+    assert events == [(CARD_DELETED, ("card2", "card5")), (CARD_ADDED, ("card2",))]
+
+    # 恢复也可以撤销（放回回收站）和重做
+    assert card_manager.undo_last_action()
+    assert set(card_manager.trash) == {"card2", "card5"} and card_manager.get_card("card2") is None
+    assert card_manager.redo_last_action() and card_manager.get_card("card2") is not None
+    print("✓ 软删除的卡片被隐藏并可恢复")
+
+
+def test_undo_delete_restores_position(make_manager):
+    """测试撤销软删除时卡片离开回收站并回到原位置"""
+    card_manager = make_manager(make_cards(10), soft_delete=True)
+    original = [card['id'] for card in card_manager.cards]
+    card_manager.delete_cards(["card0", "card7"])
+    assert card_manager.undo_last_action()
+    assert [card['id'] for card in card_manager.cards] == original and not card_manager.trash
+    assert all('deleted_at' not in card for card in card_manager.cards)
+    print("✓ 撤销删除后回到原位置")
+
+
+def test_trash_persisted(make_manager):
+    """测试回收站随数据文件保存，重新加载（完整解析或快照）后仍在回收站"""
+    card_manager = make_manager(make_cards(10), soft_delete=True)
+    card_manager.delete_cards(["card3"])
+    assert card_manager.save_snapshot()
+
+    for reload in range(2):
+        # 第一次从快照恢复，第二次删除快照后完整解析
+        if reload:
+            os.remove(snapshot_path(card_manager.data_file))
+        loaded = CardManager(card_manager.data_file, soft_delete=True)
+        assert list(loaded.trash) == ["card3"]
+        assert [card['id'] for card in loaded.cards] == [card['id'] for card in card_manager.cards]
+        assert loaded.get_card("card3") is None
+        assert loaded._generate_unique_id() != "card3"
+    print("✓ 回收站重新加载后保留")
+
+
+def test_compaction_purges_expired(make_manager):
+    """测试整理只清除超过保留天数的卡片并重写数据文件"""
+    card_manager = make_manager(make_cards(10), soft_delete=True)
+    card_manager.delete_cards(["card1", "card2"])
+    old = (datetime.now() - timedelta(days=CardManager.TRASH_RETENTION_DAYS + 1)).isoformat()
+    card_manager.trash["card1"]['deleted_at'] = old
+
+    assert card_manager.expired_trash_ids() == ["card1"]
+    assert card_manager.compact_trash() == 1
+    assert list(card_manager.trash) == ["card2"]
+    with open(card_manager.data_file, 'r', encoding='utf-8') as f:
+        saved = {card['id'] for card in json.load(f)}
+    assert "card1" not in saved and "card2" in saved
+
+    assert card_manager.purge_trash() == 1 and not card_manager.trash
+    print("✓ 整理清除过期卡片")
+
+
+def test_undo_after_purge(make_manager):
+    """测试彻底删除后再撤销删除：已清除的卡片不会回来，仍在回收站的照常恢复"""
+    card_manager = make_manager(make_cards(10), soft_delete=True)
+    card_manager.delete_cards(["card1", "card4"])
+    assert card_manager.purge_trash(["card1"]) == 1
+    assert card_manager.undo_last_action()
+    assert card_manager.get_card("card1") is None and not card_manager.trash
+    assert [card['id'] for card in card_manager.cards] == [f"card{i}" for i in range(10) if i != 1]
+    assert all('deleted_at' not in card for card in card_manager.cards)
+
+    # 重做只把实际移除的卡片放回回收站
+    assert card_manager.redo_last_action()
+    assert list(card_manager.trash) == ["card4"]
+    assert card_manager.undo_last_action()
+
+    loaded = CardManager(card_manager.data_file, soft_delete=True)
+    assert loaded.get_card("card1") is None and not loaded.trash
+    assert [card['id'] for card in loaded.cards] == [card['id'] for card in card_manager.cards]
+    print("✓ 彻底删除后撤销不会恢复已清除的卡片")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试回收站...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_soft_delete_hidden_and_restore(make_manager)
+        test_undo_delete_restores_position(make_manager)
+        test_trash_persisted(make_manager)
+        test_compaction_purges_expired(make_manager)
+        test_undo_after_purge(make_manager)
+    print("=" * 50)
+    print("回收站测试完成！")
+
+
+if __name__ == "__main__":
+    main()
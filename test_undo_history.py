@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+撤销/重做测试脚本
+验证编辑、合并、收藏、导入、清空和批量操作都能撤销和重做，
+大批量导入只记录一个操作并能一次撤销，新操作会清空重做记录
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from card_history import InsertCards
+
+
+def make_cards(count):
+    """count张卡片"""
+    cards = [{'id': f"card{i}", 'keyword': f"关键词{i}", 'definition': f"释义{i}", 'source': "",
+              'quote': "", 'notes': "", 'tags': [], 'created_at': "2026-01-01T00:00:00",
+              'updated_at': "2026-01-01T00:00:00"} for i in range(count)]
+    return cards
+
+
+def state(card_manager):
+    """卡片列表的完整内容（用于比较）"""
+    return [dict(card) for card in card_manager.cards]
+
+
+def test_edit_favorite_merge(make_manager):
+    """测试编辑、收藏和合并的撤销与重做"""
+    card_manager = make_manager(make_cards(5))
+    original = state(card_manager)
+
+    card_manager.update_card("card1", {'notes': "新的注释", 'tags': ["实词"]})
+    edited = state(card_manager)
+    card_manager.toggle_favorite("card2")
+    favorited = state(card_manager)
+    card_manager.add_card({'keyword': "关键词3", 'definition': "释义3", 'notes': "合并进来", 'tags': ["虚词"]})
+    merged = state(card_manager)
+    assert len(merged) == 5 and merged[3]['notes'] == "合并进来"
+
+    assert card_manager.undo_last_action() and state(card_manager) == favorited
+    assert card_manager.undo_last_action() and state(card_manager) == edited
+    assert 'is_favorite' not in card_manager.get_card("card2")
+    assert card_manager.undo_last_action() and state(card_manager) == original
+    assert not card_manager.undo_last_action()
+
+    assert card_manager.redo_last_action() and state(card_manager) == edited
+    assert card_manager.redo_last_action() and card_manager.redo_last_action()
+    assert state(card_manager) == merged and not card_manager.can_redo()
+
+    # 整卡更新只记录变化的字段
+    card = dict(card_manager.get_card("card4"))
+    card['quote'] = "新的原文"
+    card_manager.update_card(card)
+    changes = card_manager.history._undo[-1].changes
+    assert changes == {"card4": {'quote': ("", "新的原文")}}
+
+    # 新的修改会清空重做记录
+    card_manager.undo_last_action()
+    assert card_manager.can_redo()
+    card_manager.toggle_favorite("card0")
+    assert not card_manager.can_redo()
+    print("✓ 编辑、收藏和合并可撤销和重做")
+
+
+def test_batch_and_clear(make_manager):
+    """测试批量操作一次撤销、清空可撤销"""
+    card_manager = make_manager(make_cards(10))
+    original = state(card_manager)
+
+    with card_manager.batch():
+        card_manager.toggle_favorite("card1")
+        card_manager.update_card("card2", {'definition': "改过的释义"})
+        card_manager.delete_cards(["card3", "card5"])
+        card_manager.add_card({'keyword': "新词", 'definition': "新释义"})
+    changed = state(card_manager)
+    assert len(card_manager.history) == 1
+
+    card_manager.clear_cards()
+    assert card_manager.cards == []
+    assert card_manager.undo_last_action() and state(card_manager) == changed
+    assert card_manager.undo_last_action() and state(card_manager) == original
+    assert card_manager.get_card("card3") is card_manager.cards[3]
+
+    assert card_manager.redo_last_action() and state(card_manager) == changed
+    assert card_manager.redo_last_action() and card_manager.cards == []
+    print("✓ 批量操作和清空可撤销")
+
+
+def test_large_import_single_undo(make_manager):
+    """测试一万张卡片的导入记录为一个操作，撤销只需一次"""
+    card_manager = make_manager(make_cards(100))
+    original = state(card_manager)
+    card_manager.add_cards([{'keyword': f"导入{i}", 'definition': "导入的释义"} for i in range(10000)])
+    assert len(card_manager.cards) == 10100 and len(card_manager.history) == 1
+    command = card_manager.history._undo[-1]
+    assert isinstance(command, InsertCards) and len(command.positions) == 10000
+
+    saves = []
+    save_cards = card_manager.save_cards
+    card_manager.save_cards = lambda: saves.append(1) or save_cards()
+    start = time.perf_counter()
+    assert card_manager.undo_last_action()
+    elapsed = time.perf_counter() - start
+    assert state(card_manager) == original and len(saves) == 1
+    assert card_manager.get_card(command.positions[0][1]['id']) is None
+    print(f"✓ 导入一万张卡片一次撤销（{elapsed * 1000:.0f}毫秒）")
+
+    assert card_manager.redo_last_action() and len(card_manager.cards) == 10100
+    assert card_manager.get_card(command.positions[-1][1]['id']) is card_manager.cards[-1]
+
+    # 批量逐张新增同样合并为一个新增操作
+    with card_manager.batch():
+        for i in range(50):
+            card_manager.add_card({'keyword': f"逐张{i}", 'definition': "逐张新增"}, allow_duplicates=True)
+    command = card_manager.history._undo[-1]
+    assert isinstance(command, InsertCards) and len(command.positions) == 50
+    print("✓ 连续新增合并为一个操作")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试撤销/重做...")
+    print("=" * 50)
+    from conftest import temporary_manager_factory
+    with temporary_manager_factory() as make_manager:
+        test_edit_favorite_merge(make_manager)
+        test_batch_and_clear(make_manager)
+        test_large_import_single_undo(make_manager)
+    print("=" * 50)
+    print("撤销/重做测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+虚拟化列表测试脚本
+验证大量卡片时只实例化可视区域的行，且多选、Shift范围选择按逻辑行工作
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ui.virtual_list import VirtualCardGrid, VirtualTreeview
+
+
+class MockTreeview:
+    """模拟Treeview的关键方法（每行高30像素，含30像素表头）"""
+    def __init__(self, height=330):
+        self._items = []
+        self._values = {}
+        self._selection = []
+        self._focus = None
+        self._height = height
+        self._view_first = 0
+        # 记录Treeview操作次数，用于验证差分更新
+        self.operations = {'insert': 0, 'delete': 0, 'item': 0, 'set_children': 0}
+
+    def configure(self, **kwargs):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def winfo_height(self):
+        return self._height
+
+    def cget(self, option):
+        return 10
+
+    def get_children(self):
+        return tuple(self._items)
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        assert iid not in self._values, "iid重复"
+        self.operations['insert'] += 1
+        self._items.append(iid)
+        self._values[iid] = values
+        return iid
+
+    def delete(self, *items):
+        self.operations['delete'] += len(items)
+        for item in items:
+            self._items.remove(item)
+            self._values.pop(item, None)
+
+    def item(self, item, values=None):
+        if values is not None:
+            self.operations['item'] += 1
+            self._values[item] = values
+
+    def set_children(self, parent, *items):
+        self.operations['set_children'] += 1
+        self._items = list(items)
+
+    def yview_moveto(self, fraction):
+        self._view_first = int(round(fraction * len(self._items)))
+
+    def identify_row(self, y):
+        """根据纵坐标返回当前视图中的行"""
+        row = (y - 30) // 30
+        index = self._view_first + row
+        if row < 0 or index >= len(self._items):
+            return ""
+        return self._items[index]
+
+    def selection_set(self, items):
+        self._selection = list(items)
+
+    def focus(self, item=None):
+        if item is not None:
+            self._focus = item
+        return self._focus
+
+
+class MockScrollbar:
+    """模拟滚动条"""
+    def __init__(self):
+        self.position = (0.0, 1.0)
+
+    def config(self, **kwargs):
+        pass
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+class MockWidget:
+    """模拟卡片组件"""
+    def __init__(self):
+        self.card = None
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def winfo_children(self):
+        return []
+
+
+class MockCanvas:
+    """模拟Canvas的滚动和窗口项（宽600、高400像素）"""
+    def __init__(self, width=600, height=400):
+        self._width = width
+        self._height = height
+        self._y = 0
+        self.scrollregion = (0, 0, 0, 0)
+        self.windows = {}
+        self.after_jobs = {}
+
+    def configure(self, **kwargs):
+        if 'scrollregion' in kwargs:
+            self.scrollregion = kwargs['scrollregion']
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def winfo_width(self):
+        return self._width
+
+    def winfo_height(self):
+        return self._height
+
+    def canvasy(self, y):
+        return self._y + y
+
+    def yview(self, *args):
+        total = self.scrollregion[3]
+        if args[0] == 'moveto':
+            self._y = float(args[1]) * total
+        elif args[0] == 'scroll':
+            self._y += int(args[1]) * 50
+        self._y = max(0, min(self._y, max(0, total - self._height)))
+
+    def create_window(self, x, y, window=None, **kwargs):
+        item = len(self.windows) + 1
+        self.windows[item] = {'coords': (x, y), 'state': 'normal', 'widget': window}
+        return item
+
+    def coords(self, item, x, y):
+        self.windows[item]['coords'] = (x, y)
+
+    def itemconfigure(self, item, state=None):
+        self.windows[item]['state'] = state
+
+    def after(self, delay, callback):
+        job = f"after#{len(self.after_jobs)}"
+        self.after_jobs[job] = callback
+        return job
+
+    def after_cancel(self, job):
+        self.after_jobs.pop(job, None)
+
+    def run_pending(self):
+        jobs, self.after_jobs = self.after_jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+def make_grid(count):
+    """创建带有count张卡片的虚拟化网格"""
+    canvas = MockCanvas()
+    created = []
+
+    def create_widget(parent):
+        widget = MockWidget()
+        created.append(widget)
+        return widget
+
+    def bind_widget(widget, card):
+        widget.card = card
+
+    grid = VirtualCardGrid(canvas, MockScrollbar(), create_widget, bind_widget)
+    cards = [{'id': f"card{i}", 'keyword': f"关键词{i}"} for i in range(count)]
+    grid.set_items(cards)
+    return canvas, grid, created
+
+
+def visible_cards(canvas):
+    """当前显示中的卡片ID（按位置排序）"""
+    shown = [window for window in canvas.windows.values() if window['state'] == 'normal']
+    shown.sort(key=lambda window: (window['coords'][1], window['coords'][0]))
+    return [window['widget'].card['id'] for window in shown]
+
+
+def make_list(count):
+    """创建带有count行逻辑数据的虚拟化列表"""
+    tree = MockTreeview()
+    scrollbar = MockScrollbar()
+    virtual_list = VirtualTreeview(tree, scrollbar, buffer_rows=5)
+    cards = [{'id': f"card{i}", 'keyword': f"关键词{i}"} for i in range(count)]
+    virtual_list.set_items(cards, lambda card: card['id'], lambda card: (card['keyword'],))
+    return tree, scrollbar, virtual_list
+
+
+def test_only_visible_rows_materialized():
+    """测试10万行时只实例化可视区域加缓冲区"""
+    tree, scrollbar, virtual_list = make_list(100000)
+
+    # 330像素高，扣除表头后可显示10行，下方缓冲5行
+    assert len(tree.get_children()) == 15
+    assert len(virtual_list) == 100000
+
+    # 滚动到中间，上下各有缓冲区
+    virtual_list.yview('moveto', 0.5)
+    assert virtual_list.top == 50000
+    assert len(tree.get_children()) == 20
+    assert virtual_list.id_at_y(45) == "card50000"
+    assert abs(scrollbar.position[0] - 0.5) < 1e-9
+    print("✓ 只实例化了可视区域的行")
+
+
+def test_scroll_within_buffer():
+    """测试在缓冲区内滚动不会重新实例化"""
+    tree, scrollbar, virtual_list = make_list(1000)
+    virtual_list.scroll_to(100)
+    children = tree.get_children()
+
+    virtual_list.yview('scroll', 3, 'units')
+    assert virtual_list.top == 103
+    assert tree.get_children() == children
+    assert virtual_list.id_at_y(45) == "card103"
+
+    # 翻页超出缓冲区时重新实例化
+    virtual_list.yview('scroll', 1, 'pages')
+    assert virtual_list.top == 113
+    assert virtual_list.id_at_y(45) == "card113"
+    print("✓ 缓冲区内滚动复用已有行")
+
+
+def test_shift_range_across_unmaterialized_rows():
+    """测试Shift范围选择可以跨越未实例化的逻辑行"""
+    tree, scrollbar, virtual_list = make_list(10000)
+    virtual_list.select_only(2)
+    virtual_list.scroll_to(5000)
+    virtual_list.extend_to(virtual_list.index_at_y(45))
+
+    selected = virtual_list.selected_ids()
+    assert len(selected) == 4999
+    assert selected[0] == "card2" and selected[-1] == "card5000"
+    # 只有实例化的选中行同步到Treeview
+    assert 0 < len(tree._selection) <= len(tree.get_children())
+    print("✓ Shift范围选择按逻辑行工作")
+
+
+def test_ctrl_toggle_and_select_all():
+    """测试Ctrl切换和全选"""
+    tree, scrollbar, virtual_list = make_list(500)
+    virtual_list.toggle(3)
+    virtual_list.toggle(7)
+    virtual_list.toggle(3)
+    assert virtual_list.selected_ids() == ["card7"]
+
+    virtual_list.select_all()
+    assert len(virtual_list.selected_ids()) == 500
+
+    # 数据变化后只保留仍然存在的选中项
+    virtual_list.set_items(virtual_list.items[:10], lambda card: card['id'], lambda card: (card['keyword'],))
+    assert len(virtual_list.selected_ids()) == 10
+    print("✓ Ctrl切换和全选正常")
+
+
+def test_rows_keyed_by_card_id():
+    """测试Treeview行以卡片ID为iid，单行更新只改动一行"""
+    tree, scrollbar, virtual_list = make_list(50000)
+    virtual_list.scroll_to(20000)
+    virtual_list.select_only(20003)
+    assert virtual_list.id_at_y(45) == "card20000"
+    assert "card20003" in tree.get_children()
+
+    for key in tree.operations:
+        tree.operations[key] = 0
+    card = dict(virtual_list.items[20003], keyword="新关键词")
+    virtual_list.update_item(20003, card)
+    assert tree.operations == {'insert': 0, 'delete': 0, 'item': 1, 'set_children': 0}
+    assert tree._values["card20003"] == ("新关键词",)
+    assert virtual_list.top == 20000
+    assert virtual_list.selected_ids() == ["card20003"]
+    print("✓ 单行编辑只更新一行")
+
+
+def test_remove_and_insert_keep_scroll_position():
+    """测试删除和插入行时滚动位置与选中状态保持不变"""
+    tree, scrollbar, virtual_list = make_list(1000)
+    virtual_list.scroll_to(500)
+    virtual_list.select_only(505)
+
+    # 删除可视区域上方的行，原来的第一可视行仍在顶部
+    virtual_list.remove_ids(["card10", "card11", "card502"])
+    assert virtual_list.id_at(virtual_list.top) == "card500"
+    assert virtual_list.selected_ids() == ["card505"]
+    assert "card502" not in tree.get_children()
+    assert len(virtual_list) == 997
+
+    # 在上方插入一行
+    virtual_list.insert_item(0, {'id': "new", 'keyword': "新"})
+    assert virtual_list.id_at(virtual_list.top) == "card500"
+    assert virtual_list.id_at_y(45) == "card500"
+
+    # 移动一行到可视区域内
+    index = virtual_list.index_of("card3")
+    virtual_list.move_item(index, virtual_list.index_of("card503") - 1, virtual_list.items[index])
+    assert virtual_list.index_of("card3") + 1 == virtual_list.index_of("card503")
+    assert "card3" in tree.get_children()
+    assert tree.get_children()[list(tree.get_children()).index("card3") + 1] == "card503"
+    print("✓ 增量插入、删除、移动保持滚动位置")
+
+
+def test_grid_builds_only_visible_rows():
+    """测试卡片网格只为可视行创建组件，滚动时复用"""
+    canvas, grid, created = make_grid(5000)
+    # 宽600 → 2列；高400 → 可视2行加下方缓冲1行，每行2张卡片
+    assert grid.columns == 2
+    assert len(created) == 6
+    assert visible_cards(canvas)[0] == "card0"
+
+    grid.yview('moveto', 0.5)
+    assert len(created) <= 10
+    shown = visible_cards(canvas)
+    assert "card2500" in shown and "card0" not in shown
+    # 位置和卡片序号对应
+    for window in canvas.windows.values():
+        if window['state'] == 'normal':
+            index = int(window['widget'].card['id'][4:])
+            assert window['coords'] == ((index % 2) * 270 + 10, (index // 2) * 200 + 10)
+    assert canvas.scrollregion[3] == 2500 * 200
+    print("✓ 卡片网格只实例化可视行并复用组件")
+
+
+def test_grid_resize_is_debounced_reflow():
+    """测试窗口大小变化经过防抖，只重排列数而不重建组件"""
+    canvas, grid, created = make_grid(100)
+    count = len(created)
+
+    canvas._width = 1200
+    for _ in range(5):
+        grid._on_configure()
+    assert len(canvas.after_jobs) == 1
+    assert grid.columns == 2
+
+    canvas.run_pending()
+    assert grid.columns == 4
+    assert visible_cards(canvas)[:4] == ["card0", "card1", "card2", "card3"]
+    # 只新增了多出来的可视格子，原有组件都被复用
+    assert len(created) == 12 and len(created) - count == 6
+    assert canvas.scrollregion[3] == 25 * 200
+    print("✓ 窗口大小变化防抖后只重排列数")
+
+
+def main():
+    """主测试函数"""
+    print("开始测试虚拟化列表...")
+    print("=" * 50)
+    test_only_visible_rows_materialized()
+    test_scroll_within_buffer()
+    test_shift_range_across_unmaterialized_rows()
+    test_ctrl_toggle_and_select_all()
+    test_rows_keyed_by_card_id()
+    test_remove_and_insert_keep_scroll_position()
+    test_grid_builds_only_visible_rows()
+    test_grid_resize_is_debounced_reflow()
+    print("=" * 50)
+    print("虚拟化列表测试完成！")
+
+
+if __name__ == "__main__":
+    main()
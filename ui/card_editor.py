@@ -9,6 +9,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any, Optional
 
+from card_events import CARD_DELETED, CARDS_REPLACED
+
 class CardEditor:
     """卡片编辑器类"""
     
@@ -37,6 +39,8 @@ class CardEditor:
         # 创建编辑器界面
         self.create_editor()
         
+        # 订阅卡片变更事件（正在编辑的卡片被删除时需要知道）
+        self.card_manager.subscribe(self.on_cards_changed)
 
     
     def create_editor(self):
@@ -448,6 +452,20 @@ class CardEditor:
                 # 直接设置为正常颜色，因为这是从数据库加载的实际内容
                 field_entry.config(foreground="#000000")
     
+    def on_cards_changed(self, event):
+        """
+        卡片变更事件处理：正在编辑的卡片被删除时，保留表单内容并转为添加模式，
+        避免保存时更新一张已不存在的卡片
+        
+        Args:
+            event: card_events.CardEvent
+        """
+        if not self.current_card_id or event.type not in (CARD_DELETED, CARDS_REPLACED):
+            return
+        if self.card_manager.get_card(self.current_card_id) is None:
+            self.current_card_id = None
+            self.title_var.set("添加新卡片")
+    
     def reset_form(self):
         """重置表单"""
         # 清除当前编辑的卡片ID
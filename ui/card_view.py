@@ -9,6 +9,12 @@ import tkinter as tk
 from tkinter import ttk, font
 from typing import Dict, Any, List
 
+from ui.virtual_list import VirtualCardGrid, iter_sync_tree_rows
+from ui.scheduler import chunked_sort
+from card_events import CARD_DELETED, CARD_FAVORITED, CARD_UPDATED
+from card_record import normalized_text
+from pinyin_support import get_lazy_pinyin
+
 class CardView:
     """卡片视图类"""
     
@@ -46,8 +52,63 @@ class CardView:
         # 记录最近的多选状态（用于右键时恢复）
         self.last_multi_selection = []
         
+        # 列表视图已插入行的显示内容缓存（iid为卡片ID）
+        self._tree_row_values = {}
+        
         # 创建视图
         self.create_view()
+        
+        # 订阅卡片变更事件，视图销毁时取消订阅
+        self.card_manager.subscribe(self.on_cards_changed)
+        self.view_frame.bind('<Destroy>', self._on_view_destroy, add='+')
+    
+    def _on_view_destroy(self, event):
+        """视图销毁时取消订阅卡片变更事件"""
+        if event.widget is self.view_frame:
+            self.card_manager.unsubscribe(self.on_cards_changed)
+    
+    def on_cards_changed(self, event):
+        """
+        卡片变更事件处理：删除和修改只替换受影响的卡片，新增或整体替换才重新排序
+        
+        Args:
+            event: card_events.CardEvent
+        """
+        if event.type == CARD_FAVORITED:
+            # 本视图不显示收藏状态
+            return
+        if self.main_window.scheduler.is_running('card_view_refresh'):
+            # 正在刷新的是旧数据，重新开始
+            self.refresh()
+            return
+        # 卡片模式和时间排序按创建时间排列，修改内容不影响顺序
+        sort_by_time = self.view_var.get() != "list" or getattr(self, 'is_time_sort', False)
+        
+        if event.type == CARD_DELETED:
+            removed = set(event.card_ids)
+            self.current_cards = [card for card in self.current_cards if card['id'] not in removed]
+            if self.selected_card_id in removed:
+                self.selected_card_id = None
+        elif event.type == CARD_UPDATED and sort_by_time:
+            # 修改后的卡片可能是新的字典对象，按ID替换
+            changed = set(event.card_ids)
+            self.current_cards = [
+                (self.card_manager.get_card(card['id']) or card) if card['id'] in changed else card
+                for card in self.current_cards
+            ]
+        else:
+            # 新增、整体替换或影响排序的修改需要重新排序
+            self.refresh()
+            return
+        
+        if self.view_var.get() == "list":
+            self.update_list_view()
+        else:
+            self.update_card_view()
+            if event.type == CARD_UPDATED:
+                # 部分字段更新会原地修改卡片字典，重新填充可视区域的组件
+                self.card_grid.refresh_visible()
+        self.status_var.set(f"共 {len(self.current_cards)} 张卡片")
     
     def create_view(self):
         """创建卡片视图界面"""
@@ -282,15 +343,14 @@ class CardView:
         )
         self.card_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # 绑定滚动条
-        scrollbar.config(command=self.card_canvas.yview)
-        
-        # 创建卡片容器
-        self.card_container = ttk.Frame(self.card_canvas)
-        self.card_canvas.create_window((0, 0), window=self.card_container, anchor=tk.NW)
-        
-        # 绑定事件
-        self.card_container.bind("<Configure>", self.on_card_container_configure)
+        # 虚拟化网格：只为可视行创建卡片组件，滚动时复用，
+        # 滚动条和窗口大小变化（防抖后只重排列数）由网格处理
+        self.card_grid = VirtualCardGrid(
+            self.card_canvas,
+            scrollbar,
+            create_widget=self.create_card_widget,
+            bind_widget=self.bind_card_widget
+        )
     
     def create_status_bar(self):
         """创建底部状态栏"""
@@ -308,59 +368,63 @@ class CardView:
     
     def refresh(self):
         """刷新卡片视图"""
-        # 获取卡片列表
-        cards = self.card_manager.get_all_cards()
+        # 卡片查询（排序键计算较慢，排序在下面分帧完成）
+        card_query = self.card_manager.query()
         
-        # 根据排序方式排序
+        # 根据排序方式确定排序键
+        reverse = False
         if self.view_var.get() == "list":
             if hasattr(self, 'is_time_sort') and self.is_time_sort:
                 # 使用时间排序
                 sort_text = self.sort_menu_var.get()
                 reverse = "新→旧" in sort_text  # 新→旧为降序
-                self.current_cards = sorted(cards, key=lambda x: x['created_at'], reverse=reverse)
+                sort_key = lambda x: x['created_at']
             elif hasattr(self, 'is_pinyin_sort') and self.is_pinyin_sort:
                 # 使用拼音排序
                 sort_text = self.sort_menu_var.get()
                 reverse = "Z→A" in sort_text  # Z→A为降序
-                # 导入拼音排序模块
-                try:
-                    import pypinyin
-                    self.current_cards = sorted(
-                        [card for card in cards if card.get('keyword')],
-                        key=lambda x: pypinyin.lazy_pinyin(x['keyword'])[0].lower(),
-                        reverse=reverse
-                    )
-                except ImportError:
-                    # 如果没有pypinyin模块，使用默认排序
-                    self.current_cards = sorted(
-                        [card for card in cards if card.get('keyword')],
-                        key=lambda x: x['keyword'],
-                        reverse=reverse
-                    )
+                card_query = card_query.where(lambda card: card.get('keyword'))
+                # 拼音排序模块在第一次使用时才导入
+                lazy_pinyin = get_lazy_pinyin()
+                if lazy_pinyin is not None:
+                    sort_key = lambda x: lazy_pinyin(normalized_text(x, 'keyword'))[0]
+                else:
+                    # 如果没有pypinyin模块，按规范化文本排序（繁简写法不同的排在一起）
+                    sort_key = lambda x: normalized_text(x, 'keyword')
             elif hasattr(self, 'sort_column') and self.sort_column:
                 # 使用Treeview的列排序
                 reverse = (self.sort_order == 'desc')
                 # 确保排序键存在且不为None
-                self.current_cards = sorted(
-                    [card for card in cards if self.sort_column in card and card[self.sort_column] is not None],
-                    key=lambda x: x[self.sort_column], 
-                    reverse=reverse
-                )
+                sort_column = self.sort_column
+                card_query = card_query.where(lambda card: card.get(sort_column) is not None)
+                sort_key = lambda x: x[sort_column]
             else:
                 # 默认按关键词排序
-                self.current_cards = self.card_manager.sort_cards()
+                sort_key = self.card_manager.keyword_sort_key
         else:
             # 卡片视图默认按创建时间降序排序
-            self.current_cards = sorted(cards, key=lambda x: x['created_at'], reverse=True)
+            reverse = True
+            sort_key = lambda x: x['created_at']
+        
+        # 卡片很多时分帧排序，新的刷新会取代未完成的刷新
+        cards = card_query.run()
+        self.main_window.scheduler.run('card_view_refresh', self._refresh_task(cards, sort_key, reverse),
+                                       label="正在刷新卡片")
+    
+    def _refresh_task(self, cards, sort_key, reverse):
+        """卡片视图刷新任务：分块计算排序键，完成后更新视图"""
+        self.current_cards = yield from chunked_sort(cards, sort_key, reverse)
         
-        # 更新视图
+        # 更新视图（列表视图的行也分块插入）
         if self.view_var.get() == "list":
-            self.update_list_view()
+            yield from self._list_view_task()
         else:
             self.update_card_view()
         
-        # 更新状态栏
+        # 更新状态栏（主窗口状态栏可能还显示着刷新进度）
         self.status_var.set(f"共 {len(self.current_cards)} 张卡片")
+        if hasattr(self.main_window, 'status_bar'):
+            self.main_window.status_bar.config(text="就绪")
     
     def switch_view(self):
         """切换视图模式"""
@@ -375,24 +439,18 @@ class CardView:
             # 确保列标题正确显示
             if hasattr(self, 'update_column_headings'):
                 self.update_column_headings()
-            # 移除窗口大小改变事件绑定
-            try:
-                self.parent.unbind('<Configure>', self.resize_callback)
-            except:
-                pass
         else:
             self.card_view_frame.pack(fill=tk.BOTH, expand=True)
             self.update_card_view()
-            # 绑定窗口大小改变事件
-            self.resize_callback = self.parent.bind('<Configure>', self.on_window_resize)
     
     def update_list_view(self):
         """更新列表视图"""
-        # 清空Treeview
-        for item in self.card_treeview.get_children():
-            self.card_treeview.delete(item)
-        
-        # 添加卡片数据到Treeview
+        for _ in self._list_view_task():
+            pass
+    
+    def _list_view_task(self):
+        """列表视图更新任务（生成器），分块插入行"""
+        rows = []
         for card in self.current_cards:
             # 确保所有字段都存在
             keyword = card.get('keyword', '') or ''
@@ -401,98 +459,80 @@ class CardView:
             quote = card.get('quote', '') or ''
             
             # 直接显示文本，不添加额外的符号
-            self.card_treeview.insert('', tk.END, 
-                                     values=(keyword, definition, source, quote),
-                                     tags=(card['id'],))
+            rows.append((card['id'], (keyword, definition, source, quote)))
+        
+        # 以卡片ID为iid差分更新，只改动变化的行，保留滚动位置和选中状态
+        yield from iter_sync_tree_rows(self.card_treeview, rows, self._tree_row_values)
         
         # 更新列标题显示
         if hasattr(self, 'update_column_headings'):
             self.update_column_headings()
     def update_card_view(self):
-        """更新卡片视图（支持自适应列数）"""
-        # 清空卡片容器
-        for widget in self.card_container.winfo_children():
-            widget.destroy()
-        
-        # 根据窗口宽度自动调整列数
-        window_width = self.card_display_frame.winfo_width()
-        card_width = 270  # 卡片宽度 + 边距
-        columns = max(2, min(4, window_width // card_width))
-        
-        for i, card in enumerate(self.current_cards):
-            row = i // columns
-            col = i % columns
-            
-            # 创建卡片
-            card_frame = self.create_card_widget(card, row, col)
-            card_frame.grid(row=row, column=col, padx=10, pady=10, sticky=tk.NSEW)
-        
-        # 更新画布滚动区域
-        self.card_canvas.update_idletasks()
-        self.card_canvas.config(scrollregion=self.card_canvas.bbox("all"))
-    
-    def on_window_resize(self, event=None):
-        """窗口大小改变时更新卡片视图"""
-        if self.view_var.get() == "card":
-            self.update_card_view()
+        """更新卡片视图（虚拟化网格，只填充可视区域内的卡片组件）"""
+        self.card_grid.set_items(self.current_cards)
     
-    def create_card_widget(self, card, row, col):
-        """创建单个卡片组件"""
-        # 创建卡片框架
+    def create_card_widget(self, parent):
+        """创建一个空白卡片组件（由网格放入组件池循环复用）"""
+        # 创建卡片框架（大小由网格格子固定）
         card_frame = ttk.Frame(
-            self.card_container,
+            parent,
             width=250,
             height=180,
             relief=tk.RAISED,
             padding=10
         )
+        card_frame.pack_propagate(False)
         
         # 设置卡片样式
         card_frame.configure(style="Card.TFrame")
         
         # 关键词
-        keyword_label = ttk.Label(
+        card_frame.keyword_label = ttk.Label(
             card_frame,
-            text=card['keyword'],
             font=("SimHei", 16, "bold"),
             foreground=self.colors['accent']
         )
-        keyword_label.pack(pady=(0, 10))
+        card_frame.keyword_label.pack(pady=(0, 10))
         
         # 释义
-        definition_label = ttk.Label(
+        card_frame.definition_label = ttk.Label(
             card_frame,
-            text=card['definition'],
             font=("SimHei", 12),
             wraplength=220
         )
-        definition_label.pack(pady=(0, 10))
+        card_frame.definition_label.pack(pady=(0, 10))
         
         # 出处
-        source_label = ttk.Label(
+        card_frame.source_label = ttk.Label(
             card_frame,
-            text=card['source'],
             font=("SimHei", 10, "italic"),
             foreground=self.colors['text']
         )
-        source_label.pack(anchor=tk.W)
+        card_frame.source_label.pack(anchor=tk.W)
         
         # 原文
-        quote_label = ttk.Label(
+        card_frame.quote_label = ttk.Label(
             card_frame,
-            text=card['quote'],
             font=("SimHei", 10),
             wraplength=220
         )
-        quote_label.pack(anchor=tk.W, pady=(5, 0))
+        card_frame.quote_label.pack(anchor=tk.W, pady=(5, 0))
         
-        # 绑定事件
-        card_frame.bind("<Button-1>", lambda event, c=card: self.on_card_click(c))
+        # 绑定事件（组件复用，点击时读取当前填入的卡片）
+        card_frame.bind("<Button-1>", lambda event, f=card_frame: self.on_card_click(f.card))
         card_frame.bind("<Enter>", lambda event: self.on_card_enter(event))
         card_frame.bind("<Leave>", lambda event: self.on_card_leave(event))
         
         return card_frame
     
+    def bind_card_widget(self, card_frame, card):
+        """把卡片数据填入复用的卡片组件"""
+        card_frame.card = card
+        card_frame.keyword_label.configure(text=card['keyword'])
+        card_frame.definition_label.configure(text=card['definition'])
+        card_frame.source_label.configure(text=card['source'])
+        card_frame.quote_label.configure(text=card['quote'])
+    
     def on_treeview_select(self, event):
         """Treeview选中事件处理（同时过滤主窗口和CardView的右键）"""
         # 关键：如果正在处理右键菜单，直接恢复之前的多选，不更新选中状态
@@ -619,10 +659,6 @@ class CardView:
         """鼠标离开卡片事件处理"""
         event.widget.configure(style="Card.TFrame")
     
-    def on_card_container_configure(self, event):
-        """卡片容器配置变化事件处理"""
-        self.card_canvas.configure(scrollregion=self.card_canvas.bbox("all"))
-    
     def highlight_selected_card(self):
         """高亮显示选中的卡片"""
         # 在Treeview中高亮
@@ -630,13 +666,10 @@ class CardView:
             # 清除所有选中
             self.card_treeview.selection_remove(self.card_treeview.selection())
             
-            # 查找并选中对应的项
-            for item in self.card_treeview.get_children():
-                tags = self.card_treeview.item(item, 'tags')
-                if tags and tags[0] == self.selected_card_id:
-                    self.card_treeview.selection_add(item)
-                    self.card_treeview.see(item)
-                    break
+            # 行的iid就是卡片ID，直接定位
+            if self.card_treeview.exists(self.selected_card_id):
+                self.card_treeview.selection_add(self.selected_card_id)
+                self.card_treeview.see(self.selected_card_id)
     
     def edit_selected_card(self):
         """编辑选中的卡片"""
@@ -761,8 +794,7 @@ class CardView:
                 if tags:
                     card_id = tags[0]
                     if self.card_manager.delete_card(card_id):
-                        # 刷新视图
-                        self.refresh()
+                        # 视图已由变更事件更新
                         # 清除选中状态
                         self.selected_card_id = None
                         # 更新状态栏（不显示弹窗）
@@ -771,17 +803,14 @@ class CardView:
                         tk.messagebox.showerror("错误", "删除卡片失败")
         else:
             if tk.messagebox.askyesno("确认删除", f"确定要删除选中的{len(selected_items)}张卡片吗？"):
-                # 批量删除卡片
-                deleted_count = 0
+                # 批量删除卡片（一次保存，可一次撤销）
+                card_ids = []
                 for item in selected_items:
                     tags = self.card_treeview.item(item, 'tags')
                     if tags:
-                        card_id = tags[0]
-                        if self.card_manager.delete_card(card_id):
-                            deleted_count += 1
+                        card_ids.append(tags[0])
+                deleted_count = self.card_manager.delete_cards(card_ids)
                 
-                # 刷新视图
-                self.refresh()
                 # 清除选中状态
                 self.selected_card_id = None
                 # 更新状态栏（不显示弹窗）
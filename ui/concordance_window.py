@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+语境索引窗口：输入一个汉字，按出处列出它在各卡片原文中的每处出现（前文、该字、后文），分页显示
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from card_concordance import is_han
+
+
+class ConcordanceWindow:
+    """语境索引窗口类"""
+
+    # 每页行数
+    PAGE_SIZE = 50
+
+    def __init__(self, root, card_manager, app=None, main_window=None):
+        """
+        初始化语境索引窗口
+
+        Args:
+            root: 主窗口
+            card_manager: 卡片管理器实例
+            app: 应用实例（用于设置窗口图标）
+            main_window: 主窗口实例（双击一行时打开卡片编辑）
+        """
+        self.card_manager = card_manager
+        self.main_window = main_window
+        self.concordance = None
+        self.page_number = 0
+        self.line_cards = {}  # 当前页的行 → 卡片ID
+        self.window = tk.Toplevel(root)
+        self.window.title("语境索引")
+        self.window.geometry("820x500")
+        self.window.transient(root)
+
+        # 设置窗口图标
+        if app is not None and hasattr(app, '_set_window_icon'):
+            app._set_window_icon(self.window)
+
+        self.create_widgets()
+        # 卡片变更后语境索引基于旧的快照，提示重新查看（不自动重算，避免编辑时反复统计）
+        self.card_manager.subscribe(self.on_cards_changed)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+    def create_widgets(self):
+        """创建界面组件"""
+        main_frame = ttk.Frame(self.window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # 输入
+        input_frame = ttk.Frame(main_frame)
+        input_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(input_frame, text="汉字:").pack(side=tk.LEFT)
+        self.char_var = tk.StringVar()
+        entry = ttk.Entry(input_frame, textvariable=self.char_var, width=6)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda event: self.show_char())
+        entry.focus_set()
+        ttk.Button(input_frame, text="查看", command=self.show_char,
+                   style="Accent.TButton").pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar()
+        ttk.Label(input_frame, textvariable=self.status_var).pack(side=tk.RIGHT, padx=5)
+
+        # 列表：前文右对齐、后文左对齐，该字居中对齐成一列
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("left", "match", "right", "source", "keyword")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="browse")
+        for column, title, width, anchor in (("left", "前文", 220, tk.E), ("match", "字", 40, tk.CENTER),
+                                             ("right", "后文", 220, tk.W), ("source", "出处", 180, tk.W),
+                                             ("keyword", "关键词", 100, tk.W)):
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=width, anchor=anchor)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", self.open_selected_card)
+
+        # 翻页
+        page_frame = ttk.Frame(main_frame)
+        page_frame.pack(fill=tk.X, pady=(10, 0))
+        self.prev_button = ttk.Button(page_frame, text="上一页", command=lambda: self.go_to_page(-1),
+                                      state=tk.DISABLED)
+        self.prev_button.pack(side=tk.LEFT, padx=5)
+        self.next_button = ttk.Button(page_frame, text="下一页", command=lambda: self.go_to_page(1),
+                                      state=tk.DISABLED)
+        self.next_button.pack(side=tk.LEFT, padx=5)
+        self.page_var = tk.StringVar()
+        ttk.Label(page_frame, textvariable=self.page_var).pack(side=tk.LEFT, padx=10)
+
+    def show_char(self, char=None):
+        """查看一个字的语境索引（从第一页开始）"""
+        if char is not None:
+            self.char_var.set(char)
+        char = self.char_var.get().strip()
+        if not is_han(char):
+            self.status_var.set("请输入一个汉字")
+            return
+        self.concordance = self.card_manager.concordance(char, page_size=self.PAGE_SIZE)
+        self.page_number = 0
+        self.render_page()
+
+    def go_to_page(self, step):
+        """向前或向后翻页"""
+        if self.concordance is None:
+            return
+        number = self.page_number + step
+        if 0 <= number < self.concordance.page_count:
+            self.page_number = number
+            self.render_page()
+
+    def render_page(self):
+        """只生成并显示当前一页"""
+        concordance = self.concordance
+        self.tree.delete(*self.tree.get_children())
+        self.line_cards = {}
+        for i, line in enumerate(concordance.page(self.page_number)):
+            card = line.card
+            iid = str(i)
+            self.tree.insert("", tk.END, iid=iid, values=(
+                line.left, line.match, line.right, card.get('source', ''), card.get('keyword', '')))
+            self.line_cards[iid] = card['id']
+        pages = concordance.page_count
+        self.status_var.set(f"“{concordance.char}”出现 {len(concordance)} 处，共 {len(concordance.cards)} 张卡片")
+        self.page_var.set(f"第 {self.page_number + 1} / {pages} 页" if pages else "")
+        self.prev_button.configure(state=tk.NORMAL if self.page_number > 0 else tk.DISABLED)
+        self.next_button.configure(state=tk.NORMAL if self.page_number + 1 < pages else tk.DISABLED)
+        self.tree.yview_moveto(0)
+
+    def open_selected_card(self, event=None):
+        """双击一行时编辑对应的卡片"""
+        selected = self.tree.selection()
+        if not selected or self.main_window is None:
+            return
+        card_id = self.line_cards.get(selected[0])
+        if card_id is not None and self.card_manager.get_card(card_id) is not None:
+            self.main_window.show_edit_card(card_id)
+
+    def on_cards_changed(self, event):
+        """卡片变更后提示刷新"""
+        if self.concordance is not None:
+            self.status_var.set("卡片已变更，点击“查看”刷新")
+
+    def close(self):
+        """关闭窗口"""
+        self.card_manager.unsubscribe(self.on_cards_changed)
+        self.window.destroy()
@@ -8,12 +8,38 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import re
-from typing import Optional
+from typing import Iterable, Optional
+
+from aho_corasick import AhoCorasick
+from card_manager import user_data_dir
+from card_normalize import normalize_text
+from opencc_support import to_simplified
+
+# 用户补充的典籍和作者词表（UTF-8，每行一个名称，#开头为注释），放在用户数据目录的dictionaries下
+BOOKS_FILE = "common_books.txt"
+AUTHORS_FILE = "common_authors.txt"
+
+
+def default_dictionary_dir() -> str:
+    """用户词表的默认目录"""
+    return os.path.join(user_data_dir(), "dictionaries")
+
+
+def read_names(file_path: str) -> list:
+    """读取词表文件中的名称，文件不存在时返回空列表"""
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
 
 # -------------------------- 核心：卡片管理器（支持多格式解析）--------------------------
 class CardManager:
     """卡片管理器：负责卡片存储、导入（多格式兼容）、导出"""
-    def __init__(self):
+    def __init__(self, dictionary_dir: Optional[str] = None):
+        """
+        Args:
+            dictionary_dir: 用户词表目录，None表示用户数据目录下的dictionaries
+        """
         self.cards = []  # 存储所有卡片
         
         # 预设常见典籍和作者（可按需扩展）
@@ -28,6 +54,21 @@ class CardManager:
             "方苞", "郑日奎", "刘义庆", "王世祯", "朱彝尊", "高启", "曹植",
             "王维", "纪昀", "罗洪先", "方濬颐", "胡承珙", "薛瑄"
         ]
+        # 典籍名和作者名编译为一个自动机，识别出处时每个字段只扫描一遍
+        self.source_names = AhoCorasick(self.common_books + self.common_authors)
+        self.load_source_dictionaries(dictionary_dir or default_dictionary_dir())
+    
+    def add_source_names(self, books: Iterable[str] = (), authors: Iterable[str] = ()):
+        """补充常见典籍和作者（自动机在下一次识别出处时重新编译一次）"""
+        for names, common in ((books, self.common_books), (authors, self.common_authors)):
+            names = [name for name in names if name not in common]
+            common.extend(names)
+            self.source_names.add_words(names)
+    
+    def load_source_dictionaries(self, directory: str):
+        """从目录中的common_books.txt和common_authors.txt补充典籍和作者"""
+        self.add_source_names(read_names(os.path.join(directory, BOOKS_FILE)),
+                              read_names(os.path.join(directory, AUTHORS_FILE)))
     
     def get_all_cards(self):
         """获取所有卡片（给导出功能用）"""
@@ -42,6 +83,12 @@ class CardManager:
         # 预处理：按行拆分，统一分隔符
         lines = [self._preprocess_line(line) for line in text.splitlines() if line.strip()]
         
+        # 已有卡片的(关键词, 出处)规范化文本只计算一次，导入的卡片随后加入
+        existing_keys = set()
+        if not allow_duplicates:
+            existing_keys = {(normalize_text(existing["keyword"]), normalize_text(existing["source"]))
+                             for existing in self.cards}
+        
         for line_num, line_parts in enumerate(lines, 1):
             try:
                 # 过滤空字段
@@ -68,16 +115,13 @@ class CardManager:
                     stats["failed"] += 1
                     continue
                 
-                # 处理重复卡片
-                duplicate = False
+                # 处理重复卡片（按规范化文本比较，繁简、异体字写法不同也算重复）
                 if not allow_duplicates:
-                    for existing in self.cards:
-                        if existing["keyword"] == keyword and existing["source"] == source:
-                            duplicate = True
-                            stats["merged"] += 1
-                            break
-                if duplicate:
-                    continue
+                    key = (normalize_text(keyword), normalize_text(source))
+                    if key in existing_keys:
+                        stats["merged"] += 1
+                        continue
+                    existing_keys.add(key)
                 
                 # 添加新卡片
                 self.cards.append({
@@ -153,7 +197,7 @@ class CardManager:
             # 无冒号，无法区分关键词和释义→失败
             return None
         
-        # 2. 识别出处（优先级：有《》→ 作者+典籍→ 纯典籍→ 无出处）
+        # 2. 识别出处（优先级：有《》→ 含常见作者或典籍名→ 无出处）
         source = ""
         original_parts = []
         for i, part in enumerate(remaining_parts):
@@ -163,13 +207,8 @@ class CardManager:
                 source = part_stripped
                 original_parts = remaining_parts[:i] + remaining_parts[i+1:]
                 break
-            # 规则2：含常见作者名
-            elif any(author in part_stripped for author in self.common_authors):
-                source = part_stripped
-                original_parts = remaining_parts[:i] + remaining_parts[i+1:]
-                break
-            # 规则3：含常见典籍名
-            elif any(book in part_stripped for book in self.common_books):
+            # 规则2：含常见作者名或典籍名（自动机一遍扫描）
+            elif self.source_names.search(part_stripped):
                 source = part_stripped
                 original_parts = remaining_parts[:i] + remaining_parts[i+1:]
                 break
@@ -179,16 +218,11 @@ class CardManager:
             source = ""
             original_parts = remaining_parts
         
-        # 4. 繁简转换（可选，无库则跳过）
-        try:
-            from opencc import OpenCC
-            cc = OpenCC('t2s')
-            card_data["keyword"] = cc.convert(card_data["keyword"])
-            card_data["definition"] = cc.convert(card_data["definition"])
-            source = cc.convert(source)
-            original_text = cc.convert("".join(original_parts).strip())
-        except ImportError:
-            original_text = "".join(original_parts).strip()
+        # 4. 繁简转换（可选，无库则跳过；转换器整个进程只创建一次）
+        card_data["keyword"] = to_simplified(card_data["keyword"])
+        card_data["definition"] = to_simplified(card_data["definition"])
+        source = to_simplified(source)
+        original_text = to_simplified("".join(original_parts).strip())
         
         # 5. 整合结果
         card_data["source"] = source
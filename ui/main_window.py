@@ -13,9 +13,14 @@ from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
-from ui.card_view import CardView
 from ui.card_editor import CardEditor
 from ui.search_panel import SearchPanel
+from ui.virtual_list import VirtualTreeview
+from ui.scheduler import ChunkedScheduler, chunked_sort
+from card_events import CARD_DELETED, CARDS_REPLACED
+from card_record import card_to_json, cards_to_json, normalized_text
+from card_tags import parse_tags
+from pinyin_support import get_lazy_pinyin
 
 
 class MainWindow:
@@ -53,6 +58,18 @@ class MainWindow:
         
         # 收藏功能相关状态
         self.is_favorites_view = False  # 当前是否在收藏视图模式
+        # 按出处浏览：(典籍键, 篇章键或None)，None表示不按出处筛选
+        self.source_filter = None
+        # 按标签筛选：(标签元组, 是否任一标签即可)，None表示不按标签筛选
+        self.tag_filter = None
+        # 当前筛选条件（收藏、出处、标签）下的卡片ID，None表示不筛选；每次刷新列表或处理变更事件时求一次
+        self._filter_ids = None
+        
+        # 列表是否需要全量重建（之后由卡片变更事件增量维护）
+        self._list_stale = True
+        
+        # 分帧调度器：大量卡片的刷新、搜索分散到多帧执行，进度显示在状态栏
+        self.scheduler = ChunkedScheduler(self.root, on_progress=self.show_task_progress)
         
         # 创建主框架
         self.create_main_frame()
@@ -66,6 +83,9 @@ class MainWindow:
         # 创建右侧内容区
         self.create_content_area()
         
+        # 订阅卡片变更事件，列表按事件增量更新
+        self.card_manager.subscribe(self.on_cards_changed)
+        
         # 初始化视图
         self.show_overview()
         
@@ -155,7 +175,13 @@ class MainWindow:
         
         # 编辑菜单
         self.edit_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.edit_menu.add_command(label="撤销  \tCtrl+Z", command=self.undo_action)
+        self.edit_menu.add_command(label="重做  \tCtrl+Y", command=self.redo_action)
+        self.edit_menu.add_separator()
         self.edit_menu.add_command(label="添加卡片", command=self.show_add_card)
+        self.edit_menu.add_command(label="回收站", command=self.show_trash)
+        self.edit_menu.add_command(label="语境索引", command=self.show_concordance)
+        self.edit_menu.add_command(label="标签管理", command=self.show_tags)
         self.menu_bar.add_cascade(label="编辑", menu=self.edit_menu)
         
         # 设置菜单
@@ -230,6 +256,11 @@ class MainWindow:
         
         # 导航栏按钮已简化
         
+        # 按出处浏览（典籍 → 篇章，展开时才加载篇章）
+        from ui.source_tree import SourceTree
+        self.source_tree = SourceTree(self.nav_frame, self.card_manager, self.show_source)
+        self.source_tree.pack(fill=tk.BOTH, expand=True, pady=(20, 0))
+        
         # 设置当前选中的导航按钮
         self.current_nav = 'overview'
         self.highlight_nav_button(self.current_nav)
@@ -313,7 +344,20 @@ class MainWindow:
         self.highlight_nav_button(view_name)
     
     def show_overview(self):
-        """显示卡片概览视图"""
+        """显示卡片概览视图（列表已由变更事件保持最新，无需重建）"""
+        self.show_view('overview')
+        if self._list_stale:
+            self.refresh_list_view()
+    
+    def show_source(self, book, chapter=None):
+        """
+        在卡片概览中只显示某个出处的卡片
+        
+        Args:
+            book: 典籍键，None表示显示全部卡片
+            chapter: 篇章键，None表示整个典籍
+        """
+        self.source_filter = None if book is None else (book, chapter)
         self.show_view('overview')
         self.refresh_list_view()
     
@@ -453,10 +497,8 @@ class MainWindow:
                     messagebox.showerror("错误", "关键词和释义为必填项")
                     return
                 
-                # 更新卡片
+                # 更新卡片（列表行由变更事件刷新）
                 if self.card_manager.update_card(updated_card):
-                    # 刷新列表视图
-                    self.refresh_list_view()
                     # 关闭窗口
                     edit_window.destroy()
                 else:
@@ -492,6 +534,75 @@ class MainWindow:
     
     # 批量编辑功能已移除
     
+    def show_trash(self):
+        """显示回收站窗口（已打开时置于前台）"""
+        trash_window = getattr(self, 'trash_window', None)
+        if trash_window is not None and trash_window.window.winfo_exists():
+            trash_window.window.lift()
+            return
+        from ui.trash_window import TrashWindow
+        self.trash_window = TrashWindow(self.root, self.card_manager, self.app)
+    
+    def show_concordance(self):
+        """显示语境索引窗口（已打开时置于前台）"""
+        concordance_window = getattr(self, 'concordance_window', None)
+        if concordance_window is not None and concordance_window.window.winfo_exists():
+            concordance_window.window.lift()
+            return
+        from ui.concordance_window import ConcordanceWindow
+        self.concordance_window = ConcordanceWindow(self.root, self.card_manager, self.app, self)
+    
+    def show_tags(self):
+        """显示标签管理窗口（已打开时置于前台）"""
+        tag_window = getattr(self, 'tag_window', None)
+        if tag_window is not None and tag_window.window.winfo_exists():
+            tag_window.window.lift()
+            return
+        from ui.tag_window import TagWindow
+        self.tag_window = TagWindow(self.root, self.card_manager, self.app, self)
+    
+    def show_tagged(self, tags, any_tag=False):
+        """
+        在卡片概览中只显示有指定标签的卡片（可与收藏、按出处浏览同时使用）
+        
+        Args:
+            tags: 标签，为空时取消按标签筛选
+            any_tag: True时有其中任一标签即可，否则需要全部标签
+        """
+        self.tag_filter = (tuple(tags), any_tag) if tags else None
+        self.show_view('overview')
+        self.refresh_list_view()
+    
+    def _update_filter_ids(self):
+        """按当前的收藏、出处和标签筛选，由索引以集合运算求出列表中应有的卡片ID"""
+        tags, any_tag = self.tag_filter if self.tag_filter is not None else ((), False)
+        self._filter_ids = self.card_manager.filter_ids(tags, any_tag, source=self.source_filter,
+                                                        favorite=self.is_favorites_view)
+    
+    def add_tags_to_selected(self):
+        """给选中的卡片加上标签"""
+        self._edit_selected_tags("添加标签", "为选中的卡片添加标签（多个标签用逗号或空格分隔）：",
+                                 self.card_manager.add_tags)
+    
+    def remove_tags_from_selected(self):
+        """去掉选中卡片的标签"""
+        self._edit_selected_tags("移除标签", "从选中的卡片移除标签（多个标签用逗号或空格分隔）：",
+                                 self.card_manager.remove_tags)
+    
+    def _edit_selected_tags(self, title, prompt, action):
+        """询问标签后批量修改选中的卡片"""
+        from tkinter import simpledialog
+        card_ids = self.get_selected_card_ids()
+        if not card_ids:
+            return
+        text = simpledialog.askstring(title, prompt, parent=self.root)
+        tags = parse_tags(text or "")
+        if not tags:
+            return
+        changed = action(card_ids, tags)
+        if hasattr(self, 'status_bar'):
+            self.status_bar.config(text=f"{title}：{changed} 张卡片的标签已更新")
+    
     def show_import_export_dialog(self):
         """显示导出卡片对话框（支持多种格式选择）"""
         try:
@@ -656,12 +767,12 @@ class MainWindow:
             ancc_data = {
                 'version': '1.0',
                 'type': 'ancient_chinese_cards',
-                'data': cards_data,
+                'data': cards_to_json(cards_data),
                 'export_time': datetime.now().isoformat()
             }
             
             # 转换为JSON并编码为base64
-            json_data = json.dumps(ancc_data, ensure_ascii=False, indent=2)
+            json_data = json.dumps(ancc_data, ensure_ascii=False, indent=2, default=card_to_json)
             encoded_data = base64.b64encode(json_data.encode('utf-8')).decode('utf-8')
             
             # 写入文件
@@ -731,19 +842,18 @@ class MainWindow:
                     f"成功导入 {added_count} 张卡片。\n\n当前总卡片数: {new_count}"
                 )
             else:  # 替换卡片
-                # 清空现有卡片
-                self.card_manager.clear_cards()
-                # 添加新卡片
-                self.card_manager.add_cards(cards_data)
+                # 清空和添加合并为一次整体替换通知
+                with self.card_manager.batch():
+                    # 清空现有卡片
+                    self.card_manager.clear_cards()
+                    # 添加新卡片
+                    self.card_manager.add_cards(cards_data)
                 
                 messagebox.showinfo(
                     "成功", 
                     f"成功导入 {len(cards_data)} 张卡片，已替换所有现有卡片。"
                 )
             
-            # 刷新列表视图
-            self.refresh_list_view()
-            
         except json.JSONDecodeError:
             messagebox.showerror("错误", "ANCC文件格式错误，无法解析")
         except base64.binascii.Error:
@@ -785,6 +895,11 @@ class MainWindow:
         self.root.bind("<Control-O>", lambda event: self.edit_selected_card())
         # 绑定Delete键删除选中卡片
         self.root.bind("<Delete>", lambda event: self.delete_selected_card())
+        # 绑定Ctrl+Z撤销、Ctrl+Y重做快捷键（不区分大小写；输入框内保留文本自身的撤销）
+        for key in ("<Control-z>", "<Control-Z>"):
+            self.root.bind(key, lambda event: self._on_history_key(event, self.undo_action))
+        for key in ("<Control-y>", "<Control-Y>"):
+            self.root.bind(key, lambda event: self._on_history_key(event, self.redo_action))
         
         # 绑定窗口大小变化事件
         self.root.bind('<Configure>', self.on_window_configure)
@@ -811,7 +926,8 @@ class MainWindow:
         
         # 创建列表（Treeview）
         columns = ("keyword", "definition", "source", "quote")
-        self.card_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="extended")
+        # 选中由虚拟化列表按逻辑行管理，关闭Treeview自带的选中行为
+        self.card_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="none")
         
         # 设置列标题并绑定点击事件
         self.card_tree.heading("keyword", text="关键词", command=lambda: self.on_header_click("keyword"))
@@ -830,12 +946,14 @@ class MainWindow:
         style.configure("Treeview", rowheight=30)  # 增加行高，约等于1.5mm
         
         # 添加滚动条
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.card_tree.yview)
-        self.card_tree.configure(yscroll=scrollbar.set)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         self.card_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
+        # 虚拟化列表：只实例化可视区域的行，滚动条按逻辑行计算
+        self.virtual_list = VirtualTreeview(self.card_tree, scrollbar, on_select=self.on_treeview_select)
+        
         # 绑定双击事件
         self.card_tree.bind("<Double-1>", self.on_item_double_click)
         
@@ -845,8 +963,6 @@ class MainWindow:
         self.card_tree.bind('<Control-Button-1>', self.on_treeview_ctrl_click)
         # 绑定Shift+左键点击事件（新增）
         self.card_tree.bind('<Shift-Button-1>', self.on_treeview_shift_click)
-        # 绑定选中变化事件（新增）
-        self.card_tree.bind('<<TreeviewSelect>>', self.on_treeview_select)
         
         # 绑定右键菜单
         self.card_tree.bind("<Button-3>", self.show_context_menu)
@@ -910,13 +1026,19 @@ class MainWindow:
         # 刷新列表
         self.refresh_list_view()
     
+    # 使用拼音排序的列
+    LIST_SORT_COLUMNS = ("keyword", "definition", "source", "quote")
+    
+    # 单次事件超过该数量的卡片时改为整体重建列表
+    INCREMENTAL_UPDATE_LIMIT = 200
+    
     def get_pinyin(self, text):
         """获取中文字符串的拼音，用于排序"""
-        try:
-            # 尝试导入pypinyin库
-            from pypinyin import lazy_pinyin
+        # pypinyin在第一次需要拼音时才导入，导入结果会被缓存
+        lazy_pinyin = get_lazy_pinyin()
+        if lazy_pinyin is not None:
             return ''.join(lazy_pinyin(text))
-        except ImportError:
+        else:
             # 如果没有安装pypinyin，使用备选方案
             # 检查是否需要显示提示
             if not hasattr(self, '_pypinyin_warning_shown'):
@@ -929,43 +1051,167 @@ class MainWindow:
                 )
             return text
     
+    def _card_row_values(self, card):
+        """生成列表中一行的显示内容"""
+        return (
+            card['keyword'],
+            card['definition'][:50] + "..." if len(card['definition']) > 50 else card['definition'],
+            card['source'],
+            card['quote'][:50] + "..." if len(card['quote']) > 50 else card['quote']
+        )
+    
     def refresh_list_view(self):
-        """刷新列表视图"""
-        # 清空现有列表
-        for item in self.card_tree.get_children():
-            self.card_tree.delete(item)
-        
+        """刷新列表视图（卡片很多时分帧排序，新的刷新会取代未完成的刷新）"""
         # 获取卡片数据
-        if self.is_favorites_view:
-            cards = self.card_manager.get_favorite_cards()
+        self._update_filter_ids()
+        if self.source_filter is not None:
+            # 按出处浏览：出处、标签和收藏的卡片ID已求过交集，按ID直接取出卡片
+            cards = self.card_manager.cards_with_ids(self._filter_ids)
         else:
-            cards = self.card_manager.get_all_cards()
-        
+            # 标签和收藏在列式镜像上以行号集合的交集求出
+            criteria = {}
+            if self.is_favorites_view:
+                criteria['favorite'] = True
+            if self.tag_filter is not None:
+                criteria['tags'], criteria['any_tag'] = self.tag_filter
+            card_query = self.card_manager.query()
+            if criteria:
+                card_query = card_query.where(**criteria)
+            cards = card_query.run()
+        
+        self.scheduler.run('list_refresh', self._refresh_list_task(cards), label="正在刷新列表")
+    
+    def _refresh_list_task(self, cards):
+        """列表刷新任务：分块计算拼音排序键，完成后一次性交给虚拟化列表"""
         # 根据当前排序字段和顺序排序
         reverse = self.sort_order == "desc"
+        if self.sort_column in self.LIST_SORT_COLUMNS:
+            # 文本列使用拼音排序
+            cards = yield from chunked_sort(cards, self._list_sort_key, reverse)
+        else:
+            # 虚拟化列表会被增量更新原地修改，只读视图要先转成列表
+            cards = list(cards)
         
-        # 根据不同列使用不同的排序方法
-        if self.sort_column == "keyword":
-            # 关键词列使用拼音排序
-            cards.sort(key=lambda x: self.get_pinyin(x.get("keyword", "")), reverse=reverse)
-        elif self.sort_column in ["definition", "source", "quote"]:
-            # 其他文本列也使用拼音排序
-            cards.sort(key=lambda x: self.get_pinyin(x.get(self.sort_column, "")), reverse=reverse)
-        
-        # 添加卡片到列表
-        for card in cards:
-            values = (
-                card['keyword'],
-                card['definition'][:50] + "..." if len(card['definition']) > 50 else card['definition'],
-                card['source'],
-                card['quote'][:50] + "..." if len(card['quote']) > 50 else card['quote']
-            )
-            self.card_tree.insert("", tk.END, values=values, tags=(card['id'],))
+        # 交给虚拟化列表，按卡片ID差分更新可视区域内的行
+        self.virtual_list.set_items(cards, lambda card: card['id'], self._card_row_values)
+        self._list_stale = False
         
         # 更新列标题，添加排序指示器
         self._update_sort_indicators()
         
         # 更新状态栏
+        self._update_list_status()
+    
+    def show_task_progress(self, label, done, total):
+        """在状态栏显示分帧任务的进度"""
+        if hasattr(self, 'status_bar') and total:
+            self.status_bar.config(text=f"{label}... {done * 100 // total}%")
+    
+    def _list_sort_key(self, card):
+        """列表排序键（当前排序列的拼音）"""
+        if self.sort_column == 'keyword' and get_lazy_pinyin() is not None:
+            # 关键词的拼音由卡片索引缓存，并随预热快照保存
+            return ''.join(self.card_manager.keyword_sort_key(card))
+        # 按规范化文本（繁简、异体字统一，由卡片记录缓存）取拼音，不同写法排在一起
+        return self.get_pinyin(normalized_text(card, self.sort_column))
+    
+    def _find_list_position(self, card, skip_index=None):
+        """
+        二分查找卡片在当前排序下应插入的逻辑行号
+        
+        Args:
+            card: 卡片数据
+            skip_index: 查找时视为不存在的行（卡片自身的原位置）
+        
+        Returns:
+            int: 插入位置（不计skip_index那一行）
+        """
+        items = self.virtual_list.items
+        count = len(items) - (0 if skip_index is None else 1)
+        if self.sort_column not in self.LIST_SORT_COLUMNS:
+            return count
+        
+        key = self._list_sort_key(card)
+        reverse = self.sort_order == "desc"
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            item_index = mid if skip_index is None or mid < skip_index else mid + 1
+            mid_key = self._list_sort_key(items[item_index])
+            if (mid_key < key) if reverse else (mid_key > key):
+                high = mid
+            else:
+                low = mid + 1
+        return low
+    
+    def refresh_card_row(self, card_id):
+        """
+        增量刷新单张卡片在列表中的行（插入、删除、更新或移动），
+        不重建列表，滚动位置和选中状态保持不变
+        
+        Args:
+            card_id: 卡片ID
+        """
+        card = self.card_manager.get_card(card_id)
+        in_view = card is not None and (self._filter_ids is None or card_id in self._filter_ids)
+        index = self.virtual_list.index_of(card_id)
+        
+        if index is None:
+            if in_view:
+                self.virtual_list.insert_item(self._find_list_position(card), card)
+        elif not in_view:
+            self.virtual_list.remove_ids([card_id])
+        else:
+            old_card = self.virtual_list.items[index]
+            if (self.sort_column in self.LIST_SORT_COLUMNS and
+                    old_card.get(self.sort_column) != card.get(self.sort_column)):
+                # 排序键变化：不计原位置二分查找新位置
+                new_index = self._find_list_position(card, skip_index=index)
+                if new_index != index:
+                    self.virtual_list.move_item(index, new_index, card)
+                    self._update_list_status()
+                    return
+            self.virtual_list.update_item(index, card)
+        self._update_list_status()
+    
+    def on_cards_changed(self, event):
+        """
+        卡片变更事件处理：按事件类型增量更新列表
+        
+        Args:
+            event: card_events.CardEvent
+        """
+        if self.scheduler.is_running('list_refresh'):
+            # 正在刷新的是旧数据，重新开始
+            self.refresh_list_view()
+            return
+        if not hasattr(self, 'virtual_list') or self._list_stale:
+            return
+        if event.type == CARDS_REPLACED or len(event.card_ids) > self.INCREMENTAL_UPDATE_LIMIT:
+            # 整体替换或大批量变更时重建更快（滚动位置和选中状态仍会保留）
+            self.refresh_list_view()
+        elif event.type == CARD_DELETED:
+            self.remove_card_rows(event.card_ids)
+        else:
+            # 变更可能改变卡片是否符合筛选条件，每个事件重新求一次筛选结果，逐行只查集合
+            self._update_filter_ids()
+            for card_id in event.card_ids:
+                self.refresh_card_row(card_id)
+    
+    def remove_card_rows(self, card_ids):
+        """
+        增量删除列表中的行
+        
+        Args:
+            card_ids: 要删除的卡片ID列表
+        """
+        self.virtual_list.remove_ids(card_ids)
+        self._update_list_status()
+    
+    def _update_list_status(self):
+        """根据当前列表内容更新状态栏"""
+        cards = self.virtual_list.items
+        reverse = self.sort_order == "desc"
         if hasattr(self, 'status_bar'):
             if len(cards) == 0:
                 if self.is_favorites_view:
@@ -986,7 +1232,13 @@ class MainWindow:
                         "quote": "原文"
                     }
                     field_name = field_names.get(self.sort_column, "关键词")
-                    self.status_bar.config(text=f"显示 {len(cards)} 张卡片 (按{field_name}{sort_direction}排序)")
+                    text = f"显示 {len(cards)} 张卡片 (按{field_name}{sort_direction}排序)"
+                    if self.tag_filter is not None:
+                        tags, any_tag = self.tag_filter
+                        text = f"标签{'（任一）' if any_tag else ''} {'、'.join(tags)}：{text}"
+                    if self.source_filter is not None:
+                        text = f"按出处浏览：{text}"
+                    self.status_bar.config(text=text)
     
     def _update_sort_indicators(self):
         """更新列标题的排序指示器"""
@@ -1008,12 +1260,17 @@ class MainWindow:
         field_name = field_names.get(self.sort_column, self.sort_column)
         self.card_tree.heading(self.sort_column, text=f"{field_name}{indicator}")
     
+    def get_selected_card_ids(self):
+        """按显示顺序获取选中卡片的ID（逻辑行选择，不受虚拟化影响）"""
+        return self.virtual_list.selected_ids()
+    
     def on_item_double_click(self, event):
         """双击列表项事件处理 - 显示编辑窗口"""
-        selected_items = self.card_tree.selection()
-        if selected_items:
-            item = selected_items[0]
-            card_id = self.card_tree.item(item, "tags")[0]
+        card_id = self.virtual_list.id_at_y(event.y)
+        if card_id is None:
+            selected_ids = self.get_selected_card_ids()
+            card_id = selected_ids[0] if selected_ids else None
+        if card_id:
             # 显示编辑窗口
             self.show_edit_card(card_id)
     
@@ -1024,54 +1281,32 @@ class MainWindow:
         
         # 右键点击：直接阻止所有选中相关行为，保留原多选状态
         if event.num == 3:
-            # 清空选中锚点，阻止Treeview自动选中单个项
-            event.widget.selection_anchor("")
             # 阻止事件传播，不让后续触发单选
             return "break"
         
         # 左键处理逻辑
         region = self.card_tree.identify_region(event.x, event.y)
         if region == "cell":
-            item = self.card_tree.identify_row(event.y)
-            if item:
+            index = self.virtual_list.index_at_y(event.y)
+            if index is not None:
                 # 检查是否是Ctrl或Shift组合键
                 if event.state & 0x0004:  # Ctrl键
                     # Ctrl+点击，切换选中状态
-                    if item in self.card_tree.selection():
-                        self.card_tree.selection_remove(item)
-                    else:
-                        self.card_tree.selection_add(item)
-                    self.card_tree.focus(item)
+                    self.virtual_list.toggle(index)
                 elif event.state & 0x0001:  # Shift键
-                    # Shift+点击，范围选择
-                    current_selection = self.card_tree.selection()
-                    if current_selection:
-                        # 获取所有项
-                        all_items = self.card_tree.get_children()
-                        try:
-                            # 找到第一个选中项和当前项的索引
-                            first_idx = all_items.index(current_selection[0])
-                            current_idx = all_items.index(item)
-                            
-                            # 选择从第一个选中项到当前项的所有项
-                            start = min(first_idx, current_idx)
-                            end = max(first_idx, current_idx)
-                            
-                            # 选择范围
-                            self.card_tree.selection_set(all_items[start:end+1])
-                            self.card_tree.focus(item)
-                        except ValueError:
-                            pass
+                    # Shift+点击，从锚点范围选择
+                    self.virtual_list.extend_to(index)
                 else:
                     # 普通点击，替换选择
-                    self.card_tree.selection_set(item)
-                    self.card_tree.focus(item)
+                    self.virtual_list.select_only(index)
                 
-                # 记录拖拽选择的起始点
-                self.drag_start_item = item
+                # 记录拖拽选择的起始点（逻辑行号）
+                self.drag_start_item = index
                 self.drag_start_x = event.x
                 self.drag_start_y = event.y
                 self.drag_selecting = True
+                # 获取键盘焦点，支持上下键导航
+                self.card_tree.focus_set()
     
     def on_treeview_ctrl_click(self, event):
         """Treeview Ctrl+点击事件处理"""
@@ -1081,13 +1316,9 @@ class MainWindow:
         # Ctrl+点击，切换选中状态
         region = self.card_tree.identify_region(event.x, event.y)
         if region == "cell":
-            item = self.card_tree.identify_row(event.y)
-            if item:
-                if item in self.card_tree.selection():
-                    self.card_tree.selection_remove(item)
-                else:
-                    self.card_tree.selection_add(item)
-                self.card_tree.focus(item)
+            index = self.virtual_list.index_at_y(event.y)
+            if index is not None:
+                self.virtual_list.toggle(index)
                 # 阻止默认的选择行为
                 return "break"
     
@@ -1096,29 +1327,15 @@ class MainWindow:
         # 记录鼠标按键
         self.last_mouse_button = event.num
         
-        # Shift+点击，范围选择
+        # Shift+点击，范围选择（按逻辑行，范围可以超出当前可视区域）
         region = self.card_tree.identify_region(event.x, event.y)
         if region == "cell":
-            item = self.card_tree.identify_row(event.y)
-            if item:
-                current_selection = self.card_tree.selection()
-                if current_selection:
-                    # 获取所有项
-                    all_items = self.card_tree.get_children()
-                    try:
-                        # 找到第一个选中项和当前项的索引
-                        first_idx = all_items.index(current_selection[0])
-                        current_idx = all_items.index(item)
-                        
-                        # 选择从第一个选中项到当前项的所有项
-                        start = min(first_idx, current_idx)
-                        end = max(first_idx, current_idx)
-                        
-                        # 选择范围
-                        self.card_tree.selection_set(all_items[start:end+1])
-                        self.card_tree.focus(item)
-                    except ValueError:
-                        pass
+            index = self.virtual_list.index_at_y(event.y)
+            if index is not None:
+                if self.virtual_list.selected:
+                    self.virtual_list.extend_to(index)
+                else:
+                    self.virtual_list.select_only(index)
                 # 阻止默认的选择行为
                 return "break"
     
@@ -1131,44 +1348,36 @@ class MainWindow:
     def on_treeview_drag(self, event):
         """Treeview拖拽选择事件处理"""
         # 检查是否正在拖拽选择
-        if not self.drag_selecting or not self.drag_start_item:
+        if not self.drag_selecting or self.drag_start_item is None:
             return
         
-        # 获取当前鼠标位置的项
-        region = self.card_tree.identify_region(event.x, event.y)
-        if region == "cell":
-            current_item = self.card_tree.identify_row(event.y)
-            if current_item and current_item != self.drag_start_item:
-                # 获取所有项
-                all_items = self.card_tree.get_children()
-                
-                try:
-                    # 找到起始项和当前项的索引
-                    start_idx = all_items.index(self.drag_start_item)
-                    current_idx = all_items.index(current_item)
-                    
-                    # 选择从起始项到当前项的所有项
-                    start = min(start_idx, current_idx)
-                    end = max(start_idx, current_idx)
-                    
-                    # 清空当前选择并选择新的范围
-                    self.card_tree.selection_set(all_items[start:end+1])
-                    self.card_tree.focus(current_item)
-                except ValueError:
-                    pass
+        # 拖出可视区域时自动滚动一行，让拖拽选择可以跨越未实例化的行
+        row_height = self.virtual_list.row_height()
+        if event.y < row_height:
+            self.virtual_list.scroll_to(self.virtual_list.top - 1)
+            y = row_height + 1
+        elif event.y >= self.card_tree.winfo_height():
+            self.virtual_list.scroll_to(self.virtual_list.top + 1)
+            y = self.card_tree.winfo_height() - 2
+        else:
+            y = event.y
+        
+        # 获取当前鼠标位置的逻辑行
+        current_index = self.virtual_list.index_at_y(y)
+        if current_index is not None and current_index != self.virtual_list.focus_index:
+            # 选择从起始行到当前行的所有行（替换当前选择）
+            self.virtual_list.select_range(self.drag_start_item, current_index, keep_anchor=False)
     
-    def on_treeview_select(self, event):
-        """选中事件处理（过滤右键触发的伪选中）"""
-        # 右键触发的选中事件直接跳过，保留原多选
+    def on_treeview_select(self):
+        """选中变化处理（过滤右键触发的伪选中）"""
+        # 右键触发的选中变化直接跳过，保留原多选
         if self.last_mouse_button == 3:
             return
         
         # 只有左键触发的选中才更新状态
-        selection = self.card_tree.selection()
-        if selection:
-            item = selection[0]
-            card_id = self.card_tree.item(item, "tags")[0]
-            self.selected_card_id = card_id
+        selected_ids = self.get_selected_card_ids()
+        if selected_ids:
+            self.selected_card_id = selected_ids[0]
     
     def show_context_menu(self, event):
         """显示右键菜单（保留多选状态）"""
@@ -1176,23 +1385,21 @@ class MainWindow:
         self.last_mouse_button = 3
         
         # 获取当前真实的多选状态（右键点击前的状态）
-        selected_items = self.card_tree.selection()
-        if not selected_items:
+        if not self.virtual_list.selected:
             return
         
-        # 获取点击的项目
-        item = self.card_tree.identify_row(event.y)
-        if item and item not in selected_items:
+        # 获取点击的逻辑行
+        index = self.virtual_list.index_at_y(event.y)
+        if index is not None and not self.virtual_list.is_selected(index):
             # 支持右键点击时"追加选中"（和左键Ctrl+点击一致）
-            self.card_tree.selection_add(item)
-            selected_items = self.card_tree.selection()
+            self.virtual_list.add(index)
+        selected_ids = self.get_selected_card_ids()
         
         # 分析选中项的收藏状态
         has_favorites = False
         has_non_favorites = False
         
-        for item in selected_items:
-            card_id = self.card_tree.item(item, "tags")[0]
+        for card_id in selected_ids:
             card = self.card_manager.get_card(card_id)
             if card:
                 if card.get('is_favorite', False):
@@ -1204,7 +1411,7 @@ class MainWindow:
         self.context_menu.delete(0, tk.END)
         
         # 根据选择状态动态添加菜单项
-        if len(selected_items) == 1:
+        if len(selected_ids) == 1:
             # 单选时显示编辑选项
             self.context_menu.add_command(label="编辑  \tCtrl+O", command=self.edit_selected_card)
         
@@ -1212,7 +1419,7 @@ class MainWindow:
         if self.is_favorites_view:
             # 在收藏视图中，显示"取消收藏"
             # 多选时不显示分隔线，单选时如果已有编辑选项则显示分隔线
-            if len(selected_items) == 1:
+            if len(selected_ids) == 1:
                 try:
                     if self.context_menu.index(tk.END) is not None and self.context_menu.index(tk.END) > 0:
                         self.context_menu.add_separator()
@@ -1221,7 +1428,7 @@ class MainWindow:
             self.context_menu.add_command(label="取消收藏  \tCtrl+D", command=self.toggle_selected_favorites)
         else:
             # 在普通视图中，多选时总是显示"收藏"
-            if len(selected_items) > 1:
+            if len(selected_ids) > 1:
                 try:
                     if self.context_menu.index(tk.END) is not None and self.context_menu.index(tk.END) > 0:
                         self.context_menu.add_separator()
@@ -1248,30 +1455,29 @@ class MainWindow:
             pass
         self.context_menu.add_command(label="删除  \tDel", command=self.delete_selected_card)
         
+        # 批量标签
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="添加标签...", command=self.add_tags_to_selected)
+        self.context_menu.add_command(label="移除标签...", command=self.remove_tags_from_selected)
+        
         # 显示菜单（位置微调，避免遮挡）
         self.context_menu.post(event.x_root + 10, event.y_root + 10)
     
     def edit_selected_card(self):
         """编辑选中的卡片 - 使用主界面编辑模式"""
-        selected_items = self.card_tree.selection()
-        if selected_items:
-            item = selected_items[0]
-            card_id = self.card_tree.item(item, "tags")[0]
+        selected_ids = self.get_selected_card_ids()
+        if selected_ids:
+            card_id = selected_ids[0]
             # 切换到添加卡片视图并加载要编辑的卡片
             self.show_add_card()
             self.card_editor.load_card(card_id)
     
     def toggle_selected_favorites(self):
         """切换选中卡片的收藏状态"""
-        selected_items = self.card_tree.selection()
-        if not selected_items:
-            return
-        
         # 获取选中的卡片ID
-        card_ids = []
-        for item in selected_items:
-            card_id = self.card_tree.item(item, "tags")[0]
-            card_ids.append(card_id)
+        card_ids = self.get_selected_card_ids()
+        if not card_ids:
+            return
         
         # 批量切换收藏状态
         results = self.card_manager.toggle_favorites(card_ids)
@@ -1292,12 +1498,10 @@ class MainWindow:
             else:
                 status = f"已收藏 {favorite_count} 张，已取消收藏 {unfavorite_count} 张"
         
+        # 受影响的行已由变更事件刷新（收藏视图中取消收藏的行会被移除）
         # 更新状态栏
         if hasattr(self, 'status_bar'):
             self.status_bar.config(text=status)
-        
-        # 刷新列表视图以显示收藏状态
-        self.refresh_list_view()
     
     def toggle_favorites_view(self):
         """切换收藏视图模式"""
@@ -1318,29 +1522,38 @@ class MainWindow:
         self.refresh_list_view()
     
     def select_all_cards(self):
-        """全选所有卡片"""
-        if hasattr(self, 'card_tree'):
-            # 清空当前选择
-            self.card_tree.selection_clear()
-            # 选择所有项
-            for item in self.card_tree.get_children():
-                self.card_tree.selection_add(item)
+        """全选所有卡片（包括未实例化的逻辑行）"""
+        if hasattr(self, 'virtual_list'):
+            self.virtual_list.select_all()
+    
+    def _on_history_key(self, event, action):
+        """撤销/重做快捷键：焦点在输入框时交给输入框处理"""
+        if isinstance(event.widget, (tk.Entry, ttk.Entry, tk.Text)):
+            return None
+        action()
+        return "break"
     
     def undo_action(self):
         """撤销上一个操作"""
-        # 调用卡片管理器的撤销功能（用于撤销删除操作）
         if hasattr(self, 'card_manager'):
-            success = self.card_manager.undo_last_action()
-            if success:
-                # 刷新列表视图
-                self.refresh_list_view()
-                # 更新状态栏提示
-                if hasattr(self, 'status_bar'):
-                    self.status_bar.config(text="已撤销删除操作")
-            else:
-                # 没有可撤销的操作时，显示提示
-                if hasattr(self, 'status_bar'):
-                    self.status_bar.config(text="没有可撤销的操作")
+            self._run_history_action(self.card_manager.undo_last_action, "已撤销", "没有可撤销的操作")
+    
+    def redo_action(self):
+        """重做上一个被撤销的操作"""
+        if hasattr(self, 'card_manager'):
+            self._run_history_action(self.card_manager.redo_last_action, "已重做", "没有可重做的操作")
+    
+    def _run_history_action(self, action, done_text, empty_text):
+        """执行撤销或重做并更新状态栏"""
+        if action():
+            # 变化的行已由变更事件更新到列表
+            # 更新状态栏提示
+            if hasattr(self, 'status_bar'):
+                self.status_bar.config(text=done_text)
+        else:
+            # 没有可撤销/重做的操作时，显示提示
+            if hasattr(self, 'status_bar'):
+                self.status_bar.config(text=empty_text)
         
         # 更新状态栏
         if hasattr(self, 'status_bar'):
@@ -1362,30 +1575,23 @@ class MainWindow:
     
     def delete_selected_card(self):
         """删除选中的卡片（批量支持）"""
-        selected_items = self.card_tree.selection()
-        if not selected_items:
+        selected_ids = self.get_selected_card_ids()
+        if not selected_ids:
             return
         
         # 批量删除逻辑
-        if len(selected_items) > 1:
-            if messagebox.askyesno("确认批量删除", f"确定要删除选中的{len(selected_items)}张卡片吗？"):
-                deleted_count = 0
-                for item in selected_items:
-                    card_id = self.card_tree.item(item, "tags")[0]
-                    if self.card_manager.delete_card(card_id):
-                        deleted_count += 1
-                self.refresh_list_view()
+        if len(selected_ids) > 1:
+            if messagebox.askyesno("确认批量删除", f"确定要删除选中的{len(selected_ids)}张卡片吗？"):
+                # 一次删除、一次保存，列表一次性移除这些行，撤销时全部恢复
+                self.card_manager.delete_cards(selected_ids)
                 # 移除成功提示窗口
         else:
             # 单个删除逻辑（保留原有）
-            item = selected_items[0]
-            card_id = self.card_tree.item(item, "tags")[0]
+            card_id = selected_ids[0]
             card = self.card_manager.get_card(card_id)
             if card and messagebox.askyesno("确认删除", f"确定要删除卡片 '{card['keyword']}' 吗？"):
-                if self.card_manager.delete_card(card_id):
-                    self.refresh_list_view()
-                    # 移除成功提示窗口
-                else:
+                # 删除成功时列表行由变更事件移除（不显示成功提示窗口）
+                if not self.card_manager.delete_card(card_id):
                     messagebox.showerror("错误", "删除卡片失败")
     
 
@@ -1551,7 +1757,7 @@ class MainWindow:
         # 3. 保存JSON文件
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(all_cards, f, ensure_ascii=False, indent=2)
+                json.dump(cards_to_json(all_cards), f, ensure_ascii=False, indent=2, default=card_to_json)
             messagebox.showinfo("成功", f"已导出{len(all_cards)}张卡片到\n{os.path.basename(file_path)}")
         except Exception as e:
             messagebox.showerror("错误", f"导出失败：{str(e)}")
@@ -1578,12 +1784,12 @@ class MainWindow:
             
             # 3. 添加到软件中
             imported_count = 0
-            for card in new_cards:
-                self.card_manager.add_card(card)
-                imported_count += 1
+            with self.card_manager.batch():
+                for card in new_cards:
+                    self.card_manager.add_card(card)
+                    imported_count += 1
             
-            # 4. 刷新列表
-            self.refresh_list_view()
+            # 4. 列表已由变更事件更新
             messagebox.showinfo("成功", f"已导入{imported_count}张新卡片")
         except ValueError as e:
             messagebox.showerror("错误", f"非法文件：{str(e)}")
@@ -1687,6 +1893,9 @@ class MainWindow:
         # 保存卡片数据
         self.save_cards()
         
+        # 停止未完成的分帧任务
+        self.scheduler.cancel_all()
+        
         # 关闭窗口
         self.root.destroy()
     
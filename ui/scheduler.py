@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分帧任务调度器，把耗时的界面工作拆到多个事件循环周期里执行，避免界面卡死
+"""
+
+import time
+from typing import Callable, Dict, Generator, Optional
+
+
+class _Task:
+    """调度中的任务"""
+
+    __slots__ = ("name", "generator", "label", "after_id", "cancelled")
+
+    def __init__(self, name: str, generator: Generator, label: str):
+        self.name = name
+        self.generator = generator
+        self.label = label
+        self.after_id = None
+        self.cancelled = False
+
+
+class ChunkedScheduler:
+    """
+    基于root.after的协作式调度器
+
+    任务是一个生成器，每处理完一小块工作就yield一次（可以yield (已完成, 总数) 报告进度）。
+    调度器在每一帧里连续推进任务直到用完时间预算，然后让出事件循环，下一帧继续。
+    同名任务再次启动时会取消旧任务（例如新的刷新取代还没完成的刷新）。
+    能在第一帧预算内完成的小任务会同步完成，不会产生闪烁。
+    """
+
+    def __init__(self, widget, budget_ms: int = 15,
+                 on_progress: Optional[Callable[[str, int, int], None]] = None):
+        """
+        初始化调度器
+
+        Args:
+            widget: 用于调用after的tkinter组件（通常是根窗口）
+            budget_ms: 每一帧最多占用的时间（毫秒）
+            on_progress: 进度回调，参数为(任务说明, 已完成, 总数)
+        """
+        self.widget = widget
+        self.budget = budget_ms / 1000.0
+        self.on_progress = on_progress
+        self._tasks: Dict[str, _Task] = {}
+
+    def run(self, name: str, generator: Generator, label: str = ""):
+        """
+        启动任务（取代同名的未完成任务）
+
+        Args:
+            name: 任务名称，同名任务互相取代
+            generator: 任务生成器
+            label: 显示在进度中的任务说明
+        """
+        self.cancel(name)
+        task = _Task(name, generator, label)
+        self._tasks[name] = task
+        self._step(task)
+
+    def cancel(self, name: str) -> bool:
+        """
+        取消任务
+
+        Returns:
+            bool: 是否有任务被取消
+        """
+        task = self._tasks.pop(name, None)
+        if task is None:
+            return False
+        task.cancelled = True
+        if task.after_id is not None:
+            try:
+                self.widget.after_cancel(task.after_id)
+            except Exception:
+                pass
+        task.generator.close()
+        return True
+
+    def cancel_all(self):
+        """取消所有任务（例如窗口关闭时）"""
+        for name in list(self._tasks):
+            self.cancel(name)
+
+    def is_running(self, name: str) -> bool:
+        """任务是否还在进行中"""
+        return name in self._tasks
+
+    def _step(self, task: _Task):
+        """推进任务一帧"""
+        task.after_id = None
+        if task.cancelled:
+            return
+        deadline = time.perf_counter() + self.budget
+        progress = None
+        try:
+            while True:
+                result = next(task.generator)
+                if result is not None:
+                    progress = result
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration:
+            self._tasks.pop(task.name, None)
+            return
+        except Exception as e:
+            self._tasks.pop(task.name, None)
+            print(f"后台任务 {task.name} 执行失败: {str(e)}")
+            return
+
+        if progress is not None and self.on_progress:
+            self.on_progress(task.label, progress[0], progress[1])
+        task.after_id = self.widget.after(1, lambda: self._step(task))
+
+
+def chunked_sort(items, key: Callable, reverse: bool = False, chunk_size: int = 500):
+    """
+    分块计算排序键后排序（排序键计算是主要耗时，例如拼音转换）
+
+    用法：sorted_items = yield from chunked_sort(items, key)
+
+    Args:
+        items: 待排序的列表
+        key: 排序键函数
+        reverse: 是否降序
+        chunk_size: 每块计算的数量
+
+    Returns:
+        list: 排好序的新列表（稳定排序，与list.sort结果一致）
+    """
+    total = len(items)
+    keys = []
+    for start in range(0, total, chunk_size):
+        keys.extend(key(item) for item in items[start:start + chunk_size])
+        yield (min(total, start + chunk_size), total)
+    order = sorted(range(total), key=keys.__getitem__, reverse=reverse)
+    return [items[index] for index in order]
@@ -7,9 +7,12 @@
 
 import tkinter as tk
 from tkinter import ttk, font
-import re
 from typing import List, Dict, Any
 
+from card_events import CARD_DELETED, CARD_FAVORITED, CARDS_REPLACED
+from card_highlight import mark_spans, snippet
+from card_query_syntax import QuerySyntaxError
+
 class SearchPanel:
     """搜索面板类"""
     
@@ -29,11 +32,22 @@ class SearchPanel:
         # 设置主题颜色
         self.colors = main_window.colors
         
-        # 搜索结果
+        # 搜索结果，以及每个结果中匹配的位置（字段 → [(开始, 结束), ...]，查询时记下的）
         self.search_results = []
+        self.search_spans = []
+        
+        # 上一次搜索的查询，用于卡片变更时增量更新结果
+        self._search_criteria = None
+        # 上一次搜索是否使用查询语法（fav:条件的结果随收藏变化）
+        self._search_uses_syntax = False
+        # 上一次搜索是否按模糊或拼音匹配（变更时重新搜索，不增量更新）
+        self._search_reruns = False
         
         # 创建搜索面板界面
         self.create_search_panel()
+        
+        # 订阅卡片变更事件
+        self.card_manager.subscribe(self.on_cards_changed)
     
     def create_search_panel(self):
         """创建搜索面板界面"""
@@ -149,6 +163,36 @@ class SearchPanel:
             variable=self.use_regex
         ).grid(row=1, column=2, sticky=tk.W, padx=(0, 10), pady=(10, 0))
         
+        # 拼音匹配（字母按全拼或首字母匹配汉字，需要pypinyin）
+        self.use_pinyin = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="拼音匹配",
+            variable=self.use_pinyin
+        ).grid(row=1, column=3, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        
+        # 模糊搜索（容忍错字，只查关键词和原文，结果按相似程度排列）
+        self.use_fuzzy = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="模糊搜索",
+            variable=self.use_fuzzy
+        ).grid(row=1, column=4, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        
+        # 查询语法（source:论语 tag:诗经 fav:true created:2026-01..2026-02 AND/OR/NOT）
+        self.use_syntax = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="使用查询语法",
+            variable=self.use_syntax
+        ).grid(row=1, column=5, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        
+        ttk.Button(
+            options_frame,
+            text="查询计划",
+            command=self.show_query_plan
+        ).grid(row=1, column=6, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        
         # 搜索结果框架
         results_frame = ttk.Frame(self.search_frame)
         results_frame.pack(fill=tk.BOTH, expand=True)
@@ -207,6 +251,22 @@ class SearchPanel:
         if not query:
             return
         
+        try:
+            card_query = self._build_query(query)
+            self._search_uses_syntax = self.use_syntax.get()
+            self._search_reruns = not self._search_uses_syntax and (self.use_fuzzy.get() or self.use_pinyin.get())
+            self._start_search(card_query)
+        except QuerySyntaxError as e:
+            tk.messagebox.showerror("错误", f"查询语法错误: {str(e)}")
+        except Exception as e:
+            # 处理正则表达式错误
+            if self.use_regex.get():
+                tk.messagebox.showerror("错误", f"正则表达式错误: {str(e)}")
+            else:
+                tk.messagebox.showerror("错误", f"搜索错误: {str(e)}")
+    
+    def _build_query(self, query):
+        """按搜索框和搜索选项构造卡片查询"""
         # 获取搜索选项
         case_sensitive = self.case_sensitive.get()
         use_regex = self.use_regex.get()
@@ -228,64 +288,134 @@ class SearchPanel:
         if not search_fields:
             search_fields = ['keyword', 'definition', 'source', 'quote', 'notes']
         
-        # 获取所有卡片
-        all_cards = self.card_manager.get_all_cards()
-        
-        # 执行搜索
+        # 切换视图后重复的搜索直接取缓存的结果
+        if self.use_syntax.get():
+            # 没有字段的词在勾选的范围中查找
+            return self.card_manager.query().search(query, search_fields).cached()
+        if self.use_fuzzy.get():
+            # 按编辑距离匹配关键词和原文，结果一次给出（按相似程度排列）
+            return self.card_manager.query().fuzzy(query).cached()
+        return self.card_manager.query().match(query, search_fields, case_sensitive, use_regex,
+                                               self.use_pinyin.get()).cached()
+    
+    def show_query_plan(self):
+        """显示当前搜索的执行计划（使用的索引和估计的卡片数）"""
+        query = self.search_var.get().strip()
+        if not query:
+            return
+        try:
+            plan = self._build_query(query).explain()
+        except Exception as e:
+            tk.messagebox.showerror("错误", f"无法生成查询计划: {str(e)}")
+            return
+        tk.messagebox.showinfo("查询计划", plan)
+    
+    def _start_search(self, card_query):
+        """启动搜索任务（取代未完成的搜索），结果分帧逐步插入列表"""
+        self._search_criteria = card_query
+        self.main_window.scheduler.run('search', self._search_task(card_query), label="正在搜索")
+    
+    def _search_task(self, card_query):
+        """搜索任务（生成器）：每检查一块候选卡片就把新结果追加到列表并报告进度"""
         self.search_results = []
+        self.search_spans = []
+        self.results_listbox.delete(0, tk.END)
         
-        try:
-            for card in all_cards:
-                # 检查每个字段
-                for field in search_fields:
-                    field_value = card.get(field, '')
-                    if not field_value:
-                        continue
-                    
-                    # 转换为字符串
-                    field_value = str(field_value)
-                    
-                    # 根据搜索选项执行搜索
-                    if use_regex:
-                        # 使用正则表达式搜索
-                        flags = 0 if case_sensitive else re.IGNORECASE
-                        if re.search(query, field_value, flags):
-                            self.search_results.append(card)
-                            break
-                    else:
-                        # 使用普通文本搜索
-                        if case_sensitive:
-                            if query in field_value:
-                                self.search_results.append(card)
-                                break
-                        else:
-                            if query.lower() in field_value.lower():
-                                self.search_results.append(card)
-                                break
-            
-            # 更新结果列表
-            self.update_results_list()
-            
-            # 更新结果标题
-            self.results_title_var.set(f"搜索结果: 找到 {len(self.search_results)} 项")
+        # 查询在只读快照上分块执行，搜索过程中卡片列表变化不影响遍历；
+        # 每块结果带有确认匹配时记下的位置，直接用于高亮
+        for found, done, total in card_query.chunks(self.SEARCH_CHUNK_SIZE):
+            for index, card in enumerate(found):
+                spans = found.match_spans(index)
+                self.search_results.append(card)
+                self.search_spans.append(spans)
+                self.results_listbox.insert(tk.END, self._result_text(card, spans))
+            if done < total:
+                self.results_title_var.set(f"搜索中: 已找到 {len(self.search_results)} 项")
+            yield (done, total)
+        
+        # 更新结果标题
+        self.results_title_var.set(f"搜索结果: 找到 {len(self.search_results)} 项")
+        self.main_window.status_bar.config(text=f"搜索完成，找到 {len(self.search_results)} 项")
+    
+    # 搜索任务每块检查的卡片数
+    SEARCH_CHUNK_SIZE = 500
+    
+    # 结果列表中附带片段的字段（关键词和释义都没有匹配时显示）
+    SNIPPET_FIELDS = (('source', "出处"), ('quote', "原文"), ('notes', "注释"))
+    
+    def _result_text(self, card, spans=None):
+        """结果列表中的显示文本，匹配处用【】标出（列表框不能单独设置部分文字的样式）"""
+        spans = spans or {}
+        keyword = mark_spans(str(card['keyword']), spans.get('keyword', []))
+        definition = mark_spans(str(card['definition']), spans.get('definition', []))
+        text = f"{keyword} - {definition}"
+        if not any(start < end for field in ('keyword', 'definition') for start, end in spans.get(field, ())):
+            # 只有其他字段匹配：附上第一个匹配字段中匹配处附近的片段
+            for field, label in self.SNIPPET_FIELDS:
+                if any(start < end for start, end in spans.get(field, ())):
+                    text += f"  （{label}: {snippet(str(card.get(field, '')), spans[field])}）"
+                    break
+        return text
+    
+    def on_cards_changed(self, event):
+        """
+        卡片变更事件处理：只重新检查受影响的卡片，增量更新搜索结果
         
-        except Exception as e:
-            # 处理正则表达式错误
-            if use_regex:
-                tk.messagebox.showerror("错误", f"正则表达式错误: {str(e)}")
+        Args:
+            event: card_events.CardEvent
+        """
+        if self._search_criteria is None or (event.type == CARD_FAVORITED and not self._search_uses_syntax):
+            return
+        card_query = self._search_criteria
+        if (event.type == CARDS_REPLACED or self._search_reruns
+                or self.main_window.scheduler.is_running('search')):
+            # 整体替换、搜索尚未完成，或模糊、拼音匹配（受影响的卡片要重新排到相似程度对应的位置，
+            # 不能追加到结果末尾）时，按上次的条件重新搜索
+            self._start_search(card_query)
+            return
+        
+        changed = set(event.card_ids)
+        
+        # 从后往前处理已有结果，删除行时前面的行号不受影响
+        for index in range(len(self.search_results) - 1, -1, -1):
+            card_id = self.search_results[index]['id']
+            if card_id not in changed:
+                continue
+            changed.discard(card_id)
+            card = None if event.type == CARD_DELETED else self.card_manager.get_card(card_id)
+            spans = card_query.match_spans(card) if card is not None else None
+            self.results_listbox.delete(index)
+            if spans is not None:
+                self.search_results[index] = card
+                self.search_spans[index] = spans
+                self.results_listbox.insert(index, self._result_text(card, spans))
             else:
-                tk.messagebox.showerror("错误", f"搜索错误: {str(e)}")
+                del self.search_results[index]
+                del self.search_spans[index]
+        
+        # 新增或修改后才开始匹配的卡片追加到结果末尾
+        if event.type != CARD_DELETED:
+            for card_id in event.card_ids:
+                if card_id not in changed:
+                    continue
+                card = self.card_manager.get_card(card_id)
+                spans = card_query.match_spans(card) if card is not None else None
+                if spans is not None:
+                    self.search_results.append(card)
+                    self.search_spans.append(spans)
+                    self.results_listbox.insert(tk.END, self._result_text(card, spans))
+        
+        self.results_title_var.set(f"搜索结果: 找到 {len(self.search_results)} 项")
     
     def update_results_list(self):
         """更新结果列表"""
         # 清空列表
         self.results_listbox.delete(0, tk.END)
         
-        # 添加搜索结果
-        for card in self.search_results:
+        # 添加搜索结果（使用搜索时记下的匹配位置）
+        for card, spans in zip(self.search_results, self.search_spans):
             # 格式化显示内容
-            display_text = f"{card['keyword']} - {card['definition']}"
-            self.results_listbox.insert(tk.END, display_text)
+            self.results_listbox.insert(tk.END, self._result_text(card, spans))
     
     def on_result_select(self, event):
         """结果选中事件处理"""
@@ -313,7 +443,7 @@ class SearchPanel:
         if index < len(self.search_results):
             card = self.search_results[index]
             # 显示卡片详情
-            self.view_card_detail(card)
+            self.view_card_detail(card, self.search_spans[index])
     
     def view_selected_result(self):
         """查看选中的结果 - 显示卡片详情"""
@@ -327,7 +457,7 @@ class SearchPanel:
         if index < len(self.search_results):
             card = self.search_results[index]
             # 显示卡片详情
-            self.view_card_detail(card)
+            self.view_card_detail(card, self.search_spans[index])
     
     def edit_selected_result(self):
         """编辑选中的结果"""
@@ -344,8 +474,15 @@ class SearchPanel:
             self.main_window.show_add_card()
             self.main_window.card_editor.load_card(card['id'])
     
-    def view_card_detail(self, card):
-        """查看卡片详情"""
+    def view_card_detail(self, card, spans=None):
+        """
+        查看卡片详情
+        
+        Args:
+            card: 卡片
+            spans: 搜索时记下的匹配位置（字段 → [(开始, 结束), ...]），用于高亮
+        """
+        spans = spans or {}
         # 创建详情对话框
         detail_window = tk.Toplevel(self.parent)
         detail_window.title(f"卡片详情: {card['keyword']}")
@@ -368,12 +505,9 @@ class SearchPanel:
             background=self.colors['bg']
         ).grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
         
-        ttk.Label(
-            detail_frame,
-            text=card['keyword'],
-            font=("SimHei", 16),
-            background=self.colors['bg']
-        ).grid(row=0, column=1, sticky=tk.W, pady=(0, 5))
+        self._highlighted_text(
+            detail_frame, card['keyword'], spans.get('keyword', []), height=1
+        ).grid(row=0, column=1, sticky=tk.EW, pady=(0, 5))
         
         # 释义
         ttk.Label(
@@ -383,12 +517,9 @@ class SearchPanel:
             background=self.colors['bg']
         ).grid(row=1, column=0, sticky=tk.W, pady=(0, 5))
         
-        ttk.Label(
-            detail_frame,
-            text=card['definition'],
-            font=("SimHei", 16),
-            background=self.colors['bg']
-        ).grid(row=1, column=1, sticky=tk.W, pady=(0, 5))
+        self._highlighted_text(
+            detail_frame, card['definition'], spans.get('definition', []), height=2
+        ).grid(row=1, column=1, sticky=tk.EW, pady=(0, 5))
         
         # 出处
         ttk.Label(
@@ -398,12 +529,9 @@ class SearchPanel:
             background=self.colors['bg']
         ).grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
         
-        ttk.Label(
-            detail_frame,
-            text=card['source'],
-            font=("SimHei", 16),
-            background=self.colors['bg']
-        ).grid(row=2, column=1, sticky=tk.W, pady=(0, 5))
+        self._highlighted_text(
+            detail_frame, card['source'], spans.get('source', []), height=1
+        ).grid(row=2, column=1, sticky=tk.EW, pady=(0, 5))
         
         # 原文引用
         ttk.Label(
@@ -413,13 +541,9 @@ class SearchPanel:
             background=self.colors['bg']
         ).grid(row=3, column=0, sticky=tk.NW, pady=(0, 5))
         
-        ttk.Label(
-            detail_frame,
-            text=card['quote'],
-            font=("SimHei", 16),
-            background=self.colors['bg'],
-            wraplength=400
-        ).grid(row=3, column=1, sticky=tk.W, pady=(0, 5))
+        self._highlighted_text(
+            detail_frame, card['quote'], spans.get('quote', []), height=3
+        ).grid(row=3, column=1, sticky=tk.EW, pady=(0, 5))
         
         # 注释
         ttk.Label(
@@ -438,6 +562,7 @@ class SearchPanel:
         )
         notes_text.grid(row=4, column=1, sticky=tk.NSEW, pady=(0, 5))
         notes_text.insert(tk.END, card.get('notes', ''))
+        self._apply_highlight(notes_text, spans.get('notes', []))
         notes_text.config(state=tk.DISABLED)
         
         # 添加滚动条
@@ -472,6 +597,31 @@ class SearchPanel:
         )
         close_button.pack(side=tk.RIGHT)
     
+    def _highlighted_text(self, parent, value, spans, height):
+        """详情窗口中只读、无边框的文本（外观同标签），匹配处高亮"""
+        text = tk.Text(
+            parent,
+            width=50,
+            height=height,
+            font=("SimHei", 16),
+            wrap=tk.WORD,
+            background=self.colors['bg'],
+            relief=tk.FLAT,
+            borderwidth=0,
+            highlightthickness=0
+        )
+        text.insert(tk.END, str(value))
+        self._apply_highlight(text, spans)
+        text.config(state=tk.DISABLED)
+        return text
+    
+    def _apply_highlight(self, text, spans):
+        """按匹配位置给文本框中的文字加上高亮标签"""
+        text.tag_configure('match', foreground=self.colors['accent'], background=self.colors['hover'])
+        for start, end in spans:
+            if start < end:
+                text.tag_add('match', f"1.0+{start}c", f"1.0+{end}c")
+    
     def edit_card(self, card_id, window):
         """编辑卡片"""
         # 关闭详情窗口
@@ -504,7 +654,10 @@ class SearchPanel:
         self.results_title_var.set("搜索结果")
         
         # 清空搜索结果
+        self.main_window.scheduler.cancel('search')
         self.search_results = []
+        self.search_spans = []
+        self._search_criteria = None
     
     def focus_search_entry(self):
         """聚焦搜索输入框"""
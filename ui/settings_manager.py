@@ -38,6 +38,7 @@ class SettingsManager:
             },
             'data': {
                 # 数据相关设置
+                'soft_delete': False  # 删除的卡片是否先移入回收站（默认直接删除）
             },
             'sort': {
                 'column': None,
@@ -140,6 +141,10 @@ class SettingsManager:
         # 合并最后使用设置
         if 'last_used' in loaded_settings:
             self.settings['last_used'].update(loaded_settings['last_used'])
+        
+        # 合并数据设置
+        if 'data' in loaded_settings:
+            self.settings['data'].update(loaded_settings['data'])
     
     def apply_settings(self):
         """应用设置到应用程序"""
@@ -422,6 +427,12 @@ class SettingsManager:
                 if hasattr(self, '_auto_fill_source_var'):
                     self.set_setting("editor", "auto_fill_source", self._auto_fill_source_var.get())
                 
+                # 保存数据设置（立即对卡片管理器生效）
+                if hasattr(self, '_soft_delete_var'):
+                    self.set_setting("data", "soft_delete", self._soft_delete_var.get())
+                    if hasattr(self.app, 'card_manager'):
+                        self.app.card_manager.soft_delete = self._soft_delete_var.get()
+                
                 # 保存所有设置到文件
                 self.save_preferences()
                 print("设置已保存")
@@ -541,6 +552,20 @@ class SettingsManager:
         title_label = ttk.Label(frame, text="数据管理", font=("SimHei", 14, "bold"))
         title_label.pack(anchor=tk.W, pady=(0, 15))
         
+        # 回收站设置
+        trash_frame = ttk.LabelFrame(frame, text="回收站")
+        trash_frame.pack(fill=tk.X, pady=10)
+        
+        soft_delete_var = tk.BooleanVar(value=self.get_setting("data", "soft_delete", False) is True)
+        ttk.Checkbutton(
+            trash_frame,
+            text="删除卡片时先移入回收站（保留30天，可随时恢复）",
+            variable=soft_delete_var
+        ).pack(anchor=tk.W, padx=10, pady=10)
+        
+        # 保存变量引用，供确定按钮使用
+        self._soft_delete_var = soft_delete_var
+        
         # ANCC格式导入导出
         ancc_frame = ttk.LabelFrame(frame, text="ANCC格式导入导出")
         ancc_frame.pack(fill=tk.X, pady=10)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按出处浏览的树：典籍 → 篇章，节点显示卡片数
+
+典籍和计数来自卡片管理器的出处层级索引，不扫描卡片。篇章在展开典籍时才插入；
+卡片变更后在空闲时合并刷新一次，只改动文字或顺序有变化的节点。
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+# 节点ID中分隔典籍键和篇章键的字符（不会出现在出处中）
+_SEP = "\x1f"
+# “全部卡片”节点
+ALL_NODE = "all"
+
+
+def book_node(book):
+    """典籍节点ID"""
+    return f"b{_SEP}{book}"
+
+
+def chapter_node(book, chapter):
+    """篇章节点ID"""
+    return f"c{_SEP}{book}{_SEP}{chapter}"
+
+
+class SourceTree:
+    """出处浏览树"""
+
+    def __init__(self, parent, card_manager, on_select):
+        """
+        初始化出处浏览树
+
+        Args:
+            parent: 父容器
+            card_manager: 卡片管理器实例
+            on_select: 选中节点时的回调，参数为(典籍键, 篇章键)，选中“全部卡片”时为(None, None)，
+                选中典籍时篇章键为None
+        """
+        self.card_manager = card_manager
+        self.on_select = on_select
+        self._texts = {}  # 节点ID → 显示文字（只更新变化的节点）
+        self._opened = set()  # 已插入篇章的典籍键
+        self._refresh_pending = False
+
+        self.frame = ttk.Frame(parent)
+        ttk.Label(self.frame, text="按出处浏览").pack(anchor=tk.W, pady=(0, 5))
+        tree_frame = ttk.Frame(self.frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, show="tree", selectmode="browse")
+        self.tree.column("#0", width=180)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+
+        self.tree.insert("", tk.END, iid=ALL_NODE, text="全部卡片")
+        self.refresh()
+        # 卡片变更后刷新计数
+        self.card_manager.subscribe(self.on_cards_changed)
+
+    def pack(self, **kwargs):
+        """放置到父容器中"""
+        self.frame.pack(**kwargs)
+
+    def refresh(self):
+        """按出处索引同步典籍节点，已展开的典籍同时同步篇章节点"""
+        self._refresh_pending = False
+        books = self.card_manager.source_books()
+        self._set_text(ALL_NODE, f"全部卡片 ({len(self.card_manager.cards)})")
+        wanted = [ALL_NODE]
+        present = set()
+        for book, label, count in books:
+            iid = book_node(book)
+            wanted.append(iid)
+            present.add(book)
+            if not self.tree.exists(iid):
+                self.tree.insert("", tk.END, iid=iid, text="")
+                # 占位子节点：让典籍可以展开，展开时才换成篇章
+                self.tree.insert(iid, tk.END, text="…")
+            self._set_text(iid, f"{label} ({count})")
+            if book in self._opened:
+                self._sync_chapters(book)
+
+        # 删除不再存在的典籍，顺序不同时一次性重排
+        stale = [iid for iid in self.tree.get_children("") if iid != ALL_NODE and iid[2:] not in present]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self._forget(iid)
+        if tuple(self.tree.get_children("")) != tuple(wanted):
+            self.tree.set_children("", *wanted)
+
+    def _sync_chapters(self, book):
+        """同步一个已展开典籍的篇章节点"""
+        parent = book_node(book)
+        wanted = []
+        for chapter, label, count in self.card_manager.source_chapters(book):
+            iid = chapter_node(book, chapter)
+            wanted.append(iid)
+            if not self.tree.exists(iid):
+                self.tree.insert(parent, tk.END, iid=iid, text="")
+            self._set_text(iid, f"{label} ({count})")
+        stale = [iid for iid in self.tree.get_children(parent) if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self._texts.pop(iid, None)
+        if tuple(self.tree.get_children(parent)) != tuple(wanted):
+            self.tree.set_children(parent, *wanted)
+
+    def _set_text(self, iid, text):
+        """只在文字变化时更新节点"""
+        if self._texts.get(iid) != text:
+            self.tree.item(iid, text=text)
+            self._texts[iid] = text
+
+    def _forget(self, iid):
+        """删除典籍节点后清理其记录"""
+        book = iid[2:]
+        self._opened.discard(book)
+        prefix = chapter_node(book, "")
+        for key in [key for key in self._texts if key == iid or key.startswith(prefix)]:
+            del self._texts[key]
+
+    def on_open(self, event=None):
+        """展开典籍时才插入篇章"""
+        iid = self.tree.focus()
+        if not iid.startswith("b" + _SEP):
+            return
+        book = iid[2:]
+        if book not in self._opened:
+            self.tree.delete(*self.tree.get_children(iid))
+            self._opened.add(book)
+            self._sync_chapters(book)
+
+    def on_tree_select(self, event=None):
+        """选中节点时通知主窗口按出处筛选"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        iid = selected[0]
+        if iid.startswith("b" + _SEP):
+            self.on_select(iid[2:], None)
+        elif iid.startswith("c" + _SEP):
+            book, chapter = iid[2:].split(_SEP, 1)
+            self.on_select(book, chapter)
+        elif iid == ALL_NODE:
+            self.on_select(None, None)
+
+    def on_cards_changed(self, event):
+        """卡片变更后在空闲时合并刷新一次"""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.tree.after_idle(self.refresh)
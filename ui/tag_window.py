@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+标签管理窗口，列出所有标签和卡片数，支持按标签筛选（全部/任一）、重命名和删除标签
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+
+
+class TagWindow:
+    """标签管理窗口类"""
+
+    def __init__(self, root, card_manager, app=None, main_window=None):
+        """
+        初始化标签管理窗口
+
+        Args:
+            root: 主窗口
+            card_manager: 卡片管理器实例
+            app: 应用实例（用于设置窗口图标）
+            main_window: 主窗口实例（按标签筛选卡片概览）
+        """
+        self.card_manager = card_manager
+        self.main_window = main_window
+        self._refresh_pending = False
+        self.window = tk.Toplevel(root)
+        self.window.title("标签管理")
+        self.window.geometry("420x460")
+        self.window.transient(root)
+
+        # 设置窗口图标
+        if app is not None and hasattr(app, '_set_window_icon'):
+            app._set_window_icon(self.window)
+
+        self.create_widgets()
+        self.refresh()
+
+        # 标签变化时刷新计数（空闲时合并刷新一次），窗口关闭时取消订阅
+        self.card_manager.subscribe(self.on_cards_changed)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+    def create_widgets(self):
+        """创建界面组件"""
+        main_frame = ttk.Frame(self.window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # 列表
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=("tag", "count"), show="headings", selectmode="extended")
+        self.tree.heading("tag", text="标签")
+        self.tree.heading("count", text="卡片数")
+        self.tree.column("tag", width=260)
+        self.tree.column("count", width=80, anchor=tk.E)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda event: self.filter_selected())
+
+        # 筛选方式：选中多个标签时需要全部标签还是任一标签
+        mode_frame = ttk.Frame(main_frame)
+        mode_frame.pack(fill=tk.X, pady=(10, 0))
+        self.any_tag_var = tk.BooleanVar(value=False)
+        ttk.Radiobutton(mode_frame, text="同时有全部选中标签", variable=self.any_tag_var,
+                        value=False).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(mode_frame, text="有任一选中标签", variable=self.any_tag_var,
+                        value=True).pack(side=tk.LEFT, padx=5)
+
+        # 按钮
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="筛选卡片", command=self.filter_selected,
+                   style="Accent.TButton").pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="取消筛选", command=self.clear_filter).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="重命名", command=self.rename_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="删除标签", command=self.delete_selected).pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(10, 0))
+
+    def refresh(self):
+        """按标签索引重新列出标签（计数由索引维护，不扫描卡片），保留选中的标签"""
+        self._refresh_pending = False
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        counts = self.card_manager.tag_counts()
+        for tag, count in counts:
+            self.tree.insert("", tk.END, iid=tag, values=(tag, count))
+        keep = [tag for tag in selected if self.tree.exists(tag)]
+        if keep:
+            self.tree.selection_set(keep)
+        self.status_var.set(f"共 {len(counts)} 个标签")
+
+    def selected_tags(self):
+        """选中的标签"""
+        return list(self.tree.selection())
+
+    def filter_selected(self):
+        """在卡片概览中只显示有选中标签的卡片"""
+        tags = self.selected_tags()
+        if tags and self.main_window is not None:
+            self.main_window.show_tagged(tags, self.any_tag_var.get())
+
+    def clear_filter(self):
+        """取消按标签筛选"""
+        if self.main_window is not None:
+            self.main_window.show_tagged(())
+
+    def rename_selected(self):
+        """重命名选中的标签（新名称已存在时合并）"""
+        tags = self.selected_tags()
+        if len(tags) != 1:
+            self.status_var.set("请选中一个标签")
+            return
+        new_tag = simpledialog.askstring("重命名标签", f"将标签“{tags[0]}”重命名为：",
+                                         initialvalue=tags[0], parent=self.window)
+        if new_tag and new_tag.strip():
+            changed = self.card_manager.rename_tag(tags[0], new_tag)
+            self.status_var.set(f"已更新 {changed} 张卡片")
+
+    def delete_selected(self):
+        """从所有卡片上去掉选中的标签"""
+        tags = self.selected_tags()
+        if not tags:
+            return
+        if messagebox.askyesno("确认删除标签", f"确定要从所有卡片上去掉选中的{len(tags)}个标签吗？",
+                               parent=self.window):
+            with self.card_manager.batch():
+                changed = sum(self.card_manager.delete_tag(tag) for tag in tags)
+            self.status_var.set(f"已更新 {changed} 张卡片")
+
+    def on_cards_changed(self, event):
+        """卡片变更后在空闲时合并刷新一次"""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.window.after_idle(self.refresh)
+
+    def close(self):
+        """关闭窗口"""
+        self.card_manager.unsubscribe(self.on_cards_changed)
+        self.window.destroy()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+回收站窗口，列出已删除（移入回收站）的卡片，支持恢复和彻底删除
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from card_events import CARD_DELETED, CARD_ADDED, CARDS_REPLACED
+
+
+class TrashWindow:
+    """回收站窗口类"""
+
+    def __init__(self, root, card_manager, app=None):
+        """
+        初始化回收站窗口
+
+        Args:
+            root: 主窗口
+            card_manager: 卡片管理器实例
+            app: 应用实例（用于设置窗口图标）
+        """
+        self.card_manager = card_manager
+        self.window = tk.Toplevel(root)
+        self.window.title("回收站")
+        self.window.geometry("700x450")
+        self.window.transient(root)
+
+        # 设置窗口图标
+        if app is not None and hasattr(app, '_set_window_icon'):
+            app._set_window_icon(self.window)
+
+        self.create_widgets()
+        self.refresh()
+
+        # 卡片被删除或恢复时刷新列表，窗口关闭时取消订阅
+        self.card_manager.subscribe(self.on_cards_changed)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+    def create_widgets(self):
+        """创建界面组件"""
+        main_frame = ttk.Frame(self.window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # 列表
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("keyword", "definition", "source", "deleted_at")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="extended")
+        for column, title, width in (("keyword", "关键词", 120), ("definition", "释义", 260),
+                                     ("source", "出处", 140), ("deleted_at", "删除时间", 150)):
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=width)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 按钮
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="恢复选中", command=self.restore_selected,
+                   style="Accent.TButton").pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="彻底删除", command=self.purge_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="清空回收站", command=self.empty_trash).pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.status_var).pack(side=tk.RIGHT, padx=5)
+
+    def refresh(self):
+        """重新列出回收站中的卡片（最近删除的在前）"""
+        self.tree.delete(*self.tree.get_children())
+        for card in self.card_manager.get_trash_cards():
+            self._insert_row(card, tk.END)
+        self._update_status()
+
+    def _insert_row(self, card, index):
+        """插入一行"""
+        deleted_at = (card.get('deleted_at') or '')[:19].replace('T', ' ')
+        self.tree.insert("", index, iid=card['id'], values=(
+            card.get('keyword', ''), card.get('definition', ''), card.get('source', ''), deleted_at))
+
+    def _update_status(self):
+        """更新卡片数量提示"""
+        self.status_var.set(f"回收站中有 {len(self.card_manager.trash)} 张卡片")
+
+    def on_cards_changed(self, event):
+        """卡片变更时只增删受影响的行：新删除的插到最前，恢复的移除"""
+        trash = self.card_manager.trash
+        if event.type == CARDS_REPLACED:
+            self.refresh()
+            return
+        if event.type == CARD_DELETED:
+            for card_id in event.card_ids:
+                if card_id in trash and not self.tree.exists(card_id):
+                    self._insert_row(trash[card_id], 0)
+        elif event.type == CARD_ADDED:
+            restored = [card_id for card_id in event.card_ids if self.tree.exists(card_id)]
+            if restored:
+                self.tree.delete(*restored)
+        else:
+            return
+        self._update_status()
+
+    def restore_selected(self):
+        """恢复选中的卡片"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        restored = self.card_manager.restore_from_trash(selected)
+        self.status_var.set(f"已恢复 {restored} 张卡片")
+
+    def purge_selected(self):
+        """彻底删除选中的卡片"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        if messagebox.askyesno("确认彻底删除", f"确定要彻底删除选中的{len(selected)}张卡片吗？此操作无法撤销。",
+                               parent=self.window):
+            self.card_manager.purge_trash(selected)
+            self.tree.delete(*selected)
+            self._update_status()
+
+    def empty_trash(self):
+        """清空回收站"""
+        if not self.card_manager.trash:
+            return
+        if messagebox.askyesno("确认清空", "确定要清空回收站吗？此操作无法撤销。", parent=self.window):
+            self.card_manager.purge_trash()
+            self.refresh()
+
+    def close(self):
+        """关闭窗口"""
+        self.card_manager.unsubscribe(self.on_cards_changed)
+        self.window.destroy()
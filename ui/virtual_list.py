@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+虚拟化列表类，让Treeview只实例化可视区域（加缓冲区）内的行；
+卡片网格同理，只为可视行创建卡片组件并在滚动时循环复用
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def sync_tree_rows(tree: ttk.Treeview, rows: List[Tuple[str, tuple]], row_cache: Dict[str, tuple]):
+    """
+    按iid差分同步Treeview顶层行：只删除、插入、更新或移动有变化的行
+
+    Args:
+        tree: 要同步的Treeview（行的iid即卡片ID）
+        rows: 期望的行列表 [(iid, values), ...]，顺序即显示顺序
+        row_cache: 已插入行的显示内容缓存 {iid: values}，会被原地更新
+    """
+    for _ in iter_sync_tree_rows(tree, rows, row_cache):
+        pass
+
+
+def iter_sync_tree_rows(tree: ttk.Treeview, rows: List[Tuple[str, tuple]], row_cache: Dict[str, tuple],
+                        chunk_size: int = 200):
+    """
+    sync_tree_rows的分块版本（生成器），每处理chunk_size行yield一次进度 (已完成, 总数)，
+    供分帧调度器使用；参数同sync_tree_rows
+    """
+    wanted = [iid for iid, values in rows]
+    wanted_set = set(wanted)
+
+    # 删除不再需要的行
+    stale = [iid for iid in row_cache if iid not in wanted_set]
+    if stale:
+        tree.delete(*stale)
+        for iid in stale:
+            del row_cache[iid]
+
+    # 插入新行，只更新内容变化的行
+    total = len(rows)
+    for done, (iid, values) in enumerate(rows, 1):
+        cached = row_cache.get(iid)
+        if cached is None:
+            tree.insert("", tk.END, iid=iid, values=values, tags=(iid,))
+            row_cache[iid] = values
+        elif cached != values:
+            tree.item(iid, values=values)
+            row_cache[iid] = values
+        if done % chunk_size == 0:
+            yield (done, total)
+
+    # 顺序不同时一次性重排
+    if tuple(tree.get_children()) != tuple(wanted):
+        tree.set_children("", *wanted)
+
+
+class VirtualTreeview:
+    """虚拟化Treeview控制器
+
+    逻辑行（按排序后的卡片顺序编号）与Treeview中实际存在的行分离：
+    Treeview里只保留可视区域上下各 buffer_rows 行，滚动条和选中状态
+    全部按逻辑行计算，所以十万张卡片也只会创建几十个Treeview行。
+    """
+
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar,
+                 buffer_rows: int = 20, on_select: Optional[Callable] = None):
+        """
+        初始化虚拟化列表
+
+        Args:
+            tree: 用于显示的Treeview（建议selectmode="none"，选中由本类管理）
+            scrollbar: 垂直滚动条
+            buffer_rows: 可视区域上下额外实例化的行数
+            on_select: 选中变化时的回调函数
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.buffer_rows = buffer_rows
+        self.on_select = on_select
+
+        # 逻辑行数据
+        self.items: Sequence[Any] = []
+        self.ids: List[str] = []
+        self._index_of = None  # 卡片ID -> 逻辑行号（按需构建）
+        self._id_getter: Callable = lambda item: item['id']
+        self._values_getter: Callable = lambda item: ()
+
+        # 滚动模型：top为可视区域第一行的逻辑行号
+        self.top = 0
+        # 当前实例化的逻辑行范围 [window_start, window_end)
+        self.window_start = 0
+        self.window_end = 0
+        # 已实例化行的显示内容缓存（Treeview的iid即卡片ID）
+        self._row_values = {}
+
+        # 选中模型（按卡片ID记录，与实例化的行无关）
+        self.selected = set()
+        self.anchor_index = None  # Shift范围选择的锚点
+        self.focus_index = None   # 当前焦点行
+
+        # 接管滚动条和Treeview的滚动
+        self.scrollbar.config(command=self.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_yscroll)
+        self.tree.bind('<Configure>', lambda event: self.render(), add='+')
+        self.tree.bind('<MouseWheel>', self._on_mousewheel, add='+')
+        self.tree.bind('<Button-4>', lambda event: self._scroll_units(-3), add='+')
+        self.tree.bind('<Button-5>', lambda event: self._scroll_units(3), add='+')
+        self.tree.bind('<Up>', lambda event: self.move_focus(-1), add='+')
+        self.tree.bind('<Down>', lambda event: self.move_focus(1), add='+')
+        self.tree.bind('<Prior>', lambda event: self.move_focus(-self.visible_rows()), add='+')
+        self.tree.bind('<Next>', lambda event: self.move_focus(self.visible_rows()), add='+')
+
+    # ------------------------------------------------------------------
+    # 数据
+    # ------------------------------------------------------------------
+    def set_items(self, items: List[Any], id_getter: Callable, values_getter: Callable):
+        """
+        设置逻辑行数据（保留滚动位置和仍然存在的选中项）
+
+        Args:
+            items: 已排序的行数据列表（增量更新时会被原地修改）
+            id_getter: 从行数据取得唯一ID的函数
+            values_getter: 从行数据生成Treeview列值的函数
+        """
+        state = self._remember_state()
+        self.items = items
+        self._id_getter = id_getter
+        self._values_getter = values_getter
+        self.ids = [id_getter(item) for item in items]
+        self._index_of = None
+
+        # 去掉已经不存在的选中项
+        if self.selected:
+            self.selected &= set(self.ids)
+        self._restore_state(state, keep_top_row=False)
+        self.render(force=True)
+
+    def _remember_state(self):
+        """记录焦点行和锚点行的卡片ID，用于结构变化后恢复"""
+        return (self.id_at(self.top), self._id_or_none(self.anchor_index), self._id_or_none(self.focus_index))
+
+    def _restore_state(self, state, keep_top_row: bool = True):
+        """
+        结构变化后按卡片ID恢复焦点、锚点和滚动位置
+
+        Args:
+            state: _remember_state的返回值
+            keep_top_row: 是否让原来的第一可视行保持在顶部
+        """
+        top_id, anchor_id, focus_id = state
+        self.anchor_index = None if anchor_id is None else self.index_of(anchor_id)
+        self.focus_index = None if focus_id is None else self.index_of(focus_id)
+        if keep_top_row and top_id is not None:
+            top_index = self.index_of(top_id)
+            if top_index is not None:
+                self.top = top_index
+        self.top = self._clamp_top(self.top)
+
+    def _id_or_none(self, index: Optional[int]) -> Optional[str]:
+        return None if index is None else self.id_at(index)
+
+    def update_item(self, index: int, item: Any):
+        """
+        原地更新一行（排序位置不变），只改动这一行的Treeview内容
+
+        Args:
+            index: 逻辑行号
+            item: 新的行数据
+        """
+        self.items[index] = item
+        item_id = self.ids[index]
+        if item_id in self._row_values:
+            values = self._values_getter(item)
+            if values != self._row_values[item_id]:
+                self.tree.item(item_id, values=values)
+                self._row_values[item_id] = values
+
+    def insert_item(self, index: int, item: Any):
+        """
+        在逻辑行号处插入一行（可视区域保持不动）
+
+        Args:
+            index: 插入位置
+            item: 行数据
+        """
+        state = self._remember_state()
+        self.items.insert(index, item)
+        self.ids.insert(index, self._id_getter(item))
+        self._index_of = None
+        self._restore_state(state)
+        self.render(force=True)
+
+    def move_item(self, old_index: int, new_index: int, item: Any):
+        """
+        把一行移动到新位置（排序键变化时使用）
+
+        Args:
+            old_index: 原逻辑行号
+            new_index: 移除原行之后的新逻辑行号
+            item: 新的行数据
+        """
+        state = self._remember_state()
+        del self.items[old_index]
+        item_id = self.ids.pop(old_index)
+        self.items.insert(new_index, item)
+        self.ids.insert(new_index, item_id)
+        self._index_of = None
+        self._restore_state(state)
+        self.render(force=True)
+
+    def remove_ids(self, item_ids):
+        """
+        删除指定ID的行（可视区域和选中状态尽量保持不动）
+
+        Args:
+            item_ids: 要删除的卡片ID集合
+        """
+        item_ids = set(item_ids)
+        if not item_ids:
+            return
+        state = self._remember_state()
+        top_id = state[0]
+        if top_id in item_ids:
+            # 第一可视行被删除时，改为保持其后第一条保留的行
+            top_id = next((self.ids[i] for i in range(self.top, len(self.ids))
+                           if self.ids[i] not in item_ids), None)
+            state = (top_id,) + state[1:]
+        kept = [(item, item_id) for item, item_id in zip(self.items, self.ids) if item_id not in item_ids]
+        self.items[:] = [item for item, item_id in kept]
+        self.ids = [item_id for item, item_id in kept]
+        self._index_of = None
+        self.selected -= item_ids
+        self._restore_state(state)
+        self.render(force=True)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index_of(self, item_id: str) -> Optional[int]:
+        """获取卡片ID对应的逻辑行号"""
+        if self._index_of is None:
+            self._index_of = {item_id: i for i, item_id in enumerate(self.ids)}
+        return self._index_of.get(item_id)
+
+    def id_at(self, index: int) -> Optional[str]:
+        """获取逻辑行号对应的卡片ID"""
+        if 0 <= index < len(self.ids):
+            return self.ids[index]
+        return None
+
+    def index_at_y(self, y: int) -> Optional[int]:
+        """获取鼠标纵坐标所在的逻辑行号"""
+        item = self.tree.identify_row(y)
+        if not item or item not in self._row_values:
+            return None
+        return self.index_of(item)
+
+    def id_at_y(self, y: int) -> Optional[str]:
+        """获取鼠标纵坐标所在行的卡片ID"""
+        index = self.index_at_y(y)
+        return None if index is None else self.id_at(index)
+
+    # ------------------------------------------------------------------
+    # 滚动模型
+    # ------------------------------------------------------------------
+    def row_height(self) -> int:
+        """获取Treeview行高"""
+        try:
+            return int(ttk.Style(self.tree).lookup("Treeview", "rowheight") or 30)
+        except Exception:
+            return 30
+
+    def visible_rows(self) -> int:
+        """计算可视区域能显示的行数（扣除表头高度）"""
+        row_height = self.row_height()
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # 尚未布局时按Treeview的height选项估算
+            return max(1, int(self.tree.cget('height') or 10))
+        return max(1, (height - row_height) // row_height)
+
+    def _clamp_top(self, top: int) -> int:
+        """把top限制在合法范围"""
+        max_top = max(0, len(self.ids) - self.visible_rows())
+        return max(0, min(int(top), max_top))
+
+    def yview(self, *args):
+        """滚动条回调，参数与Treeview.yview一致"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            top = float(args[1]) * len(self.ids)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows()
+            top = self.top + amount
+        else:
+            return
+        self.scroll_to(top)
+
+    def scroll_to(self, top: int):
+        """滚动到指定逻辑行"""
+        top = self._clamp_top(top)
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def _scroll_units(self, amount: int):
+        """按行滚动（阻止Treeview自己滚动）"""
+        self.scroll_to(self.top + amount)
+        return "break"
+
+    def _on_mousewheel(self, event):
+        """鼠标滚轮事件（Windows/macOS）"""
+        if event.delta == 0:
+            return "break"
+        step = -1 if event.delta > 0 else 1
+        # Windows每格delta为120，macOS为较小的值
+        amount = max(1, abs(event.delta) // 120) * 3
+        return self._scroll_units(step * amount)
+
+    def see(self, index: int):
+        """确保逻辑行在可视区域内"""
+        visible = self.visible_rows()
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + visible:
+            self.scroll_to(index - visible + 1)
+
+    def _on_tree_yscroll(self, first, last):
+        """Treeview内部视图变化时（例如键盘导航），同步回逻辑top"""
+        span = self.window_end - self.window_start
+        if span > 0:
+            top = self.window_start + int(round(float(first) * span))
+            if top != self.top and self.window_start <= top < self.window_end:
+                self.top = self._clamp_top(top)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        """按逻辑行更新滚动条位置"""
+        total = len(self.ids)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        visible = self.visible_rows()
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+
+    # ------------------------------------------------------------------
+    # 渲染
+    # ------------------------------------------------------------------
+    def render(self, force: bool = False):
+        """
+        渲染可视区域：窗口覆盖不到时重新实例化，否则只移动Treeview内部视图
+
+        Args:
+            force: 数据变化后强制按差分同步实例化的行
+        """
+        total = len(self.ids)
+        visible = self.visible_rows()
+        self.top = self._clamp_top(self.top)
+        needed_end = min(total, self.top + visible)
+
+        if force or not (self.window_start <= self.top and needed_end <= self.window_end):
+            self._materialize(max(0, self.top - self.buffer_rows),
+                              min(total, self.top + visible + self.buffer_rows))
+
+        # 把Treeview内部视图移到top所在行
+        span = self.window_end - self.window_start
+        if span > 0:
+            self.tree.yview_moveto((self.top - self.window_start) / span)
+        self._sync_selection()
+        self._update_scrollbar()
+
+    def _materialize(self, start: int, end: int):
+        """实例化逻辑行 [start, end)，与已有的行按卡片ID差分"""
+        rows = [(self.ids[index], self._values_getter(self.items[index])) for index in range(start, end)]
+        sync_tree_rows(self.tree, rows, self._row_values)
+        self.window_start = start
+        self.window_end = end
+
+    def refresh_visible(self):
+        """重新生成已实例化行的显示内容（数据原地修改后调用）"""
+        for index in range(self.window_start, self.window_end):
+            self.update_item(index, self.items[index])
+
+    def _sync_selection(self):
+        """把逻辑选中状态同步到已实例化的行"""
+        self.tree.selection_set([item_id for item_id in self._row_values if item_id in self.selected])
+        focus_id = self._id_or_none(self.focus_index)
+        if focus_id in self._row_values:
+            self.tree.focus(focus_id)
+
+    # ------------------------------------------------------------------
+    # 选中模型（按逻辑行）
+    # ------------------------------------------------------------------
+    def _selection_changed(self):
+        """选中变化后刷新显示并通知回调"""
+        self._sync_selection()
+        if self.on_select:
+            self.on_select()
+
+    def selected_ids(self) -> List[str]:
+        """按显示顺序返回选中的卡片ID"""
+        if not self.selected:
+            return []
+        if len(self.selected) * 8 < len(self.ids):
+            # 少量选中时按行号排序，避免遍历整个列表
+            indexed = [(self.index_of(item_id), item_id) for item_id in self.selected]
+            return [item_id for index, item_id in sorted(i for i in indexed if i[0] is not None)]
+        return [item_id for item_id in self.ids if item_id in self.selected]
+
+    def is_selected(self, index: int) -> bool:
+        """检查逻辑行是否被选中"""
+        return self.id_at(index) in self.selected
+
+    def select_only(self, index: int):
+        """只选中一行（普通点击）"""
+        item_id = self.id_at(index)
+        if item_id is None:
+            return
+        self.selected = {item_id}
+        self.anchor_index = index
+        self.focus_index = index
+        self._selection_changed()
+
+    def toggle(self, index: int):
+        """切换一行的选中状态（Ctrl+点击）"""
+        item_id = self.id_at(index)
+        if item_id is None:
+            return
+        if item_id in self.selected:
+            self.selected.discard(item_id)
+        else:
+            self.selected.add(item_id)
+        self.anchor_index = index
+        self.focus_index = index
+        self._selection_changed()
+
+    def add(self, index: int):
+        """追加选中一行（右键点击未选中的行）"""
+        item_id = self.id_at(index)
+        if item_id is None:
+            return
+        self.selected.add(item_id)
+        self._selection_changed()
+
+    def select_range(self, start: int, end: int, keep_anchor: bool = True):
+        """
+        选中逻辑行范围（替换当前选择）
+
+        Args:
+            start: 起始行（通常为锚点）
+            end: 结束行（当前点击或拖拽到的行）
+            keep_anchor: 是否保留原锚点
+        """
+        low, high = min(start, end), max(start, end)
+        self.selected = set(self.ids[low:high + 1])
+        if not keep_anchor or self.anchor_index is None:
+            self.anchor_index = start
+        self.focus_index = end
+        self._selection_changed()
+
+    def extend_to(self, index: int):
+        """从锚点扩展选择到指定行（Shift+点击）"""
+        anchor = self.anchor_index if self.anchor_index is not None else index
+        self.select_range(anchor, index)
+
+    def select_all(self):
+        """全选所有逻辑行"""
+        self.selected = set(self.ids)
+        if self.ids and self.anchor_index is None:
+            self.anchor_index = 0
+        self._selection_changed()
+
+    def clear_selection(self):
+        """清空选择"""
+        self.selected = set()
+        self.anchor_index = None
+        self._selection_changed()
+
+    def move_focus(self, delta: int):
+        """键盘上下移动焦点行并单选"""
+        if not self.ids:
+            return "break"
+        current = self.focus_index if self.focus_index is not None else self.top
+        index = max(0, min(len(self.ids) - 1, current + delta))
+        self.see(index)
+        self.select_only(index)
+        return "break"
+
+
+class VirtualCardGrid:
+    """虚拟化卡片网格控制器
+
+    卡片按固定大小的格子排列在Canvas上，只为可视行（加缓冲行）创建卡片组件。
+    滚动时移出可视区域的组件回收到组件池，填入新卡片数据后移动到新位置；
+    窗口大小变化经过防抖后只重新计算列数并移动已有组件，不销毁重建。
+    """
+
+    def __init__(self, canvas: tk.Canvas, scrollbar: ttk.Scrollbar,
+                 create_widget: Callable, bind_widget: Callable,
+                 cell_width: int = 270, cell_height: int = 200, padding: int = 10,
+                 min_columns: int = 2, max_columns: int = 4,
+                 buffer_rows: int = 1, resize_delay: int = 100):
+        """
+        初始化虚拟化卡片网格
+
+        Args:
+            canvas: 承载卡片组件的Canvas
+            scrollbar: 垂直滚动条
+            create_widget: 创建一个空白卡片组件的函数，参数为父组件（canvas）
+            bind_widget: 把卡片数据填入组件的函数，参数为(组件, 卡片)
+            cell_width: 每个格子的宽度（含边距）
+            cell_height: 每个格子的高度（含边距）
+            padding: 格子内卡片四周的边距
+            min_columns: 最少列数
+            max_columns: 最多列数
+            buffer_rows: 可视区域上下额外实例化的行数
+            resize_delay: 窗口大小变化的防抖延迟（毫秒）
+        """
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.create_widget = create_widget
+        self.bind_widget = bind_widget
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.padding = padding
+        self.min_columns = min_columns
+        self.max_columns = max_columns
+        self.buffer_rows = buffer_rows
+        self.resize_delay = resize_delay
+
+        self.items: Sequence[Any] = []
+        self.columns = min_columns
+        # 正在显示的组件：逻辑序号 -> [组件, Canvas窗口项, 已填入的卡片]
+        self._active: Dict[int, list] = {}
+        # 空闲组件池：[(组件, Canvas窗口项), ...]
+        self._pool: List[tuple] = []
+        self._resize_job = None
+
+        self.scrollbar.config(command=self.yview)
+        self.canvas.configure(yscrollcommand=self._on_canvas_yscroll)
+        self.canvas.bind('<Configure>', self._on_configure, add='+')
+        self._bind_scroll(self.canvas)
+
+    def _bind_scroll(self, widget):
+        """让组件上的鼠标滚轮也滚动网格"""
+        widget.bind('<MouseWheel>', self._on_mousewheel, add='+')
+        widget.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'), add='+')
+        widget.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'), add='+')
+
+    # ------------------------------------------------------------------
+    # 数据
+    # ------------------------------------------------------------------
+    def set_items(self, items: Sequence[Any]):
+        """
+        设置要显示的卡片（已显示的组件直接换上新数据，不重建）
+
+        Args:
+            items: 已排序的卡片列表
+        """
+        self.items = items
+        self._update_scrollregion()
+        self.render()
+
+    def __len__(self):
+        return len(self.items)
+
+    def widget_count(self) -> int:
+        """已创建的卡片组件总数（显示中的加池中的）"""
+        return len(self._active) + len(self._pool)
+
+    # ------------------------------------------------------------------
+    # 滚动与尺寸
+    # ------------------------------------------------------------------
+    def row_count(self) -> int:
+        """逻辑行数"""
+        return (len(self.items) + self.columns - 1) // self.columns
+
+    def _compute_columns(self) -> int:
+        """根据Canvas宽度计算列数"""
+        width = self.canvas.winfo_width()
+        return max(self.min_columns, min(self.max_columns, width // self.cell_width))
+
+    def _update_scrollregion(self):
+        """按行数设置滚动区域（不依赖已创建的组件）"""
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_width,
+                                            self.row_count() * self.cell_height))
+
+    def yview(self, *args):
+        """滚动条回调，参数与Canvas.yview一致"""
+        self.canvas.yview(*args)
+        self.render()
+
+    def _on_mousewheel(self, event):
+        """鼠标滚轮事件（Windows/macOS）"""
+        if event.delta:
+            self.yview('scroll', -1 if event.delta > 0 else 1, 'units')
+        return "break"
+
+    def _on_canvas_yscroll(self, first, last):
+        """Canvas视图变化时同步滚动条"""
+        self.scrollbar.set(first, last)
+
+    def _on_configure(self, event=None):
+        """窗口大小变化：防抖后再重新排列"""
+        if self._resize_job is not None:
+            self.canvas.after_cancel(self._resize_job)
+        self._resize_job = self.canvas.after(self.resize_delay, self.reflow)
+
+    def reflow(self):
+        """重新计算列数；列数变化时只移动已有组件"""
+        self._resize_job = None
+        columns = self._compute_columns()
+        if columns != self.columns:
+            self.columns = columns
+            self._update_scrollregion()
+            for index, entry in self._active.items():
+                self._place(entry[1], index)
+        self.render()
+
+    def scroll_to_index(self, index: int):
+        """滚动使第index张卡片所在的行位于顶部"""
+        rows = self.row_count()
+        if rows:
+            self.yview('moveto', (index // self.columns) / rows)
+
+    # ------------------------------------------------------------------
+    # 渲染
+    # ------------------------------------------------------------------
+    def _visible_range(self) -> Tuple[int, int]:
+        """可视行（加缓冲行）对应的卡片序号范围 [start, end)"""
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.cell_height)
+        first_row = max(0, int(top // self.cell_height) - self.buffer_rows)
+        last_row = int((top + height - 1) // self.cell_height) + self.buffer_rows
+        return first_row * self.columns, min(len(self.items), (last_row + 1) * self.columns)
+
+    def _place(self, window_item, index: int):
+        """把Canvas窗口项移动到第index张卡片的格子"""
+        row, col = divmod(index, self.columns)
+        self.canvas.coords(window_item, col * self.cell_width + self.padding,
+                           row * self.cell_height + self.padding)
+
+    def render(self):
+        """回收离开可视区域的组件，为新进入的卡片复用或创建组件"""
+        start, end = self._visible_range()
+
+        # 回收不再需要的组件
+        for index in [index for index in self._active if not start <= index < end]:
+            widget, window_item, item = self._active.pop(index)
+            self.canvas.itemconfigure(window_item, state='hidden')
+            self._pool.append((widget, window_item))
+
+        for index in range(start, end):
+            item = self.items[index]
+            entry = self._active.get(index)
+            if entry is None:
+                widget, window_item = self._pool.pop() if self._pool else self._create()
+                entry = [widget, window_item, None]
+                self._active[index] = entry
+                self._place(window_item, index)
+                self.canvas.itemconfigure(window_item, state='normal')
+            # 同一个格子数据没变时不重新填充
+            if entry[2] is not item:
+                self.bind_widget(entry[0], item)
+                entry[2] = item
+
+    def _create(self):
+        """新建一个卡片组件并放入Canvas"""
+        widget = self.create_widget(self.canvas)
+        # 滚轮事件不会冒泡到父组件，组件和子组件都要绑定
+        for child in [widget] + list(widget.winfo_children()):
+            self._bind_scroll(child)
+        window_item = self.canvas.create_window(
+            0, 0, window=widget, anchor=tk.NW,
+            width=self.cell_width - 2 * self.padding,
+            height=self.cell_height - 2 * self.padding
+        )
+        return widget, window_item
+
+    def refresh_visible(self):
+        """强制重新填充正在显示的组件（卡片被原地修改后调用）"""
+        for entry in self._active.values():
+            entry[2] = None
+        self.render()
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """更新管理器：负责版本检测、后台下载、更新提示（编码修复版+版本对比修复）"""
-import requests
 import json
 import os
 import sys
@@ -97,6 +96,7 @@ class UpdateChecker:
 
     def _get_requests_session(self):
         """获取配置了代理的requests会话"""
+        import requests  # requests导入较慢，第一次联网时才导入
         session = requests.Session()
         
         # 尝试从系统环境变量获取代理设置
@@ -116,6 +116,7 @@ class UpdateChecker:
 
     def fetch_latest_release(self):
         """从GitHub获取最新release信息（优先API，失败降级+统一版本格式）"""
+        import requests
         api_url = f"https://api.github.com/repos/{self.github_owner}/{self.github_repo}/releases/latest"
         try:
             session = self._get_requests_session()
@@ -379,6 +380,7 @@ class UpdateChecker:
 
     def download_update_in_background(self):
         """后台下载更新（不阻塞主线程）"""
+        import requests
         if not self.download_url:
             messagebox.showerror("错误", "未找到对应平台的更新包（仅支持exe/dmg/tar.gz）")
             return